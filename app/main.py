@@ -3,6 +3,7 @@
 This module handles application startup and initialization.
 """
 
+import logging
 import sys
 from pathlib import Path
 
@@ -15,30 +16,78 @@ def setup_python_path():
 
 
 def main():
-    """Main application entry point."""
+    """Main application entry point.
+
+    The critical path ends once the main window shell has painted; anything
+    listed in startup.DEFERRED_SUBSYSTEMS is imported and initialized at
+    idle time afterwards. Among them, the execution journal reconciles the
+    order items a crash interrupted, so nothing a provider already accepted
+    is submitted again. Pass --profile-startup to print a per-phase
+    timing breakdown and import costs once startup has finished, and
+    --profile-signals to time signal bus slots (shown in the Signal
+    Profiler dock).
+    """
     # Set up imports first
     setup_python_path()
 
     # Import after path setup
-    from application import ArtFactoryApplication
-    from views.main_window import MainWindow
+    from startup import DEFERRED_SUBSYSTEMS, StartupPipeline, StartupProfiler
+
+    profiler = StartupProfiler(enabled="--profile-startup" in sys.argv)
+    profiler.start()
+
+    with profiler.phase("import application"):
+        from application import ArtFactoryApplication
 
     # Create application instance
-    art_factory = ArtFactoryApplication()
-    art_factory.create_app()
+    with profiler.phase("create application"):
+        art_factory = ArtFactoryApplication()
+        art_factory.create_app()
+
+    with profiler.phase("import signals"):
+        from signals import signal_bus
+
+    # The signal bus is created at import time, before --debug is parsed,
+    # so apply the debug decision to it explicitly
+    if art_factory.is_debug_mode():
+        logging.basicConfig(
+            level=logging.DEBUG, format="%(asctime)s %(name)s %(message)s"
+        )
+        signal_bus.set_debug(True)
+
+    # Before the window connects, so its slots are timed too
+    if "--profile-signals" in sys.argv:
+        signal_bus.set_profiling(True)
+
+    with profiler.phase("import main window"):
+        from views.main_window import MainWindow
 
-    # Create and show main window
-    main_window = MainWindow()
-    main_window.show()
+    # Create and show main window, painting the shell before deferred work
+    with profiler.phase("first paint"):
+        main_window = MainWindow()
+        main_window.show()
+        art_factory.app.processEvents()
+
+    if signal_bus.profiling_enabled:
+        main_window.show_signal_profiler()
 
     if art_factory.is_debug_mode():
         print("Art Factory started in debug mode")
         print(f"Python version: {sys.version}")
         print(f"App directory: {Path(__file__).parent}")
 
+    # Bring up non-critical subsystems at idle time
+    pipeline = StartupPipeline(profiler)
+    for name, target in DEFERRED_SUBSYSTEMS:
+        pipeline.defer(name, target)
+    if profiler.enabled:
+        pipeline.on_finished(profiler.stop)
+        pipeline.on_finished(lambda: print(profiler.report()))
+    pipeline.start()
+
     # Start event loop
     return art_factory.run()
 
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
@@ -1 +1,74 @@
-"""Data models for Art Factory application."""
+"""Data models for Art Factory application.
+
+SQLAlchemy models for the tables in docs/database-schema.md, plus the
+SQLite database setup:
+
+- Base: Declarative base shared by all models
+- Project, Order, OrderItem, ResultCacheEntry, Product, ProductHash,
+  Collection, CollectionProduct, Provider, Model, Template, Lookup, Tag,
+  TagAssociation, GenerationLog, SystemSetting, MigrationHistory: Mapped
+  tables
+- Database: Engine, per-thread sessions and the serialized writer
+- WriteQueue: Single writer thread batching writes per tick
+- KeysetPager, KeysetPage, CursorError: Cursor-based paging of products,
+  orders and projects by (created_at, id)
+- install_search_index, rebuild_search_index: FTS5 product search index,
+  created with the schema and kept in sync by triggers
+- ProductIndex: Compact in-memory product metadata with bitmap filters,
+  kept current by domain events
+
+Usage:
+    from models import Database, Product
+
+    database = Database(database_path())
+    database.create_schema()
+    database.start()
+"""
+
+from .base import Base
+from .collection import Collection, CollectionProduct
+from .database import Database, get_database, init_database
+from .order import Order, OrderItem, ResultCacheEntry
+from .paging import CursorError, KeysetPage, KeysetPager
+from .product import Product, ProductHash
+from .product_index import ProductIndex, get_product_index, init_product_index
+from .project import Project
+from .provider import Model, Provider
+from .search import install_search_index, rebuild_search_index
+from .system import GenerationLog, MigrationHistory, SystemSetting
+from .tag import Tag, TagAssociation
+from .template import Lookup, Template
+from .write_queue import WriteQueue
+
+__all__ = [
+    "Base",
+    "Collection",
+    "CollectionProduct",
+    "CursorError",
+    "Database",
+    "GenerationLog",
+    "KeysetPage",
+    "KeysetPager",
+    "Lookup",
+    "MigrationHistory",
+    "Model",
+    "Order",
+    "OrderItem",
+    "Product",
+    "ProductHash",
+    "ProductIndex",
+    "Project",
+    "Provider",
+    "ResultCacheEntry",
+    "SystemSetting",
+    "Tag",
+    "TagAssociation",
+    "Template",
+    "WriteQueue",
+    "get_database",
+    "get_product_index",
+    "init_database",
+    "init_product_index",
+    "install_search_index",
+    "rebuild_search_index",
+]
@@ -0,0 +1,49 @@
+"""SQLAlchemy declarative base for Art Factory models.
+
+Every table follows docs/database-schema.md. UUID keys are stored as 36
+character strings so the schema works unchanged on SQLite and PostgreSQL.
+"""
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, String, func
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+
+def new_id() -> str:
+    """Return a new random UUID string primary key."""
+    return str(uuid.uuid4())
+
+
+def utcnow() -> datetime:
+    """Return the current UTC time without tzinfo, as stored in SQLite."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Base(DeclarativeBase):
+    """Declarative base shared by all models."""
+
+
+class UUIDPrimaryKeyMixin:
+    """Adds a UUID string primary key generated on insert."""
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=new_id)
+
+
+class TimestampMixin:
+    """Adds created_at/updated_at columns maintained on insert and update.
+
+    Server defaults mirror the Python ones so raw SQL inserts (triggers,
+    migrations) get timestamps too.
+    """
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, server_default=func.current_timestamp()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=utcnow,
+        onupdate=utcnow,
+        server_default=func.current_timestamp(),
+    )
@@ -0,0 +1,54 @@
+"""Collection models."""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    false,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, TimestampMixin, UUIDPrimaryKeyMixin, utcnow
+
+
+class Collection(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """A user-curated group of products."""
+
+    __tablename__ = "collections"
+
+    name: Mapped[str] = mapped_column(String(255))
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    cover_product_id: Mapped[Optional[str]] = mapped_column(
+        ForeignKey("products.id", ondelete="SET NULL")
+    )
+    product_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    is_public: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default=false()
+    )
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    __table_args__ = (Index("idx_collections_created_at", "created_at", "id"),)
+
+
+class CollectionProduct(Base):
+    """Membership of a product in a collection."""
+
+    __tablename__ = "collection_products"
+
+    collection_id: Mapped[str] = mapped_column(
+        ForeignKey("collections.id", ondelete="CASCADE"), primary_key=True
+    )
+    product_id: Mapped[str] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    position: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    added_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+
+    __table_args__ = (Index("idx_collection_products_product_id", "product_id"),)
@@ -0,0 +1,182 @@
+"""SQLite database setup for Art Factory.
+
+The workload is many worker threads writing order item status while the
+GUI thread reads galleries, so the database is tuned for that:
+
+- WAL journaling lets readers proceed while a write is in progress
+- synchronous=NORMAL fsyncs at checkpoints instead of every commit, which
+  is safe under WAL (a power cut can only lose the latest transactions)
+- mmap_size and cache_size keep hot pages out of read() calls
+- each thread gets its own session from a scoped_session registry, backed
+  by a connection pool
+- writes go through a single WriteQueue thread, batched per tick
+
+Usage:
+    database = Database(database_path())
+    database.create_schema()
+    database.start()
+    products = database.session().scalars(select(Product)).all()
+    database.writer.update_item_status(item_id, "complete")
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+
+from .base import Base
+from .write_queue import DEFAULT_WRITE_TICK_MS, WriteQueue
+from utils.file_utils import database_path
+
+logger = logging.getLogger(__name__)
+
+# Applied to every new connection
+SQLITE_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": 5000,  # ms to wait for a lock before "database is locked"
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative means KiB: 64 MiB per connection
+    "temp_store": "MEMORY",
+}
+
+# Pooled connections kept open for reader threads
+DEFAULT_POOL_SIZE = 8
+DEFAULT_MAX_OVERFLOW = 16
+
+
+def _apply_pragmas(dbapi_connection, _connection_record):
+    """Configure a new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def create_database_engine(
+    path: Union[str, Path],
+    pool_size: int = DEFAULT_POOL_SIZE,
+    max_overflow: int = DEFAULT_MAX_OVERFLOW,
+    echo: bool = False,
+) -> Engine:
+    """Create an engine for a SQLite file with the tuned pragmas.
+
+    Args:
+        path: Database file path
+        pool_size: Connections kept open in the pool
+        max_overflow: Extra connections allowed under load
+        echo: Log every statement
+
+    Returns:
+        Engine: The configured engine
+    """
+    engine = create_engine(
+        f"sqlite:///{path}",
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        echo=echo,
+    )
+    event.listen(engine, "connect", _apply_pragmas)
+    return engine
+
+
+class Database:
+    """Engine, per-thread sessions and the serialized writer for one file.
+
+    Reads use session(), which returns the calling thread's own session;
+    worker threads should call remove_session() when they finish. Writes
+    that can tolerate a tick of latency should go through writer.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        pool_size: int = DEFAULT_POOL_SIZE,
+        write_tick_ms: int = DEFAULT_WRITE_TICK_MS,
+    ):
+        """Initialize the database.
+
+        Args:
+            path: Database file path
+            pool_size: Connections kept open in the pool
+            write_tick_ms: Batching window of the writer thread
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.engine = create_database_engine(self.path, pool_size)
+        self.session_factory = sessionmaker(bind=self.engine, expire_on_commit=False)
+        self._sessions = scoped_session(self.session_factory)
+        self.writer = WriteQueue(self.engine, write_tick_ms)
+
+    def create_schema(self):
+        """Create any missing tables and indexes.
+
+        create_all() only creates the indexes of new tables, so indexes of
+        existing tables that are missing, or declared with different columns
+        than the database has, are (re)built here.
+        """
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as connection:
+            inspector = inspect(connection)
+            for table in Base.metadata.sorted_tables:
+                existing = {
+                    index["name"]: index["column_names"]
+                    for index in inspector.get_indexes(table.name)
+                }
+                for index in table.indexes:
+                    columns = [column.name for column in index.columns]
+                    if existing.get(index.name) == columns:
+                        continue
+                    if index.name in existing:
+                        index.drop(connection)
+                    index.create(connection)
+                    logger.info("Built index %s", index.name)
+
+    def start(self):
+        """Start the writer thread."""
+        self.writer.start()
+
+    def session(self) -> Session:
+        """Return the calling thread's session."""
+        return self._sessions()
+
+    def remove_session(self):
+        """Close the calling thread's session and return its connection."""
+        self._sessions.remove()
+
+    def close(self):
+        """Flush pending writes, stop the writer and close all connections."""
+        self.writer.stop()
+        self._sessions.remove()
+        self.engine.dispose()
+
+
+_database: Optional[Database] = None
+
+
+def init_database() -> Database:
+    """Open the application database (deferred startup hook)."""
+    global _database
+    if _database is None:
+        _database = Database(database_path())
+        _database.create_schema()
+        _database.start()
+
+        from PyQt6.QtCore import QCoreApplication
+
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_database.close)
+        logger.info("Database opened at %s", _database.path)
+    return _database
+
+
+def get_database() -> Optional[Database]:
+    """Return the application database, if initialized."""
+    return _database
@@ -0,0 +1,113 @@
+"""Order and order item models."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import (
+    JSON,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from .base import Base, TimestampMixin, UUIDPrimaryKeyMixin, utcnow
+
+
+class Order(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """A request to create products with one provider and model."""
+
+    __tablename__ = "orders"
+
+    project_id: Mapped[Optional[str]] = mapped_column(
+        ForeignKey("projects.id", ondelete="CASCADE")
+    )
+    provider: Mapped[str] = mapped_column(String(100))
+    model: Mapped[str] = mapped_column(String(200))
+    model_family: Mapped[Optional[str]] = mapped_column(String(100))
+    model_modality: Mapped[Optional[str]] = mapped_column(String(100))
+    status: Mapped[str] = mapped_column(
+        String(50), default="pending", server_default="pending"
+    )
+    base_parameter_set: Mapped[Dict[str, Any]] = mapped_column(JSON)
+    expanded_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    completed_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    failed_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    template_id: Mapped[Optional[str]] = mapped_column(ForeignKey("templates.id"))
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    items: Mapped[List["OrderItem"]] = relationship(
+        back_populates="order",
+        order_by="OrderItem.sequence_number",
+        passive_deletes=True,
+    )
+
+    __table_args__ = (
+        Index("idx_orders_project_id", "project_id", "created_at", "id"),
+        Index("idx_orders_status", "status", "created_at", "id"),
+        Index("idx_orders_provider_model", "provider", "model"),
+        Index("idx_orders_provider", "provider", "created_at", "id"),
+        Index("idx_orders_model", "model", "created_at", "id"),
+        Index("idx_orders_created_at", "created_at", "id"),
+    )
+
+
+class OrderItem(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """A single generation request expanded from an order."""
+
+    __tablename__ = "order_items"
+
+    order_id: Mapped[str] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"))
+    sequence_number: Mapped[int] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(
+        String(50), default="pending", server_default="pending"
+    )
+    generation_parameter_set: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
+    actual_parameter_set: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
+    return_parameter_set: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
+    provider_request_id: Mapped[Optional[str]] = mapped_column(String(255))
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    error_message: Mapped[Optional[str]] = mapped_column(Text)
+    retry_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    order: Mapped[Order] = relationship(back_populates="items")
+
+    __table_args__ = (
+        Index("idx_order_items_order_id", "order_id"),
+        Index("idx_order_items_status", "status"),
+        Index(
+            "idx_order_items_order_sequence",
+            "order_id",
+            "sequence_number",
+            unique=True,
+        ),
+    )
+
+
+class ResultCacheEntry(Base):
+    """An order item whose outputs answer every request with the same key."""
+
+    __tablename__ = "result_cache"
+
+    # SHA256 of the canonical (provider, model, actual_parameter_set)
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    provider: Mapped[str] = mapped_column(String(100))
+    model: Mapped[str] = mapped_column(String(200))
+    order_item_id: Mapped[str] = mapped_column(
+        ForeignKey("order_items.id", ondelete="CASCADE")
+    )
+    # Seconds the provider took, i.e. the time each hit saves
+    generation_seconds: Mapped[float] = mapped_column(Float, default=0.0)
+    hits: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+    last_hit_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    __table_args__ = (
+        Index("idx_result_cache_order_item_id", "order_item_id"),
+        Index("idx_result_cache_provider", "provider", "model"),
+    )
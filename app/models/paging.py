@@ -0,0 +1,289 @@
+"""Keyset pagination for galleries, orders and projects.
+
+OFFSET paging makes SQLite walk and discard every row before the page, so
+page 2,000 of a 200k-product gallery reads 200k index entries. Lists are
+instead ordered newest first by (created_at, id), and each page starts
+where the previous one ended: ``WHERE (created_at, id) < (:created_at,
+:id)``. That is one index seek whatever the depth. The position is handed
+out as an opaque cursor string, so callers never depend on its contents.
+
+Filters (the dicts sent with ui.filter_applied) compile to predicates
+backed by the schema's indexes. Each filterable column is indexed as
+(column, created_at, id), so a filtered page is still one seek:
+
+- products: project, type, liked, tag (tag id), model (the generating
+  order's model)
+- orders: project, status, provider, model
+- projects: status
+
+The tag and model filters are driven from tag_associations and orders
+instead: the matching products are found by key and then sorted, so their
+cost grows with the number of matches rather than with the page depth.
+
+Usage:
+    pager = KeysetPager(database, Product)
+    page = pager.page({"project": project.id, "liked": True}, limit=100)
+    older = pager.page({"project": project.id}, after=page.next_cursor)
+    gallery_model = ProductListModel(pager.fetch_ids, seek_page=pager.seek_ids)
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple, Type
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.orm import Mapped
+from sqlalchemy.sql.elements import ColumnElement
+
+from .database import Database
+from .order import Order, OrderItem
+from .product import Product
+from .project import Project
+from .tag import TagAssociation
+
+# Rows per page when the caller does not ask for a size
+DEFAULT_PAGE_LIMIT = 100
+
+# Largest page a caller may request
+MAX_PAGE_LIMIT = 1000
+
+
+def _product_model(value: Any) -> ColumnElement:
+    """Products generated by an order for the given model."""
+    return Product.order_item_id.in_(
+        select(OrderItem.id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.model == value)
+    )
+
+
+def _product_tag(value: Any) -> ColumnElement:
+    """Products carrying the tag with the given id."""
+    return Product.id.in_(
+        select(TagAssociation.entity_id).where(
+            TagAssociation.tag_id == value,
+            TagAssociation.entity_type == "product",
+        )
+    )
+
+
+# Filter keys accepted per model, each compiling a value to a predicate
+FILTERS: Dict[type, Dict[str, Callable[[Any], ColumnElement]]] = {
+    Product: {
+        "project": lambda value: Product.project_id == value,
+        "type": lambda value: Product.type == value,
+        "liked": lambda value: Product.liked.is_(bool(value)),
+        "tag": _product_tag,
+        "model": _product_model,
+    },
+    Order: {
+        "project": lambda value: Order.project_id == value,
+        "status": lambda value: Order.status == value,
+        "provider": lambda value: Order.provider == value,
+        "model": lambda value: Order.model == value,
+    },
+    Project: {
+        "status": lambda value: Project.status == value,
+    },
+}
+
+
+class PagedModel(Protocol):
+    """A mapped class with UUIDPrimaryKeyMixin and TimestampMixin columns."""
+
+    __tablename__: str
+    id: Mapped[str]
+    created_at: Mapped[datetime]
+
+
+class CursorError(ValueError):
+    """A page cursor that is malformed or was not produced by this module."""
+
+
+@dataclass
+class KeysetPage:
+    """One page of rows, newest first, with cursors to its neighbours.
+
+    next_cursor continues with older rows and previous_cursor goes back to
+    newer ones; each is None when there is nothing in that direction.
+    """
+
+    rows: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Return the opaque cursor for a row's position."""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Return the (created_at, id) position held by a cursor.
+
+    Raises:
+        CursorError: If the cursor cannot be decoded
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (binascii.Error, TypeError, ValueError) as error:
+        raise CursorError(f"Invalid page cursor: {cursor!r}") from error
+
+
+def compile_filters(model: Type[PagedModel], filters: Optional[Dict[str, Any]]) -> List:
+    """Translate a filter dict into index-backed predicates for a model.
+
+    Keys whose value is None are ignored, so a cleared filter can stay in
+    the dict.
+
+    Raises:
+        ValueError: If a key is not a filter of this model
+    """
+    available = FILTERS.get(model, {})
+    predicates = []
+    for key, value in (filters or {}).items():
+        if value is None:
+            continue
+        if key not in available:
+            raise ValueError(f"Unknown {model.__tablename__} filter: {key}")
+        predicates.append(available[key](value))
+    if hasattr(model, "deleted_at"):
+        predicates.append(model.deleted_at.is_(None))
+    return predicates
+
+
+def keyset_statement(
+    model: Type[PagedModel],
+    filters: Optional[Dict[str, Any]] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_LIMIT,
+    columns: Optional[List] = None,
+) -> Select:
+    """Build the SELECT for one page, newest first (oldest first with before).
+
+    Args:
+        model: Mapped class with created_at and id columns
+        filters: Filter dict (see FILTERS)
+        after: Cursor of the row the page starts after
+        before: Cursor of the row the page ends before
+        limit: Rows to select
+        columns: Columns to select (defaults to the whole entity)
+
+    Raises:
+        CursorError: If a cursor cannot be decoded
+        ValueError: If a filter key is unknown or both cursors are given
+    """
+    if after is not None and before is not None:
+        raise ValueError("Pass either after or before, not both")
+    key = tuple_(model.created_at, model.id)
+    statement = select(*(columns or [model])).where(*compile_filters(model, filters))
+    if before is not None:
+        return (
+            statement.where(key > decode_cursor(before))
+            .order_by(model.created_at, model.id)
+            .limit(limit)
+        )
+    if after is not None:
+        statement = statement.where(key < decode_cursor(after))
+    return statement.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+
+
+class KeysetPager:
+    """Pages through one model's rows by (created_at, id).
+
+    Reads run on the calling thread's session.
+    """
+
+    def __init__(self, database: Database, model: Type[PagedModel]):
+        """Initialize the pager.
+
+        Args:
+            database: Database to read from
+            model: Product, Order or Project (any model with created_at/id)
+        """
+        self.database = database
+        self.model = model
+
+    def page(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_LIMIT,
+    ) -> KeysetPage:
+        """Return one page of rows, newest first.
+
+        Args:
+            filters: Filter dict (see FILTERS)
+            after: next_cursor of the previous page, for older rows
+            before: previous_cursor of the next page, for newer rows
+            limit: Rows per page (capped at MAX_PAGE_LIMIT)
+
+        Returns:
+            KeysetPage: The rows and the cursors around them
+        """
+        return self._page(filters, after, before, limit, None)
+
+    def fetch_ids(
+        self, filters: Dict[str, Any], cursor: Optional[str], limit: int
+    ) -> Tuple[List[str], Optional[str]]:
+        """Page fetcher for ProductListModel: ids only, read from the index."""
+        page = self._page(
+            filters, cursor, None, limit, [self.model.created_at, self.model.id]
+        )
+        return [row.id for row in page.rows], page.next_cursor
+
+    def seek_ids(
+        self, filters: Dict[str, Any], offset: int, limit: int
+    ) -> Tuple[List[str], Optional[str]]:
+        """Page seeker for ProductListModel: the ids from a row offset on.
+
+        This one page uses OFFSET, so it is meant for jumps; the cursor it
+        returns pages on by key.
+        """
+        limit = max(1, min(limit, MAX_PAGE_LIMIT))
+        columns = [self.model.created_at, self.model.id]
+        statement = keyset_statement(
+            self.model, filters, None, None, limit + 1, columns
+        ).offset(max(0, offset))
+        rows = list(self.database.session().execute(statement).all())
+        more = len(rows) > limit
+        rows = rows[:limit]
+        cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if more else None
+        return [row.id for row in rows], cursor
+
+    def _page(self, filters, after, before, limit, columns) -> KeysetPage:
+        """Run one page query; limit + 1 rows tell whether more follow."""
+        limit = max(1, min(limit, MAX_PAGE_LIMIT))
+        statement = keyset_statement(
+            self.model, filters, after, before, limit + 1, columns
+        )
+        session = self.database.session()
+        if columns:
+            rows = list(session.execute(statement).all())
+        else:
+            rows = list(session.scalars(statement).all())
+        more = len(rows) > limit
+        rows = rows[:limit]
+
+        page = KeysetPage(rows)
+        if before is not None:
+            rows.reverse()
+            if rows:
+                page.next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+                if more:
+                    page.previous_cursor = encode_cursor(rows[0].created_at, rows[0].id)
+            return page
+        if rows:
+            if more:
+                page.next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+            if after is not None:
+                page.previous_cursor = encode_cursor(rows[0].created_at, rows[0].id)
+        return page
@@ -0,0 +1,73 @@
+"""Product models."""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    false,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, TimestampMixin, UUIDPrimaryKeyMixin, utcnow
+
+
+class Product(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """A generated or imported media file."""
+
+    __tablename__ = "products"
+
+    order_item_id: Mapped[Optional[str]] = mapped_column(
+        ForeignKey("order_items.id", ondelete="SET NULL")
+    )
+    project_id: Mapped[Optional[str]] = mapped_column(
+        ForeignKey("projects.id", ondelete="CASCADE")
+    )
+    type: Mapped[str] = mapped_column(String(50))
+    file_path: Mapped[str] = mapped_column(Text)
+    file_size: Mapped[Optional[int]] = mapped_column(BigInteger)
+    file_hash: Mapped[Optional[str]] = mapped_column(String(64))
+    thumbnail_paths: Mapped[Optional[Dict[str, str]]] = mapped_column(JSON)
+    width: Mapped[Optional[int]] = mapped_column(Integer)
+    height: Mapped[Optional[int]] = mapped_column(Integer)
+    duration: Mapped[Optional[float]] = mapped_column(Float)
+    mime_type: Mapped[Optional[str]] = mapped_column(String(100))
+    # "metadata" is reserved by the declarative base
+    metadata_: Mapped[Optional[Dict[str, Any]]] = mapped_column("metadata", JSON)
+    liked: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
+    rating: Mapped[Optional[int]] = mapped_column(Integer)
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    # Filter indexes end in (created_at, id) so a filtered gallery pages in
+    # index order (see models.paging)
+    __table_args__ = (
+        Index("idx_products_project_id", "project_id", "created_at", "id"),
+        Index("idx_products_order_item_id", "order_item_id"),
+        Index("idx_products_type", "type", "created_at", "id"),
+        Index("idx_products_liked", "liked", "created_at", "id"),
+        Index("idx_products_file_hash", "file_hash"),
+        Index("idx_products_created_at", "created_at", "id"),
+    )
+
+
+class ProductHash(Base):
+    """Perceptual hash of an image product, for near-duplicate search."""
+
+    __tablename__ = "product_hashes"
+
+    product_id: Mapped[str] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    # 64-bit dHash as 16 hex digits (see utils.perceptual_hash)
+    dhash: Mapped[str] = mapped_column(String(16))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
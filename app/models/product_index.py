@@ -0,0 +1,851 @@
+"""Compact in-memory index of product metadata.
+
+Galleries, filters and counts ask for the same few product columns over
+and over. ProductIndex keeps them in process, one packed column per field,
+so a filter is a handful of big-integer ANDs instead of a query:
+
+- ids are 16 byte UUIDs in one bytearray, found through an open-addressing
+  table of row numbers (an ``array``, not a dict of strings)
+- type, rating, width, height and created_at are ``array`` columns
+- liked and each type are bitmaps over all rows, held as Python ints
+- each project and tag is a RowSet: a bitmap over the rows it spans, or a
+  sorted array of rows when that is smaller
+
+Rows are kept in (created_at, id) order, so paging newest first walks a
+bitmap from the top, in KeysetPager's order. A product created with an
+older timestamp than the newest indexed one (an import, say) renumbers the
+rows after it; a pager holding a cursor from before then may repeat or
+skip a row. Deleted products only lose their bit in the live bitmap.
+At a million products the index takes under 64 bytes per product; run
+tests/performance/bench_product_index.py to measure it.
+
+start() loads the index on a background thread. After that it follows
+DomainSignals like the counter service does: product_created,
+product_liked and product_deleted only record ids, and one call per tick
+on the database's WriteQueue reads the changed rows and applies them,
+after every write queued before the events. Tag
+assignments are not signalled; code changing them calls tag() or
+untag().
+
+Filters use the keys of ui.filter_applied that the columns can answer
+(project, type, liked, tag). Callers fall back to KeysetPager for the
+others, and while the index is still loading.
+
+Usage:
+    index = init_product_index()
+    if index.ready and index.supports(filters):
+        gallery_model = ProductListModel(index.fetch_ids, seek_page=index.seek_ids)
+        total = index.count(filters)
+"""
+
+import logging
+import sys
+import threading
+from array import array
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from hashlib import blake2b
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.engine import Connection
+
+from signals import signal_bus as default_signal_bus
+
+from .database import Database
+from .product import Product
+from .tag import TagAssociation
+
+logger = logging.getLogger(__name__)
+
+# Filter keys the index answers (see models.paging.FILTERS for all of them)
+INDEX_FILTERS = ("project", "type", "liked", "tag")
+
+# Bytes of a page's bitmap examined at a time when paging
+SCAN_BYTES = 256
+
+# Bound parameters per "id IN (...)" lookup (SQLite allows 999)
+LOOKUP_CHUNK_SIZE = 500
+
+# Rows fetched per round trip during the initial load
+LOAD_BATCH_SIZE = 10_000
+
+_EPOCH = datetime(1970, 1, 1)
+
+_product_index: Optional["ProductIndex"] = None
+
+
+@dataclass
+class IndexedProduct:
+    """The metadata the index holds for one product."""
+
+    id: str
+    project_id: Optional[str]
+    type: str
+    liked: bool
+    rating: Optional[int]
+    width: Optional[int]
+    height: Optional[int]
+    created_at: datetime
+
+
+def encode_id(product_id: str) -> Tuple[bytes, bool]:
+    """Return the 16 byte key of an id and whether it is a canonical UUID.
+
+    Other ids (tests and imports use some) are keyed by a 16 byte digest.
+    """
+    if len(product_id) == 36 and (
+        product_id[8] == product_id[13] == product_id[18] == product_id[23] == "-"
+    ):
+        text = product_id.replace("-", "")
+        try:
+            key = bytes.fromhex(text)
+        except ValueError:
+            key = b""
+        if len(key) == 16 and key.hex() == text:
+            return key, True
+    return blake2b(product_id.encode(), digest_size=16).digest(), False
+
+
+def format_id(key: bytes) -> str:
+    """Return the UUID string of a 16 byte key."""
+    text = key.hex()
+    return f"{text[:8]}-{text[8:12]}-{text[12:16]}-{text[16:20]}-{text[20:]}"
+
+
+def bitmap(rows: Sequence[int]) -> int:
+    """Return the int with the bits of the given rows set."""
+    if not rows:
+        return 0
+    buffer = bytearray((max(rows) >> 3) + 1)
+    for row in rows:
+        buffer[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def set_bits(bits: int) -> List[int]:
+    """Return the positions of the set bits, lowest first."""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    positions = []
+    for index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            positions.append(index * 8 + low.bit_length() - 1)
+            byte ^= low
+    return positions
+
+
+def highest_bits(bits: int, stop: int, limit: int) -> List[int]:
+    """Return up to limit set bit positions below stop, highest first."""
+    if stop < bits.bit_length():
+        bits &= (1 << stop) - 1
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    positions: List[int] = []
+    end = len(data)
+    while end > 0 and len(positions) < limit:
+        start = max(0, end - SCAN_BYTES)
+        chunk = int.from_bytes(data[start:end], "little")
+        while chunk and len(positions) < limit:
+            top = chunk.bit_length() - 1
+            positions.append(start * 8 + top)
+            chunk ^= 1 << top
+        end = start
+    return positions
+
+
+def skip_bits(bits: int, count: int) -> int:
+    """Return the stop for highest_bits() that skips the highest count bits.
+
+    Returns 0 when fewer than count bits are set.
+    """
+    if count <= 0:
+        return bits.bit_length()
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    end = len(data)
+    while end > 0:
+        start = max(0, end - SCAN_BYTES)
+        chunk = int.from_bytes(data[start:end], "little")
+        found = chunk.bit_count()
+        if found < count:
+            count -= found
+            end = start
+            continue
+        for _ in range(count):
+            top = chunk.bit_length() - 1
+            chunk ^= 1 << top
+        return start * 8 + top
+    return 0
+
+
+class RowSet:
+    """A set of row numbers, as an offset bitmap or as sorted rows.
+
+    The bitmap covers only the rows from the lowest member up, so a project
+    whose products were all made in one month costs about a bit per row of
+    that month. Bitmaps are preferred up to 6 bytes per member, since they
+    AND without a Python loop; past 12 bytes per member (one member in ~100
+    rows) the set becomes a sorted array('I') of 4 bytes per member, so
+    rarely used tags stay cheap too.
+    """
+
+    __slots__ = ("count", "_base", "_bits", "_rows")
+
+    def __init__(self, rows: Iterable[int] = ()):
+        """Initialize the set from row numbers in any order."""
+        self._rows: Optional[array] = array("I", sorted(set(rows)))
+        self._base = 0
+        self._bits = 0
+        self.count = len(self._rows)
+        self._fit()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, row: int) -> bool:
+        if self._rows is not None:
+            index = bisect_left(self._rows, row)
+            return index < len(self._rows) and self._rows[index] == row
+        return row >= self._base and bool(self._bits >> (row - self._base) & 1)
+
+    @property
+    def dense(self) -> bool:
+        """Whether the set is stored as a bitmap."""
+        return self._rows is None
+
+    def add(self, row: int):
+        """Add a row."""
+        if row in self:
+            return
+        if self._rows is not None:
+            insort(self._rows, row)
+        else:
+            if row < self._base:
+                self._bits <<= self._base - row
+                self._base = row
+            self._bits |= 1 << (row - self._base)
+        self.count += 1
+        self._fit()
+
+    def update(self, rows: Iterable[int]):
+        """Add many rows at once."""
+        rows = sorted(set(rows))
+        if not rows:
+            return
+        if self._rows is not None:
+            merged = set(self._rows)
+            merged.update(rows)
+            self._rows = array("I", sorted(merged))
+            self.count = len(self._rows)
+        else:
+            if rows[0] < self._base:
+                self._bits <<= self._base - rows[0]
+                self._base = rows[0]
+            self._bits |= bitmap([row - self._base for row in rows])
+            self.count = self._bits.bit_count()
+        self._fit()
+
+    def discard(self, row: int):
+        """Remove a row if present."""
+        if row not in self:
+            return
+        if self._rows is not None:
+            del self._rows[bisect_left(self._rows, row)]
+        else:
+            self._bits ^= 1 << (row - self._base)
+        self.count -= 1
+        self._fit()
+
+    def mask(self) -> int:
+        """Return the set as a bitmap over all rows."""
+        if self._rows is not None:
+            return bitmap(self._rows)
+        return self._bits << self._base
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the set."""
+        if self._rows is not None:
+            return sys.getsizeof(self._rows)
+        return sys.getsizeof(self._bits)
+
+    def _fit(self):
+        """Switch representation when the other one is much smaller."""
+        if not self.count:
+            self._rows, self._base, self._bits = array("I"), 0, 0
+        elif self._rows is not None:
+            span = self._rows[-1] - self._rows[0] + 1
+            if span // 8 <= 6 * self.count:
+                self._base = self._rows[0]
+                self._bits = bitmap([row - self._base for row in self._rows])
+                self._rows = None
+        elif self._bits.bit_length() // 8 > 12 * self.count:
+            self._rows = array("I", (self._base + row for row in set_bits(self._bits)))
+            self._base, self._bits = 0, 0
+
+
+class ProductIndex:
+    """Columnar product metadata with bitmap filters, kept current by events.
+
+    Reads are safe from any thread. Changes are applied on the database's
+    writer thread, so a query may lag the latest event by one write tick;
+    call flush() to wait for it.
+
+    Attributes:
+        ready: Whether the initial load has finished
+        tick_count: Number of ticks that applied events
+    """
+
+    def __init__(self, database: Database, signal_bus=None):
+        """Initialize an empty index and connect it to the domain signals.
+
+        Args:
+            database: Database to load from and whose writer applies events
+            signal_bus: Signal bus to follow (defaults to the global bus)
+        """
+        self.database = database
+        self.signal_bus = signal_bus or default_signal_bus
+        self.ready = False
+        self.tick_count = 0
+
+        self._lock = threading.RLock()
+        self._clear_rows()
+        self._types: List[str] = []
+        self._type_codes: Dict[str, int] = {}
+        # Project code 0 is "no project"
+        self._projects: List[Optional[str]] = [None]
+        self._project_codes: Dict[Optional[str], int] = {None: 0}
+
+        self._version = 0
+        self._mask_cache: Tuple[Any, int] = (None, 0)
+        self._changed: Set[str] = set()
+        self._deleted: Set[str] = set()
+        self._armed = False
+        self._load_thread: Optional[threading.Thread] = None
+
+        domain = self.signal_bus.domain
+        domain.product_created.connect(self._on_product_changed)
+        domain.product_liked.connect(self._on_product_changed)
+        domain.product_deleted.connect(self._on_product_deleted)
+
+    def _clear_rows(self) -> None:
+        """Empty the columns, id table and bitmaps; codes are kept."""
+        # Columns, one entry per row
+        self._ids = bytearray()
+        self._created = array("d")
+        self._project = array("I")
+        self._type = array("B")
+        self._rating = array("b")
+        self._width = array("I")
+        self._height = array("I")
+        # Rows whose id is not a canonical UUID
+        self._odd_ids: Dict[int, str] = {}
+        # Open-addressing table of row numbers by id, -1 when empty
+        self._slots = array("i", [-1]) * 8
+
+        self._alive = 0
+        self._liked = 0
+        self._type_bits: Dict[int, int] = {}
+        self._project_rows: Dict[int, RowSet] = {}
+        self._tag_rows: Dict[str, RowSet] = {}
+
+    def __len__(self) -> int:
+        """Number of live products."""
+        with self._lock:
+            return self._alive.bit_count()
+
+    def start(self):
+        """Load the index on a background thread.
+
+        Events recorded meanwhile are held back and applied once the load
+        is done; rows the load already read are simply read again.
+        """
+        self._load_thread = threading.Thread(
+            target=self.load, name="ProductIndexLoad", daemon=True
+        )
+        self._load_thread.start()
+
+    def load(self, connection: Optional[Connection] = None):
+        """Read every live product and tag assignment into the index.
+
+        Args:
+            connection: Connection to read with (defaults to a new one)
+        """
+        if connection is None:
+            with self.database.engine.connect() as connection:
+                return self.load(connection)
+        table = Product.__table__
+        statement = (
+            select(*self._product_columns())
+            .where(table.c.deleted_at.is_(None))
+            .order_by(table.c.created_at, table.c.id)
+        )
+        result = connection.execution_options(yield_per=LOAD_BATCH_SIZE).execute(
+            statement
+        )
+        for rows in result.partitions():
+            self.load_rows(rows)
+        associations = connection.execute(
+            select(TagAssociation.tag_id, TagAssociation.entity_id).where(
+                TagAssociation.entity_type == "product"
+            )
+        )
+        self.load_tags(associations)
+        with self._lock:
+            self.ready = True
+            pending = bool(self._changed or self._deleted)
+        logger.info("Product index loaded %d products", len(self))
+        if pending:
+            self._arm()
+
+    def load_rows(self, rows: Sequence[Sequence[Any]]):
+        """Append products in creation order.
+
+        Args:
+            rows: (id, project_id, type, liked, rating, width, height,
+                created_at) tuples, oldest first
+        """
+        with self._lock:
+            self._reserve(len(self._created) + len(rows))
+            # Rows per bitmap, as arrays to keep the load's peak memory low
+            liked = array("I")
+            types: Dict[int, array] = {}
+            projects: Dict[int, array] = {}
+            first = len(self._created)
+            for values in rows:
+                product_id, project_id, type_, is_liked = values[:4]
+                rating, width, height, created_at = values[4:8]
+                row = self._append(product_id, created_at)
+                project = self._project_code(project_id)
+                code = self._type_code(type_)
+                self._project.append(project)
+                self._type.append(code)
+                self._rating.append(-1 if rating is None else rating)
+                self._width.append(width or 0)
+                self._height.append(height or 0)
+                projects.setdefault(project, array("I")).append(row)
+                types.setdefault(code, array("I")).append(row)
+                if is_liked:
+                    liked.append(row)
+
+            end = len(self._created)
+            self._alive |= (1 << end) - (1 << first)
+            self._liked |= bitmap(liked)
+            for code, type_rows in types.items():
+                self._type_bits[code] = self._type_bits.get(code, 0) | bitmap(type_rows)
+            for project, project_rows in projects.items():
+                self._project_rows.setdefault(project, RowSet()).update(project_rows)
+            self._version += 1
+
+    def load_tags(self, associations: Iterable[Sequence[Any]]):
+        """Add (tag_id, product_id) assignments of products in the index."""
+        grouped: Dict[str, array] = {}
+        with self._lock:
+            for tag_id, product_id in associations:
+                row = self._find(product_id)
+                if row >= 0:
+                    grouped.setdefault(tag_id, array("I")).append(row)
+            for tag_id, rows in grouped.items():
+                self._tag_rows.setdefault(tag_id, RowSet()).update(rows)
+            self._version += 1
+
+    def tag(self, product_id: str, tag_id: str):
+        """Record that a product was tagged."""
+        self.load_tags([(tag_id, product_id)])
+
+    def untag(self, product_id: str, tag_id: str):
+        """Record that a tag was removed from a product."""
+        with self._lock:
+            row = self._find(product_id)
+            rows = self._tag_rows.get(tag_id)
+            if row >= 0 and rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._tag_rows[tag_id]
+                self._version += 1
+
+    def supports(self, filters: Optional[Dict[str, Any]]) -> bool:
+        """Return True if every set filter is one the index answers."""
+        return all(
+            key in INDEX_FILTERS
+            for key, value in (filters or {}).items()
+            if value is not None
+        )
+
+    def mask(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Return the bitmap of live rows matching a filter dict.
+
+        Keys whose value is None are ignored, as in models.paging.
+
+        Raises:
+            ValueError: If a key is not one of INDEX_FILTERS
+        """
+        active = tuple(
+            sorted(
+                (key, value)
+                for key, value in (filters or {}).items()
+                if value is not None
+            )
+        )
+        with self._lock:
+            cache_key = (self._version, active)
+            if self._mask_cache[0] == cache_key:
+                return self._mask_cache[1]
+            bits = self._alive
+            for key, value in active:
+                if key == "liked":
+                    bits = bits & self._liked if value else bits & ~self._liked
+                elif key == "type":
+                    code = self._type_codes.get(value, -1)
+                    bits &= self._type_bits.get(code, 0)
+                elif key == "project":
+                    rows = self._project_rows.get(self._project_codes.get(value, -1))
+                    bits &= rows.mask() if rows is not None else 0
+                elif key == "tag":
+                    rows = self._tag_rows.get(value)
+                    bits &= rows.mask() if rows is not None else 0
+                else:
+                    raise ValueError(f"Unknown product index filter: {key}")
+            self._mask_cache = (cache_key, bits)
+            return bits
+
+    def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Return the number of live products matching a filter dict."""
+        return self.mask(filters).bit_count()
+
+    def fetch_ids(
+        self, filters: Dict[str, Any], cursor: Optional[int], limit: int
+    ) -> Tuple[List[str], Optional[int]]:
+        """Page fetcher for ProductListModel: matching ids, newest first.
+
+        Args:
+            filters: Filter dict (see INDEX_FILTERS)
+            cursor: Cursor returned with the previous page, or None
+            limit: Ids to return at most
+
+        Returns:
+            Tuple: (product ids, cursor of the next page or None when done)
+        """
+        bits = self.mask(filters)
+        stop = bits.bit_length() if cursor is None else cursor
+        rows = highest_bits(bits, stop, limit + 1)
+        more = len(rows) > limit
+        rows = rows[:limit]
+        with self._lock:
+            ids = [self._id_of(row) for row in rows]
+        return ids, rows[-1] if more else None
+
+    def seek_ids(
+        self, filters: Dict[str, Any], offset: int, limit: int
+    ) -> Tuple[List[str], Optional[int]]:
+        """Page seeker for ProductListModel: matching ids from a row offset on.
+
+        The offset is skipped by counting bits a chunk at a time.
+        """
+        return self.fetch_ids(filters, skip_bits(self.mask(filters), offset), limit)
+
+    def record(self, product_id: str) -> Optional[IndexedProduct]:
+        """Return a live product's indexed metadata, or None."""
+        with self._lock:
+            row = self._find(product_id)
+            if row < 0 or not self._alive >> row & 1:
+                return None
+            rating = self._rating[row]
+            return IndexedProduct(
+                id=product_id,
+                project_id=self._projects[self._project[row]],
+                type=self._types[self._type[row]],
+                liked=bool(self._liked >> row & 1),
+                rating=None if rating < 0 else rating,
+                width=self._width[row] or None,
+                height=self._height[row] or None,
+                created_at=_EPOCH + timedelta(seconds=self._created[row]),
+            )
+
+    def tags_of(self, product_id: str) -> List[str]:
+        """Return the ids of the tags on a product."""
+        with self._lock:
+            row = self._find(product_id)
+            if row < 0:
+                return []
+            return sorted(tag for tag, rows in self._tag_rows.items() if row in rows)
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the columns, table and bitmaps."""
+        with self._lock:
+            total = sys.getsizeof(self._ids) + sys.getsizeof(self._slots)
+            for column in (
+                self._created,
+                self._project,
+                self._type,
+                self._rating,
+                self._width,
+                self._height,
+            ):
+                total += sys.getsizeof(column)
+            total += sys.getsizeof(self._alive) + sys.getsizeof(self._liked)
+            total += sum(sys.getsizeof(bits) for bits in self._type_bits.values())
+            total += sum(rows.nbytes() for rows in self._project_rows.values())
+            total += sum(rows.nbytes() for rows in self._tag_rows.values())
+            total += sys.getsizeof(self._odd_ids) + sum(
+                sys.getsizeof(value) for value in self._odd_ids.values()
+            )
+            return total
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until the load and every event recorded so far are applied."""
+        if self._load_thread is not None:
+            self._load_thread.join(timeout)
+        self.database.writer.flush(timeout)
+
+    # Event handling
+
+    def _on_product_changed(self, product_id: str):
+        """Record a created or updated product."""
+        with self._lock:
+            self._changed.add(product_id)
+        self._arm()
+
+    def _on_product_deleted(self, product_id: str):
+        """Record a deleted product."""
+        with self._lock:
+            self._deleted.add(product_id)
+        self._arm()
+
+    def _arm(self):
+        """Queue the tick's apply call unless one is already queued."""
+        with self._lock:
+            if self._armed:
+                return
+            self._armed = True
+        try:
+            self.database.writer.submit(self._apply)
+        except RuntimeError:
+            with self._lock:
+                self._armed = False
+            logger.warning("Database writer is not running; product index stale")
+
+    def _apply(self, connection: Connection):
+        """Writer thread: read the tick's changed products and apply them."""
+        with self._lock:
+            self._armed = False
+            if not self.ready:
+                # Kept for when the load finishes
+                return
+            changed, self._changed = self._changed, set()
+            deleted, self._deleted = self._deleted, set()
+
+        rows = _lookup(connection, select(*self._product_columns()), changed)
+        with self._lock:
+            gone = set(deleted)
+            appended = []
+            for row in rows:
+                product_id = row[0]
+                if row[-1] is not None:
+                    gone.add(product_id)
+                elif self._find(product_id) >= 0:
+                    self._update(row)
+                else:
+                    appended.append(tuple(row[:-1]))
+            appended.sort(key=lambda values: (values[-1], values[0]))
+            dead = [self._find(product_id) for product_id in gone]
+            self._alive &= ~bitmap([row for row in dead if row >= 0])
+            if appended and self._created and self._precedes(appended[0]):
+                self._merge_rows(appended)
+            else:
+                self.load_rows(appended)
+            new_ids = [values[0] for values in appended]
+            self._version += 1
+            self.tick_count += 1
+
+        if new_ids:
+            tag_statement = select(
+                TagAssociation.tag_id, TagAssociation.entity_id
+            ).where(TagAssociation.entity_type == "product")
+            self.load_tags(
+                _lookup(connection, tag_statement, set(new_ids), "entity_id")
+            )
+
+    def _update(self, values: Sequence[Any]):
+        """Apply a changed product's columns to its existing row."""
+        product_id, project_id, type_, liked, rating, width, height = values[:7]
+        row = self._find(product_id)
+        project = self._project_code(project_id)
+        if project != self._project[row]:
+            self._project_rows[self._project[row]].discard(row)
+            self._project_rows.setdefault(project, RowSet()).add(row)
+            self._project[row] = project
+        code = self._type_code(type_)
+        if code != self._type[row]:
+            self._type_bits[self._type[row]] &= ~(1 << row)
+            self._type_bits[code] = self._type_bits.get(code, 0) | 1 << row
+            self._type[row] = code
+        bit = 1 << row
+        self._liked = self._liked | bit if liked else self._liked & ~bit
+        self._alive |= bit
+        self._rating[row] = -1 if rating is None else rating
+        self._width[row] = width or 0
+        self._height[row] = height or 0
+
+    def _precedes(self, values: Sequence[Any]) -> bool:
+        """Return True if a product sorts before the newest indexed row."""
+        last = len(self._created) - 1
+        created = (values[-1] - _EPOCH).total_seconds()
+        return (created, values[0]) < (self._created[last], self._id_of(last))
+
+    def _merge_rows(self, rows: List[Tuple]):
+        """Lay every row out again with new rows in (created_at, id) order.
+
+        This costs a pass over the whole index, so it is only done when a
+        tick brings a product older than the newest one indexed.
+        """
+        existing = []
+        dead = []
+        for row in range(len(self._created)):
+            product_id = self._id_of(row)
+            rating = self._rating[row]
+            existing.append(
+                (
+                    product_id,
+                    self._projects[self._project[row]],
+                    self._types[self._type[row]],
+                    bool(self._liked >> row & 1),
+                    None if rating < 0 else rating,
+                    self._width[row] or None,
+                    self._height[row] or None,
+                    _EPOCH + timedelta(seconds=self._created[row]),
+                )
+            )
+            if not self._alive >> row & 1:
+                dead.append(product_id)
+        tags = [
+            (tag_id, self._id_of(row))
+            for tag_id, rows in self._tag_rows.items()
+            for row in set_bits(rows.mask())
+        ]
+        merged = existing + rows
+        merged.sort(key=lambda values: (values[-1], values[0]))
+
+        self._clear_rows()
+        self.load_rows(merged)
+        self._alive &= ~bitmap([self._find(product_id) for product_id in dead])
+        self.load_tags(tags)
+
+    # Storage
+
+    @staticmethod
+    def _product_columns() -> List:
+        """Columns read per product, in load_rows() order plus deleted_at."""
+        table = Product.__table__
+        return [
+            table.c.id,
+            table.c.project_id,
+            table.c.type,
+            table.c.liked,
+            table.c.rating,
+            table.c.width,
+            table.c.height,
+            table.c.created_at,
+            table.c.deleted_at,
+        ]
+
+    def _append(self, product_id: str, created_at: datetime) -> int:
+        """Add a row for an id and return its number."""
+        key, canonical = encode_id(product_id)
+        row = len(self._created)
+        self._ids += key
+        self._created.append((created_at - _EPOCH).total_seconds())
+        if not canonical:
+            self._odd_ids[row] = product_id
+        self._insert_slot(key, row)
+        return row
+
+    def _id_of(self, row: int) -> str:
+        """Return the id stored in a row."""
+        odd = self._odd_ids.get(row)
+        if odd is not None:
+            return odd
+        return format_id(bytes(self._ids[row * 16 : row * 16 + 16]))
+
+    def _find(self, product_id: str) -> int:
+        """Return the row of an id, or -1."""
+        key = encode_id(product_id)[0]
+        slots = self._slots
+        mask = len(slots) - 1
+        ids = self._ids
+        slot = hash(key) & mask
+        while True:
+            row = slots[slot]
+            if row < 0:
+                return -1
+            if ids[row * 16 : row * 16 + 16] == key:
+                return row
+            slot = (slot + 1) & mask
+
+    def _insert_slot(self, key: bytes, row: int):
+        """Point the table at a row; the id must not be in it yet."""
+        slots = self._slots
+        mask = len(slots) - 1
+        slot = hash(key) & mask
+        while slots[slot] >= 0:
+            slot = (slot + 1) & mask
+        slots[slot] = row
+
+    def _reserve(self, rows: int):
+        """Grow the table so it stays at most three quarters full."""
+        size = len(self._slots)
+        if rows * 4 <= size * 3:
+            return
+        while rows * 4 > size * 3:
+            size *= 2
+        self._slots = array("i", [-1]) * size
+        ids = self._ids
+        for row in range(len(self._created)):
+            self._insert_slot(bytes(ids[row * 16 : row * 16 + 16]), row)
+
+    def _project_code(self, project_id: Optional[str]) -> int:
+        """Return the code of a project id, assigning one if needed."""
+        code = self._project_codes.get(project_id)
+        if code is None:
+            code = self._project_codes[project_id] = len(self._projects)
+            self._projects.append(project_id)
+        return code
+
+    def _type_code(self, type_: str) -> int:
+        """Return the code of a product type, assigning one if needed."""
+        code = self._type_codes.get(type_)
+        if code is None:
+            code = self._type_codes[type_] = len(self._types)
+            self._types.append(type_)
+        return code
+
+
+def _lookup(
+    connection: Connection, statement, ids: Set[str], key: str = "id"
+) -> List[Sequence[Any]]:
+    """Run a products or tag_associations select for the given ids, chunked."""
+    rows: List[Sequence[Any]] = []
+    if not ids:
+        return rows
+    column = statement.selected_columns[0].table.c[key]
+    statement = statement.where(column.in_(bindparam("ids", expanding=True)))
+    ordered = sorted(ids)
+    for start in range(0, len(ordered), LOOKUP_CHUNK_SIZE):
+        chunk = ordered[start : start + LOOKUP_CHUNK_SIZE]
+        rows.extend(connection.execute(statement, {"ids": chunk}).all())
+    return rows
+
+
+def init_product_index() -> ProductIndex:
+    """Build the application's product index (deferred startup hook)."""
+    global _product_index
+    if _product_index is None:
+        from .database import init_database
+
+        _product_index = ProductIndex(init_database())
+        _product_index.start()
+    return _product_index
+
+
+def get_product_index() -> Optional[ProductIndex]:
+    """Return the application product index, if initialized."""
+    return _product_index
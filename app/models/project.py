@@ -0,0 +1,32 @@
+"""Project model."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import JSON, DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, TimestampMixin, UUIDPrimaryKeyMixin
+
+
+class Project(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """Primary organizational unit for orders and products."""
+
+    __tablename__ = "projects"
+
+    name: Mapped[str] = mapped_column(String(255))
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    status: Mapped[str] = mapped_column(
+        String(50), default="active", server_default="active"
+    )
+    product_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    order_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    featured_product_ids: Mapped[Optional[List[str]]] = mapped_column(JSON)
+    settings: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    __table_args__ = (
+        Index("idx_projects_status", "status", "created_at", "id"),
+        Index("idx_projects_created_at", "created_at", "id"),
+        Index("idx_projects_deleted_at", "deleted_at"),
+    )
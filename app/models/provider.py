@@ -0,0 +1,62 @@
+"""Provider and model catalogue."""
+
+from typing import Any, Dict, Optional
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    true,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, TimestampMixin, UUIDPrimaryKeyMixin
+
+
+class Provider(TimestampMixin, Base):
+    """An AI generation service such as replicate or fal."""
+
+    __tablename__ = "providers"
+
+    id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    name: Mapped[str] = mapped_column(String(255))
+    api_base_url: Mapped[Optional[str]] = mapped_column(Text)
+    api_key_encrypted: Mapped[Optional[str]] = mapped_column(Text)
+    is_enabled: Mapped[bool] = mapped_column(
+        Boolean, default=True, server_default=true()
+    )
+    rate_limit_requests: Mapped[Optional[int]] = mapped_column(Integer)
+    rate_limit_tokens: Mapped[Optional[int]] = mapped_column(Integer)
+    concurrent_limit: Mapped[Optional[int]] = mapped_column(Integer)
+    settings: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
+
+
+class Model(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """A model offered by a provider."""
+
+    __tablename__ = "models"
+
+    provider_id: Mapped[str] = mapped_column(ForeignKey("providers.id"))
+    model_id: Mapped[str] = mapped_column(String(255))
+    name: Mapped[str] = mapped_column(String(255))
+    family: Mapped[Optional[str]] = mapped_column(String(100))
+    modality: Mapped[str] = mapped_column(String(100))
+    version: Mapped[Optional[str]] = mapped_column(String(50))
+    is_available: Mapped[bool] = mapped_column(
+        Boolean, default=True, server_default=true()
+    )
+    parameter_schema: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
+    capabilities: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
+    pricing: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
+
+    __table_args__ = (
+        UniqueConstraint("provider_id", "model_id"),
+        Index("idx_models_provider_id", "provider_id"),
+        Index("idx_models_family", "family"),
+        Index("idx_models_modality", "modality"),
+    )
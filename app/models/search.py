@@ -0,0 +1,187 @@
+"""Full-text search index for Art Factory.
+
+Prompts live inside JSON parameter sets, so a LIKE query has to parse and
+scan every order item. Instead, product_search is an FTS5 table with one
+row per live product, which indexes:
+
+- prompt: the item's generation_parameter_set prompt, falling back to the
+  order's base_parameter_set and then to the product's own metadata
+- notes: products.notes
+- tags: names of the tags on the product
+- project: the project's name
+
+SQLite triggers keep it in sync, so every write path is covered, including
+the WriteQueue, raw SQL and cascades. Soft-deleted products are removed
+from the index, so queries need no join to filter them out.
+
+FTS5 rowids must be stable integers, but products are keyed by UUID and
+their implicit rowids may change on VACUUM. product_search_rows therefore
+assigns each product a permanent integer rowid.
+
+Usage:
+    with engine.begin() as connection:
+        rebuild_search_index(connection)
+"""
+
+import logging
+from typing import List
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+
+from .base import Base
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = "product_search"
+SEARCH_ROWS_TABLE = "product_search_rows"
+
+# Indexed columns in order, after the UNINDEXED product_id and project_id
+SEARCH_COLUMNS = ("prompt", "notes", "tags", "project")
+
+_PROMPT = """coalesce(
+        json_extract(oi.generation_parameter_set, '$.prompt'),
+        json_extract(o.base_parameter_set, '$.prompt'),
+        json_extract(p.metadata, '$.prompt'))"""
+
+_TAGS = """(SELECT group_concat(t.name, ' ')
+        FROM tag_associations ta JOIN tags t ON t.id = ta.tag_id
+        WHERE ta.entity_type = 'product' AND ta.entity_id = p.id)"""
+
+
+def _refresh(where: str) -> List[str]:
+    """Statements replacing the index rows of the products matching where.
+
+    where is a condition over products aliased as p.
+    """
+    return [
+        f"""DELETE FROM {SEARCH_TABLE} WHERE rowid IN (
+        SELECT r.id FROM {SEARCH_ROWS_TABLE} r
+        JOIN products p ON p.id = r.product_id WHERE {where})""",
+        f"""INSERT OR IGNORE INTO {SEARCH_ROWS_TABLE} (product_id)
+        SELECT p.id FROM products p WHERE {where} AND p.deleted_at IS NULL""",
+        f"""INSERT INTO {SEARCH_TABLE}
+        (rowid, product_id, project_id, prompt, notes, tags, project)
+    SELECT r.id, p.id, p.project_id, {_PROMPT}, p.notes, {_TAGS}, pr.name
+    FROM products p
+    JOIN {SEARCH_ROWS_TABLE} r ON r.product_id = p.id
+    LEFT JOIN order_items oi ON oi.id = p.order_item_id
+    LEFT JOIN orders o ON o.id = oi.order_id
+    LEFT JOIN projects pr ON pr.id = p.project_id
+    WHERE {where} AND p.deleted_at IS NULL""",
+    ]
+
+
+def _trigger(name: str, event_clause: str, statements: List[str]) -> str:
+    """CREATE TRIGGER statement running the given statements."""
+    body = "".join(f"\n    {statement};" for statement in statements)
+    return f"CREATE TRIGGER IF NOT EXISTS {name} {event_clause}\nBEGIN{body}\nEND"
+
+
+SEARCH_DDL: List[str] = [
+    f"""CREATE TABLE IF NOT EXISTS {SEARCH_ROWS_TABLE} (
+        id INTEGER PRIMARY KEY,
+        product_id VARCHAR(36) NOT NULL UNIQUE
+    )""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        product_id UNINDEXED,
+        project_id UNINDEXED,
+        {", ".join(SEARCH_COLUMNS)},
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+    _trigger(
+        "product_search_products_ai",
+        "AFTER INSERT ON products",
+        _refresh("p.id = new.id"),
+    ),
+    _trigger(
+        "product_search_products_au",
+        "AFTER UPDATE OF notes, project_id, order_item_id, metadata, deleted_at"
+        " ON products",
+        _refresh("p.id = new.id"),
+    ),
+    _trigger(
+        "product_search_products_ad",
+        "AFTER DELETE ON products",
+        [
+            f"""DELETE FROM {SEARCH_TABLE} WHERE rowid = (
+        SELECT id FROM {SEARCH_ROWS_TABLE} WHERE product_id = old.id)""",
+            f"DELETE FROM {SEARCH_ROWS_TABLE} WHERE product_id = old.id",
+        ],
+    ),
+    _trigger(
+        "product_search_tag_associations_ai",
+        "AFTER INSERT ON tag_associations WHEN new.entity_type = 'product'",
+        _refresh("p.id = new.entity_id"),
+    ),
+    _trigger(
+        "product_search_tag_associations_ad",
+        "AFTER DELETE ON tag_associations WHEN old.entity_type = 'product'",
+        _refresh("p.id = old.entity_id"),
+    ),
+    _trigger(
+        "product_search_tags_au",
+        "AFTER UPDATE OF name ON tags",
+        _refresh(
+            "p.id IN (SELECT entity_id FROM tag_associations"
+            " WHERE tag_id = new.id AND entity_type = 'product')"
+        ),
+    ),
+    _trigger(
+        "product_search_projects_au",
+        "AFTER UPDATE OF name ON projects",
+        _refresh("p.project_id = new.id"),
+    ),
+    _trigger(
+        "product_search_order_items_au",
+        "AFTER UPDATE OF generation_parameter_set ON order_items",
+        _refresh("p.order_item_id = new.id"),
+    ),
+    _trigger(
+        "product_search_orders_au",
+        "AFTER UPDATE OF base_parameter_set ON orders",
+        _refresh(
+            "p.order_item_id IN (SELECT id FROM order_items WHERE order_id = new.id)"
+        ),
+    ),
+]
+
+
+def install_search_index(connection: Connection):
+    """Create the index table and triggers, populating a new index.
+
+    Safe to run on every start: existing objects are left alone.
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+        {"name": SEARCH_TABLE},
+    ).first()
+    for statement in SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection: Connection):
+    """Re-index every live product from scratch."""
+    connection.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE}")
+    connection.exec_driver_sql(f"DELETE FROM {SEARCH_ROWS_TABLE}")
+    for statement in _refresh("1 = 1")[1:]:
+        connection.exec_driver_sql(statement)
+    logger.info("Rebuilt the product search index")
+
+
+def _create_search_index(target, connection: Connection, **kwargs):
+    if connection.dialect.name == "sqlite":
+        install_search_index(connection)
+
+
+def _drop_search_index(target, connection: Connection, **kwargs):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {SEARCH_ROWS_TABLE}")
+
+
+event.listen(Base.metadata, "after_create", _create_search_index)
+event.listen(Base.metadata, "before_drop", _drop_search_index)
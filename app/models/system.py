@@ -0,0 +1,52 @@
+"""System tables: generation logs, settings and migration history."""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, UUIDPrimaryKeyMixin, utcnow
+
+
+class GenerationLog(UUIDPrimaryKeyMixin, Base):
+    """Log line recorded while generating an order item."""
+
+    __tablename__ = "generation_logs"
+
+    order_item_id: Mapped[Optional[str]] = mapped_column(
+        ForeignKey("order_items.id", ondelete="CASCADE")
+    )
+    timestamp: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+    level: Mapped[Optional[str]] = mapped_column(String(20))
+    message: Mapped[Optional[str]] = mapped_column(Text)
+    details: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
+
+    __table_args__ = (
+        Index("idx_generation_logs_order_item_id", "order_item_id"),
+        Index("idx_generation_logs_timestamp", "timestamp"),
+        Index("idx_generation_logs_level", "level"),
+    )
+
+
+class SystemSetting(Base):
+    """Application-wide setting stored as JSON."""
+
+    __tablename__ = "system_settings"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    value: Mapped[Any] = mapped_column(JSON)
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, onupdate=utcnow
+    )
+
+
+class MigrationHistory(Base):
+    """Applied schema migration."""
+
+    __tablename__ = "migration_history"
+
+    version: Mapped[str] = mapped_column(String(50), primary_key=True)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+    description: Mapped[Optional[str]] = mapped_column(Text)
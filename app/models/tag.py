@@ -0,0 +1,38 @@
+"""Tag models."""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, UUIDPrimaryKeyMixin, utcnow
+
+
+class Tag(UUIDPrimaryKeyMixin, Base):
+    """A label applied to projects, products, collections or orders."""
+
+    __tablename__ = "tags"
+
+    name: Mapped[str] = mapped_column(String(100), unique=True)
+    color: Mapped[Optional[str]] = mapped_column(String(7))
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    usage_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+
+    __table_args__ = (Index("idx_tags_name", "name"),)
+
+
+class TagAssociation(Base):
+    """Assignment of a tag to an entity."""
+
+    __tablename__ = "tag_associations"
+
+    tag_id: Mapped[str] = mapped_column(
+        ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True
+    )
+    entity_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+    entity_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+
+    __table_args__ = (Index("idx_tag_associations_entity", "entity_type", "entity_id"),)
@@ -0,0 +1,61 @@
+"""Template and lookup models."""
+
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    false,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, TimestampMixin, UUIDPrimaryKeyMixin
+
+
+class Template(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """A saved, reusable parameter set."""
+
+    __tablename__ = "templates"
+
+    name: Mapped[str] = mapped_column(String(255))
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    provider: Mapped[str] = mapped_column(String(100))
+    model: Mapped[str] = mapped_column(String(200))
+    parameter_set: Mapped[Dict[str, Any]] = mapped_column(JSON)
+    project_id: Mapped[Optional[str]] = mapped_column(
+        ForeignKey("projects.id", ondelete="CASCADE")
+    )
+    is_global: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default=false()
+    )
+    usage_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("idx_templates_provider_model", "provider", "model"),
+        Index("idx_templates_project_id", "project_id"),
+        Index("idx_templates_is_global", "is_global"),
+    )
+
+
+class Lookup(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """Named value list used by [key] prompt tokens."""
+
+    __tablename__ = "lookups"
+
+    key: Mapped[str] = mapped_column(String(100), unique=True)
+    values: Mapped[List[Any]] = mapped_column(JSON)
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    category: Mapped[Optional[str]] = mapped_column(String(100))
+    is_system: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default=false()
+    )
+
+    __table_args__ = (
+        Index("idx_lookups_key", "key"),
+        Index("idx_lookups_category", "category"),
+    )
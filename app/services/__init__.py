@@ -0,0 +1 @@
+"""Business logic services for Art Factory application."""
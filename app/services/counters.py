@@ -0,0 +1,340 @@
+"""Denormalized counter maintenance for Art Factory.
+
+The schema keeps counts next to the rows they describe so that project
+cards and order lists never run COUNT(*):
+
+- projects.product_count: live products in the project
+- projects.order_count: live orders in the project
+- orders.completed_count / failed_count: items that completed or failed
+  (failed for good or dead-lettered, see services.retries)
+- collections.product_count: live products in the collection
+- tags.usage_count: associations, not counting deleted products
+
+CounterService keeps them current from domain events (order_created,
+product_created, product_deleted, generation_completed, generation_failed).
+Events only record ids. The first event of a tick queues one call on the
+database's WriteQueue, and that call runs inside the writer's transaction.
+It resolves the ids to the rows they affect, so it sees every write queued
+before the event. It then applies the summed deltas with one UPDATE per
+counter table. Code changing tag associations or collection membership
+reports it with adjust().
+
+Events can be missed: a crash between the write and the counter tick, or
+a hard delete before the tick runs. verify_counters() recomputes every
+count in bulk and lists the rows that drifted, and repair_counters() fixes
+them. scripts/verify_counters.py runs both from the command line.
+
+Usage:
+    counters = init_counters()
+    counters.adjust("tags.usage_count", tag.id, +1)
+    with database.engine.begin() as connection:
+        repair_counters(connection)
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Table, bindparam, text, update
+from sqlalchemy.engine import Connection
+
+from models import Base, Database
+from signals import signal_bus as default_signal_bus
+
+logger = logging.getLogger(__name__)
+
+# Bound parameters per "id IN (...)" lookup (SQLite allows 999)
+LOOKUP_CHUNK_SIZE = 500
+
+# Correct value of each "table.column" counter, as a scalar subquery over
+# the counter table's row
+COUNTER_QUERIES: Dict[str, str] = {
+    "projects.product_count": """(SELECT count(*) FROM products p
+        WHERE p.project_id = projects.id AND p.deleted_at IS NULL)""",
+    "projects.order_count": """(SELECT count(*) FROM orders o
+        WHERE o.project_id = projects.id AND o.deleted_at IS NULL)""",
+    "orders.completed_count": """(SELECT count(*) FROM order_items oi
+        WHERE oi.order_id = orders.id AND oi.status = 'complete')""",
+    "orders.failed_count": """(SELECT count(*) FROM order_items oi
+        WHERE oi.order_id = orders.id
+            AND oi.status IN ('failed', 'dead_letter'))""",
+    "collections.product_count": """(SELECT count(*)
+        FROM collection_products cp JOIN products p ON p.id = cp.product_id
+        WHERE cp.collection_id = collections.id AND p.deleted_at IS NULL)""",
+    "tags.usage_count": """(SELECT count(*) FROM tag_associations ta
+        WHERE ta.tag_id = tags.id AND (ta.entity_type != 'product'
+            OR EXISTS (SELECT 1 FROM products p
+                WHERE p.id = ta.entity_id AND p.deleted_at IS NULL)))""",
+}
+
+# How each domain event moves counters: the event, a query selecting the
+# counter row ids, the column the event's ids are matched against, the
+# counter and the delta
+EVENT_RULES: List[Tuple[str, str, str, str, int]] = [
+    ("order_created", "SELECT project_id FROM orders", "id", "projects.order_count", 1),
+    (
+        "product_created",
+        "SELECT project_id FROM products",
+        "id",
+        "projects.product_count",
+        1,
+    ),
+    (
+        "product_deleted",
+        "SELECT project_id FROM products",
+        "id",
+        "projects.product_count",
+        -1,
+    ),
+    (
+        "product_deleted",
+        "SELECT collection_id FROM collection_products",
+        "product_id",
+        "collections.product_count",
+        -1,
+    ),
+    (
+        "product_deleted",
+        "SELECT tag_id FROM tag_associations WHERE entity_type = 'product'",
+        "entity_id",
+        "tags.usage_count",
+        -1,
+    ),
+    (
+        "generation_completed",
+        "SELECT order_id FROM order_items",
+        "id",
+        "orders.completed_count",
+        1,
+    ),
+    (
+        "generation_failed",
+        "SELECT order_id FROM order_items",
+        "id",
+        "orders.failed_count",
+        1,
+    ),
+]
+
+_counter_service: Optional["CounterService"] = None
+
+
+@dataclass
+class CounterMismatch:
+    """A stored counter that differs from the recomputed count."""
+
+    table: str
+    column: str
+    row_id: str
+    stored: int
+    actual: int
+
+
+class CounterService:
+    """Applies domain events to the denormalized counters in batches.
+
+    Event slots run in the emitting thread and only record ids, so workers
+    never wait on the database to emit.
+
+    Attributes:
+        tick_count: Number of ticks that applied deltas
+        rows_updated: Counter rows changed so far
+    """
+
+    def __init__(self, database: Database, signal_bus=None):
+        """Initialize the service and connect it to the domain signals.
+
+        Args:
+            database: Database whose writer applies the deltas
+            signal_bus: Signal bus to use (defaults to the global bus)
+        """
+        self.database = database
+        self.signal_bus = signal_bus or default_signal_bus
+        self._lock = threading.Lock()
+        self._events: Dict[str, Set[str]] = defaultdict(set)
+        self._adjustments: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._armed = False
+
+        self.tick_count = 0
+        self.rows_updated = 0
+
+        domain = self.signal_bus.domain
+        for event in dict.fromkeys(rule[0] for rule in EVENT_RULES):
+            getattr(domain, event).connect(self._recorder(event))
+
+    def adjust(self, counter: str, row_id: str, delta: int):
+        """Queue a change to one counter. Safe to call from any thread.
+
+        Args:
+            counter: "table.column" of the counter, such as "tags.usage_count"
+            row_id: Id of the row to change
+            delta: Amount to add (negative to subtract)
+
+        Raises:
+            KeyError: If counter is not a maintained counter
+        """
+        if counter not in COUNTER_QUERIES:
+            raise KeyError(f"{counter} is not a maintained counter")
+        with self._lock:
+            self._adjustments[(counter, row_id)] += delta
+        self._arm()
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until every event recorded so far has been applied."""
+        self.database.writer.flush(timeout)
+
+    def _recorder(self, event: str):
+        """Return the slot recording the ids of one event."""
+
+        def record(entity_id: str, *args):
+            with self._lock:
+                self._events[event].add(entity_id)
+            self._arm()
+
+        return record
+
+    def _arm(self):
+        """Queue the tick's apply call unless one is already queued."""
+        with self._lock:
+            if self._armed:
+                return
+            self._armed = True
+        try:
+            self.database.writer.submit(self._apply)
+        except RuntimeError:
+            with self._lock:
+                self._armed = False
+            logger.warning("Database writer is not running; counters not updated")
+
+    def _apply(self, connection: Connection):
+        """Writer thread: resolve the tick's events and apply the deltas."""
+        with self._lock:
+            events = self._events
+            adjustments = self._adjustments
+            self._events = defaultdict(set)
+            self._adjustments = defaultdict(int)
+            self._armed = False
+
+        deltas: Dict[Tuple[str, str], int] = defaultdict(int)
+        for adjusted, delta in adjustments.items():
+            deltas[adjusted] += delta
+        for event, select_sql, key, counter, delta in EVENT_RULES:
+            for (row_id,) in _lookup(connection, select_sql, events[event], key):
+                if row_id is not None:
+                    deltas[(counter, row_id)] += delta
+
+        updated = _apply_deltas(connection, deltas)
+        if updated:
+            self.tick_count += 1
+            self.rows_updated += updated
+
+
+def _lookup(
+    connection: Connection, select_sql: str, ids: Set[str], key: str = "id"
+) -> List[Any]:
+    """Run select_sql for the rows whose key column is in ids, chunked."""
+    rows: List[Any] = []
+    if not ids:
+        return rows
+    joiner = " AND " if " WHERE " in select_sql else " WHERE "
+    statement = text(f"{select_sql}{joiner}{key} IN :ids").bindparams(
+        bindparam("ids", expanding=True)
+    )
+    ordered = sorted(ids)
+    for start in range(0, len(ordered), LOOKUP_CHUNK_SIZE):
+        chunk = ordered[start : start + LOOKUP_CHUNK_SIZE]
+        rows.extend(connection.execute(statement, {"ids": chunk}).all())
+    return rows
+
+
+def _apply_deltas(connection: Connection, deltas: Dict[Tuple[str, str], int]) -> int:
+    """Add deltas to their counters, one executemany UPDATE per table.
+
+    Returns:
+        int: Number of counter rows changed
+    """
+    per_table: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(
+        lambda: defaultdict(dict)
+    )
+    for (counter, row_id), delta in deltas.items():
+        if delta:
+            table_name, column = counter.split(".")
+            per_table[table_name][row_id][column] = delta
+
+    updated = 0
+    for table_name, rows in per_table.items():
+        table: Table = Base.metadata.tables[table_name]
+        columns = sorted({column for values in rows.values() for column in values})
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                {
+                    column: table.c[column] + bindparam(f"b_{column}")
+                    for column in columns
+                }
+            )
+        )
+        params = [
+            {"b_id": row_id, **{f"b_{c}": values.get(c, 0) for c in columns}}
+            for row_id, values in rows.items()
+        ]
+        connection.execute(statement, params)
+        updated += len(params)
+    return updated
+
+
+def verify_counters(connection: Connection) -> List[CounterMismatch]:
+    """Recompute every counter and return the ones that drifted."""
+    mismatches: List[CounterMismatch] = []
+    for counter, actual in COUNTER_QUERIES.items():
+        table, column = counter.split(".")
+        rows = connection.execute(
+            text(
+                f"SELECT id, stored, actual FROM (SELECT id, {column} AS stored,"
+                f" {actual} AS actual FROM {table}) WHERE stored IS NOT actual"
+            )
+        ).all()
+        mismatches.extend(
+            CounterMismatch(table, column, row_id, stored, actual)
+            for row_id, stored, actual in rows
+        )
+    return mismatches
+
+
+def repair_counters(connection: Connection) -> int:
+    """Recompute every counter in bulk, fixing any that drifted.
+
+    Returns:
+        int: Number of counter values that were wrong
+    """
+    repaired = 0
+    for counter, actual in COUNTER_QUERIES.items():
+        table, column = counter.split(".")
+        result = connection.execute(
+            text(
+                f"UPDATE {table} SET {column} = {actual}"
+                f" WHERE {column} IS NOT {actual}"
+            )
+        )
+        repaired += result.rowcount
+    if repaired:
+        logger.warning("Repaired %d denormalized counters", repaired)
+    return repaired
+
+
+def init_counters() -> CounterService:
+    """Maintain the application database's counters (deferred startup hook)."""
+    global _counter_service
+    if _counter_service is None:
+        from models.database import init_database
+
+        _counter_service = CounterService(init_database())
+    return _counter_service
+
+
+def get_counters() -> Optional[CounterService]:
+    """Return the application counter service, if initialized."""
+    return _counter_service
@@ -0,0 +1,497 @@
+"""Crash-safe journal of order item executions for Art Factory.
+
+order_items.status is written through the database's WriteQueue, a tick
+after the fact, so after a crash a "generating" row says nothing about
+whether the provider was ever called. ExecutionJournal is a write-ahead
+log next to the database that answers that question. Each record is one
+JSON line, appended in this order:
+
+- "begin" before the provider is called (durable)
+- "submitted" with the provider_request_id once the provider accepted the
+  request, so the result can be polled again later
+- "complete", "failed" or "cancelled" when the item is finished, or
+  "retrying" when a failed attempt will be retried (services.retries)
+
+A durable record is only acknowledged once it has been fsynced. fsyncs are
+batched: a sync thread writes and fsyncs everything appended so far. While
+one fsync runs, new records queue up, and the next fsync covers all of
+them, so under load each item waits for about one fsync and no record
+costs one of its own. Records that do not need to be durable ride along
+with the next sync.
+
+On startup, reconcile_journal() replays the journal against order_items
+before anything is scheduled:
+
+- items the provider accepted are re-polled: they get their
+  provider_request_id back and are returned as ScheduledItems to enqueue
+- items waiting for a retry go back to "pending": the retry submits a new
+  request, so the failed one is not polled again
+- items that began but have no request id may have been charged, so they
+  become "needs_retry" for the user to decide, instead of being re-sent
+- items that never began go back to "pending"
+- finishes the database lost are applied from the journal
+
+The journal is then compacted to the items still at the provider.
+
+Usage:
+    journal = ExecutionJournal(journal_path())
+    result = reconcile_journal(journal, database)
+    journal.open()
+    scheduler = GenerationScheduler(execute, limits, journal=journal)
+    scheduler.enqueue_many(result.resume)
+
+    def execute(item):
+        request_id = provider.submit(item)
+        item.record_request(request_id)
+        ...
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, cast
+
+from sqlalchemy import Table, bindparam, select
+from sqlalchemy.engine import Connection, Row
+
+from models import Database, Order, OrderItem
+from models.base import utcnow
+
+from .generation_scheduler import ScheduledItem
+
+logger = logging.getLogger(__name__)
+
+# Longest a record that is not durable waits for its fsync, in milliseconds
+DEFAULT_SYNC_INTERVAL_MS = 1000
+
+# Record of a failed attempt that will be retried
+RETRY_EVENT = "retrying"
+
+# Records of an item that is still in flight
+OPEN_EVENTS = ("begin", "submitted", RETRY_EVENT)
+
+# Records that finish an item, named after the order_items status they set
+FINISH_EVENTS = ("complete", "failed", "cancelled")
+
+# Item statuses reconciliation leaves alone
+FINAL_STATUSES = ("complete", "failed", "cancelled", "needs_retry", "dead_letter")
+
+# Error message of items that may have been charged without a request id
+UNACKNOWLEDGED_ERROR = (
+    "Interrupted after the provider was called but before it returned a"
+    " request id; the item may have been charged. Retry it to generate again."
+)
+
+# Bound parameters per "id IN (...)" lookup (SQLite allows 999)
+LOOKUP_CHUNK_SIZE = 500
+
+
+class JournalClosedError(RuntimeError):
+    """A record was appended to a journal that is not open."""
+
+
+@dataclass
+class JournalState:
+    """Latest known state of one item, replayed from the journal."""
+
+    item_id: str
+    event: str
+    provider_id: Optional[str] = None
+    request_id: Optional[str] = None
+    error: Optional[str] = None
+    updated_at: float = 0.0
+
+    @property
+    def open(self) -> bool:
+        """Whether the item was still in flight."""
+        return self.event in OPEN_EVENTS
+
+
+@dataclass
+class ReconcileResult:
+    """What reconcile_journal() did with each interrupted item."""
+
+    # Items the provider accepted, to enqueue again so they are polled
+    resume: List[ScheduledItem] = field(default_factory=list)
+    # Items that may have been charged, now "needs_retry"
+    retry: List[str] = field(default_factory=list)
+    # Items that never reached the provider, back to "pending"
+    requeued: List[str] = field(default_factory=list)
+    # Items whose finish was journalled but not written to the database
+    closed: List[str] = field(default_factory=list)
+
+
+class ExecutionJournal:
+    """Append-only, group-committed log of order item executions.
+
+    Appending is safe from any thread. Every append returns a Future that
+    resolves once the record is fsynced; durable appends make the sync
+    start at once, others wait for it at most sync_interval_ms.
+
+    Attributes:
+        path: Journal file
+        record_count: Records appended since open()
+        sync_count: fsyncs since open(); record_count / sync_count is the
+            batching factor
+    """
+
+    def __init__(self, path, sync_interval_ms: int = DEFAULT_SYNC_INTERVAL_MS):
+        """Initialize a closed journal.
+
+        Args:
+            path: Journal file; created on open()
+            sync_interval_ms: Longest wait of records that are not durable
+        """
+        self.path = Path(path)
+        self.record_count = 0
+        self.sync_count = 0
+        self._sync_interval = sync_interval_ms / 1000
+        self._condition = threading.Condition()
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        # Futures of records written since the last sync
+        self._unsynced: List[Future] = []
+        self._durable_pending = False
+
+    @property
+    def is_open(self) -> bool:
+        """Whether records can be appended."""
+        return self._file is not None
+
+    def open(self):
+        """Open the file for appending and start the sync thread."""
+        with self._condition:
+            if self._file is not None:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "ab")
+            self._closing = False
+            self._thread = threading.Thread(
+                target=self._sync_loop, name="ExecutionJournalSync", daemon=True
+            )
+            self._thread.start()
+
+    def close(self):
+        """Sync every appended record and close the file."""
+        with self._condition:
+            if self._file is None:
+                return
+            self._closing = True
+            self._condition.notify()
+        self._thread.join()
+        with self._condition:
+            self._file.close()
+            self._file = None
+            self._thread = None
+
+    def append(
+        self, item_id: str, event: str, durable: bool = False, **values
+    ) -> Future:
+        """Append one record.
+
+        Args:
+            item_id: Order item the record is about
+            event: One of OPEN_EVENTS or FINISH_EVENTS
+            durable: Sync now instead of within sync_interval_ms
+            **values: Other fields (provider, request_id, error)
+
+        Returns:
+            Future: Resolves once the record is on disk
+
+        Raises:
+            JournalClosedError: If the journal is not open
+        """
+        record = {"item": item_id, "event": event, "t": round(time.time(), 3)}
+        record.update((key, value) for key, value in values.items() if value)
+        line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+        future: Future = Future()
+        with self._condition:
+            if self._file is None or self._closing:
+                raise JournalClosedError(f"Journal {self.path} is not open")
+            self._file.write(line)
+            self.record_count += 1
+            self._unsynced.append(future)
+            if durable and not self._durable_pending:
+                self._durable_pending = True
+                self._condition.notify()
+        return future
+
+    def begin(
+        self, item_id: str, provider_id: str, request_id: Optional[str] = None
+    ) -> Future:
+        """Record that an item is about to call its provider (durable).
+
+        Wait for the returned future before calling the provider. A resumed
+        item passes the request_id it is polling instead.
+        """
+        if request_id is not None:
+            return self.append(
+                item_id, "submitted", provider=provider_id, request_id=request_id
+            )
+        return self.append(item_id, "begin", durable=True, provider=provider_id)
+
+    def submitted(self, item_id: str, request_id: str) -> Future:
+        """Record the provider's request id for an item (durable)."""
+        return self.append(item_id, "submitted", durable=True, request_id=request_id)
+
+    def finish(self, item_id: str, status: str, error: Optional[str] = None) -> Future:
+        """Record the outcome of an attempt (FINISH_EVENTS or RETRY_EVENT)."""
+        if status not in FINISH_EVENTS and status != RETRY_EVENT:
+            raise ValueError(f"Unknown finish status {status!r}")
+        return self.append(item_id, status, error=error)
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until every record appended so far is on disk."""
+        with self._condition:
+            pending = list(self._unsynced)
+            self._durable_pending = True
+            self._condition.notify()
+        for future in pending:
+            future.result(timeout)
+
+    def replay(self) -> Dict[str, JournalState]:
+        """Return the latest state of every item in the journal file.
+
+        A record cut short by a crash can only be the last line; it is
+        skipped, as if it had not been written.
+        """
+        states: Dict[str, JournalState] = {}
+        if not self.path.exists():
+            return states
+        with open(self.path, "rb") as handle:
+            for number, line in enumerate(handle, 1):
+                try:
+                    record = json.loads(line)
+                    item_id = record["item"]
+                    event = record["event"]
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("Skipping torn journal record at line %d", number)
+                    continue
+                state = states.get(item_id)
+                if state is None:
+                    state = states[item_id] = JournalState(item_id, event)
+                state.event = event
+                if event == RETRY_EVENT:
+                    # The retry sends a new request
+                    state.request_id = None
+                state.updated_at = record.get("t", 0.0)
+                state.provider_id = record.get("provider", state.provider_id)
+                state.request_id = record.get("request_id", state.request_id)
+                state.error = record.get("error")
+        return states
+
+    def compact(self, keep: List[JournalState]):
+        """Replace the file with one "submitted" record per kept item.
+
+        Only allowed while the journal is closed; the new file is fsynced
+        and renamed over the old one, so a crash leaves either of them.
+        """
+        if self.is_open:
+            raise RuntimeError("Compact the journal before open()")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with open(temporary, "wb") as handle:
+            for state in keep:
+                record = {
+                    "item": state.item_id,
+                    "event": "submitted",
+                    "t": state.updated_at,
+                    "provider": state.provider_id,
+                    "request_id": state.request_id,
+                }
+                handle.write(json.dumps(record, separators=(",", ":")).encode())
+                handle.write(b"\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self.path)
+        _fsync_directory(self.path.parent)
+
+    def _sync_loop(self):
+        """Sync thread: write and fsync batches of records."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._durable_pending or self._closing,
+                    self._sync_interval,
+                )
+                closing = self._closing
+                batch, self._unsynced = self._unsynced, []
+                self._durable_pending = False
+                if batch:
+                    self._file.flush()
+                    descriptor = self._file.fileno()
+            if batch:
+                # Outside the lock, so records keep arriving for the next batch
+                try:
+                    os.fsync(descriptor)
+                except OSError as error:
+                    for future in batch:
+                        future.set_exception(error)
+                else:
+                    self.sync_count += 1
+                    for future in batch:
+                        future.set_result(None)
+            if closing:
+                return
+
+
+def _fsync_directory(directory: Path):
+    """Make a rename in directory durable (no-op where unsupported)."""
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def reconcile_journal(journal: ExecutionJournal, database: Database) -> ReconcileResult:
+    """Settle items interrupted by a crash, then compact the journal.
+
+    Call before journal.open() and before anything is scheduled. The
+    database changes are made in one transaction on its writer.
+
+    Args:
+        journal: Closed journal of the previous run
+        database: Started database holding the order items
+
+    Returns:
+        ReconcileResult: What happened to each interrupted item
+    """
+    states = journal.replay()
+    result = ReconcileResult()
+    database.writer.submit(
+        lambda connection: _reconcile(connection, states, result)
+    ).result()
+    journal.compact([states[item.item_id] for item in result.resume])
+    if result.resume or result.retry or result.requeued or result.closed:
+        logger.warning(
+            "Execution journal: %d items resumed, %d need retry, %d requeued,"
+            " %d finished",
+            len(result.resume),
+            len(result.retry),
+            len(result.requeued),
+            len(result.closed),
+        )
+    return result
+
+
+def _reconcile(
+    connection: Connection,
+    states: Dict[str, JournalState],
+    result: ReconcileResult,
+):
+    """Writer thread: compare in-flight items with the journal and fix them."""
+    columns = (
+        OrderItem.id,
+        OrderItem.status,
+        Order.provider,
+        Order.project_id,
+        OrderItem.retry_count,
+    )
+    base = select(*columns).join(Order, Order.id == OrderItem.order_id)
+    rows: Dict[str, Row] = {
+        row[0]: row
+        for row in connection.execute(base.where(OrderItem.status == "generating"))
+    }
+    # Journalled items too: the status writes may have been lost with the crash
+    journalled = sorted(item_id for item_id in states if item_id not in rows)
+    statement = base.where(OrderItem.id.in_(bindparam("ids", expanding=True)))
+    for start in range(0, len(journalled), LOOKUP_CHUNK_SIZE):
+        chunk = journalled[start : start + LOOKUP_CHUNK_SIZE]
+        for row in connection.execute(statement, {"ids": chunk}):
+            rows[row[0]] = row
+
+    updates: Dict[str, Dict[str, Any]] = {}
+    now = utcnow()
+    for item_id, status, provider_id, project_id, retry_count in rows.values():
+        if status in FINAL_STATUSES:
+            # The database already has the outcome the journal lost
+            continue
+        state = states.get(item_id)
+        if state is None:
+            result.requeued.append(item_id)
+            updates[item_id] = {"status": "pending", "started_at": None}
+        elif state.event == "begin":
+            result.retry.append(item_id)
+            updates[item_id] = {
+                "status": "needs_retry",
+                "error_message": UNACKNOWLEDGED_ERROR,
+            }
+        elif state.event == RETRY_EVENT:
+            result.requeued.append(item_id)
+            updates[item_id] = {"status": "pending", "provider_request_id": None}
+        elif state.event in OPEN_EVENTS:
+            result.resume.append(
+                ScheduledItem(
+                    item_id,
+                    state.provider_id or provider_id,
+                    project_id,
+                    provider_request_id=state.request_id,
+                    attempts=retry_count,
+                )
+            )
+            updates[item_id] = {
+                "status": "generating",
+                "provider_request_id": state.request_id,
+            }
+        else:
+            result.closed.append(item_id)
+            values: Dict[str, Any] = {"status": state.event}
+            if state.event == "complete":
+                values["completed_at"] = now
+            if state.error:
+                values["error_message"] = state.error
+            updates[item_id] = values
+
+    table = cast(Table, OrderItem.__table__)
+    for item_id, values in updates.items():
+        connection.execute(table.update().where(table.c.id == item_id).values(**values))
+
+
+_execution_journal: Optional[ExecutionJournal] = None
+_last_reconcile: Optional[ReconcileResult] = None
+
+
+def init_execution_journal() -> ExecutionJournal:
+    """Reconcile and open the application journal (deferred startup hook).
+
+    Items to re-poll are kept for the generation scheduler; see
+    last_reconcile().
+    """
+    global _execution_journal, _last_reconcile
+    if _execution_journal is None:
+        from models.database import init_database
+        from utils.file_utils import journal_path
+
+        journal = ExecutionJournal(journal_path())
+        _last_reconcile = reconcile_journal(journal, init_database())
+        journal.open()
+        _execution_journal = journal
+
+        from PyQt6.QtCore import QCoreApplication
+
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(journal.close)
+    return _execution_journal
+
+
+def get_execution_journal() -> Optional[ExecutionJournal]:
+    """Return the application journal, if initialized."""
+    return _execution_journal
+
+
+def last_reconcile() -> Optional[ReconcileResult]:
+    """Return what startup reconciliation did, if it has run."""
+    return _last_reconcile
@@ -0,0 +1,715 @@
+"""Provider-aware generation scheduler for Art Factory.
+
+Order items are queued per provider and dispatched to a worker pool while
+respecting each provider's limits from the providers table:
+
+- rate_limit_requests and rate_limit_tokens (per minute) become token
+  buckets, so bursts are smoothed instead of rejected by the provider
+- concurrent_limit caps the items running at once per provider
+- two priority lanes: "interactive" items (a user waiting on one image)
+  go ahead of "bulk" items, with bulk guaranteed one slot in every
+  INTERACTIVE_BURST + 1 dispatches so large orders never starve
+- within a lane, projects take turns, so one project's 10k item order
+  does not hold up another project's handful of items
+
+Lifecycle is reported on the signal bus (generation_started, _completed,
+_failed, _cancelled) and queue depth and wait times are published through
+domain.scheduler_stats whenever the counts change, at most once per stats
+interval. ui.request_cancel cancels queued items immediately and signals
+running ones to stop. stop() signals running items to stop too, but marks
+them interrupted rather than cancelled: they are neither reported nor
+journalled as finished, so the journal resumes them on the next start.
+
+With a RetryController (services.retries), failures it classifies as
+transient pause the provider and put the item back after a backoff
+delay, instead of reporting generation_failed straight away.
+
+execute may be a plain function, run on a worker thread pool, or a
+coroutine function, run on the shared asyncio loop thread so hundreds of
+in-flight provider polls cost no threads of their own. With an
+ExecutionJournal, each item's execution is journalled so a crash can be
+reconciled on the next start (see services.execution_journal).
+
+Usage:
+    scheduler = GenerationScheduler(factory.generate, limits)
+    scheduler.start()
+    scheduler.enqueue(ScheduledItem(item.id, "replicate", project_id))
+"""
+
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from signals import signal_bus as default_signal_bus
+from utils.async_loop import AsyncLoopThread, init_async_loop
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+# Interactive items dispatched in a row before a waiting bulk item gets a turn
+INTERACTIVE_BURST = 4
+
+# Concurrency for providers without a concurrent_limit
+DEFAULT_CONCURRENT_LIMIT = 4
+
+# Items running at once across all providers (worker threads when synchronous)
+DEFAULT_MAX_WORKERS = 32
+
+# Minimum interval between scheduler_stats emissions
+DEFAULT_STATS_INTERVAL_MS = 250
+
+# Bucket capacity in seconds of refill, i.e. the largest burst allowed
+BURST_SECONDS = 1.0
+
+Clock = Callable[[], float]
+
+
+class TokenBucket:
+    """Classic token bucket: refills at a fixed rate up to a capacity."""
+
+    def __init__(self, rate: float, capacity: float, clock: Clock = time.monotonic):
+        """Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held
+            clock: Monotonic clock in seconds
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    @classmethod
+    def per_minute(cls, limit: int, clock: Clock = time.monotonic) -> "TokenBucket":
+        """Create a bucket for a per-minute limit."""
+        rate = limit / 60
+        return cls(rate, max(1.0, rate * BURST_SECONDS), clock)
+
+    def delay(self, amount: float = 1) -> float:
+        """Return seconds until amount tokens are available (0 if now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self.rate
+
+    def consume(self, amount: float = 1):
+        """Take tokens; call only after delay() returned 0."""
+        self._tokens -= min(amount, self.capacity)
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+
+@dataclass
+class ProviderLimits:
+    """Scheduling limits of one provider, as stored in the providers table."""
+
+    provider_id: str
+    rate_limit_requests: Optional[int] = None  # per minute
+    rate_limit_tokens: Optional[int] = None  # per minute
+    concurrent_limit: Optional[int] = None
+
+    @classmethod
+    def from_provider(cls, provider) -> "ProviderLimits":
+        """Build limits from a models.Provider row."""
+        return cls(
+            provider.id,
+            provider.rate_limit_requests,
+            provider.rate_limit_tokens,
+            provider.concurrent_limit,
+        )
+
+
+@dataclass
+class ScheduledItem:
+    """An order item waiting for, or holding, a provider slot.
+
+    The cancel_event is set when the item is cancelled, or with interrupted
+    when the scheduler stops; generation code should check it between
+    steps. An item with a provider_request_id was
+    accepted by the provider before a restart: execute should poll that
+    request instead of submitting a new one.
+    """
+
+    item_id: str
+    provider_id: str
+    project_id: Optional[str] = None
+    lane: str = BULK
+    tokens: int = 1
+    payload: Any = None
+    enqueued_at: float = 0.0
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    provider_request_id: Optional[str] = None
+    # Execution journal of the scheduler running the item, if it has one
+    journal: Any = None
+    # Failed attempts so far (order_items.retry_count)
+    attempts: int = 0
+    # Stopped by a scheduler shutdown, to be resumed rather than cancelled
+    interrupted: bool = False
+
+    def record_request(self, request_id: str) -> Optional[Future]:
+        """Note the provider's request id, durably if the item is journalled.
+
+        Returns:
+            Optional[Future]: Resolves once the journal has the id on disk
+        """
+        self.provider_request_id = request_id
+        if self.journal is None:
+            return None
+        return self.journal.submitted(self.item_id, request_id)
+
+
+class _Lane:
+    """Per-project FIFO queues served round-robin."""
+
+    def __init__(self):
+        self._projects: "OrderedDict[Optional[str], Deque[ScheduledItem]]" = (
+            OrderedDict()
+        )
+
+    def append(self, item: ScheduledItem):
+        self._projects.setdefault(item.project_id, deque()).append(item)
+
+    def peek(self) -> Optional[ScheduledItem]:
+        """Return the next item, dropping cancelled ones on the way."""
+        while self._projects:
+            project_id, items = next(iter(self._projects.items()))
+            while items and items[0].cancel_event.is_set():
+                items.popleft()
+            if items:
+                return items[0]
+            del self._projects[project_id]
+        return None
+
+    def pop(self) -> ScheduledItem:
+        """Remove the peeked item and pass the turn to the next project."""
+        project_id, items = next(iter(self._projects.items()))
+        item = items.popleft()
+        if items:
+            self._projects.move_to_end(project_id)
+        else:
+            del self._projects[project_id]
+        return item
+
+
+class _ProviderQueue:
+    """Lanes, limits and statistics for one provider."""
+
+    def __init__(self, limits: ProviderLimits, clock: Clock):
+        self.limits = limits
+        self.clock = clock
+        # Clock time before which nothing is dispatched (see pause())
+        self.paused_until = 0.0
+        self.lanes = {lane: _Lane() for lane in LANES}
+        self.queued = 0
+        self.running = 0
+        self.interactive_streak = 0
+        self.concurrent_limit = limits.concurrent_limit or DEFAULT_CONCURRENT_LIMIT
+        self.request_bucket = (
+            TokenBucket.per_minute(limits.rate_limit_requests, clock)
+            if limits.rate_limit_requests
+            else None
+        )
+        self.token_bucket = (
+            TokenBucket.per_minute(limits.rate_limit_tokens, clock)
+            if limits.rate_limit_tokens
+            else None
+        )
+        self.wait_total = 0.0
+        self.wait_count = 0
+        self.max_wait = 0.0
+
+    def next_lane(self) -> Optional[str]:
+        """Pick the lane to serve next, or None if both are empty."""
+        interactive = self.lanes[INTERACTIVE].peek()
+        bulk = self.lanes[BULK].peek()
+        if interactive is None:
+            return BULK if bulk is not None else None
+        if bulk is not None and self.interactive_streak >= INTERACTIVE_BURST:
+            return BULK
+        return INTERACTIVE
+
+    def rate_delay(self, item: ScheduledItem) -> float:
+        """Seconds until the rate limits and any pause allow this item."""
+        delay = max(0.0, self.paused_until - self.clock())
+        if self.request_bucket is not None:
+            delay = max(delay, self.request_bucket.delay(1))
+        if self.token_bucket is not None:
+            delay = max(delay, self.token_bucket.delay(item.tokens))
+        return delay
+
+    def consume(self, item: ScheduledItem):
+        if self.request_bucket is not None:
+            self.request_bucket.consume(1)
+        if self.token_bucket is not None:
+            self.token_bucket.consume(item.tokens)
+
+
+class GenerationScheduler:
+    """Dispatch queued order items to workers within provider limits.
+
+    A dispatcher thread decides what runs next; execute(item) runs on a
+    shared worker pool, or as a task on the asyncio loop thread when it is
+    a coroutine function, and its return value is ignored. An exception
+    marks the item failed, unless the item was cancelled, in which case it
+    is reported as cancelled. Cancelling a running coroutine also cancels
+    its task.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[ScheduledItem], Any],
+        limits: Iterable[ProviderLimits] = (),
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        stats_interval_ms: int = DEFAULT_STATS_INTERVAL_MS,
+        signal_bus=None,
+        clock: Clock = time.monotonic,
+        async_loop: Optional[AsyncLoopThread] = None,
+        journal=None,
+        retry=None,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            execute: Callable that generates one item
+            limits: Limits per provider; unknown providers get defaults
+            max_workers: Items running at once across all providers
+            stats_interval_ms: Minimum interval between stats emissions
+            signal_bus: Signal bus to report on (defaults to the global bus)
+            clock: Monotonic clock in seconds
+            async_loop: Loop for coroutine execute functions (defaults to
+                the application loop)
+            journal: Open ExecutionJournal recording each item's execution
+            retry: RetryController deciding which failures are retried
+        """
+        self._execute = execute
+        self._is_async = asyncio.iscoroutinefunction(execute)
+        self._async_loop = async_loop
+        self._journal = journal
+        self._retry = retry
+        self._clock = clock
+        self._max_workers = max_workers
+        self._stats_interval = stats_interval_ms / 1000
+        self.signal_bus = signal_bus or default_signal_bus
+
+        self._condition = threading.Condition()
+        self._providers: Dict[str, _ProviderQueue] = {}
+        self._provider_order: Deque[str] = deque()
+        self._items: Dict[str, ScheduledItem] = {}
+        self._running: Dict[str, ScheduledItem] = {}
+        # Items waiting out a retry delay: (due time, sequence, item)
+        self._delayed: List[Tuple[float, int, ScheduledItem]] = []
+        self._delayed_items: Dict[str, ScheduledItem] = {}
+        self._delay_sequence = 0
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: Dict[str, Future] = {}
+        self._stopping = False
+        self._last_stats = 0.0
+        # Counts of the last scheduler_stats emission, to skip repeats
+        self._last_counts: Optional[Tuple] = None
+
+        for provider_limits in limits:
+            self.set_limits(provider_limits)
+
+        self.signal_bus.ui.request_cancel.connect(self.cancel)
+
+    def set_limits(self, limits: ProviderLimits):
+        """Add or replace a provider's limits; queued items are kept."""
+        with self._condition:
+            previous = self._providers.get(limits.provider_id)
+            queue = _ProviderQueue(limits, self._clock)
+            if previous is None:
+                self._provider_order.append(limits.provider_id)
+            else:
+                queue.lanes = previous.lanes
+                queue.queued = previous.queued
+                queue.running = previous.running
+                queue.paused_until = previous.paused_until
+            self._providers[limits.provider_id] = queue
+            self._condition.notify()
+
+    def start(self):
+        """Start the dispatcher thread and worker pool."""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            if self._is_async:
+                if self._async_loop is None:
+                    self._async_loop = init_async_loop()
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self._max_workers, thread_name_prefix="generation"
+                )
+            self._thread = threading.Thread(
+                target=self._dispatch_loop, name="generation-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """Stop dispatching; running items are signalled to stop.
+
+        They are marked interrupted, so they stay in flight in the journal
+        instead of being reported cancelled.
+        """
+        with self._condition:
+            if self._thread is None:
+                return
+            self._stopping = True
+            for item in self._running.values():
+                if not item.cancel_event.is_set():
+                    item.interrupted = True
+                item.cancel_event.set()
+            for task in self._tasks.values():
+                task.cancel()
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def enqueue(self, item: ScheduledItem):
+        """Queue one item."""
+        self.enqueue_many([item])
+
+    def enqueue_many(self, items: Iterable[ScheduledItem]):
+        """Queue items under a single lock acquisition."""
+        now = self._clock()
+        with self._condition:
+            for item in items:
+                if item.lane not in LANES:
+                    raise ValueError(f"Unknown lane {item.lane!r}")
+                queue = self._providers.get(item.provider_id)
+                if queue is None:
+                    self.set_limits(ProviderLimits(item.provider_id))
+                    queue = self._providers[item.provider_id]
+                item.enqueued_at = now
+                self._items[item.item_id] = item
+                queue.lanes[item.lane].append(item)
+                queue.queued += 1
+            self._condition.notify()
+
+    def enqueue_later(self, item: ScheduledItem, delay: float):
+        """Queue an item once delay seconds have passed."""
+        with self._condition:
+            self._delay_sequence += 1
+            heapq.heappush(
+                self._delayed, (self._clock() + delay, self._delay_sequence, item)
+            )
+            self._delayed_items[item.item_id] = item
+            self._condition.notify()
+
+    def pause(self, provider_id: str, seconds: float):
+        """Dispatch nothing to a provider for the next seconds.
+
+        A shorter pause never cuts an earlier, longer one short.
+        """
+        with self._condition:
+            queue = self._providers.get(provider_id)
+            if queue is None:
+                self.set_limits(ProviderLimits(provider_id))
+                queue = self._providers[provider_id]
+            queue.paused_until = max(queue.paused_until, self._clock() + seconds)
+            self._condition.notify()
+
+    def cancel(self, item_id: str) -> bool:
+        """Cancel a queued or running item.
+
+        Queued items are dropped immediately; running items have their
+        cancel_event set and are reported when execute() returns.
+
+        Returns:
+            bool: True if the item was queued or running
+        """
+        with self._condition:
+            item = self._running.get(item_id)
+            if item is not None:
+                item.cancel_event.set()
+                task = self._tasks.get(item_id)
+                if task is not None:
+                    task.cancel()
+                return True
+            item = self._delayed_items.pop(item_id, None)
+            if item is not None:
+                # Dropped from the heap when it comes due
+                item.cancel_event.set()
+            else:
+                item = self._items.pop(item_id, None)
+                if item is None:
+                    return False
+                # The dispatcher drops cancelled items when they reach the head
+                item.cancel_event.set()
+                self._providers[item.provider_id].queued -= 1
+                self._condition.notify()
+        self.signal_bus.domain.generation_cancelled.emit(item_id)
+        return True
+
+    def queued_count(self, provider_id: Optional[str] = None) -> int:
+        """Return the number of queued items, optionally for one provider."""
+        with self._condition:
+            if provider_id is not None:
+                queue = self._providers.get(provider_id)
+                return queue.queued if queue else 0
+            return sum(queue.queued for queue in self._providers.values())
+
+    def delayed_count(self) -> int:
+        """Return the number of items waiting out a retry delay."""
+        with self._condition:
+            return len(self._delayed_items)
+
+    def running_count(self, provider_id: Optional[str] = None) -> int:
+        """Return the number of running items, optionally for one provider."""
+        with self._condition:
+            if provider_id is not None:
+                queue = self._providers.get(provider_id)
+                return queue.running if queue else 0
+            return len(self._running)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return queue depth and wait times per provider.
+
+        Wait statistics cover items dispatched since the previous call.
+        """
+        with self._condition:
+            return self._collect_stats()
+
+    def _collect_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for provider_id, queue in self._providers.items():
+            count = queue.wait_count
+            stats[provider_id] = {
+                "queued": queue.queued,
+                "running": queue.running,
+                "concurrent_limit": queue.concurrent_limit,
+                "dispatched": count,
+                "wait_ms_avg": (
+                    round(queue.wait_total / count * 1000, 1) if count else 0.0
+                ),
+                "wait_ms_max": round(queue.max_wait * 1000, 1),
+                "paused_s": round(max(0.0, queue.paused_until - self._clock()), 1),
+            }
+            queue.wait_total = 0.0
+            queue.wait_count = 0
+            queue.max_wait = 0.0
+        return stats
+
+    def _dispatch_loop(self):
+        """Dispatcher thread: start items whenever limits allow."""
+        with self._condition:
+            while not self._stopping:
+                due = self._release_delayed()
+                started, delay = self._dispatch_ready()
+                if due is not None:
+                    delay = due if delay is None else min(delay, due)
+                report_in = self._maybe_report()
+                if not started:
+                    if report_in is not None:
+                        delay = report_in if delay is None else min(delay, report_in)
+                    self._condition.wait(delay)
+
+    def _release_delayed(self) -> Optional[float]:
+        """Queue the delayed items that are due (lock held).
+
+        Returns:
+            Optional[float]: Seconds until the next delayed item is due
+        """
+        now = self._clock()
+        released = []
+        while self._delayed and self._delayed[0][0] <= now:
+            _due, _sequence, item = heapq.heappop(self._delayed)
+            if self._delayed_items.pop(item.item_id, None) is item:
+                released.append(item)
+        if released:
+            self.enqueue_many(released)
+        if self._delayed:
+            return self._delayed[0][0] - now
+        return None
+
+    def _dispatch_ready(self) -> Tuple[bool, Optional[float]]:
+        """Start every item that can run now (lock held).
+
+        Returns:
+            Tuple[bool, Optional[float]]: Whether anything started, and the
+            shortest rate-limit delay among blocked providers
+        """
+        started = False
+        shortest: Optional[float] = None
+        for _ in range(len(self._provider_order)):
+            provider_id = self._provider_order[0]
+            self._provider_order.rotate(-1)
+            queue = self._providers[provider_id]
+            while queue.running < queue.concurrent_limit:
+                if len(self._running) >= self._max_workers:
+                    return started, shortest
+                lane = queue.next_lane()
+                if lane is None:
+                    break
+                item = queue.lanes[lane].peek()
+                if item is None:
+                    break
+                delay = queue.rate_delay(item)
+                if delay > 0:
+                    shortest = delay if shortest is None else min(shortest, delay)
+                    break
+                queue.consume(item)
+                queue.lanes[lane].pop()
+                queue.interactive_streak = (
+                    queue.interactive_streak + 1 if lane == INTERACTIVE else 0
+                )
+                self._start(queue, item)
+                started = True
+        return started, shortest
+
+    def _start(self, queue: _ProviderQueue, item: ScheduledItem):
+        """Hand an item to the worker pool (lock held)."""
+        wait = self._clock() - item.enqueued_at
+        queue.wait_total += wait
+        queue.wait_count += 1
+        queue.max_wait = max(queue.max_wait, wait)
+        queue.queued -= 1
+        queue.running += 1
+        self._items.pop(item.item_id, None)
+        self._running[item.item_id] = item
+        # start() created the loop or the executor before anything runs
+        if self._is_async:
+            assert self._async_loop is not None
+            self._tasks[item.item_id] = self._async_loop.submit(self._run_async(item))
+        else:
+            assert self._executor is not None
+            self._executor.submit(self._run, item)
+
+    def _run(self, item: ScheduledItem):
+        """Worker thread: execute one item and report its outcome."""
+        self.signal_bus.domain.generation_started.emit(item.item_id)
+        error: Optional[BaseException] = None
+        try:
+            if self._journal is not None:
+                self._begin(item).result()
+            self._execute(item)
+        except Exception as exc:
+            error = exc
+        finally:
+            self._finish(item)
+        self._report(item, error)
+
+    async def _run_async(self, item: ScheduledItem):
+        """Loop thread: await one item and report its outcome."""
+        self.signal_bus.domain.generation_started.emit(item.item_id)
+        error: Optional[BaseException] = None
+        try:
+            if self._journal is not None:
+                await asyncio.wrap_future(self._begin(item))
+            await self._execute(item)
+        except asyncio.CancelledError:
+            item.cancel_event.set()
+        except Exception as exc:
+            error = exc
+        finally:
+            self._finish(item)
+        self._report(item, error)
+
+    def _begin(self, item: ScheduledItem) -> Future:
+        """Journal that the item is about to call its provider."""
+        item.journal = self._journal
+        return self._journal.begin(
+            item.item_id, item.provider_id, item.provider_request_id
+        )
+
+    def _finish(self, item: ScheduledItem):
+        """Release the item's provider slot."""
+        with self._condition:
+            self._running.pop(item.item_id, None)
+            self._tasks.pop(item.item_id, None)
+            self._providers[item.provider_id].running -= 1
+            self._condition.notify()
+
+    def _report(self, item: ScheduledItem, error: Optional[BaseException]):
+        """Emit the item's final lifecycle signal, or queue its retry."""
+        domain = self.signal_bus.domain
+        if item.interrupted:
+            # Left open in the journal for the next start to resume
+            logger.info("Generation of %s interrupted by shutdown", item.item_id)
+            return
+        if item.cancel_event.is_set():
+            status = "cancelled"
+            domain.generation_cancelled.emit(item.item_id)
+        elif error is not None:
+            decision = self._retry.on_failure(item, error) if self._retry else None
+            if decision is not None and decision.provider_pause:
+                self.pause(item.provider_id, decision.provider_pause)
+            if decision is not None and decision.delay is not None:
+                status = "retrying"
+                logger.info(
+                    "Retrying %s in %.1fs (attempt %d): %s",
+                    item.item_id,
+                    decision.delay,
+                    item.attempts,
+                    error,
+                )
+                self.enqueue_later(item, decision.delay)
+                domain.generation_retrying.emit(
+                    item.item_id, item.attempts, decision.delay
+                )
+            else:
+                status = "failed"
+                logger.warning("Generation of %s failed: %s", item.item_id, error)
+                domain.generation_failed.emit(item.item_id, str(error))
+        else:
+            status = "complete"
+            if self._retry is not None:
+                self._retry.on_success(item)
+            domain.generation_completed.emit(item.item_id)
+        if item.journal is not None:
+            try:
+                item.journal.finish(
+                    item.item_id, status, str(error) if error is not None else None
+                )
+            except RuntimeError as exc:
+                # Closed during shutdown; the item is reconciled on next start
+                logger.warning("Could not journal %s: %s", item.item_id, exc)
+
+    def _maybe_report(self) -> Optional[float]:
+        """Emit scheduler_stats if the counts changed (lock held).
+
+        Emissions are at least an interval apart.
+
+        Returns:
+            Optional[float]: Seconds until a held back emission is due
+        """
+        counts = tuple(
+            (
+                provider_id,
+                queue.queued,
+                queue.running,
+                queue.concurrent_limit,
+                queue.paused_until,
+            )
+            for provider_id, queue in self._providers.items()
+        )
+        if counts == self._last_counts:
+            return None
+        wait = self._last_stats + self._stats_interval - self._clock()
+        if wait > 0:
+            return wait
+        self._last_stats = self._clock()
+        self._last_counts = counts
+        self.signal_bus.domain.scheduler_stats.emit(self._collect_stats())
+        return None
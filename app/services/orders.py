@@ -0,0 +1,113 @@
+"""Order creation for Art Factory.
+
+create_order() expands an order's base parameter set and writes the order
+and its items through the database's WriteQueue. The item count is checked
+in closed form before anything is written. Items are then expanded lazily
+and queued in chunks with stream_order_items(), at most
+MAX_PENDING_CHUNKS ahead of the writer, so a 100k item order neither
+builds its rows in memory nor lands in the writer as one huge insert.
+domain.order_items_expanded reports progress per chunk, and
+domain.order_created is emitted once every item is committed.
+
+Usage:
+    order_id = create_order(
+        database,
+        "replicate",
+        "flux",
+        {"prompt": "[color] cat", "steps": "8,20"},
+        project_id=project.id,
+        lookups={"color": ["red", "blue"]},
+    )
+"""
+
+import logging
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, List, Mapping, Optional, Sequence, cast
+
+from sqlalchemy import Table
+
+from models import Database, Order
+from models.base import new_id
+from signals import signal_bus as default_signal_bus
+from utils.order_expansion import (
+    DEFAULT_CHUNK_SIZE,
+    ExpansionError,
+    OrderExpander,
+    stream_order_items,
+)
+
+logger = logging.getLogger(__name__)
+
+# Most items one order may expand to
+DEFAULT_MAX_ITEMS = 100_000
+
+# Item chunks queued on the writer before waiting for the oldest one
+MAX_PENDING_CHUNKS = 4
+
+
+def create_order(
+    database: Database,
+    provider: str,
+    model: str,
+    base_parameter_set: Mapping[str, Any],
+    project_id: Optional[str] = None,
+    lookups: Optional[Mapping[str, Sequence[Any]]] = None,
+    max_items: int = DEFAULT_MAX_ITEMS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    signal_bus=None,
+) -> str:
+    """Write an order and its expanded items; returns the order id.
+
+    Args:
+        database: Database whose writer stores the rows
+        provider: Provider id the order is sent to
+        model: Model name at the provider
+        base_parameter_set: Parameters to expand (see utils.order_expansion)
+        project_id: Project the order belongs to
+        lookups: Lookup values by key, for [key] tokens
+        max_items: Largest expansion accepted
+        chunk_size: Items per insert on the writer
+        signal_bus: Signal bus to emit on (defaults to the global bus)
+
+    Raises:
+        ExpansionError: If the parameters cannot be expanded or expand to
+            more than max_items items
+    """
+    bus = signal_bus or default_signal_bus
+    expander = OrderExpander(base_parameter_set, lookups)
+    count = expander.count()
+    if count > max_items:
+        raise ExpansionError(
+            f"Order expands to {count} items; at most {max_items} are allowed"
+        )
+
+    order_id = new_id()
+    writer = database.writer
+    writer.insert(
+        cast(Table, Order.__table__),
+        [
+            {
+                "id": order_id,
+                "project_id": project_id,
+                "provider": provider,
+                "model": model,
+                "base_parameter_set": dict(base_parameter_set),
+                "expanded_count": count,
+            }
+        ],
+    )
+
+    pending: Deque[Future] = deque()
+
+    def insert_chunk(rows: List[Dict[str, Any]]) -> None:
+        pending.append(writer.insert_order_items(rows))
+        if len(pending) > MAX_PENDING_CHUNKS:
+            pending.popleft().result()
+
+    written = stream_order_items(order_id, expander, insert_chunk, chunk_size, bus)
+    while pending:
+        pending.popleft().result()
+    logger.info("Created order %s with %d items", order_id, written)
+    bus.domain.order_created.emit(order_id)
+    return order_id
@@ -0,0 +1,245 @@
+"""Navigation prefetching for the product gallery.
+
+Arrowing through products or paging the gallery otherwise waits for every
+thumbnail to be generated or read when it comes into view. The prefetcher
+follows ui.selection_changed and ui.page_changed and asks the
+ThumbnailCache for the neighbours before they are needed:
+
+- selecting a product loads it, then warms the next and previous
+  ``window`` products, in every prefetched size ("small" for the grid,
+  "large" for the image viewer's placeholder)
+- changing page warms the ``window`` products past either end of the page
+  in the grid size
+
+Requests are queued in priority order: the direction of travel first,
+nearest first. The estimated pixmap bytes of a plan are capped by a budget,
+and by half the cache's memory tier so prefetching never evicts what is on
+screen. Prefetches that are still queued when the plan changes are
+withdrawn, and all of them are when the direction reverses, so the pool
+works on what the user is heading towards.
+
+Every navigation counts a hit per size whose pixmap was already in memory
+and a miss otherwise; compare hit_rate across window sizes to tune them.
+
+Usage:
+    prefetcher = NavigationPrefetcher(gallery.product_model(), thumbnail_cache)
+    ...
+    logger.info("Prefetch hit rate %.0f%%", prefetcher.hit_rate * 100)
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject
+
+from signals import signal_bus as default_signal_bus
+from utils.image_utils import THUMBNAIL_SIZES
+
+logger = logging.getLogger(__name__)
+
+# Products warmed on each side of the selection or page
+DEFAULT_PREFETCH_WINDOW = 8
+
+# Thumbnail sizes warmed around a selected product
+DEFAULT_PREFETCH_SIZES: Tuple[str, ...] = ("small", "large")
+
+# Estimated pixmap bytes one plan may request: about 12 products in both
+# default sizes
+DEFAULT_PREFETCH_BUDGET_BYTES = 32 * 1024 * 1024
+
+CacheKey = Tuple[str, str]
+
+
+def pixmap_estimate(size_name: str) -> int:
+    """Return the largest pixmap size in bytes of a thumbnail tier (32 bpp)."""
+    width, height = THUMBNAIL_SIZES[size_name]
+    return width * height * 4
+
+
+class NavigationPrefetcher(QObject):
+    """Warm the thumbnail cache around the gallery's selection and page.
+
+    Attributes:
+        hits: Navigations' sizes found in memory on arrival
+        misses: Navigations' sizes that still had to be loaded
+        requested: Prefetch requests handed to the cache
+        cancelled: Queued prefetches withdrawn as stale
+    """
+
+    def __init__(
+        self,
+        model,
+        thumbnail_cache,
+        window: int = DEFAULT_PREFETCH_WINDOW,
+        size_names: Iterable[str] = DEFAULT_PREFETCH_SIZES,
+        budget_bytes: int = DEFAULT_PREFETCH_BUDGET_BYTES,
+        signal_bus=None,
+        parent: Optional[QObject] = None,
+    ):
+        """Initialize the prefetcher.
+
+        Args:
+            model: ProductListModel the gallery shows
+            thumbnail_cache: ThumbnailCache to warm
+            window: Products warmed on each side
+            size_names: Thumbnail sizes warmed around a selection; pages
+                warm the first (grid) size only
+            budget_bytes: Estimated pixmap bytes one plan may request
+            signal_bus: Signal bus to follow (defaults to the global bus)
+            parent: Optional parent object
+        """
+        super().__init__(parent)
+        self.model = model
+        self.thumbnail_cache = thumbnail_cache
+        self.window = window
+        self.size_names = tuple(size_names)
+        self.budget_bytes = budget_bytes
+        self.signal_bus = signal_bus or default_signal_bus
+
+        # Rows last navigated to, and the direction of travel (+1 or -1)
+        self._span: Optional[Tuple[int, int]] = None
+        self._direction = 1
+        # Prefetches this object queued, in request order
+        self._queued: Dict[CacheKey, None] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.requested = 0
+        self.cancelled = 0
+
+        self.signal_bus.ui.selection_changed.connect(self._on_selection_changed)
+        self.signal_bus.ui.page_changed.connect(self._on_page_changed)
+        self.signal_bus.ui.filter_applied.connect(self._on_filter_applied)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of navigations' sizes that were already in memory."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Return the counters as a dict, for logging."""
+        return {
+            "window": self.window,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "requested": self.requested,
+            "cancelled": self.cancelled,
+        }
+
+    def reset_stats(self):
+        """Zero the counters, e.g. after changing the window."""
+        self.hits = self.misses = self.requested = self.cancelled = 0
+
+    def navigate(self, first_row: int, last_row: int, size_names: Tuple[str, ...]):
+        """Warm the rows around a span the user just moved to.
+
+        Args:
+            first_row: First row now in view or selected
+            last_row: Last row now in view or selected
+            size_names: Thumbnail sizes to warm
+        """
+        if self._span is not None and first_row != self._span[0]:
+            direction = 1 if first_row > self._span[0] else -1
+            if direction != self._direction:
+                # Everything queued was ordered for the other way
+                self.cancel_all()
+                self._direction = direction
+        self._span = (first_row, last_row)
+
+        # Forget prefetches that have finished
+        self._queued = {
+            key: None for key in self._queued if self.thumbnail_cache.is_pending(*key)
+        }
+        plan = self._plan(first_row, last_row, size_names)
+        for key in [key for key in self._queued if key not in plan]:
+            self._withdraw(key)
+        memory = self.thumbnail_cache.memory
+        for key in plan:
+            if key in memory or self.thumbnail_cache.is_pending(*key):
+                continue
+            self.thumbnail_cache.request(*key)
+            if self.thumbnail_cache.is_pending(*key):
+                self._queued[key] = None
+                self.requested += 1
+
+    def cancel_all(self):
+        """Withdraw every prefetch that has not started yet."""
+        for key in list(self._queued):
+            self._withdraw(key)
+
+    def _plan(
+        self, first_row: int, last_row: int, size_names: Tuple[str, ...]
+    ) -> Dict[CacheKey, None]:
+        """Return the keys to warm, most urgent first, within the budget."""
+        if self._direction > 0:
+            # Make sure the ids ahead are loaded; one keyset page at most
+            self.model.ensure_loaded(last_row + self.window + 1)
+            ahead = range(last_row + 1, last_row + self.window + 1)
+            behind = range(first_row - 1, first_row - self.window - 1, -1)
+        else:
+            ahead = range(first_row - 1, first_row - self.window - 1, -1)
+            behind = range(last_row + 1, last_row + self.window + 1)
+
+        budget = min(self.budget_bytes, self.thumbnail_cache.memory.budget_bytes // 2)
+        plan: Dict[CacheKey, None] = {}
+        # A single selected row goes first: it is needed now, and a request
+        # made after the prefetches would wait behind them in the pool
+        current = [first_row] if first_row == last_row else []
+        for row in [*current, *ahead, *behind]:
+            product_id = self.model.product_id(row)
+            if product_id is None:
+                continue
+            for size_name in size_names:
+                budget -= pixmap_estimate(size_name)
+                if budget < 0:
+                    return plan
+                plan[(product_id, size_name)] = None
+        return plan
+
+    def _withdraw(self, key: CacheKey):
+        """Stop tracking a prefetch, cancelling it if it is still queued."""
+        del self._queued[key]
+        if self.thumbnail_cache.cancel(*key):
+            self.cancelled += 1
+
+    def _count(self, product_ids: List[str], size_names: Tuple[str, ...]):
+        """Record whether the products navigated to were already warm."""
+        memory = self.thumbnail_cache.memory
+        for product_id in product_ids:
+            for size_name in size_names:
+                if (product_id, size_name) in memory:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+    def _on_selection_changed(self, product_ids: list):
+        """Warm around the most recently selected product."""
+        if not product_ids:
+            return
+        row = self.model.row_of(product_ids[-1])
+        if row is None:
+            return
+        self._count([product_ids[-1]], self.size_names)
+        self.navigate(row, row, self.size_names)
+
+    def _on_page_changed(self, page: int):
+        """Warm the grid thumbnails past both ends of a page (1-based)."""
+        page_size = self.model.page_size
+        first_row = (max(1, page) - 1) * page_size
+        self.model.ensure_loaded(first_row + 1)
+        last_row = min(first_row + page_size, self.model.rowCount()) - 1
+        if last_row < first_row:
+            return
+        grid = self.size_names[:1]
+        # Count the top of the page, which is what appears first
+        top = range(first_row, min(first_row + self.window, last_row + 1))
+        self._count([self.model.product_id(row) for row in top], grid)
+        self.navigate(first_row, last_row, grid)
+
+    def _on_filter_applied(self, _filters: dict):
+        """Forget the position: the rows now belong to a different list."""
+        self.cancel_all()
+        self._span = None
+        self._direction = 1
@@ -0,0 +1,338 @@
+"""Single-pass product ingestion for Art Factory.
+
+Every generated or imported file needs file_hash (SHA256, used for dedup),
+file_size, width/height and mime_type. Computing them in separate read
+passes means reading each file three times. Ingestion streams the bytes
+once and, for every chunk:
+
+- feeds the SHA256 digest and the byte count
+- sniffs the header for mime type and dimensions until recognised
+- writes the chunk to a temporary file inside the storage root
+
+Committing then checks idx_products_file_hash for an existing product,
+before anything is renamed. A duplicate is discarded and the existing
+product is returned. A new file is renamed to its final path,
+``products/{project_id}/{year}/{month}/{product_id}_{hash}{ext}``, and its
+row is written. Thumbnail generation is then queued, and only after all
+that is DomainSignals.product_created emitted.
+
+Usage:
+    ingestor = ProductIngestor(get_database(), get_thumbnail_cache())
+    product = ingestor.ingest_file(path, project_id=project.id)
+    product = await ingestor.ingest_download(client, url, order_item_id=item.id)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+from sqlalchemy import select
+
+from models import Database, Product
+from models.base import new_id, utcnow
+from signals import signal_bus as default_signal_bus
+from utils.file_utils import products_dir, temp_dir
+from utils.image_utils import MIME_EXTENSIONS, MediaDigest, MediaInfo
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per chunk when ingesting a local file
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Project directory for products that belong to no project
+UNASSIGNED_PROJECT = "unassigned"
+
+
+@dataclass
+class IngestedProduct:
+    """Outcome of ingesting one file."""
+
+    product_id: str
+    file_path: str
+    file_hash: str
+    file_size: int
+    mime_type: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    # True when the file matched an existing product and was discarded
+    duplicate: bool = False
+
+
+class IngestWriter:
+    """Accepts a file's bytes chunk by chunk and commits it as a product.
+
+    Use as a context manager so an exception aborts the ingest and removes
+    the temporary file.
+    """
+
+    def __init__(self, ingestor: "ProductIngestor", fields: Dict[str, Any]):
+        self._ingestor = ingestor
+        self.fields = fields
+        self.product_id = fields.get("id") or new_id()
+        ingestor.temp_root.mkdir(parents=True, exist_ok=True)
+        self.temp_path = ingestor.temp_root / f"{uuid.uuid4().hex}.part"
+        self._file = open(self.temp_path, "wb")
+        self._digest = MediaDigest()
+
+    @property
+    def size(self) -> int:
+        """Bytes written so far."""
+        return self._digest.size
+
+    @property
+    def media(self) -> Optional[MediaInfo]:
+        """Mime type and dimensions, once the header has been recognised."""
+        return self._digest.media
+
+    def write(self, chunk: bytes):
+        """Add the next chunk of the file."""
+        self._file.write(chunk)
+        self._digest.update(chunk)
+
+    def commit(self) -> IngestedProduct:
+        """Finish the file and store it as a product (or find its duplicate)."""
+        self._file.close()
+        return self._ingestor._commit(self, self._digest.hexdigest())
+
+    def abort(self):
+        """Discard everything written so far."""
+        self._file.close()
+        self.temp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "IngestWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.abort()
+
+
+class ProductIngestor:
+    """Turns byte streams into stored, deduplicated, announced products.
+
+    Safe to use from several threads at once: hashes being committed are
+    claimed in memory, so two identical files arriving together still
+    produce one product.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        thumbnail_cache=None,
+        products_root: Optional[Union[str, Path]] = None,
+        temp_root: Optional[Union[str, Path]] = None,
+        signal_bus=None,
+    ):
+        """Initialize the ingestor.
+
+        Args:
+            database: Database to check for duplicates and write rows to
+            thumbnail_cache: ThumbnailCache to queue thumbnail generation on
+            products_root: Root of final product files (defaults to storage)
+            temp_root: Directory for partial files; must be on the same
+                filesystem as products_root
+            signal_bus: Signal bus to use (defaults to the global bus)
+        """
+        self.database = database
+        self.thumbnail_cache = thumbnail_cache
+        self.products_root = Path(products_root or products_dir())
+        self.temp_root = Path(temp_root or temp_dir())
+        self.signal_bus = signal_bus or default_signal_bus
+        self._claims: Dict[str, str] = {}
+        self._claims_lock = threading.Lock()
+
+    def open(
+        self,
+        project_id: Optional[str] = None,
+        order_item_id: Optional[str] = None,
+        product_type: Optional[str] = None,
+        **fields,
+    ) -> IngestWriter:
+        """Start ingesting a file.
+
+        Args:
+            project_id: Project the product belongs to
+            order_item_id: Order item that generated it
+            product_type: products.type (defaults to the sniffed media kind)
+            **fields: Other products columns by column name, such as
+                metadata or notes
+
+        Returns:
+            IngestWriter: Writer to feed the file's bytes to
+        """
+        fields.update(
+            project_id=project_id, order_item_id=order_item_id, type=product_type
+        )
+        return IngestWriter(self, fields)
+
+    def ingest_chunks(self, chunks: Iterable[bytes], **fields) -> IngestedProduct:
+        """Ingest a file given as an iterable of byte chunks."""
+        with self.open(**fields) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+            return writer.commit()
+
+    def ingest_file(
+        self,
+        path: Union[str, Path],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        **fields,
+    ) -> IngestedProduct:
+        """Ingest a copy of a local file, reading it once."""
+        with open(path, "rb") as handle:
+            return self.ingest_chunks(
+                iter(lambda: handle.read(chunk_size), b""), **fields
+            )
+
+    async def ingest_download(self, client, url: str, **fields) -> IngestedProduct:
+        """Ingest a provider output while it downloads.
+
+        The body is hashed and sniffed as it arrives through
+        HttpClient.download_to(). Writing, hashing and sniffing each chunk,
+        and the database work of committing, run in the loop's default
+        executor so the loop thread never blocks on disk or CPU. One chunk
+        is written while the next is downloaded.
+
+        Args:
+            client: utils.http_client.HttpClient to download with
+            url: Output URL
+            **fields: As for open()
+        """
+        loop = asyncio.get_running_loop()
+        pending: Optional[asyncio.Future] = None
+
+        async def write(chunk: bytes):
+            nonlocal pending
+            if pending is not None:
+                await pending
+            pending = loop.run_in_executor(None, writer.write, chunk)
+
+        with self.open(**fields) as writer:
+            try:
+                await client.download_to(url, write)
+                if pending is not None:
+                    await pending
+            finally:
+                # The file must not be aborted under a write still running
+                if pending is not None and not pending.done():
+                    await asyncio.wait([pending])
+            return await loop.run_in_executor(None, writer.commit)
+
+    def find_by_hash(self, file_hash: str) -> Optional[str]:
+        """Return the id of a live product with this file hash, if any."""
+        session = self.database.session()
+        try:
+            return session.scalars(
+                select(Product.id)
+                .where(Product.file_hash == file_hash, Product.deleted_at.is_(None))
+                .limit(1)
+            ).first()
+        finally:
+            self.database.remove_session()
+
+    def _commit(self, writer: IngestWriter, file_hash: str) -> IngestedProduct:
+        """Deduplicate, move into place, write the row and announce."""
+        media = writer.media or MediaInfo(None)
+        result = IngestedProduct(
+            writer.product_id,
+            "",
+            file_hash,
+            writer.size,
+            media.mime_type,
+            media.width,
+            media.height,
+        )
+
+        with self._claims_lock:
+            existing = self._claims.get(file_hash)
+            if existing is None:
+                existing = self.find_by_hash(file_hash)
+            if existing is None:
+                self._claims[file_hash] = writer.product_id
+        if existing is not None:
+            writer.temp_path.unlink(missing_ok=True)
+            result.product_id = existing
+            result.duplicate = True
+            logger.debug("Discarded duplicate of product %s", existing)
+            return result
+
+        try:
+            path = product_path(
+                self.products_root,
+                writer.fields.get("project_id"),
+                writer.product_id,
+                file_hash,
+                media.mime_type,
+            )
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(writer.temp_path, path)
+            result.file_path = str(path)
+            try:
+                self.database.writer.insert_products(
+                    [self._row(writer, result)]
+                ).result()
+            except Exception:
+                path.unlink(missing_ok=True)
+                raise
+        except Exception:
+            writer.temp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            # Once the row is committed, find_by_hash sees it
+            with self._claims_lock:
+                self._claims.pop(file_hash, None)
+
+        if self.thumbnail_cache is not None and (result.mime_type or "").startswith(
+            "image/"
+        ):
+            self.thumbnail_cache.generate_files(result.file_path, file_hash)
+        self.signal_bus.domain.product_created.emit(result.product_id)
+        return result
+
+    @staticmethod
+    def _row(writer: IngestWriter, result: IngestedProduct) -> Dict[str, Any]:
+        """Build the products row for a committed file."""
+        row = {key: value for key, value in writer.fields.items() if value is not None}
+        row.update(
+            id=result.product_id,
+            type=row.get("type") or media_kind(result.mime_type),
+            file_path=result.file_path,
+            file_size=result.file_size,
+            file_hash=result.file_hash,
+            width=result.width,
+            height=result.height,
+            mime_type=result.mime_type,
+        )
+        return row
+
+
+def product_path(
+    products_root: Union[str, Path],
+    project_id: Optional[str],
+    product_id: str,
+    file_hash: str,
+    mime_type: Optional[str],
+) -> Path:
+    """Return where a new product's file is stored.
+
+    Layout: ``{root}/{project_id}/{yyyy}/{mm}/{product_id}_{hash}{ext}``.
+    """
+    now = utcnow()
+    return (
+        Path(products_root)
+        / (project_id or UNASSIGNED_PROJECT)
+        / f"{now:%Y}"
+        / f"{now:%m}"
+        / f"{product_id}_{file_hash}{MIME_EXTENSIONS.get(mime_type, '')}"
+    )
+
+
+def media_kind(mime_type: Optional[str]) -> str:
+    """Return products.type for a mime type: image, video or file."""
+    kind = (mime_type or "").split("/", 1)[0]
+    return kind if kind in ("image", "video") else "file"
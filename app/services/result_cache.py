@@ -0,0 +1,469 @@
+"""Output-level generation result cache for Art Factory.
+
+Deterministic models given the same parameters and a fixed seed return
+the same image. Re-running identical items after a template tweak then
+pays the provider again for outputs the library already has. ResultCache
+keys every generation on a canonical hash of (provider, model,
+actual_parameter_set) and remembers which order item produced it
+(result_cache table).
+
+execute asks the cache after mapping the item's parameters and before
+calling the provider. On a hit, serve() creates new products for the item
+from the earlier item's live products and completes the item. The files
+are hard links or copy-on-write clones (utils.file_utils.link_file), so a
+hit costs no provider call, no download and no disk space. On a miss,
+execute generates as usual and calls store() with the time it took.
+
+The cache is opt-in per provider through providers.settings, e.g.
+{"result_cache": {"enabled": true, "models": ["flux-schnell"],
+"seed_key": "seed"}}. Only requests with a fixed seed are cached; a
+missing, null or -1 seed means the provider picks one at random. stats()
+counts this session's hits and the provider time they saved, and
+cache_report() totals them over the cache's lifetime per provider and
+model.
+
+Usage:
+    cache = init_result_cache()
+    if cache.serve(item, model, parameters):
+        return
+    started = time.monotonic()
+    ...  # call the provider and ingest its outputs
+    cache.store(item, model, parameters, time.monotonic() - started)
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.engine import Connection
+
+from models import Database, Order, OrderItem, Product, Provider, ResultCacheEntry
+from models.base import new_id, utcnow
+from signals import signal_bus as default_signal_bus
+from utils.file_utils import link_file, products_dir
+
+from .generation_scheduler import ScheduledItem
+from .product_ingestion import product_path
+
+logger = logging.getLogger(__name__)
+
+# Changing how keys are computed must change this, orphaning old entries
+CACHE_KEY_VERSION = 1
+
+# Parameter that holds the seed, unless a provider names another
+DEFAULT_SEED_KEY = "seed"
+
+# Seed values that ask the provider for a random seed
+RANDOM_SEEDS = (None, -1, "", "random")
+
+RECORD_HIT_SQL = text(
+    "UPDATE result_cache SET hits = hits + 1, last_hit_at = :now WHERE key = :key"
+)
+
+STORE_SQL = text(
+    "INSERT OR IGNORE INTO result_cache"
+    " (key, provider, model, order_item_id, generation_seconds, hits, created_at)"
+    " VALUES (:key, :provider, :model, :order_item_id, :seconds, 0, :now)"
+)
+
+
+def canonical_parameters(value: Any) -> Any:
+    """Return parameters in a form whose JSON is the same for equal requests.
+
+    Keys are sorted when serialised, None values are dropped as providers
+    treat them as absent, and integral floats become ints, so {"steps":
+    20.0, "lora": None} and {"steps": 20} share a key.
+    """
+    if isinstance(value, Mapping):
+        return {
+            str(key): canonical_parameters(item)
+            for key, item in value.items()
+            if item is not None
+        }
+    if isinstance(value, (list, tuple)):
+        return [canonical_parameters(item) for item in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def cache_key(provider: str, model: str, parameters: Mapping[str, Any]) -> str:
+    """Return the SHA256 hex key of a generation request."""
+    payload = json.dumps(
+        [CACHE_KEY_VERSION, provider, model, canonical_parameters(parameters)],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheSettings:
+    """Whether and what one provider's results are cached."""
+
+    enabled: bool = False
+    # Only these models, or every model when None
+    models: Optional[Tuple[str, ...]] = None
+    # Parameter that must hold a fixed seed, or None to cache regardless
+    seed_key: Optional[str] = DEFAULT_SEED_KEY
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Mapping[str, Any]]) -> "CacheSettings":
+        """Build settings from providers.settings["result_cache"]."""
+        settings = settings or {}
+        models = settings.get("models")
+        return cls(
+            bool(settings.get("enabled", False)),
+            tuple(models) if models is not None else None,
+            settings.get("seed_key", DEFAULT_SEED_KEY),
+        )
+
+    def cacheable(self, model: str, parameters: Mapping[str, Any]) -> bool:
+        """Return whether a request may be served from, or stored in, the cache."""
+        if not self.enabled:
+            return False
+        if self.models is not None and model not in self.models:
+            return False
+        if self.seed_key is not None:
+            seed = parameters.get(self.seed_key)
+            if isinstance(seed, (list, dict)) or seed in RANDOM_SEEDS:
+                return False
+        return True
+
+
+def load_cache_settings(database: Database) -> Dict[str, CacheSettings]:
+    """Return every provider's result cache settings, by provider id."""
+    with database.engine.connect() as connection:
+        return {
+            provider_id: CacheSettings.from_settings(
+                (settings or {}).get("result_cache")
+            )
+            for provider_id, settings in connection.execute(
+                select(Provider.id, Provider.settings)
+            )
+        }
+
+
+@dataclass
+class CacheReport:
+    """Lifetime savings of the cache for one provider and model."""
+
+    provider: str
+    model: str
+    entries: int
+    hits: int
+    saved_seconds: float
+
+
+def cache_report(database: Database) -> List[CacheReport]:
+    """Return the saved API calls and time per provider and model."""
+    statement = (
+        select(
+            ResultCacheEntry.provider,
+            ResultCacheEntry.model,
+            func.count(),
+            func.coalesce(func.sum(ResultCacheEntry.hits), 0),
+            func.coalesce(
+                func.sum(ResultCacheEntry.hits * ResultCacheEntry.generation_seconds),
+                0.0,
+            ),
+        )
+        .group_by(ResultCacheEntry.provider, ResultCacheEntry.model)
+        .order_by(ResultCacheEntry.provider, ResultCacheEntry.model)
+    )
+    with database.engine.connect() as connection:
+        return [CacheReport(*row) for row in connection.execute(statement)]
+
+
+@dataclass
+class _Statistics:
+    """Counts of one session."""
+
+    hits: int = 0
+    misses: int = 0
+    saved_seconds: float = 0.0
+    stored: int = 0
+    # Product files created per link_file() method
+    files: Counter = field(default_factory=Counter)
+
+
+class ResultCache:
+    """Serves repeated generation requests from earlier outputs.
+
+    serve() and store() block on the database and file system; call them
+    from execute's worker thread, or through run_in_executor from a
+    coroutine execute. Safe to use from several threads at once.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        settings: Optional[Mapping[str, CacheSettings]] = None,
+        thumbnail_cache=None,
+        products_root: Optional[Union[str, Path]] = None,
+        signal_bus=None,
+    ):
+        """Initialize the cache.
+
+        Args:
+            database: Database holding result_cache, products and items
+            settings: Cache settings by provider id (providers not listed
+                are not cached)
+            thumbnail_cache: ThumbnailCache to queue thumbnails on
+            products_root: Root of product files (defaults to storage)
+            signal_bus: Signal bus to use (defaults to the global bus)
+        """
+        self.database = database
+        self.thumbnail_cache = thumbnail_cache
+        self.products_root = Path(products_root or products_dir())
+        self.signal_bus = signal_bus or default_signal_bus
+        self._settings: Dict[str, CacheSettings] = dict(settings or {})
+        self._lock = threading.Lock()
+        self._statistics = _Statistics()
+
+    def settings(self, provider_id: str) -> CacheSettings:
+        """Return a provider's cache settings."""
+        with self._lock:
+            return self._settings.get(provider_id) or CacheSettings()
+
+    def set_settings(self, provider_id: str, settings: CacheSettings):
+        """Replace a provider's cache settings, e.g. after they are edited."""
+        with self._lock:
+            self._settings[provider_id] = settings
+
+    def serve(
+        self, item: ScheduledItem, model: str, parameters: Mapping[str, Any]
+    ) -> List[str]:
+        """Complete an item from the cache, if its request was seen before.
+
+        On a hit, a product is created for each live product of the item
+        that made the cached request, with its file linked rather than
+        copied. The item is marked complete and product_created is emitted
+        for each new product.
+
+        Args:
+            item: Item about to be generated
+            model: Model the request is for
+            parameters: The item's actual_parameter_set
+
+        Returns:
+            List[str]: Ids of the new products; empty on a miss
+        """
+        if not self.settings(item.provider_id).cacheable(model, parameters):
+            return []
+        key = cache_key(item.provider_id, model, parameters)
+        with self.database.engine.connect() as connection:
+            entry = connection.execute(
+                select(
+                    ResultCacheEntry.order_item_id, ResultCacheEntry.generation_seconds
+                ).where(ResultCacheEntry.key == key)
+            ).first()
+            if entry is None or entry.order_item_id == item.item_id:
+                return self._miss()
+            sources = connection.execute(
+                select(
+                    Product.type,
+                    Product.file_path,
+                    Product.file_size,
+                    Product.file_hash,
+                    Product.width,
+                    Product.height,
+                    Product.duration,
+                    Product.mime_type,
+                    Product.metadata_.label("metadata_"),
+                )
+                .where(
+                    Product.order_item_id == entry.order_item_id,
+                    Product.deleted_at.is_(None),
+                )
+                .order_by(Product.created_at, Product.id)
+            ).all()
+            returned = connection.execute(
+                select(OrderItem.return_parameter_set).where(
+                    OrderItem.id == entry.order_item_id
+                )
+            ).scalar()
+            project_id = (
+                item.project_id
+                or connection.execute(
+                    select(Order.project_id)
+                    .join(OrderItem, OrderItem.order_id == Order.id)
+                    .where(OrderItem.id == item.item_id)
+                ).scalar()
+            )
+
+        sources = [source for source in sources if Path(source.file_path).exists()]
+        if not sources:
+            # Its outputs were deleted; the next generation replaces it
+            self.database.writer.submit(
+                lambda connection: connection.execute(
+                    delete(ResultCacheEntry).where(ResultCacheEntry.key == key)
+                )
+            )
+            return self._miss()
+
+        rows = self._link_products(item, project_id, sources)
+        now = utcnow()
+        self.database.writer.update_item_status(
+            item.item_id,
+            "complete",
+            completed_at=now,
+            return_parameter_set=returned,
+            provider_request_id=None,
+        )
+        self.database.writer.submit(
+            lambda connection: connection.execute(
+                RECORD_HIT_SQL, {"now": now, "key": key}
+            )
+        )
+        for row in rows:
+            if self.thumbnail_cache is not None and (row["mime_type"] or "").startswith(
+                "image/"
+            ):
+                self.thumbnail_cache.generate_files(row["file_path"], row["file_hash"])
+            self.signal_bus.domain.product_created.emit(row["id"])
+
+        seconds = entry.generation_seconds or 0.0
+        with self._lock:
+            self._statistics.hits += 1
+            self._statistics.saved_seconds += seconds
+        logger.info(
+            "Served %s from the result cache: %d products, %.1fs saved",
+            item.item_id,
+            len(rows),
+            seconds,
+        )
+        return [row["id"] for row in rows]
+
+    def store(
+        self,
+        item: ScheduledItem,
+        model: str,
+        parameters: Mapping[str, Any],
+        seconds: float,
+    ) -> Optional[str]:
+        """Remember that an item's products answer its request.
+
+        Call once the item's products are written. A key that is already
+        cached keeps its first item.
+
+        Args:
+            item: Item that was just generated
+            model: Model the request was for
+            parameters: The item's actual_parameter_set
+            seconds: How long the provider took, saved by every later hit
+
+        Returns:
+            Optional[str]: The cache key, or None if the request is not cached
+        """
+        if not self.settings(item.provider_id).cacheable(model, parameters):
+            return None
+        values = {
+            "key": cache_key(item.provider_id, model, parameters),
+            "provider": item.provider_id,
+            "model": model,
+            "order_item_id": item.item_id,
+            "seconds": seconds,
+            "now": utcnow(),
+        }
+
+        def write(connection: Connection):
+            connection.execute(STORE_SQL, values)
+
+        self.database.writer.submit(write)
+        with self._lock:
+            self._statistics.stored += 1
+        return values["key"]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return this session's hits, misses, saved calls and saved time."""
+        with self._lock:
+            statistics = self._statistics
+            lookups = statistics.hits + statistics.misses
+            return {
+                "hits": statistics.hits,
+                "misses": statistics.misses,
+                "hit_rate": statistics.hits / lookups if lookups else 0.0,
+                "saved_calls": statistics.hits,
+                "saved_seconds": round(statistics.saved_seconds, 3),
+                "stored": statistics.stored,
+                "files": dict(statistics.files),
+            }
+
+    def _miss(self) -> List[str]:
+        with self._lock:
+            self._statistics.misses += 1
+        return []
+
+    def _link_products(
+        self, item: ScheduledItem, project_id: Optional[str], sources
+    ) -> List[Dict[str, Any]]:
+        """Link each source file into place and write the product rows."""
+        rows = []
+        methods = []
+        try:
+            for source in sources:
+                product_id = new_id()
+                path = product_path(
+                    self.products_root,
+                    project_id,
+                    product_id,
+                    source.file_hash,
+                    source.mime_type,
+                )
+                path.parent.mkdir(parents=True, exist_ok=True)
+                methods.append(link_file(source.file_path, path))
+                rows.append(
+                    {
+                        "id": product_id,
+                        "order_item_id": item.item_id,
+                        "project_id": project_id,
+                        "type": source.type,
+                        "file_path": str(path),
+                        "file_size": source.file_size,
+                        "file_hash": source.file_hash,
+                        "width": source.width,
+                        "height": source.height,
+                        "duration": source.duration,
+                        "mime_type": source.mime_type,
+                        "metadata": source.metadata_,
+                    }
+                )
+            self.database.writer.insert_products(rows).result()
+        except Exception:
+            for row in rows:
+                Path(row["file_path"]).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._statistics.files.update(methods)
+        return rows
+
+
+_result_cache: Optional[ResultCache] = None
+
+
+def init_result_cache() -> ResultCache:
+    """Build the application's result cache from the providers' settings."""
+    global _result_cache
+    if _result_cache is None:
+        from models.database import init_database
+        from utils.thumbnail_cache import init_thumbnail_cache
+
+        database = init_database()
+        _result_cache = ResultCache(
+            database, load_cache_settings(database), init_thumbnail_cache()
+        )
+    return _result_cache
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Return the application's result cache, if initialized."""
+    return _result_cache
@@ -0,0 +1,451 @@
+"""Retry policy and dead-letter queue for generation failures.
+
+Provider calls fail in two ways. Transient failures (HTTP 408, 425, 429 and
+5xx, timeouts, dropped connections) are worth another attempt after a
+while. Permanent ones (invalid parameters, content policy, bad credentials)
+fail the same way every time, so retrying them only burns quota.
+classify_error() sorts errors into the two kinds. Provider code can also
+raise TransientError or PermanentError to decide for itself.
+
+RetryController plugs into GenerationScheduler (retry=...). It decides,
+for each failure:
+
+- permanent: the item fails at once (status failed)
+- transient, attempts left: the item is queued again after a backoff
+  delay with jitter, or after the server's Retry-After if longer
+  (status pending, retry_count and error_message updated)
+- transient, attempts used up: the item goes to the dead-letter queue
+  (status dead_letter)
+
+Transient failures also pause the whole provider. The pause grows with
+the provider's consecutive failures and is never shorter than its
+Retry-After, and the first success resets it. When a provider returns 429
+to every request, the scheduler stops dispatching to it instead of
+sending each queued item straight into the same error.
+
+Each provider's policy comes from providers.settings["retry"], e.g.
+{"max_attempts": 5, "base_delay": 2.0, "max_delay": 300.0}.
+list_dead_letters() backs the dead-letter view and resubmit() puts
+selected items back in the queue with a fresh retry budget.
+
+A retry submits a new request: the item's provider_request_id is cleared
+when it goes back to "pending", so the next attempt does not poll the
+failed request again.
+
+Usage:
+    retry = RetryController(database, load_retry_policies(database))
+    scheduler = GenerationScheduler(execute, limits, retry=retry)
+    dead = list_dead_letters(database)
+    resubmit(database, [item.item_id for item in dead], scheduler)
+"""
+
+import asyncio
+import logging
+import random
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.engine import Connection
+
+from models import Database, Order, OrderItem, Provider
+from models.base import utcnow
+from utils.http_client import HttpError, HttpStatusError
+
+from .generation_scheduler import ScheduledItem
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: timeouts, too early, rate limits, server errors
+TRANSIENT_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+# Attempts in total (the first one included) before an item is dead-lettered
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Backoff delay of the first retry, doubling with each further attempt
+DEFAULT_BASE_DELAY = 2.0
+
+# Longest backoff delay, for items and provider pauses alike
+DEFAULT_MAX_DELAY = 300.0
+
+# Longest Retry-After honoured, so a bogus header cannot park a provider
+MAX_RETRY_AFTER = 3600.0
+
+# Statuses listed by the dead-letter view
+DEAD_LETTER_STATUSES = ("dead_letter", "needs_retry")
+
+# Statuses counted in orders.failed_count (see services.counters)
+COUNTED_FAILED_STATUSES = ("failed", "dead_letter")
+
+# Bound parameters per "id IN (...)" lookup (SQLite allows 999)
+LOOKUP_CHUNK_SIZE = 500
+
+
+class TransientError(Exception):
+    """A failure that may succeed if tried again later."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PermanentError(Exception):
+    """A failure that will fail the same way every time."""
+
+
+@dataclass
+class Failure:
+    """How classify_error() sees an error."""
+
+    transient: bool
+    # Seconds the server asked us to wait, if it said
+    retry_after: Optional[float] = None
+
+
+@dataclass
+class RetryDecision:
+    """What the scheduler does with a failed item."""
+
+    # Seconds until the item is queued again; None fails it for good
+    delay: Optional[float]
+    # Seconds to dispatch nothing more to the item's provider
+    provider_pause: float = 0.0
+
+
+def parse_retry_after(
+    value: Optional[str], now: Optional[datetime] = None
+) -> Optional[float]:
+    """Return the seconds a Retry-After header asks for.
+
+    Args:
+        value: Header value, delay-seconds or an HTTP date
+        now: Current UTC time for HTTP dates (defaults to utcnow())
+
+    Returns:
+        Optional[float]: Seconds to wait, None if absent or unreadable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        offset = when.utcoffset()
+        if offset is not None:
+            when = when.replace(tzinfo=None) - offset
+        seconds = (when - (now or utcnow())).total_seconds()
+    return min(max(0.0, seconds), MAX_RETRY_AFTER)
+
+
+def classify_error(error: BaseException) -> Failure:
+    """Sort an error into transient or permanent.
+
+    Errors this module does not recognise are permanent: retrying a bug
+    or a rejected prompt five times helps nobody.
+    """
+    if isinstance(error, TransientError):
+        retry_after = error.retry_after
+        if retry_after is not None:
+            retry_after = min(max(0.0, retry_after), MAX_RETRY_AFTER)
+        return Failure(True, retry_after)
+    if isinstance(error, PermanentError):
+        return Failure(False)
+    if isinstance(error, HttpStatusError):
+        if error.status not in TRANSIENT_STATUSES:
+            return Failure(False)
+        return Failure(True, parse_retry_after(error.headers.get("retry-after")))
+    if isinstance(error, (HttpError, ConnectionError, asyncio.TimeoutError)):
+        return Failure(True)
+    return Failure(False)
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently one provider's failures are retried."""
+
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    base_delay: float = DEFAULT_BASE_DELAY
+    max_delay: float = DEFAULT_MAX_DELAY
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Mapping[str, Any]]) -> "RetryPolicy":
+        """Build a policy from providers.settings["retry"], defaults for gaps."""
+        settings = settings or {}
+        return cls(
+            int(settings.get("max_attempts", DEFAULT_MAX_ATTEMPTS)),
+            float(settings.get("base_delay", DEFAULT_BASE_DELAY)),
+            float(settings.get("max_delay", DEFAULT_MAX_DELAY)),
+        )
+
+    @classmethod
+    def from_provider(cls, provider) -> "RetryPolicy":
+        """Build a policy from a models.Provider row."""
+        return cls.from_settings((provider.settings or {}).get("retry"))
+
+    def delay(self, attempt: int, rng: random.Random) -> float:
+        """Return the backoff before retry number attempt (1 for the first).
+
+        The delay is drawn uniformly between half the exponential bound
+        and the bound ("equal jitter"), so items that failed together do
+        not retry together, yet none retries right away.
+        """
+        bound = min(self.max_delay, self.base_delay * 2 ** max(0, attempt - 1))
+        return rng.uniform(bound / 2, bound)
+
+
+def load_retry_policies(database: Database) -> Dict[str, RetryPolicy]:
+    """Return every provider's retry policy, by provider id."""
+    with database.engine.connect() as connection:
+        return {
+            provider_id: RetryPolicy.from_settings((settings or {}).get("retry"))
+            for provider_id, settings in connection.execute(
+                select(Provider.id, Provider.settings)
+            )
+        }
+
+
+class RetryController:
+    """Decides whether failed items are retried, and records the outcome.
+
+    Called by the scheduler from whichever thread finished the item, so
+    its state is guarded by a lock. Database writes go through the
+    database's WriteQueue and are not waited for.
+    """
+
+    def __init__(
+        self,
+        database: Optional[Database] = None,
+        policies: Optional[Mapping[str, RetryPolicy]] = None,
+        default_policy: Optional[RetryPolicy] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        """Initialize the controller.
+
+        Args:
+            database: Database to record retry_count, error_message and
+                status in (nothing is recorded without one)
+            policies: Retry policy by provider id
+            default_policy: Policy of providers without their own
+            rng: Random source for jitter (seed it in tests)
+        """
+        self.database = database
+        self.default_policy = default_policy or RetryPolicy()
+        self._policies: Dict[str, RetryPolicy] = dict(policies or {})
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        # Consecutive transient failures by provider id
+        self._failures: Dict[str, int] = {}
+        self.retried = 0
+        self.dead_lettered = 0
+
+    def policy(self, provider_id: str) -> RetryPolicy:
+        """Return the retry policy of a provider."""
+        return self._policies.get(provider_id, self.default_policy)
+
+    def set_policy(self, provider_id: str, policy: RetryPolicy):
+        """Replace a provider's retry policy, e.g. after its settings change."""
+        with self._lock:
+            self._policies[provider_id] = policy
+
+    def consecutive_failures(self, provider_id: str) -> int:
+        """Return the provider's transient failures since its last success."""
+        with self._lock:
+            return self._failures.get(provider_id, 0)
+
+    def on_failure(self, item: ScheduledItem, error: BaseException) -> RetryDecision:
+        """Decide what happens to a failed item and record it.
+
+        Increments item.attempts for every failure.
+        """
+        failure = classify_error(error)
+        item.attempts += 1
+        message = str(error) or type(error).__name__
+        if not failure.transient:
+            self._record(item, "failed", message)
+            return RetryDecision(None)
+
+        policy = self.policy(item.provider_id)
+        retry_after = failure.retry_after or 0.0
+        with self._lock:
+            failures = self._failures.get(item.provider_id, 0) + 1
+            self._failures[item.provider_id] = failures
+            pause = max(policy.delay(failures, self._rng), retry_after)
+            if item.attempts >= policy.max_attempts:
+                self.dead_lettered += 1
+                delay = None
+            else:
+                self.retried += 1
+                delay = max(policy.delay(item.attempts, self._rng), retry_after)
+        if delay is None:
+            logger.warning(
+                "Giving up on %s after %d attempts: %s",
+                item.item_id,
+                item.attempts,
+                message,
+            )
+            self._record(item, "dead_letter", message)
+        else:
+            item.provider_request_id = None
+            self._record(item, "pending", message, provider_request_id=None)
+        return RetryDecision(delay, pause)
+
+    def on_success(self, item: ScheduledItem):
+        """Note that the item's provider is answering again."""
+        with self._lock:
+            self._failures.pop(item.provider_id, None)
+
+    def _record(self, item: ScheduledItem, status: str, message: str, **values):
+        """Queue the item's new status, retry_count, error_message and values."""
+        if self.database is None:
+            return
+        self.database.writer.update_item_status(
+            item.item_id,
+            status,
+            retry_count=item.attempts,
+            error_message=message,
+            **values,
+        )
+
+
+@dataclass
+class DeadLetter:
+    """An order item waiting in the dead-letter queue."""
+
+    item_id: str
+    order_id: str
+    project_id: Optional[str]
+    provider: str
+    model: str
+    status: str
+    retry_count: int
+    error_message: Optional[str]
+    updated_at: Optional[datetime]
+
+
+def list_dead_letters(
+    database: Database,
+    provider: Optional[str] = None,
+    order_id: Optional[str] = None,
+    statuses: Sequence[str] = DEAD_LETTER_STATUSES,
+) -> List[DeadLetter]:
+    """Return the items in the dead-letter queue, most recent first.
+
+    Args:
+        database: Database to read
+        provider: Only items of this provider
+        order_id: Only items of this order
+        statuses: Item statuses to list
+    """
+    statement = (
+        select(
+            OrderItem.id,
+            OrderItem.order_id,
+            Order.project_id,
+            Order.provider,
+            Order.model,
+            OrderItem.status,
+            OrderItem.retry_count,
+            OrderItem.error_message,
+            OrderItem.updated_at,
+        )
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(OrderItem.status.in_(statuses), Order.deleted_at.is_(None))
+        .order_by(OrderItem.updated_at.desc(), OrderItem.id)
+    )
+    if provider is not None:
+        statement = statement.where(Order.provider == provider)
+    if order_id is not None:
+        statement = statement.where(OrderItem.order_id == order_id)
+    with database.engine.connect() as connection:
+        return [DeadLetter(*row) for row in connection.execute(statement)]
+
+
+def resubmit(
+    database: Database,
+    item_ids: Iterable[str],
+    scheduler=None,
+    counters=None,
+) -> List[str]:
+    """Put items back in the queue with a fresh retry budget.
+
+    Each item is reset to pending with retry_count 0 and no error or
+    provider request. Items that were counted in orders.failed_count are
+    taken off it again.
+
+    Args:
+        database: Database holding the items
+        item_ids: Items to resubmit; unknown ids and items no longer in
+            DEAD_LETTER_STATUSES (completed, cancelled, already pending)
+            are skipped
+        scheduler: GenerationScheduler to queue the items on; without one
+            they wait as pending for the next run
+        counters: CounterService to correct failed_count through
+
+    Returns:
+        List[str]: Ids of the items actually reset and resubmitted
+    """
+    item_ids = list(dict.fromkeys(item_ids))
+    statement = (
+        select(
+            OrderItem.id, OrderItem.status, Order.id, Order.provider, Order.project_id
+        )
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(
+            OrderItem.id.in_(bindparam("ids", expanding=True)),
+            OrderItem.status.in_(DEAD_LETTER_STATUSES),
+        )
+    )
+    found: List[Any] = []
+    with database.engine.connect() as connection:
+        for start in range(0, len(item_ids), LOOKUP_CHUNK_SIZE):
+            chunk = item_ids[start : start + LOOKUP_CHUNK_SIZE]
+            found.extend(connection.execute(statement, {"ids": chunk}))
+    position = {item_id: index for index, item_id in enumerate(item_ids)}
+    found.sort(key=lambda row: position[row[0]])
+
+    rows: List[Any] = []
+    reset_statement = (
+        update(OrderItem)
+        .where(
+            OrderItem.id == bindparam("item_id"),
+            OrderItem.status.in_(DEAD_LETTER_STATUSES),
+        )
+        .values(
+            status="pending",
+            retry_count=0,
+            error_message=None,
+            provider_request_id=None,
+            started_at=None,
+            completed_at=None,
+        )
+    )
+
+    def reset(connection: Connection):
+        # The status check is repeated in the write, so an item that
+        # completed or was resubmitted since the select is left alone
+        for row in found:
+            result = connection.execute(reset_statement, {"item_id": row[0]})
+            if result.rowcount:
+                rows.append(row)
+
+    database.writer.submit(reset).result()
+    if counters is not None:
+        for _item, status, order_id, _provider, _project in rows:
+            if status in COUNTED_FAILED_STATUSES:
+                counters.adjust("orders.failed_count", order_id, -1)
+
+    if scheduler is not None:
+        scheduler.enqueue_many(
+            ScheduledItem(item_id, provider, project_id)
+            for item_id, _status, _order, provider, project_id in rows
+        )
+    if rows:
+        logger.info("Resubmitted %d items", len(rows))
+    return [row[0] for row in rows]
@@ -0,0 +1,712 @@
+"""Near-duplicate image search for Art Factory.
+
+Seed sweeps and re-runs produce many images that look almost the same but
+differ byte for byte, so file_hash cannot find them. Every image product
+gets a perceptual hash (utils.perceptual_hash) stored in product_hashes,
+and SimilarityIndex keeps all of them in memory for Hamming-radius queries.
+
+Hashing follows domain.product_created, so both the ingestor and the
+import worker are covered: the event records the id, one call per tick on
+the database's WriteQueue reads the new image paths, and the files are
+hashed in batches in a process pool. Libraries from before this feature
+are hashed with backfill() (scripts/find_duplicates.py --backfill).
+
+The index is a multi-index hash table rather than a BK-tree: each hash is
+split into INDEX_CHUNKS chunks and two hashes within distance d share at
+least one chunk that differs in at most d // INDEX_CHUNKS bits. A query
+only checks the hashes in those buckets. At half a million images that is
+a few hundred candidates instead of a tree walk touching a large part of
+the library; run tests/performance/bench_similarity.py to measure it.
+
+The gallery uses the "similar_to" filter (registered in models.paging by
+init_similarity()), and plan_cleanup()/apply_cleanup() keep the best
+product of each duplicate group and soft-delete the rest.
+
+Usage:
+    index = init_similarity()
+    matches = index.find_similar(product_id)
+    groups = index.duplicate_groups(project_id=project.id)
+    plan = plan_cleanup(database, groups)
+    apply_cleanup(database, plan)
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from array import array
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from itertools import combinations
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import DateTime, bindparam, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.elements import ColumnElement
+
+from models import Database, Product, ProductHash
+from models.base import utcnow
+from models.paging import FILTERS
+from models.product_index import encode_id, format_id
+from signals import signal_bus as default_signal_bus
+from utils.perceptual_hash import HASH_BITS, dhash_files, format_hash, parse_hash
+
+logger = logging.getLogger(__name__)
+
+# Hamming distance up to which two images count as near-duplicates
+DEFAULT_MAX_DISTANCE = 6
+
+# Files hashed per process pool task
+DEFAULT_HASH_BATCH_SIZE = 32
+
+# Chunks a hash is split into, one bucket table each
+INDEX_CHUNKS = 4
+
+# Bits per chunk
+CHUNK_BITS = HASH_BITS // INDEX_CHUNKS
+
+# Most products the similar_to gallery filter matches
+MAX_SIMILAR_RESULTS = 500
+
+# Bound parameters per "id IN (...)" lookup (SQLite allows 999)
+LOOKUP_CHUNK_SIZE = 500
+
+# Rows per batch while loading or backfilling
+LOAD_BATCH_SIZE = 10_000
+
+# Stores a hash unless the product is gone or already hashed
+_STORE_HASH = text(
+    "INSERT OR IGNORE INTO product_hashes (product_id, dhash, created_at)"
+    " SELECT :product_id, :dhash, :created_at"
+    " WHERE EXISTS (SELECT 1 FROM products WHERE id = :product_id)"
+).bindparams(bindparam("created_at", type_=DateTime))
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(radius: int) -> Tuple[int, ...]:
+    """Return every chunk-sized mask with at most radius bits set."""
+    masks = [0]
+    for bits in range(1, radius + 1):
+        for positions in combinations(range(CHUNK_BITS), bits):
+            masks.append(sum(1 << position for position in positions))
+    return tuple(masks)
+
+
+class HammingIndex:
+    """Multi-index table of 64-bit hashes for Hamming-radius queries.
+
+    Hashes are kept in an array and product ids packed into 16 bytes each,
+    like in ProductIndex. Every chunk has a dict of bucket -> array of
+    positions. Removed products stay in the arrays and are skipped. Not
+    thread-safe; SimilarityIndex guards it with its lock.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._hashes = array("Q")
+        self._keys = bytearray()
+        # Positions whose id is not a canonical UUID
+        self._odd_keys: Dict[int, str] = {}
+        self._tables: List[Dict[int, array]] = [{} for _ in range(INDEX_CHUNKS)]
+        self._removed: Set[str] = set()
+
+    def __len__(self) -> int:
+        """Number of hashes added, removed ones included."""
+        return len(self._hashes)
+
+    def add(self, product_id: str, value: int):
+        """Add the hash of a product."""
+        position = len(self._hashes)
+        self._hashes.append(value)
+        key, canonical = encode_id(product_id)
+        self._keys += key
+        if not canonical:
+            self._odd_keys[position] = product_id
+        for chunk, bucket in enumerate(_chunks(value)):
+            rows = self._tables[chunk].get(bucket)
+            if rows is None:
+                self._tables[chunk][bucket] = array("I", (position,))
+            else:
+                rows.append(position)
+        self._removed.discard(product_id)
+
+    def remove(self, product_id: str):
+        """Leave a product out of every later result."""
+        self._removed.add(product_id)
+
+    def product_id(self, position: int) -> str:
+        """Return the product id stored at a position."""
+        odd = self._odd_keys.get(position)
+        if odd is not None:
+            return odd
+        return format_id(bytes(self._keys[position * 16 : position * 16 + 16]))
+
+    def candidates(self, value: int, max_distance: int) -> Set[int]:
+        """Return the positions sharing a near bucket with value."""
+        masks = _flip_masks(max_distance // INDEX_CHUNKS)
+        found: Set[int] = set()
+        for chunk, bucket in enumerate(_chunks(value)):
+            table = self._tables[chunk]
+            for mask in masks:
+                rows = table.get(bucket ^ mask)
+                if rows is not None:
+                    found.update(rows)
+        return found
+
+    def query(self, value: int, max_distance: int) -> List[Tuple[str, int]]:
+        """Return (product id, distance) within max_distance, nearest first."""
+        hashes = self._hashes
+        matches = []
+        for position in self.candidates(value, max_distance):
+            distance = (hashes[position] ^ value).bit_count()
+            if distance <= max_distance:
+                product_id = self.product_id(position)
+                if product_id not in self._removed:
+                    matches.append((product_id, distance))
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """Yield (product id, hash) of every product not removed."""
+        for position, value in enumerate(self._hashes):
+            product_id = self.product_id(position)
+            if product_id not in self._removed:
+                yield product_id, value
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the arrays and bucket tables in bytes."""
+        total = self._hashes.itemsize * len(self._hashes) + len(self._keys)
+        for table in self._tables:
+            total += sum(rows.itemsize * len(rows) + 64 for rows in table.values())
+            total += 40 * len(table)
+        return total
+
+
+def _chunks(value: int) -> List[int]:
+    """Split a hash into its INDEX_CHUNKS buckets."""
+    mask = (1 << CHUNK_BITS) - 1
+    return [value >> (chunk * CHUNK_BITS) & mask for chunk in range(INDEX_CHUNKS)]
+
+
+@dataclass
+class CleanupGroup:
+    """One duplicate group: the product to keep and the ones to delete."""
+
+    keep: str
+    remove: List[str] = field(default_factory=list)
+
+
+class SimilarityIndex:
+    """Perceptual hashes of image products, kept current by events.
+
+    Queries are safe from any thread. Hashes computed while the initial
+    load is running are held back and added when it finishes.
+
+    Attributes:
+        ready: Whether the initial load has finished
+        max_distance: Default distance of find_similar() and duplicate groups
+        hashed: Files hashed by this instance
+        failed: Files that could not be hashed
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        executor: Optional[Executor] = None,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        batch_size: int = DEFAULT_HASH_BATCH_SIZE,
+        signal_bus=None,
+    ):
+        """Initialize an empty index and connect it to the domain signals.
+
+        Args:
+            database: Database holding products and product_hashes
+            executor: Worker pool (defaults to a spawn-based process pool)
+            max_distance: Default near-duplicate distance
+            batch_size: Files hashed per pool task
+            signal_bus: Signal bus to follow (defaults to the global bus)
+        """
+        self.database = database
+        self.signal_bus = signal_bus or default_signal_bus
+        self.max_distance = max_distance
+        self.batch_size = batch_size
+        self.ready = False
+        self.hashed = 0
+        self.failed = 0
+
+        self._lock = threading.RLock()
+        self._index = HammingIndex()
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._executor_lock = threading.Lock()
+        self._created: Set[str] = set()
+        self._armed = False
+        # Ids being hashed, so a product is not queued twice
+        self._hashing: Set[str] = set()
+        self._futures: Set[Future] = set()
+        # Hashes that arrived before the load finished
+        self._early: Dict[str, int] = {}
+        self._load_thread: Optional[threading.Thread] = None
+
+        domain = self.signal_bus.domain
+        domain.product_created.connect(self._on_product_created)
+        domain.product_deleted.connect(self._on_product_deleted)
+
+    def __len__(self) -> int:
+        """Number of hashes in the index, deleted products included."""
+        with self._lock:
+            return len(self._index)
+
+    def start(self):
+        """Load the stored hashes on a background thread."""
+        self._load_thread = threading.Thread(
+            target=self.load, name="SimilarityIndexLoad", daemon=True
+        )
+        self._load_thread.start()
+
+    def load(self, connection: Optional[Connection] = None):
+        """Read the hash of every live product into the index.
+
+        Args:
+            connection: Connection to read with (defaults to a new one)
+        """
+        if connection is None:
+            with self.database.engine.connect() as connection:
+                return self.load(connection)
+        statement = (
+            select(ProductHash.product_id, ProductHash.dhash)
+            .join(Product, Product.id == ProductHash.product_id)
+            .where(Product.deleted_at.is_(None))
+        )
+        result = connection.execution_options(yield_per=LOAD_BATCH_SIZE).execute(
+            statement
+        )
+        for rows in result.partitions():
+            with self._lock:
+                for product_id, dhash in rows:
+                    if product_id not in self._early:
+                        self._index.add(product_id, parse_hash(dhash))
+        with self._lock:
+            for product_id, value in self._early.items():
+                self._index.add(product_id, value)
+            self._early.clear()
+            self.ready = True
+        logger.info("Similarity index loaded %d hashes", len(self))
+
+    def find_similar(
+        self,
+        product_id: str,
+        max_distance: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, int]]:
+        """Return products that look like the given one, nearest first.
+
+        Args:
+            product_id: Product to compare against
+            max_distance: Largest Hamming distance (defaults to max_distance)
+            limit: Most matches to return
+
+        Returns:
+            List[Tuple[str, int]]: (product id, distance), without the
+            product itself; empty if it has no hash yet
+        """
+        value = self.hash_of(product_id)
+        if value is None:
+            return []
+        matches = [
+            match
+            for match in self.similar_to_hash(value, max_distance)
+            if match[0] != product_id
+        ]
+        return matches[:limit] if limit is not None else matches
+
+    def similar_to_hash(
+        self, value: int, max_distance: Optional[int] = None
+    ) -> List[Tuple[str, int]]:
+        """Return (product id, distance) of every product near a hash."""
+        if max_distance is None:
+            max_distance = self.max_distance
+        with self._lock:
+            return self._index.query(value, max_distance)
+
+    def hash_of(self, product_id: str) -> Optional[int]:
+        """Return the stored hash of a product, or None."""
+        with self.database.engine.connect() as connection:
+            dhash = connection.scalar(
+                select(ProductHash.dhash).where(ProductHash.product_id == product_id)
+            )
+        return parse_hash(dhash) if dhash is not None else None
+
+    def similar_predicate(self, product_id: str) -> ColumnElement:
+        """Compile the gallery's similar_to filter: the product and its matches."""
+        ids = [product_id]
+        ids.extend(
+            match[0]
+            for match in self.find_similar(product_id, limit=MAX_SIMILAR_RESULTS - 1)
+        )
+        return Product.id.in_(ids)
+
+    def duplicate_groups(
+        self,
+        max_distance: Optional[int] = None,
+        project_id: Optional[str] = None,
+        product_ids: Optional[Iterable[str]] = None,
+    ) -> List[List[str]]:
+        """Group products that are near-duplicates of each other.
+
+        Groups are connected components: A and C share a group when both
+        are near B, even if they are further apart from each other.
+
+        Args:
+            max_distance: Largest distance within a group
+            project_id: Only consider products of this project
+            product_ids: Only consider these products
+
+        Returns:
+            List[List[str]]: Groups of two or more ids, largest first
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        scope: Optional[Set[str]] = None
+        if product_ids is not None:
+            scope = set(product_ids)
+        if project_id is not None:
+            with self.database.engine.connect() as connection:
+                in_project = set(
+                    connection.scalars(
+                        select(Product.id).where(
+                            Product.project_id == project_id,
+                            Product.deleted_at.is_(None),
+                        )
+                    )
+                )
+            scope = in_project if scope is None else scope & in_project
+
+        parent: Dict[str, str] = {}
+
+        def find(node: str) -> str:
+            while parent.setdefault(node, node) != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        with self._lock:
+            items = list(self._index.items())
+        for product_id, value in items:
+            if scope is not None and product_id not in scope:
+                continue
+            # One query per product, so events are not held up for the whole scan
+            for other, _distance in self.similar_to_hash(value, max_distance):
+                if other != product_id and (scope is None or other in scope):
+                    parent[find(other)] = find(product_id)
+
+        groups: Dict[str, List[str]] = {}
+        for product_id in parent:
+            groups.setdefault(find(product_id), []).append(product_id)
+        return sorted(
+            (sorted(group) for group in groups.values() if len(group) > 1),
+            key=lambda group: (-len(group), group[0]),
+        )
+
+    def backfill(self, limit: Optional[int] = None) -> int:
+        """Queue hashing of every live image product that has no hash yet.
+
+        Args:
+            limit: Most products to queue
+
+        Returns:
+            int: Number of products queued; call flush() to wait for them
+        """
+        statement = (
+            select(Product.id, Product.file_path)
+            .outerjoin(ProductHash, ProductHash.product_id == Product.id)
+            .where(
+                Product.type == "image",
+                Product.deleted_at.is_(None),
+                ProductHash.product_id.is_(None),
+            )
+            .order_by(Product.created_at)
+            .limit(limit)
+        )
+        with self.database.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+        return self._hash(rows)
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until the load and every hash queued so far are stored."""
+        if self._load_thread is not None:
+            self._load_thread.join(timeout)
+        while True:
+            self.database.writer.flush(timeout)
+            with self._lock:
+                futures = list(self._futures)
+            if not futures:
+                return
+            for future in futures:
+                try:
+                    future.result(timeout)
+                except Exception:
+                    pass
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the in-memory index in bytes."""
+        with self._lock:
+            return self._index.memory_bytes()
+
+    def shutdown(self, wait: bool = False):
+        """Stop the worker pool, cancelling queued hashing."""
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    # Event handling
+
+    def _on_product_created(self, product_id: str, *args):
+        """Record a created product."""
+        with self._lock:
+            self._created.add(product_id)
+        self._arm()
+
+    def _on_product_deleted(self, product_id: str, *args):
+        """Leave a deleted product out of later results."""
+        with self._lock:
+            self._index.remove(product_id)
+            self._early.pop(product_id, None)
+
+    def _arm(self):
+        """Queue the tick's resolve call unless one is already queued."""
+        with self._lock:
+            if self._armed:
+                return
+            self._armed = True
+        try:
+            self.database.writer.submit(self._resolve)
+        except RuntimeError:
+            with self._lock:
+                self._armed = False
+            logger.warning("Database writer is not running; products not hashed")
+
+    def _resolve(self, connection: Connection):
+        """Writer thread: read the new image products' paths and hash them."""
+        with self._lock:
+            created, self._created = self._created, set()
+            self._armed = False
+        statement = (
+            select(Product.id, Product.file_path)
+            .where(
+                Product.type == "image",
+                Product.deleted_at.is_(None),
+                Product.id.in_(bindparam("ids", expanding=True)),
+            )
+            .where(
+                ~select(ProductHash.product_id)
+                .where(ProductHash.product_id == Product.id)
+                .exists()
+            )
+        )
+        ordered = sorted(created)
+        rows: List[Tuple[str, str]] = []
+        for start in range(0, len(ordered), LOOKUP_CHUNK_SIZE):
+            chunk = ordered[start : start + LOOKUP_CHUNK_SIZE]
+            result = connection.execute(statement, {"ids": chunk})
+            rows.extend((product_id, file_path) for product_id, file_path in result)
+        self._hash(rows)
+
+    def _hash(self, rows: Sequence[Tuple[str, str]]) -> int:
+        """Send products to the pool in batches; returns how many were sent."""
+        with self._lock:
+            rows = [row for row in rows if row[0] not in self._hashing]
+            self._hashing.update(row[0] for row in rows)
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start : start + self.batch_size]
+            product_ids = [product_id for product_id, _path in batch]
+            future = self._get_executor().submit(
+                dhash_files, [path for _product_id, path in batch]
+            )
+            with self._lock:
+                self._futures.add(future)
+            future.add_done_callback(partial(self._on_hashed, product_ids))
+        return len(rows)
+
+    def _on_hashed(self, product_ids: List[str], future: Future):
+        """Store a finished batch and add it to the index."""
+        hashes: Dict[str, int] = {}
+        if future.cancelled():
+            pass
+        elif future.exception() is not None:
+            logger.warning(
+                "Hashing %d products failed: %s", len(product_ids), future.exception()
+            )
+        else:
+            hashes = {
+                product_id: value
+                for product_id, value in zip(product_ids, future.result())
+                if value is not None
+            }
+        with self._lock:
+            self.hashed += len(hashes)
+            self.failed += len(product_ids) - len(hashes)
+            for product_id, value in hashes.items():
+                if self.ready:
+                    self._index.add(product_id, value)
+                else:
+                    self._early[product_id] = value
+
+        if hashes:
+            now = utcnow()
+            params = [
+                {
+                    "product_id": product_id,
+                    "dhash": format_hash(value),
+                    "created_at": now,
+                }
+                for product_id, value in hashes.items()
+            ]
+            try:
+                stored = self.database.writer.submit(
+                    lambda connection: connection.execute(_STORE_HASH, params)
+                )
+            except RuntimeError:
+                logger.warning("Database writer is not running; hashes not stored")
+            else:
+                stored.add_done_callback(
+                    lambda _stored: self._finish(product_ids, future)
+                )
+                return
+        self._finish(product_ids, future)
+
+    def _finish(self, product_ids: List[str], future: Future):
+        """Forget a batch once its hashes are stored."""
+        with self._lock:
+            self._hashing.difference_update(product_ids)
+            self._futures.discard(future)
+
+    def _get_executor(self) -> Executor:
+        """Create the process pool on first use."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=max(1, (os.cpu_count() or 2) - 1),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+
+def register_similarity_filter(index: SimilarityIndex):
+    """Let KeysetPager filter products with {"similar_to": product_id}."""
+    FILTERS[Product]["similar_to"] = index.similar_predicate
+
+
+def plan_cleanup(
+    database: Database, groups: Iterable[Sequence[str]]
+) -> List[CleanupGroup]:
+    """Choose the product to keep in each duplicate group.
+
+    The keeper is the liked product, then the best rated, then the one
+    with the most pixels, then the largest file, then the oldest.
+
+    Args:
+        database: Database to read the products from
+        groups: Duplicate groups, as from SimilarityIndex.duplicate_groups()
+
+    Returns:
+        List[CleanupGroup]: One entry per group with two or more live products
+    """
+    groups = [list(group) for group in groups]
+    ids = sorted({product_id for group in groups for product_id in group})
+    statement = select(
+        Product.id,
+        Product.liked,
+        Product.rating,
+        Product.width,
+        Product.height,
+        Product.file_size,
+        Product.created_at,
+    ).where(
+        Product.deleted_at.is_(None), Product.id.in_(bindparam("ids", expanding=True))
+    )
+    rank: Dict[str, Tuple] = {}
+    with database.engine.connect() as connection:
+        for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+            chunk = ids[start : start + LOOKUP_CHUNK_SIZE]
+            for (
+                product_id,
+                liked,
+                rating,
+                width,
+                height,
+                size,
+                created,
+            ) in connection.execute(statement, {"ids": chunk}):
+                rank[product_id] = (
+                    not liked,
+                    -(rating or 0),
+                    -((width or 0) * (height or 0)),
+                    -(size or 0),
+                    created,
+                    product_id,
+                )
+
+    plan = []
+    for group in groups:
+        live = sorted(
+            (product_id for product_id in group if product_id in rank),
+            key=rank.__getitem__,
+        )
+        if len(live) > 1:
+            plan.append(CleanupGroup(keep=live[0], remove=live[1:]))
+    return plan
+
+
+def apply_cleanup(
+    database: Database, plan: Iterable[CleanupGroup], signal_bus=None
+) -> int:
+    """Soft-delete the products a cleanup plan removes.
+
+    Each deletion is announced with domain.product_deleted once written,
+    so counters, the product index and this index follow.
+
+    Returns:
+        int: Number of products deleted
+    """
+    signal_bus = signal_bus or default_signal_bus
+    now = utcnow()
+    removed = [product_id for group in plan for product_id in group.remove]
+    for product_id in removed:
+        database.writer.update(Product.__table__, product_id, {"deleted_at": now})
+    database.writer.flush()
+    for product_id in removed:
+        signal_bus.domain.product_deleted.emit(product_id)
+    if removed:
+        logger.info("Deleted %d near-duplicate products", len(removed))
+    return len(removed)
+
+
+_similarity_index: Optional[SimilarityIndex] = None
+
+
+def init_similarity() -> SimilarityIndex:
+    """Build the application's similarity index (deferred startup hook).
+
+    The worker pool itself is only started when the first image is hashed.
+    """
+    global _similarity_index
+    if _similarity_index is None:
+        from models.database import init_database
+
+        _similarity_index = SimilarityIndex(init_database())
+        register_similarity_filter(_similarity_index)
+        _similarity_index.start()
+
+        from PyQt6.QtCore import QCoreApplication
+
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_similarity_index.shutdown)
+    return _similarity_index
+
+
+def get_similarity() -> Optional[SimilarityIndex]:
+    """Return the application similarity index, if initialized."""
+    return _similarity_index
@@ -6,6 +6,9 @@ between different parts of the application. It includes:
 - DomainSignals: Business domain events (orders, generations, products)
 - UISignals: User interface interaction events
 - SignalBus: Singleton pattern for centralized signal management
+- ProgressCoalescer: Frame-windowed delivery of generation progress
+- SignalBatcher: Per-tick batches of single-id signals
+- SignalProfiler: Opt-in per-slot timing of the signal bus
 
 Usage:
     from app.signals import signal_bus
@@ -19,6 +22,17 @@ Usage:
 
 from .domain_signals import DomainSignals
 from .ui_signals import UISignals
+from .progress_coalescer import ProgressCoalescer
+from .signal_batcher import SignalBatcher
+from .signal_profiler import SignalProfiler
 from .signal_bus import SignalBus, signal_bus
 
-__all__ = ["DomainSignals", "UISignals", "SignalBus", "signal_bus"]
+__all__ = [
+    "DomainSignals",
+    "UISignals",
+    "ProgressCoalescer",
+    "SignalBatcher",
+    "SignalProfiler",
+    "SignalBus",
+    "signal_bus",
+]
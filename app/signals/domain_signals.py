@@ -13,12 +13,22 @@ class DomainSignals(QObject):
 
     Signals:
         order_created: Emitted when a new order is created
-        order_items_expanded: Emitted when order items are expanded from parameters
+        order_items_expanded: Emitted per chunk as order items are expanded
+            (item_count is cumulative; the last emission is the total)
         generation_started: Emitted when generation begins for an order item
         generation_progress: Emitted to report generation progress
         generation_completed: Emitted when generation finishes successfully
+        generation_completed_batch: Batch of generation_completed item ids
+        generation_cancelled: Emitted when a queued or running item is cancelled
+        generation_retrying: Emitted when a failed item is queued again after
+            a backoff delay
+        scheduler_stats: Periodic queue depth and wait times per provider
         product_created: Emitted when a new product is created
+        product_created_batch: Batch of product_created product ids
         product_liked: Emitted when a product is liked/favorited
+        import_progress: Periodic counts and throughput of a bulk import
+        search_completed: First page of ranked product ids for a search
+        thumbnail_ready: Emitted when a requested thumbnail is in memory
         project_changed: Emitted when the active project changes
 
     Example:
@@ -36,11 +46,19 @@ class DomainSignals(QObject):
     generation_progress = pyqtSignal(str, int)  # item_id, percent (0-100)
     generation_completed = pyqtSignal(str)  # item_id
     generation_failed = pyqtSignal(str, str)  # item_id, error
+    generation_completed_batch = pyqtSignal(list)  # item_ids
+    generation_cancelled = pyqtSignal(str)  # item_id
+    generation_retrying = pyqtSignal(str, int, float)  # item_id, attempt, delay s
+    scheduler_stats = pyqtSignal(dict)  # provider_id -> queue statistics
 
     # Product events
     product_created = pyqtSignal(str)  # product_id
+    product_created_batch = pyqtSignal(list)  # product_ids
     product_liked = pyqtSignal(str)  # product_id
     product_deleted = pyqtSignal(str)  # product_id
+    thumbnail_ready = pyqtSignal(str, str)  # product_id, size_name
+    import_progress = pyqtSignal(dict)  # import statistics
+    search_completed = pyqtSignal(str, list)  # query, product_ids
 
     # Project events
     project_changed = pyqtSignal(str)  # project_id
@@ -0,0 +1,168 @@
+"""Coalesced delivery of generation progress for Art Factory.
+
+Workers can report progress far faster than the GUI can repaint. The
+ProgressCoalescer buffers the latest percentage per item and delivers it on
+the thread the coalescer lives in (normally the GUI thread) at most once per
+frame window, so a burst of updates costs one slot call per item per frame.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtBoundSignal, pyqtSignal
+
+# Default frame window in milliseconds (roughly 30 deliveries per second)
+DEFAULT_PROGRESS_WINDOW_MS = 33
+
+
+class ProgressCoalescer(QObject):
+    """Collapse generation_progress updates per item within a frame window.
+
+    Progress posted from any thread is stored as the latest value for its
+    item_id. When the window elapses, each pending item is delivered once
+    through the target signal. Lifecycle signals are never buffered; instead
+    the coalescer flushes an item's pending progress as soon as a lifecycle
+    signal for that item is emitted, so slots always see progress before
+    the matching started/completed/failed event.
+
+    Attributes:
+        posted_count: Number of progress updates posted
+        delivered_count: Number of progress updates actually emitted
+
+    Example:
+        coalescer = ProgressCoalescer(domain.generation_progress, window_ms=16)
+        coalescer.post("item_1", 10)
+        coalescer.post("item_1", 20)  # Only 20 is delivered
+    """
+
+    # Internal wake-up used to arm the timer on the coalescer's own thread
+    _wake = pyqtSignal()
+
+    def __init__(
+        self,
+        target: pyqtBoundSignal,
+        window_ms: int = DEFAULT_PROGRESS_WINDOW_MS,
+        parent: Optional[QObject] = None,
+    ):
+        """Initialize the progress coalescer.
+
+        Args:
+            target: The (item_id, percent) signal to deliver through
+            window_ms: Frame window in milliseconds; 0 disables coalescing
+            parent: Optional parent QObject
+        """
+        super().__init__(parent)
+        self._target = target
+        self._window_ms = max(0, int(window_ms))
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[int, float]] = {}
+        self._armed = False
+
+        self.posted_count = 0
+        self.delivered_count = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        # The stubs miss connect()'s optional connection type
+        queued = Qt.ConnectionType.QueuedConnection
+        self._wake.connect(self._arm, queued)  # type: ignore[call-arg]
+
+    @property
+    def window_ms(self) -> int:
+        """Current frame window in milliseconds."""
+        return self._window_ms
+
+    def set_window(self, window_ms: int):
+        """Change the frame window.
+
+        Setting the window to 0 flushes anything pending and switches to
+        immediate pass-through delivery.
+
+        Args:
+            window_ms: New frame window in milliseconds
+        """
+        self._window_ms = max(0, int(window_ms))
+        if self._window_ms == 0:
+            self.flush()
+
+    def post(self, item_id: str, percent: int):
+        """Record a progress update for delivery in the next frame.
+
+        Safe to call from any thread.
+
+        Args:
+            item_id: The order item reporting progress
+            percent: Progress percentage (0-100)
+        """
+        if self._window_ms == 0:
+            with self._lock:
+                self.posted_count += 1
+                self.delivered_count += 1
+            self._target.emit(item_id, percent)
+            return
+
+        with self._lock:
+            self.posted_count += 1
+            self._pending[item_id] = (percent, time.perf_counter())
+            if self._armed:
+                return
+            self._armed = True
+
+        self._wake.emit()
+
+    def flush(self):
+        """Deliver all pending progress updates immediately."""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._armed = False
+            self.delivered_count += len(pending)
+
+        for item_id, (percent, _) in pending.items():
+            self._target.emit(item_id, percent)
+
+    def flush_item(self, item_id: str, *_args):
+        """Deliver pending progress for a single item immediately.
+
+        Connected directly to lifecycle signals so buffered progress is
+        emitted before the lifecycle event itself reaches any slot queue.
+
+        Args:
+            item_id: The order item whose pending progress to deliver
+        """
+        with self._lock:
+            entry = self._pending.pop(item_id, None)
+            if entry is not None:
+                self.delivered_count += 1
+
+        if entry is not None:
+            self._target.emit(item_id, entry[0])
+
+    def pending_count(self) -> int:
+        """Return the number of items with undelivered progress."""
+        with self._lock:
+            return len(self._pending)
+
+    def oldest_pending_age(self) -> float:
+        """Return the age in seconds of the oldest undelivered update."""
+        with self._lock:
+            if not self._pending:
+                return 0.0
+            oldest = min(posted_at for _, posted_at in self._pending.values())
+        return time.perf_counter() - oldest
+
+    def clear(self):
+        """Drop all pending progress and reset counters."""
+        with self._lock:
+            self._pending.clear()
+            self._armed = False
+            self.posted_count = 0
+            self.delivered_count = 0
+        self._timer.stop()
+
+    def _arm(self):
+        """Start the frame timer on the coalescer's thread."""
+        if not self._timer.isActive():
+            self._timer.start(self._window_ms)
@@ -0,0 +1,128 @@
+"""Tick-based batching of single-id signals for Art Factory.
+
+Bulk operations such as folder imports or large order fulfilment emit one
+single-id signal per product or item. The SignalBatcher collects those ids as
+they are emitted, from any thread, and re-emits them once per tick as a list
+through a batch signal, so views can do one model update per batch instead
+of one per id.
+"""
+
+import threading
+from typing import List, Optional
+
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtBoundSignal, pyqtSignal
+
+# Default tick length in milliseconds for collecting a batch
+DEFAULT_BATCH_WINDOW_MS = 16
+
+
+class SignalBatcher(QObject):
+    """Collect single-id emits and deliver them as one list per tick.
+
+    The batcher is connected directly to the single-id source signal, so it
+    runs in the emitting thread and never changes what existing single-id
+    slots receive. Ids are delivered in emit order on the thread the batcher
+    lives in (normally the GUI thread). Keep a reference to the batcher for
+    as long as batching is wanted; the signal bus owns its own batchers.
+
+    Attributes:
+        batch_count: Number of batches delivered
+
+    Example:
+        batcher = SignalBatcher(domain.product_created, domain.product_created_batch)
+        domain.product_created.emit("product_1")
+        domain.product_created.emit("product_2")
+        # Next tick: product_created_batch(["product_1", "product_2"])
+    """
+
+    # Internal wake-up used to arm the timer on the batcher's own thread
+    _wake = pyqtSignal()
+
+    def __init__(
+        self,
+        source: pyqtBoundSignal,
+        target: pyqtBoundSignal,
+        window_ms: int = DEFAULT_BATCH_WINDOW_MS,
+        parent: Optional[QObject] = None,
+    ):
+        """Initialize the signal batcher.
+
+        Args:
+            source: The single-id signal to collect from
+            target: The list signal to deliver batches through
+            window_ms: Tick length in milliseconds
+            parent: Optional parent QObject
+        """
+        super().__init__(parent)
+        self._source = source
+        self._target = target
+        self._window_ms = max(0, int(window_ms))
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._armed = False
+
+        self.batch_count = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        # The stubs miss connect()'s optional connection type
+        queued = Qt.ConnectionType.QueuedConnection
+        self._wake.connect(self._arm, queued)  # type: ignore[call-arg]
+        self.attach()
+
+    def attach(self):
+        """Connect to the source signal (again after a bus reset)."""
+        self._source.connect(self.post, Qt.ConnectionType.DirectConnection)
+
+    def set_window(self, window_ms: int):
+        """Change the tick length.
+
+        Args:
+            window_ms: New tick length in milliseconds
+        """
+        self._window_ms = max(0, int(window_ms))
+
+    def post(self, entity_id: str):
+        """Add an id to the current batch. Safe to call from any thread.
+
+        Args:
+            entity_id: The id carried by the single-id signal
+        """
+        with self._lock:
+            self._pending.append(entity_id)
+            if self._armed:
+                return
+            self._armed = True
+
+        self._wake.emit()
+
+    def flush(self):
+        """Deliver the current batch immediately."""
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+            self._armed = False
+            if pending:
+                self.batch_count += 1
+
+        if pending:
+            self._target.emit(pending)
+
+    def pending_count(self) -> int:
+        """Return the number of ids waiting for the next batch."""
+        with self._lock:
+            return len(self._pending)
+
+    def clear(self):
+        """Drop the current batch and reset counters."""
+        with self._lock:
+            self._pending = []
+            self._armed = False
+            self.batch_count = 0
+        self._timer.stop()
+
+    def _arm(self):
+        """Start the tick timer on the batcher's thread."""
+        if not self._timer.isActive():
+            self._timer.start(self._window_ms)
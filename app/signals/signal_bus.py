@@ -2,69 +2,160 @@
 
 The SignalBus provides a singleton pattern for accessing all application
 signals from a single location, with optional debug logging.
+
+Debug logging is decided once, when it is switched on or off, rather than on
+every call: with logging off, ``signal_bus.domain`` and ``signal_bus.ui`` are
+the raw Qt signal objects, and with logging on they are wrappers whose
+``emit`` is bound to a logging (or sampled logging) path up front. Log records
+go to the ``logging`` module and to an in-memory ring buffer.
+
+Profiling (see signal_profiler) is switched the same way: with it on, the
+wrappers connect slots through timing relays, and the statistics are kept
+on ``signal_bus.profiler``.
 """
 
+import logging
 import os
-import sys
-from typing import Optional
-from functools import wraps
-from PyQt6.QtCore import QObject, pyqtBoundSignal
+import time
+from collections import deque
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from PyQt6.QtCore import QObject, Qt, pyqtBoundSignal
 
 from .domain_signals import DomainSignals
+from .progress_coalescer import ProgressCoalescer
+from .signal_batcher import SignalBatcher
+from .signal_profiler import SignalProfiler
 from .ui_signals import UISignals
 
+logger = logging.getLogger(__name__)
+
+# Lifecycle signals that must flush buffered progress for their item first
+PROGRESS_LIFECYCLE_SIGNALS = (
+    "generation_started",
+    "generation_completed",
+    "generation_failed",
+    "generation_cancelled",
+    "generation_retrying",
+)
+
+# Single-id domain signals that are also delivered as per-tick batches
+BATCHED_SIGNALS = {
+    "product_created": "product_created_batch",
+    "generation_completed": "generation_completed_batch",
+}
+
+# Default number of records kept in the signal trace ring buffer
+DEFAULT_TRACE_SIZE = 1000
 
-def log_signal_emission(signal_name: str):
-    """Decorator to log signal emissions in debug mode.
 
-    Args:
-        signal_name: Name of the signal for logging
+class SignalRecord(NamedTuple):
+    """A structured record of a signal bus event."""
+
+    timestamp: float
+    event: str  # emit, connect, disconnect
+    signal: str
+    args: Tuple[Any, ...]
+
+
+class SignalTrace:
+    """Fixed-size ring buffer of recent signal records.
+
+    Example:
+        signal_bus.set_debug(True)
+        signal_bus.domain.order_created.emit("order_1")
+        signal_bus.trace.records()[-1].signal  # "domain.order_created"
     """
 
-    def decorator(emit_method):
-        @wraps(emit_method)
-        def wrapper(*args, **kwargs):
-            if os.environ.get("AF_DEBUG", "0") == "1":
-                # Format arguments for logging
-                arg_str = ""
-                if args:
-                    # Skip 'self' argument
-                    signal_args = args[1:] if len(args) > 1 else []
-                    if signal_args:
-                        arg_str = f" with args: {signal_args}"
-                print(f"[SIGNAL] {signal_name} emitted{arg_str}", file=sys.stderr)
-            return emit_method(*args, **kwargs)
+    def __init__(self, maxlen: int = DEFAULT_TRACE_SIZE):
+        """Initialize the trace buffer.
 
-        return wrapper
+        Args:
+            maxlen: Maximum number of records retained
+        """
+        self._records: deque = deque(maxlen=maxlen)
+
+    def append(self, event: str, signal_name: str, args: Tuple[Any, ...] = ()):
+        """Record a signal event.
+
+        Args:
+            event: Event kind (emit, connect, disconnect)
+            signal_name: Fully qualified signal name
+            args: Signal arguments, if any
+        """
+        self._records.append(SignalRecord(time.time(), event, signal_name, args))
+
+    def records(self) -> List[SignalRecord]:
+        """Return the retained records, oldest first."""
+        return list(self._records)
 
-    return decorator
+    def clear(self):
+        """Discard all retained records."""
+        self._records.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
 
 
 class LoggedSignalWrapper:
-    """Wrapper class to add logging to Qt signals."""
+    """Wrapper class to add logging to Qt signals.
+
+    The emit path is selected once at construction: every emit is logged
+    when sample_every is 1, otherwise only every Nth emit is logged.
+    """
 
-    def __init__(self, signal: pyqtBoundSignal, signal_name: str):
+    def __init__(
+        self,
+        signal: pyqtBoundSignal,
+        signal_name: str,
+        trace: Optional[SignalTrace] = None,
+        sample_every: int = 1,
+    ):
         """Initialize the logged signal wrapper.
 
         Args:
             signal: The Qt signal to wrap
             signal_name: Name for logging purposes
+            trace: Optional ring buffer receiving structured records
+            sample_every: Log one in every N emits (1 logs all of them)
         """
         self._signal = signal
         self._signal_name = signal_name
+        self._trace = trace
+        self._sample_every = max(1, int(sample_every))
+        self._emit_count = 0
+
+        if self._sample_every == 1:
+            self.emit = self._emit_logged
+        else:
+            self.emit = self._emit_sampled
+
+    def _record(self, event: str, message: str, args: Tuple[Any, ...] = ()):
+        """Send a structured record to the trace buffer and logger."""
+        if self._trace is not None:
+            self._trace.append(event, self._signal_name, args)
+        if logger.isEnabledFor(logging.DEBUG):
+            extra = {
+                "signal": self._signal_name,
+                "signal_event": event,
+                "signal_args": args,
+            }
+            if args:
+                logger.debug(
+                    message + " with args: %s", self._signal_name, args, extra=extra
+                )
+            else:
+                logger.debug(message, self._signal_name, extra=extra)
 
-    def connect(self, slot):
+    def connect(self, slot, *args):
         """Connect a slot to the signal.
 
         Args:
             slot: The slot function to connect
+            *args: Optional connection type, passed through to Qt
         """
-        if os.environ.get("AF_DEBUG", "0") == "1":
-            print(
-                f"[SIGNAL] Connected slot to {self._signal_name}",
-                file=sys.stderr,
-            )
-        return self._signal.connect(slot)
+        self._record("connect", "[SIGNAL] Connected slot to %s")
+        return self._signal.connect(slot, *args)
 
     def disconnect(self, slot=None):
         """Disconnect a slot from the signal.
@@ -72,41 +163,54 @@ class LoggedSignalWrapper:
         Args:
             slot: The slot to disconnect, or None to disconnect all
         """
-        if os.environ.get("AF_DEBUG", "0") == "1":
-            print(
-                f"[SIGNAL] Disconnected from {self._signal_name}",
-                file=sys.stderr,
-            )
+        self._record("disconnect", "[SIGNAL] Disconnected from %s")
         if slot is None:
             return self._signal.disconnect()
         return self._signal.disconnect(slot)
 
-    @log_signal_emission("signal")
-    def emit(self, *args):
-        """Emit the signal with optional logging.
+    def _emit_logged(self, *args):
+        """Emit the signal, logging every call.
 
         Args:
             *args: Arguments to pass to the signal
         """
-        # Update the decorator to use the actual signal name
-        if os.environ.get("AF_DEBUG", "0") == "1":
-            arg_str = f" with args: {args}" if args else ""
-            print(f"[SIGNAL] {self._signal_name} emitted{arg_str}", file=sys.stderr)
+        self._record("emit", "[SIGNAL] %s emitted", args)
+        return self._signal.emit(*args)
+
+    def _emit_sampled(self, *args):
+        """Emit the signal, logging one in every sample_every calls.
+
+        Args:
+            *args: Arguments to pass to the signal
+        """
+        self._emit_count += 1
+        if self._emit_count % self._sample_every == 0:
+            self._record("emit", "[SIGNAL] %s emitted", args)
         return self._signal.emit(*args)
 
 
 class LoggedSignals:
     """Base class for signals with automatic logging."""
 
-    def __init__(self, signals_instance: QObject, prefix: str):
+    def __init__(
+        self,
+        signals_instance: QObject,
+        prefix: str,
+        trace: Optional[SignalTrace] = None,
+        sample_every: int = 1,
+    ):
         """Initialize logged signals wrapper.
 
         Args:
             signals_instance: The signals instance to wrap
             prefix: Prefix for signal names in logs
+            trace: Optional ring buffer receiving structured records
+            sample_every: Log one in every N emits per signal
         """
         self._signals = signals_instance
         self._prefix = prefix
+        self._trace = trace
+        self._sample_every = sample_every
         self._setup_logging()
 
     def _setup_logging(self):
@@ -115,8 +219,90 @@ class LoggedSignals:
             attr = getattr(self._signals, attr_name)
             if isinstance(attr, pyqtBoundSignal):
                 signal_name = f"{self._prefix}.{attr_name}"
-                wrapped_signal = LoggedSignalWrapper(attr, signal_name)
-                setattr(self, attr_name, wrapped_signal)
+                setattr(self, attr_name, self._wrap(attr, signal_name))
+
+    def _wrap(self, signal: pyqtBoundSignal, signal_name: str):
+        """Return the wrapper for one signal."""
+        return LoggedSignalWrapper(signal, signal_name, self._trace, self._sample_every)
+
+
+class ProfiledSignalWrapper(LoggedSignalWrapper):
+    """Signal wrapper that connects slots through the profiler's relays.
+
+    Emits go straight to the Qt signal unless debug logging is also on.
+    """
+
+    def __init__(
+        self,
+        signal: pyqtBoundSignal,
+        signal_name: str,
+        profiler: SignalProfiler,
+        trace: Optional[SignalTrace] = None,
+        sample_every: int = 1,
+    ):
+        """Initialize the profiled signal wrapper.
+
+        Args:
+            signal: The Qt signal to wrap
+            signal_name: Name for statistics and logging
+            profiler: Profiler timing the connected slots
+            trace: Ring buffer for debug logging, or None when it is off
+            sample_every: Log one in every N emits (1 logs all of them)
+        """
+        super().__init__(signal, signal_name, trace, sample_every)
+        self._profiler = profiler
+        self._logging = trace is not None
+        if not self._logging:
+            self.emit = signal.emit
+
+    def connect(self, slot, *args):
+        """Connect a slot through a timing relay, or directly while paused.
+
+        Args:
+            slot: The slot function to connect
+            *args: Optional connection type, passed through to Qt
+        """
+        if self._logging:
+            self._record("connect", "[SIGNAL] Connected slot to %s")
+        if not self._profiler.enabled:
+            return self._signal.connect(slot, *args)
+        return self._profiler.connect(self._signal_name, self._signal, slot, *args)
+
+    def disconnect(self, slot=None):
+        """Disconnect a slot, or all of them when slot is None."""
+        if self._logging:
+            self._record("disconnect", "[SIGNAL] Disconnected from %s")
+        return self._profiler.disconnect(self._signal_name, self._signal, slot)
+
+
+class ProfiledSignals(LoggedSignals):
+    """Signals whose slots are timed, and logged when trace is given."""
+
+    def __init__(
+        self,
+        signals_instance: QObject,
+        prefix: str,
+        profiler: SignalProfiler,
+        trace: Optional[SignalTrace] = None,
+        sample_every: int = 1,
+    ):
+        """Initialize profiled signals wrapper.
+
+        Args:
+            signals_instance: The signals instance to wrap
+            prefix: Prefix for signal names
+            profiler: Profiler timing the connected slots
+            trace: Ring buffer for debug logging, or None when it is off
+            sample_every: Log one in every N emits per signal
+        """
+        self._profiler = profiler
+        super().__init__(signals_instance, prefix, trace, sample_every)
+
+    def _wrap(self, signal: pyqtBoundSignal, signal_name: str):
+        """Return the profiled wrapper for one signal."""
+        return ProfiledSignalWrapper(
+            signal, signal_name, self._profiler, self._trace, self._sample_every
+        )
 
 
 class SignalBus:
@@ -129,6 +315,10 @@ class SignalBus:
     Attributes:
         domain: Domain signals for business events
         ui: UI signals for user interface events
+        progress: Coalescer for high-frequency generation_progress updates
+        trace: Ring buffer of recent signal records while debugging
+        batchers: SignalBatcher per batched single-id domain signal
+        profiler: Slot timing statistics, once profiling was switched on
 
     Example:
         from app.signals import signal_bus
@@ -138,6 +328,9 @@ class SignalBus:
 
         # Emit a UI signal
         signal_bus.ui.loading_started.emit("Loading products...")
+
+        # Report progress from a worker (coalesced per frame window)
+        signal_bus.emit_progress("item_1", 42)
     """
 
     _instance: Optional["SignalBus"] = None
@@ -154,22 +347,147 @@ class SignalBus:
         if not hasattr(self, "_initialized"):
             self._domain_signals = DomainSignals()
             self._ui_signals = UISignals()
-
-            # Wrap signals with logging in debug mode
-            if os.environ.get("AF_DEBUG", "0") == "1":
-                print(
-                    "[SIGNAL] Signal bus initialized with debug logging",
-                    file=sys.stderr,
+            self.progress = ProgressCoalescer(self._domain_signals.generation_progress)
+            self._connect_progress_lifecycle()
+            self.batchers = {
+                name: SignalBatcher(
+                    getattr(self._domain_signals, name),
+                    getattr(self._domain_signals, batch_name),
                 )
-                self.domain = LoggedSignals(self._domain_signals, "domain")
-                self.ui = LoggedSignals(self._ui_signals, "ui")
-            else:
-                # Direct access without logging
-                self.domain = self._domain_signals
-                self.ui = self._ui_signals
+                for name, batch_name in BATCHED_SIGNALS.items()
+            }
+            self.trace = SignalTrace()
+            self.profiler: Optional[SignalProfiler] = None
+
+            # Resolve the debug and profiling decisions once; set_debug() and
+            # set_profiling() can change them later
+            self._debug_enabled = False
+            self._sample_every = 1
+            self._profiling_enabled = False
+            self.set_profiling(os.environ.get("AF_PROFILE_SIGNALS", "0") == "1")
+            self.set_debug(os.environ.get("AF_DEBUG", "0") == "1")
 
             self._initialized = True
 
+    @property
+    def debug_enabled(self) -> bool:
+        """Whether signal debug logging is currently active."""
+        return self._debug_enabled
+
+    def set_debug(self, enabled: bool, sample_every: int = 1):
+        """Switch signal debug logging on or off at runtime.
+
+        Existing connections are unaffected because they live on the
+        underlying Qt signals; only the emit/connect path is swapped.
+
+        Args:
+            enabled: True to log signal activity
+            sample_every: Log one in every N emits per signal
+        """
+        self._debug_enabled = enabled
+        self._sample_every = sample_every
+        self._apply_wrappers()
+        if enabled:
+            logger.debug("[SIGNAL] Signal bus debug logging enabled")
+
+    @property
+    def profiling_enabled(self) -> bool:
+        """Whether slots connected now are timed."""
+        return self._profiling_enabled
+
+    def set_profiling(self, enabled: bool):
+        """Switch slot profiling on or off at runtime.
+
+        Slots connected while profiling is on are timed; those connected
+        earlier are not. Switching it off stops recording but keeps the
+        statistics and the timed connections, so it can be resumed. While
+        timed connections remain, domain and ui stay wrapped so those slots
+        can still be disconnected.
+
+        Args:
+            enabled: True to time slots connected through the bus
+        """
+        if enabled and self.profiler is None:
+            self.profiler = SignalProfiler()
+            self._attach_profiler()
+        if self.profiler is not None:
+            self.profiler.enabled = enabled
+        self._profiling_enabled = enabled
+        self._apply_wrappers()
+
+    def _apply_wrappers(self):
+        """Point domain and ui at the raw signals or the right wrappers."""
+        trace = self.trace if self._debug_enabled else None
+        relayed = self.profiler is not None and self.profiler.has_relays()
+        if self._profiling_enabled or relayed:
+            self.domain = ProfiledSignals(
+                self._domain_signals,
+                "domain",
+                self.profiler,
+                trace,
+                self._sample_every,
+            )
+            self.ui = ProfiledSignals(
+                self._ui_signals, "ui", self.profiler, trace, self._sample_every
+            )
+        elif self._debug_enabled:
+            self.domain = LoggedSignals(
+                self._domain_signals, "domain", trace, self._sample_every
+            )
+            self.ui = LoggedSignals(self._ui_signals, "ui", trace, self._sample_every)
+        else:
+            # Direct access without logging
+            self.domain = self._domain_signals
+            self.ui = self._ui_signals
+
+    def _attach_profiler(self):
+        """Stamp every signal's emissions for queue-delay measurement."""
+        for prefix, signals in (
+            ("domain", self._domain_signals),
+            ("ui", self._ui_signals),
+        ):
+            for attr_name in dir(signals):
+                attr = getattr(signals, attr_name)
+                if isinstance(attr, pyqtBoundSignal):
+                    self.profiler.attach(f"{prefix}.{attr_name}", attr)
+
+    def _connect_progress_lifecycle(self):
+        """Flush buffered progress ahead of each lifecycle signal.
+
+        The connection is direct so the flush runs in the emitting thread
+        before the lifecycle event is queued for any other slot.
+        """
+        for signal_name in PROGRESS_LIFECYCLE_SIGNALS:
+            getattr(self._domain_signals, signal_name).connect(
+                self.progress.flush_item, Qt.ConnectionType.DirectConnection
+            )
+
+    def emit_progress(self, item_id: str, percent: int):
+        """Report generation progress through the coalescing layer.
+
+        Safe to call from worker threads. Slots connected to
+        domain.generation_progress receive only the latest value per item
+        once per frame window.
+
+        Args:
+            item_id: The order item reporting progress
+            percent: Progress percentage (0-100)
+        """
+        self.progress.post(item_id, percent)
+
+    def flush_batches(self):
+        """Deliver all pending id batches immediately."""
+        for batcher in self.batchers.values():
+            batcher.flush()
+
+    def set_progress_window(self, window_ms: int):
+        """Set the progress coalescing window.
+
+        Args:
+            window_ms: Frame window in milliseconds; 0 delivers immediately
+        """
+        self.progress.set_window(window_ms)
+
     def reset(self):
         """Reset all signal connections (useful for testing)."""
         # Disconnect all signals
@@ -183,10 +501,19 @@ class SignalBus:
                         # No connections to disconnect
                         pass
 
-        if os.environ.get("AF_DEBUG", "0") == "1":
-            print(
-                "[SIGNAL] Signal bus reset - all connections cleared", file=sys.stderr
-            )
+        # Drop buffered progress/batches and restore the internal hooks
+        if self.profiler is not None:
+            self.profiler.forget_connections()
+            self._attach_profiler()
+        self.progress.clear()
+        self._connect_progress_lifecycle()
+        for batcher in self.batchers.values():
+            batcher.clear()
+            batcher.attach()
+
+        if self._debug_enabled:
+            self.trace.clear()
+            logger.debug("[SIGNAL] Signal bus reset - all connections cleared")
 
 
 # Create the global signal bus instance
@@ -0,0 +1,393 @@
+"""Opt-in profiling of signal bus slots.
+
+With profiling on (``signal_bus.set_profiling(True)``, ``AF_PROFILE_SIGNALS=1``
+or ``--profile-signals``), every slot connected through ``signal_bus.domain``
+or ``signal_bus.ui`` is wrapped in a timing relay. For each signal and slot
+the profiler records:
+
+- the call count and the total, mean, max and p95 execution time
+- for deliveries that crossed threads (or were explicitly queued), the
+  delay between the emit and the slot starting, with the same statistics
+
+Queue delay works without changing what is emitted. Each underlying signal
+gets a direct-connected stamp, connected before any profiled slot, that
+records when every emission happened. A slot sees each emission made after
+it was connected exactly once and in order, so its k-th call belongs to the
+k-th emission since then.
+
+Only slots connected while profiling is on are timed, so switch it on
+before the windows and services connect (main.py does this for
+--profile-signals). Internal connections made on the raw signals, such as
+the progress coalescer's, are not timed.
+
+Usage:
+    signal_bus.set_profiling(True)
+    ...
+    signal_bus.profiler.export_json("signals.json")
+    worst = signal_bus.profiler.rows()[0]
+"""
+
+import functools
+import inspect
+import json
+import threading
+import time
+import weakref
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from PyQt6.QtCore import QObject, Qt, pyqtBoundSignal
+
+# Durations kept per statistic for the p95 (the most recent ones)
+DEFAULT_SAMPLE_SIZE = 1024
+
+# Emission stamps kept per signal; a queued slot lagging further behind
+# than this gets no delay sample
+EMISSION_HISTORY = 4096
+
+_QUEUED = (
+    Qt.ConnectionType.QueuedConnection,
+    Qt.ConnectionType.BlockingQueuedConnection,
+)
+
+
+def percentile(samples, fraction: float) -> float:
+    """Return the nearest-rank percentile of samples (0 when empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def slot_name(slot: Callable) -> str:
+    """Return a readable name for a slot, e.g. ``MainWindow._on_order_created``."""
+    receiver = getattr(slot, "__self__", None)
+    function = getattr(slot, "__func__", slot)
+    name = getattr(function, "__qualname__", None) or repr(function)
+    if receiver is not None and "." not in name:
+        name = f"{type(receiver).__name__}.{name}"
+    return name
+
+
+def _positional_count(slot: Callable) -> Optional[int]:
+    """Return how many positional arguments a slot accepts (None: any)."""
+    try:
+        parameters = inspect.signature(slot).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    count = 0
+    for parameter in parameters:
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            return None
+        if parameter.kind in (
+            parameter.POSITIONAL_ONLY,
+            parameter.POSITIONAL_OR_KEYWORD,
+        ):
+            count += 1
+    return count
+
+
+class TimingStats:
+    """Count, total, max and recent samples of one duration."""
+
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: deque = deque(maxlen=sample_size)
+
+    def add(self, seconds: float):
+        """Record one duration."""
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Return the statistics in milliseconds."""
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+            "p95_ms": percentile(self.samples, 0.95) * 1000,
+        }
+
+
+class _EmissionLog:
+    """Sequence-numbered emission stamps of one signal."""
+
+    __slots__ = ("count", "emits", "stamps")
+
+    def __init__(self):
+        # count numbers emissions for the slot relays and never resets;
+        # emits is the statistic and is cleared by SignalProfiler.reset()
+        self.count = 0
+        self.emits = 0
+        self.stamps: deque = deque(maxlen=EMISSION_HISTORY)
+
+    def lookup(self, sequence: int) -> Optional[Tuple[float, int]]:
+        """Return (perf_counter, thread id) of an emission, if still kept."""
+        index = sequence - (self.count - len(self.stamps))
+        if 0 <= index < len(self.stamps):
+            return self.stamps[index]
+        return None
+
+
+class _SlotTimer(QObject):
+    """Relay that times one profiled connection.
+
+    A relay for a QObject's method lives in the receiver's thread and is its
+    child, so queued calls still run in that thread and the connection goes
+    away with the receiver, as it would without profiling.
+    """
+
+    def __init__(
+        self,
+        profiler: "SignalProfiler",
+        signal_name: str,
+        slot: Callable,
+        queued: bool,
+    ):
+        super().__init__()
+        self._profiler = profiler
+        self._signal_name = signal_name
+        self._name = slot_name(slot)
+        self._queued = queued
+        self._arg_count = _positional_count(slot)
+        self._log = profiler._emissions[signal_name]
+        self._sequence = self._log.count
+
+        self._slot: Callable[[], Optional[Callable]]
+        receiver = getattr(slot, "__self__", None)
+        if isinstance(receiver, QObject):
+            self._slot = weakref.WeakMethod(slot)
+            self.moveToThread(receiver.thread())
+            self.setParent(receiver)
+        else:
+            self._slot = lambda: slot
+
+    def matches(self, slot: Callable) -> bool:
+        """Return True if this relay calls the given slot."""
+        return self._slot() == slot
+
+    def call(self, *args):
+        """Run the slot, recording its duration and delivery delay."""
+        start = time.perf_counter()
+        # Claim the emission first: the slot may emit this signal again
+        sequence = self._sequence
+        self._sequence += 1
+        slot = self._slot()
+        if slot is None:
+            return None
+        if self._arg_count is not None:
+            args = args[: self._arg_count]
+        try:
+            return slot(*args)
+        finally:
+            if self._profiler.enabled:
+                self._profiler._record(
+                    self._signal_name,
+                    self._name,
+                    time.perf_counter() - start,
+                    self._delay(sequence, start),
+                )
+
+    def _delay(self, sequence: int, start: float) -> Optional[float]:
+        """Time since this call's emission, for deliveries that were queued."""
+        with self._profiler._lock:
+            stamp = self._log.lookup(sequence)
+        if stamp is None:
+            return None
+        emitted, thread = stamp
+        if self._queued or thread != threading.get_ident():
+            return max(0.0, start - emitted)
+        return None
+
+
+class SignalProfiler:
+    """Per-signal and per-slot statistics for the signal bus.
+
+    Attributes:
+        enabled: Whether statistics are recorded; profiled connections and
+            emission stamps stay in place while it is off
+        started_at: Wall-clock time the statistics were last reset
+    """
+
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE):
+        """Initialize the profiler.
+
+        Args:
+            sample_size: Recent durations kept per statistic for the p95
+        """
+        self.enabled = True
+        self.sample_size = sample_size
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._emissions: Dict[str, _EmissionLog] = {}
+        self._calls: Dict[Tuple[str, str], TimingStats] = {}
+        self._delays: Dict[Tuple[str, str], TimingStats] = {}
+        self._relays: Dict[str, List[_SlotTimer]] = {}
+
+    def attach(self, signal_name: str, signal: pyqtBoundSignal):
+        """Stamp a signal's emissions; call before connecting profiled slots."""
+        log = self._emissions.setdefault(signal_name, _EmissionLog())
+
+        def stamp(*_args):
+            # Stamps keep counting while disabled so relays stay in step
+            with self._lock:
+                log.count += 1
+                log.emits += self.enabled
+                log.stamps.append((time.perf_counter(), threading.get_ident()))
+
+        # The stubs miss connect()'s optional connection type
+        direct = Qt.ConnectionType.DirectConnection
+        signal.connect(stamp, direct)  # type: ignore[call-arg]
+
+    def connect(self, signal_name: str, signal: pyqtBoundSignal, slot, *args):
+        """Connect a slot to a signal through a timing relay.
+
+        Args:
+            signal_name: Fully qualified signal name
+            signal: The underlying Qt signal
+            slot: Slot to time
+            *args: Optional connection type, passed through to Qt
+        """
+        if signal_name not in self._emissions:
+            self.attach(signal_name, signal)
+        queued = bool(args) and args[0] in _QUEUED
+        relay = _SlotTimer(self, signal_name, slot, queued)
+        with self._lock:
+            self._relays.setdefault(signal_name, []).append(relay)
+        # A relay dies with its receiver; forget it then
+        relay.destroyed.connect(  # type: ignore[call-arg]
+            functools.partial(self._drop_relay, signal_name, relay),
+            Qt.ConnectionType.DirectConnection,
+        )
+        return signal.connect(relay.call, *args)
+
+    def disconnect(self, signal_name: str, signal: pyqtBoundSignal, slot=None):
+        """Disconnect a slot, or every slot of the signal when slot is None.
+
+        Raises:
+            TypeError: If the slot is not connected, as Qt would
+        """
+        if slot is None:
+            # Qt drops every connection, the stamp included
+            with self._lock:
+                self._relays.pop(signal_name, None)
+            result = signal.disconnect()
+            self.attach(signal_name, signal)
+            return result
+        with self._lock:
+            relays = list(self._relays.get(signal_name, []))
+        for relay in relays:
+            if relay.matches(slot):
+                self._drop_relay(signal_name, relay)
+                return signal.disconnect(relay.call)
+        return signal.disconnect(slot)
+
+    def has_relays(self) -> bool:
+        """Return True while any slot is connected through a timing relay."""
+        with self._lock:
+            return any(self._relays.values())
+
+    def _drop_relay(self, signal_name: str, relay: _SlotTimer, *_args):
+        """Remove one relay from the table, if it is still there."""
+        with self._lock:
+            relays = self._relays.get(signal_name, [])
+            for index, known in enumerate(relays):
+                if known is relay:
+                    del relays[index]
+                    break
+
+    def forget_connections(self):
+        """Drop all relays after their signals were disconnected wholesale.
+
+        The caller attaches the stamps again before new connections.
+        """
+        with self._lock:
+            self._relays.clear()
+
+    def reset(self):
+        """Clear the statistics; connections stay timed."""
+        with self._lock:
+            self._calls.clear()
+            self._delays.clear()
+            for log in self._emissions.values():
+                log.emits = 0
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all statistics as a JSON-ready dict.
+
+        Returns:
+            Dict: ``{"started_at", "duration_s", "signals": {signal:
+            {"emits", "slots": {slot: {"calls": {...}, "queue_delay":
+            {...}}}}}}`` with times in milliseconds
+        """
+        with self._lock:
+            signals: Dict[str, Any] = {
+                name: {"emits": log.emits, "slots": {}}
+                for name, log in self._emissions.items()
+                if log.emits
+            }
+            for (signal_name, name), calls in self._calls.items():
+                entry = signals.setdefault(signal_name, {"emits": 0, "slots": {}})
+                delays = self._delays.get((signal_name, name))
+                entry["slots"][name] = {
+                    "calls": calls.as_dict(),
+                    "queue_delay": (delays or TimingStats(1)).as_dict(),
+                }
+        return {
+            "started_at": self.started_at,
+            "duration_s": time.time() - self.started_at,
+            "signals": signals,
+        }
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Return one flat row per signal and slot, most total time first."""
+        rows = []
+        for signal_name, entry in self.snapshot()["signals"].items():
+            for name, stats in entry["slots"].items():
+                rows.append(
+                    {
+                        "signal": signal_name,
+                        "slot": name,
+                        "emits": entry["emits"],
+                        **stats["calls"],
+                        "queued": stats["queue_delay"]["count"],
+                        "queue_mean_ms": stats["queue_delay"]["mean_ms"],
+                        "queue_max_ms": stats["queue_delay"]["max_ms"],
+                        "queue_p95_ms": stats["queue_delay"]["p95_ms"],
+                    }
+                )
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def export_json(self, path: Union[str, Path]) -> Path:
+        """Write snapshot() to a JSON file and return its path."""
+        path = Path(path)
+        path.write_text(json.dumps(self.snapshot(), indent=2))
+        return path
+
+    def _record(
+        self, signal_name: str, name: str, duration: float, delay: Optional[float]
+    ):
+        """Add one slot call to the statistics (any thread)."""
+        key = (signal_name, name)
+        with self._lock:
+            calls = self._calls.get(key)
+            if calls is None:
+                calls = self._calls[key] = TimingStats(self.sample_size)
+            calls.add(duration)
+            if delay is not None:
+                delays = self._delays.get(key)
+                if delays is None:
+                    delays = self._delays[key] = TimingStats(self.sample_size)
+                delays.add(delay)
@@ -20,6 +20,7 @@ class UISignals(QObject):
         loading_started: UI begins a loading operation
         loading_finished: UI completes a loading operation
         error_occurred: An error needs to be displayed to the user
+        thumbnail_requested: A view needs a product thumbnail loaded
 
     Example:
         signals = UISignals()
@@ -46,6 +47,9 @@ class UISignals(QObject):
     page_changed = pyqtSignal(int)  # page number for paginated views
     search_requested = pyqtSignal(str)  # search query
 
+    # Media loading events
+    thumbnail_requested = pyqtSignal(str, str)  # product_id, size_name
+
     def __init__(self):
         """Initialize UISignals."""
         super().__init__()
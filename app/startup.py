@@ -0,0 +1,306 @@
+"""Startup pipeline and profiling for Art Factory.
+
+Startup is split into a critical path, which ends when the main window shell
+has painted, and deferred subsystems that are imported and initialized one
+per event-loop iteration afterwards. This module only depends on the
+standard library so it can be imported before anything else.
+
+Usage:
+    profiler = StartupProfiler(enabled=True)
+    profiler.start()
+    with profiler.phase("create application"):
+        ...
+    pipeline = StartupPipeline(profiler)
+    pipeline.defer("database", "models.database:init_database")
+    pipeline.start()
+"""
+
+import importlib
+import logging
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Subsystems initialized at idle time after the main window first paints.
+# Each entry is (name, "module:function"); the module is only imported when
+# its turn comes, which keeps it off the cold-start path.
+DEFERRED_SUBSYSTEMS: List[Tuple[str, str]] = [
+    ("database", "models.database:init_database"),
+    ("thumbnail_cache", "utils.thumbnail_cache:init_thumbnail_cache"),
+    ("async_loop", "utils.async_loop:init_async_loop"),
+    ("http_clients", "utils.http_client:init_http_clients"),
+    ("counters", "services.counters:init_counters"),
+    ("execution_journal", "services.execution_journal:init_execution_journal"),
+    ("result_cache", "services.result_cache:init_result_cache"),
+    ("product_index", "models.product_index:init_product_index"),
+    ("similarity", "services.similarity:init_similarity"),
+]
+
+# Number of most expensive imports shown in the startup report
+IMPORT_REPORT_LIMIT = 25
+
+
+class _TimedLoader:
+    """Loader proxy that times module creation and execution.
+
+    Extension modules do most of their work in create_module(), so timing
+    starts there and ends when exec_module() returns.
+    """
+
+    def __init__(self, loader, timer: "ImportTimer"):
+        self._loader = loader
+        self._timer = timer
+        self._start = 0.0
+
+    def create_module(self, spec):
+        self._timer._enter()
+        self._start = time.perf_counter()
+        try:
+            return self._loader.create_module(spec)
+        except BaseException:
+            self._timer._exit(spec.name, time.perf_counter() - self._start)
+            raise
+
+    def exec_module(self, module):
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer._exit(module.__name__, time.perf_counter() - self._start)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class ImportTimer(MetaPathFinder):
+    """Record per-module import cost, in the style of ``-X importtime``.
+
+    Each record holds the module name, its self time (excluding nested
+    imports), its cumulative time and its nesting depth, all in microseconds.
+    """
+
+    def __init__(self):
+        """Initialize the import timer."""
+        self.records: List[Tuple[str, int, int, int]] = []
+        self._stack: List[float] = []
+
+    def install(self):
+        """Start timing imports."""
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        """Stop timing imports."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        """Find a spec with the remaining finders and wrap its loader."""
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, self)
+            return spec
+        return None
+
+    def _enter(self):
+        self._stack.append(0.0)
+
+    def _exit(self, name: str, elapsed: float):
+        children = self._stack.pop()
+        depth = len(self._stack)
+        if self._stack:
+            self._stack[-1] += elapsed
+        self.records.append(
+            (name, int((elapsed - children) * 1e6), int(elapsed * 1e6), depth)
+        )
+
+    def report(self, limit: int = IMPORT_REPORT_LIMIT) -> str:
+        """Format the most expensive imports by cumulative time.
+
+        Args:
+            limit: Maximum number of modules to list
+
+        Returns:
+            str: Table of self and cumulative microseconds per module
+        """
+        lines = [f"{'self [us]':>10} | {'cumulative':>10} | imported package"]
+        top = sorted(self.records, key=lambda record: record[2], reverse=True)
+        for name, self_us, cumulative_us, depth in top[:limit]:
+            lines.append(f"{self_us:>10} | {cumulative_us:>10} | {'  ' * depth}{name}")
+        return "\n".join(lines)
+
+
+class StartupProfiler:
+    """Per-phase timing of application startup.
+
+    When disabled, phase() is a no-op context manager so the profiler can
+    stay in the startup code permanently.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """Initialize the startup profiler.
+
+        Args:
+            enabled: Whether to record timings
+        """
+        self.enabled = enabled
+        self.phases: List[Tuple[str, float]] = []
+        self.imports = ImportTimer() if enabled else None
+        self._origin = time.perf_counter()
+
+    def start(self):
+        """Mark the start of startup and begin timing imports."""
+        self._origin = time.perf_counter()
+        if self.imports is not None:
+            self.imports.install()
+
+    def stop(self):
+        """Stop timing imports."""
+        if self.imports is not None:
+            self.imports.uninstall()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a named startup phase.
+
+        Args:
+            name: Phase name shown in the report
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def elapsed(self) -> float:
+        """Return seconds since start() was called."""
+        return time.perf_counter() - self._origin
+
+    def report(self) -> str:
+        """Format the per-phase breakdown and import costs.
+
+        Returns:
+            str: Human-readable startup profile
+        """
+        lines = ["Startup profile", f"{'phase':<36} {'ms':>9}"]
+        for name, seconds in self.phases:
+            lines.append(f"{name:<36} {seconds * 1000:>9.1f}")
+        lines.append(f"{'total':<36} {self.elapsed() * 1000:>9.1f}")
+        if self.imports is not None:
+            lines.append("")
+            lines.append("Import costs")
+            lines.append(self.imports.report())
+        return "\n".join(lines)
+
+
+def resolve_target(target: Union[str, Callable[[], Any]]) -> Callable[[], Any]:
+    """Resolve a "module:function" reference to a callable.
+
+    Args:
+        target: A callable, or a "module:function" string to import
+
+    Returns:
+        Callable: The initializer to run
+    """
+    if callable(target):
+        return target
+    module_name, _, attr_name = target.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attr_name)
+
+
+class StartupPipeline:
+    """Run deferred subsystem initializers at idle time.
+
+    Initializers run one per event-loop iteration after start(), so the
+    window stays responsive while the database, provider registry and
+    caches come up. Failures are logged and recorded rather than raised.
+
+    Attributes:
+        results: Return value of each completed initializer by name
+        errors: Exception raised by each failed initializer by name
+    """
+
+    def __init__(self, profiler: Optional[StartupProfiler] = None):
+        """Initialize the startup pipeline.
+
+        Args:
+            profiler: Optional profiler receiving one phase per initializer
+        """
+        self.profiler = profiler or StartupProfiler()
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, Exception] = {}
+        self._tasks: deque = deque()
+        self._finished_callbacks: List[Callable[[], None]] = []
+
+    def defer(self, name: str, target: Union[str, Callable[[], Any]]):
+        """Queue a subsystem initializer.
+
+        Args:
+            name: Subsystem name for profiling and results
+            target: A callable, or a "module:function" string imported lazily
+        """
+        self._tasks.append((name, target))
+
+    def on_finished(self, callback: Callable[[], None]):
+        """Register a callback to run once every initializer has run.
+
+        Args:
+            callback: Function called with no arguments
+        """
+        self._finished_callbacks.append(callback)
+
+    @property
+    def pending(self) -> int:
+        """Number of initializers not yet run."""
+        return len(self._tasks)
+
+    def start(self):
+        """Begin running initializers from the Qt event loop."""
+        from PyQt6.QtCore import QTimer
+
+        QTimer.singleShot(0, self._run_next)
+
+    def run_all(self):
+        """Run every queued initializer synchronously."""
+        while self._tasks:
+            self._run_one()
+        self._finish()
+
+    def _run_next(self):
+        """Run one initializer and reschedule for the next idle tick."""
+        from PyQt6.QtCore import QTimer
+
+        if not self._tasks:
+            self._finish()
+            return
+        self._run_one()
+        QTimer.singleShot(0, self._run_next)
+
+    def _run_one(self):
+        """Run the next initializer, recording its result or error."""
+        name, target = self._tasks.popleft()
+        with self.profiler.phase(f"deferred: {name}"):
+            try:
+                self.results[name] = resolve_target(target)()
+            except Exception as exc:
+                logger.exception("Deferred startup of %s failed", name)
+                self.errors[name] = exc
+
+    def _finish(self):
+        """Notify listeners that deferred startup is complete."""
+        for callback in self._finished_callbacks:
+            callback()
+        self._finished_callbacks = []
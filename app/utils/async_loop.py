@@ -0,0 +1,219 @@
+"""Shared asyncio event loop for Art Factory.
+
+Provider calls are I/O bound: submit a request, poll its status, download
+the result. Running each on its own thread costs a thread stack per
+in-flight generation. Instead, one asyncio loop runs in a dedicated thread
+and every coroutine shares it (and, later, one pooled HTTP client).
+
+Coroutines may emit on the signal bus directly: PyQt signal emission is
+thread safe and slots in the GUI thread receive queued calls. For results
+that a GUI object needs, AsyncBridge delivers a callback on the GUI thread.
+
+Usage:
+    loop = init_async_loop()
+    future = loop.submit(poll_prediction(prediction_id))
+
+    bridge = AsyncBridge(loop)
+    bridge.submit(fetch_models(), on_result=self._show_models)
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLoopThread:
+    """An asyncio event loop running forever in a daemon thread."""
+
+    def __init__(self, name: str = "asyncio-loop"):
+        """Initialize the loop thread (not started).
+
+        Args:
+            name: Name of the loop thread
+        """
+        self._name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._shutdown_hooks: List[Callable[[], Awaitable]] = []
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """The running event loop, or None when stopped."""
+        return self._loop
+
+    @property
+    def running(self) -> bool:
+        """Whether the loop thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def in_loop_thread(self) -> bool:
+        """Return True when called from the loop thread."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def start(self):
+        """Start the loop thread and wait until the loop is running."""
+        if self.running:
+            return
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._loop, ready), name=self._name, daemon=True
+        )
+        self._thread.start()
+        ready.wait()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Cancel pending tasks, stop the loop and join the thread."""
+        if not self.running:
+            return
+        loop, thread = self._started()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        self._thread = None
+        self._loop = None
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable]):
+        """Await hook() on the loop when it stops, before tasks are cancelled.
+
+        Used to close resources owned by the loop, such as pooled
+        connections.
+        """
+        self._shutdown_hooks.append(hook)
+
+    def submit(self, coroutine: Awaitable) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop from any thread.
+
+        Cancelling the returned future cancels the task.
+
+        Returns:
+            concurrent.futures.Future: Resolves with the coroutine's result
+        """
+        loop, _thread = self._started()
+        return asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+    def call_soon(self, callback: Callable[..., Any], *args):
+        """Run a plain callable on the loop thread."""
+        loop, _thread = self._started()
+        loop.call_soon_threadsafe(callback, *args)
+
+    def run(self, coroutine: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block until it finishes.
+
+        Must not be called from the loop thread itself.
+        """
+        if self.in_loop_thread():
+            raise RuntimeError("run() would deadlock on the loop thread")
+        return self.submit(coroutine).result(timeout)
+
+    def _started(self) -> Tuple[asyncio.AbstractEventLoop, threading.Thread]:
+        """Return the loop and its thread, raising if the loop is not running."""
+        if self._loop is None or self._thread is None or not self.running:
+            raise RuntimeError("AsyncLoopThread is not running; call start() first")
+        return self._loop, self._thread
+
+    def _run(self, loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        """Loop thread body."""
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            for hook in self._shutdown_hooks:
+                try:
+                    loop.run_until_complete(hook())
+                except Exception:
+                    logger.exception("Loop shutdown hook failed")
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(
+                    asyncio.gather(*pending, return_exceptions=True)
+                )
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+
+class AsyncBridge(QObject):
+    """Deliver coroutine results to callbacks on the bridge's thread.
+
+    The bridge is normally created on the GUI thread, so on_result and
+    on_error run there and may touch widgets.
+    """
+
+    # Internal: callback, value
+    _deliver = pyqtSignal(object, object)
+
+    def __init__(self, loop: AsyncLoopThread, parent: Optional[QObject] = None):
+        """Initialize the bridge.
+
+        Args:
+            loop: Loop thread to run coroutines on
+            parent: Optional parent object
+        """
+        super().__init__(parent)
+        self._loop = loop
+        self._deliver.connect(self._on_deliver)
+
+    def submit(
+        self,
+        coroutine: Awaitable,
+        on_result: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> concurrent.futures.Future:
+        """Run a coroutine and call back with its outcome on this thread.
+
+        Cancelled coroutines call neither callback. Errors without an
+        on_error callback are logged.
+
+        Returns:
+            concurrent.futures.Future: The coroutine's future
+        """
+        future = self._loop.submit(coroutine)
+
+        def done(finished: concurrent.futures.Future):
+            if finished.cancelled():
+                return
+            error = finished.exception()
+            if error is None:
+                if on_result is not None:
+                    self._deliver.emit(on_result, finished.result())
+            elif on_error is not None:
+                self._deliver.emit(on_error, error)
+            else:
+                logger.error("Unhandled error in coroutine", exc_info=error)
+
+        future.add_done_callback(done)
+        return future
+
+    def _on_deliver(self, callback: Callable[[Any], None], value: Any):
+        callback(value)
+
+
+_async_loop: Optional[AsyncLoopThread] = None
+
+
+def init_async_loop() -> AsyncLoopThread:
+    """Start the application asyncio loop (deferred startup hook)."""
+    global _async_loop
+    if _async_loop is None:
+        _async_loop = AsyncLoopThread()
+        _async_loop.start()
+
+        from PyQt6.QtCore import QCoreApplication
+
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_async_loop.stop)
+    return _async_loop
+
+
+def get_async_loop() -> Optional[AsyncLoopThread]:
+    """Return the application asyncio loop, if started."""
+    return _async_loop
@@ -0,0 +1,79 @@
+"""File and storage helpers for Art Factory."""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Union
+
+# Project root, used for the default development storage location
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# Linux ioctl cloning a whole file (reflink), _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+def storage_root() -> Path:
+    """Return the root of the file storage tree.
+
+    Set AF_STORAGE_DIR to override the default ``storage/`` directory at the
+    project root.
+    """
+    return Path(os.environ.get("AF_STORAGE_DIR", PROJECT_ROOT / "storage"))
+
+
+def thumbnails_dir() -> Path:
+    """Return the thumbnail cache directory."""
+    return storage_root() / "thumbnails"
+
+
+def products_dir() -> Path:
+    """Return the root directory of generated and imported product files."""
+    return storage_root() / "products"
+
+
+def temp_dir() -> Path:
+    """Return the directory for files being written before they are final.
+
+    It lives inside the storage root so finished files can be renamed into
+    place instead of copied.
+    """
+    return storage_root() / "temp"
+
+
+def database_path() -> Path:
+    """Return the SQLite database file path."""
+    return storage_root() / "artfactory.db"
+
+
+def journal_path() -> Path:
+    """Return the order execution journal file path."""
+    return storage_root() / "execution-journal.log"
+
+
+def link_file(source: Union[str, Path], destination: Union[str, Path]) -> str:
+    """Create destination with source's content without copying its bytes.
+
+    Tries a hard link, then a copy-on-write clone (reflink, on Linux file
+    systems such as Btrfs and XFS), and only then copies. Product files are
+    never modified in place, so sharing their data is safe.
+
+    Returns:
+        str: "hardlink", "reflink" or "copy"
+    """
+    try:
+        os.link(source, destination)
+        return "hardlink"
+    except OSError:
+        pass
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        try:
+            with open(source, "rb") as src, open(destination, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except OSError:
+            Path(destination).unlink(missing_ok=True)
+    shutil.copyfile(source, destination)
+    return "copy"
@@ -0,0 +1,552 @@
+"""Pooled HTTP/2 client for provider APIs.
+
+Each provider factory talks to its API in three ways: it submits a
+prediction, polls its status, and downloads the output. Opening a fresh
+TCP and TLS connection for every poll costs several round trips, so
+HttpClient keeps connections open and reuses them. It opens at most
+max_connections (the provider's concurrent_limit) and streams downloads
+straight into the destination file in fixed-size chunks.
+
+The client wraps httpx.AsyncClient on the shared asyncio loop
+(utils.async_loop). TLS connections offer HTTP/2 through ALPN, so a
+provider that supports it multiplexes submits, polls and downloads over
+one connection; others fall back to HTTP/1.1 keep-alive. The negotiated
+protocol is counted in stats().
+
+Redirects are followed here rather than by httpx. Authorization, Cookie
+and Proxy-Authorization are dropped when a redirect leaves the origin,
+and a redirect from https to http is refused.
+
+Usage:
+    clients = init_http_clients()
+    client = clients.client("replicate")
+    response = await client.post(url, json=payload, headers=auth)
+    prediction = response.json()
+    await client.download(prediction["output"][0], destination)
+"""
+
+import asyncio
+import inspect
+import json as jsonlib
+import logging
+import os
+import ssl
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Mapping, Optional, Tuple, Union
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from .async_loop import init_async_loop
+
+logger = logging.getLogger(__name__)
+
+# Open connections per client when the provider sets no concurrent_limit
+DEFAULT_MAX_CONNECTIONS = 4
+
+# Seconds an idle connection is kept for reuse
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+# Seconds to wait for connecting, any single read or write, or a free connection
+DEFAULT_TIMEOUT = 60.0
+
+# Download chunk size; the most a download holds in memory at once
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Redirects followed per request
+MAX_REDIRECTS = 5
+
+USER_AGENT = "ArtFactory/0.1"
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Request headers that must not follow a redirect to another origin
+CREDENTIAL_HEADERS = ("authorization", "cookie", "proxy-authorization")
+
+# ALPN names for the HTTP versions httpx reports
+PROTOCOL_NAMES = {"HTTP/1.0": "http/1.0", "HTTP/1.1": "http/1.1", "HTTP/2": "h2"}
+
+Origin = Tuple[str, str, int]
+
+
+class HttpError(Exception):
+    """A request failed before a complete response arrived."""
+
+
+class HttpStatusError(HttpError):
+    """The server answered with an error status."""
+
+    def __init__(
+        self,
+        status: int,
+        reason: str,
+        url: str,
+        body: bytes = b"",
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        super().__init__(f"HTTP {status} {reason} for {url}")
+        self.status = status
+        self.reason = reason
+        self.url = url
+        self.body = body
+        # Lower-case names, as in HttpResponse; Retry-After lives here
+        self.headers = headers or {}
+
+
+@dataclass
+class HttpResponse:
+    """A complete response with its body in memory."""
+
+    status: int
+    reason: str
+    headers: Dict[str, str]  # lower-case names
+    body: bytes
+    url: str
+
+    def json(self) -> Any:
+        """Decode the body as JSON."""
+        return jsonlib.loads(self.body)
+
+
+@dataclass
+class _Head:
+    """Status line and headers of a response."""
+
+    status: int
+    reason: str
+    headers: Dict[str, str]
+
+
+def _origin(url: str) -> Origin:
+    """Return the (scheme, host, port) of an absolute http(s) URL."""
+    parts = urlsplit(url)
+    if parts.scheme not in DEFAULT_PORTS or not parts.hostname:
+        raise HttpError(f"Unsupported URL: {url}")
+    return parts.scheme, parts.hostname, parts.port or DEFAULT_PORTS[parts.scheme]
+
+
+def _check_headers(headers: Mapping[str, str]):
+    """Reject header names or values that would split the request."""
+    for name, value in headers.items():
+        if any(char in f"{name}{value}" for char in "\r\n\0"):
+            raise ValueError(f"Invalid character in header {name!r}")
+
+
+class HttpClient:
+    """HTTP/2-capable client with a bounded, keep-alive connection pool.
+
+    Every method must be awaited on the same event loop. The client never
+    has more than max_connections open, and requests beyond that wait for
+    a free connection; HTTP/2 carries concurrent requests to one origin on
+    a single connection. A connection the server closed while idle is
+    discarded before it is reused.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "",
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        timeout: float = DEFAULT_TIMEOUT,
+        headers: Optional[Mapping[str, str]] = None,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ):
+        """Initialize the client.
+
+        Args:
+            base_url: Prefix for relative request URLs
+            max_connections: Open connections at most
+            keepalive_expiry: Seconds an idle connection is kept
+            timeout: Seconds to wait for connecting, any single read or
+                write, or a free connection
+            headers: Headers sent with every request
+            ssl_context: TLS settings (defaults to system certificates)
+        """
+        self.base_url = base_url
+        self.max_connections = max(1, max_connections)
+        self._timeout = timeout
+        self._headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity"}
+        self._headers.update(headers or {})
+        _check_headers(self._headers)
+        self._client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(timeout),
+            verify=ssl_context if ssl_context is not None else True,
+            follow_redirects=False,
+            trust_env=False,
+        )
+        self._closed = False
+        self.requests = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.bytes_downloaded = 0
+        self.protocols: Dict[str, int] = {}
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Mapping[str, str]] = None,
+        json: Any = None,
+        data: Optional[bytes] = None,
+        raise_for_status: bool = True,
+    ) -> HttpResponse:
+        """Send a request and read the whole response.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL, or a path relative to base_url
+            headers: Extra request headers
+            json: Value sent as a JSON body
+            data: Raw body bytes
+            raise_for_status: Raise HttpStatusError for 4xx and 5xx answers
+
+        Returns:
+            HttpResponse: The response
+
+        Raises:
+            HttpStatusError: The server answered with an error status
+            HttpError: The connection failed or timed out
+        """
+        headers = dict(headers or {})
+        if json is not None:
+            data = jsonlib.dumps(json).encode()
+            headers.setdefault("Content-Type", "application/json")
+
+        async def read_all(head: _Head, url: str, body: AsyncIterator[bytes]):
+            content = b"".join([chunk async for chunk in body])
+            if raise_for_status and head.status >= 400:
+                raise HttpStatusError(
+                    head.status, head.reason, url, content, head.headers
+                )
+            return HttpResponse(head.status, head.reason, head.headers, content, url)
+
+        return await self._send(method, url, headers, data, read_all)
+
+    async def get(self, url: str, **kwargs) -> HttpResponse:
+        """Send a GET request."""
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> HttpResponse:
+        """Send a POST request."""
+        return await self.request("POST", url, **kwargs)
+
+    async def download(
+        self,
+        url: str,
+        destination: Union[str, Path],
+        headers: Optional[Mapping[str, str]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> int:
+        """Stream a response body into a file.
+
+        The body is written chunk by chunk to a ".part" file next to the
+        destination, which is renamed into place once complete. A failed
+        download leaves nothing behind.
+
+        Args:
+            url: Absolute URL, or a path relative to base_url
+            destination: Final file path; parent directories are created
+            headers: Extra request headers
+            chunk_size: Bytes read and written at a time
+
+        Returns:
+            int: Bytes written
+
+        Raises:
+            HttpStatusError: The server answered with an error status
+            HttpError: The connection failed or timed out
+        """
+        destination = Path(destination)
+        partial = destination.with_name(destination.name + ".part")
+        await asyncio.to_thread(destination.parent.mkdir, parents=True, exist_ok=True)
+        try:
+            handle = await asyncio.to_thread(open, partial, "wb")
+            try:
+                # File writes run on a worker thread so a slow disk never
+                # stalls the loop; the next chunk is read once it is done.
+                written = await self.download_to(
+                    url,
+                    lambda chunk: asyncio.to_thread(handle.write, chunk),
+                    headers=headers,
+                    chunk_size=chunk_size,
+                )
+            finally:
+                await asyncio.to_thread(handle.close)
+            await asyncio.to_thread(os.replace, partial, destination)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        return written
+
+    async def download_to(
+        self,
+        url: str,
+        write: Callable[[bytes], Any],
+        headers: Optional[Mapping[str, str]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> int:
+        """Stream a response body into a callable, chunk by chunk.
+
+        Lets callers process a download as it arrives, for example hashing
+        it while it is written (see services.product_ingestion).
+
+        Args:
+            url: Absolute URL, or a path relative to base_url
+            write: Called with each chunk of the body; if it returns an
+                awaitable, that is awaited before the next chunk is read
+            headers: Extra request headers
+            chunk_size: Bytes read at a time
+
+        Returns:
+            int: Bytes received
+
+        Raises:
+            HttpStatusError: The server answered with an error status
+            HttpError: The connection failed or timed out
+        """
+
+        async def stream(head: _Head, url: str, body: AsyncIterator[bytes]):
+            if head.status >= 400:
+                content = b"".join([chunk async for chunk in body])
+                raise HttpStatusError(
+                    head.status, head.reason, url, content, head.headers
+                )
+            received = 0
+            async for chunk in body:
+                written = write(chunk)
+                if inspect.isawaitable(written):
+                    await written
+                received += len(chunk)
+            self.bytes_downloaded += received
+            return received
+
+        return await self._send(
+            "GET", url, dict(headers or {}), None, stream, chunk_size
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return connection reuse metrics.
+
+        Returns:
+            dict: requests, connections_opened, connections_reused,
+                reuse_ratio (share of requests on a reused connection),
+                bytes_downloaded and protocols (requests per negotiated
+                ALPN protocol, "h2" or "http/1.1")
+        """
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": (
+                self.connections_reused / self.requests if self.requests else 0.0
+            ),
+            "bytes_downloaded": self.bytes_downloaded,
+            "protocols": dict(self.protocols),
+        }
+
+    async def aclose(self):
+        """Close every connection; the client cannot be used afterwards."""
+        self._closed = True
+        await self._client.aclose()
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        body: Optional[bytes],
+        consume,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """Send a request, follow redirects and hand the final body to consume.
+
+        Raises:
+            ValueError: A header contains CR, LF or NUL
+        """
+        if self._closed:
+            raise HttpError("HttpClient is closed")
+        url = urljoin(self.base_url, url)
+        merged = dict(self._headers)
+        merged.update(headers)
+        _check_headers(merged)
+        origin = _origin(url)
+        for _redirect in range(MAX_REDIRECTS + 1):
+            async with self._exchange(method, url, merged, body) as response:
+                head = _Head(
+                    response.status_code,
+                    response.reason_phrase,
+                    dict(response.headers.items()),
+                )
+                location = head.headers.get("location")
+                if head.status not in REDIRECT_STATUSES or not location:
+                    return await consume(
+                        head, url, self._read_body(response, chunk_size)
+                    )
+                # Drain the small redirect body so the connection is reused
+                async for _chunk in self._read_body(response, chunk_size):
+                    pass
+
+            url = urljoin(url, location)
+            target = _origin(url)
+            if origin[0] == "https" and target[0] == "http":
+                raise HttpError(f"Refusing redirect from https to {url}")
+            if target != origin:
+                merged = {
+                    name: value
+                    for name, value in merged.items()
+                    if name.lower() not in CREDENTIAL_HEADERS
+                }
+            origin = target
+            if head.status == 303 or (
+                head.status in (301, 302) and method not in ("GET", "HEAD")
+            ):
+                method, body = "GET", None
+                merged = {
+                    name: value
+                    for name, value in merged.items()
+                    if name.lower() != "content-type"
+                }
+        raise HttpError(f"Too many redirects for {url}")
+
+    @asynccontextmanager
+    async def _exchange(
+        self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]
+    ) -> AsyncIterator[httpx.Response]:
+        """Send one request and yield its streamed response.
+
+        A trace hook counts whether the request opened a new connection.
+        """
+        opened = False
+
+        async def trace(event: str, info: Dict[str, Any]):
+            nonlocal opened
+            if event == "connection.connect_tcp.complete":
+                opened = True
+
+        request = self._client.build_request(
+            method, url, headers=headers, content=body, extensions={"trace": trace}
+        )
+        try:
+            response = await self._client.send(request, stream=True)
+        except httpx.TimeoutException as error:
+            raise HttpError(f"Timed out after {self._timeout}s") from error
+        except httpx.TransportError as error:
+            raise HttpError(f"Connection to {url} failed: {error}") from error
+        self.requests += 1
+        if opened:
+            self.connections_opened += 1
+        else:
+            self.connections_reused += 1
+        protocol = PROTOCOL_NAMES.get(
+            response.http_version, response.http_version.lower()
+        )
+        self.protocols[protocol] = self.protocols.get(protocol, 0) + 1
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def _read_body(
+        self, response: httpx.Response, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        """Yield the response body in chunks of at most chunk_size bytes."""
+        try:
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+        except httpx.TimeoutException as error:
+            raise HttpError(f"Timed out after {self._timeout}s") from error
+        except httpx.TransportError as error:
+            raise HttpError(f"Response body truncated: {error}") from error
+
+
+class ProviderHttpClients:
+    """One HttpClient per provider, sized by the provider's concurrent_limit.
+
+    Sharing a client between a provider's submit, polling and download code
+    means they reuse the same warm connections.
+    """
+
+    def __init__(
+        self,
+        concurrent_limits: Optional[Mapping[str, Optional[int]]] = None,
+        **client_options,
+    ):
+        """Initialize the registry.
+
+        Args:
+            concurrent_limits: providers.concurrent_limit per provider id
+            **client_options: Passed to every HttpClient
+        """
+        self._limits: Dict[str, Optional[int]] = dict(concurrent_limits or {})
+        self._client_options = client_options
+        self._clients: Dict[str, HttpClient] = {}
+
+    def set_limits(self, concurrent_limits: Mapping[str, Optional[int]]):
+        """Update limits; clients already created keep their size."""
+        self._limits.update(concurrent_limits)
+
+    def client(self, provider_id: str) -> HttpClient:
+        """Return the provider's client, creating it on first use."""
+        client = self._clients.get(provider_id)
+        if client is None:
+            limit = self._limits.get(provider_id) or DEFAULT_MAX_CONNECTIONS
+            client = HttpClient(max_connections=limit, **self._client_options)
+            self._clients[provider_id] = client
+        return client
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return each provider client's reuse metrics."""
+        return {
+            provider_id: client.stats() for provider_id, client in self._clients.items()
+        }
+
+    async def aclose(self):
+        """Close every client's connections."""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+_http_clients: Optional[ProviderHttpClients] = None
+
+
+def init_http_clients() -> ProviderHttpClients:
+    """Create the provider HTTP clients (deferred startup hook).
+
+    Connection limits come from the providers table when the database is
+    open. The clients are closed when the asyncio loop stops.
+    """
+    global _http_clients
+    if _http_clients is None:
+        limits: Dict[str, Optional[int]] = {}
+        from models.database import get_database
+
+        database = get_database()
+        if database is not None:
+            from sqlalchemy import select
+
+            from models.provider import Provider
+
+            session = database.session()
+            limits = dict(
+                session.execute(select(Provider.id, Provider.concurrent_limit))
+            )
+            database.remove_session()
+        _http_clients = ProviderHttpClients(limits)
+        init_async_loop().add_shutdown_hook(_http_clients.aclose)
+    return _http_clients
+
+
+def get_http_clients() -> Optional[ProviderHttpClients]:
+    """Return the provider HTTP clients, if created."""
+    return _http_clients
@@ -0,0 +1,289 @@
+"""Tile pyramids for viewing very large images in Art Factory.
+
+A 100 MP image holds about 400 MB of pixels once decoded, so the image
+viewer never keeps one in the GUI process. A worker process decodes the
+image once and writes a pyramid of raw tiles to a scratch directory:
+
+- level 0 is the full resolution, and each further level halves it until
+  the whole image fits in one tile
+- each level is one file of TILE_SIZE x TILE_SIZE tiles stored one after
+  another in row-major tile order, with edge tiles padded, so a tile is one
+  contiguous positional read
+
+The viewer then reads only the tiles it shows, at the level that matches
+its zoom. render_preview() produces the screen-sized image that is shown
+first; for JPEGs it asks the decoder to downscale while decoding, which
+skips most of the work.
+
+These are plain functions with picklable results so they can run in a
+process pool, like the thumbnail code in image_utils.
+
+Usage:
+    pyramid = build_tile_pyramid(path, scratch_dir)
+    pixels = read_tile(pyramid, level=2, column=0, row=1)
+"""
+
+import json
+import math
+import os
+import struct
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Tuple, Union
+
+from PIL import Image, UnidentifiedImageError
+
+# Edge length of a tile in pixels
+TILE_SIZE = 512
+
+# Largest image the viewer opens (Pillow's own limit is about 179 MP)
+MAX_VIEWER_PIXELS = 500_000_000
+
+# Name of the file describing a finished pyramid, written last
+PYRAMID_MANIFEST = "pyramid.json"
+
+
+@dataclass
+class TileLevel:
+    """Geometry of one pyramid level."""
+
+    width: int
+    height: int
+    columns: int
+    rows: int
+
+
+@dataclass
+class TilePyramid:
+    """A finished tile pyramid on disk."""
+
+    directory: str
+    width: int
+    height: int
+    # "RGB" or "RGBA"
+    mode: str
+    tile_size: int = TILE_SIZE
+    levels: List[TileLevel] = field(default_factory=list)
+
+    @property
+    def bytes_per_pixel(self) -> int:
+        """Bytes per pixel in the tile files."""
+        return len(self.mode)
+
+    @property
+    def tile_bytes(self) -> int:
+        """Size of one (padded) tile in bytes."""
+        return self.tile_size * self.tile_size * self.bytes_per_pixel
+
+    def level_path(self, level: int) -> Path:
+        """Return the file holding a level's tiles."""
+        return Path(self.directory) / f"level{level}.raw"
+
+    def tile_rect(self, level: int, column: int, row: int) -> Tuple[int, int, int, int]:
+        """Return (x, y, width, height) of a tile's real pixels in its level."""
+        geometry = self.levels[level]
+        x = column * self.tile_size
+        y = row * self.tile_size
+        return (
+            x,
+            y,
+            min(self.tile_size, geometry.width - x),
+            min(self.tile_size, geometry.height - y),
+        )
+
+
+def read_image_size(source_path: Union[str, Path]) -> Tuple[int, int]:
+    """Read an image's size from its header without decoding it.
+
+    Image.open() refuses images past Pillow's decompression bomb limit
+    even when only the header is read. This opens the header with the
+    format plugins directly, so the GUI process can learn the size of a
+    huge image without raising Image.MAX_IMAGE_PIXELS.
+
+    Raises:
+        PIL.UnidentifiedImageError: If no format plugin accepts the file
+    """
+    Image.preinit()
+    with open(source_path, "rb") as handle:
+        prefix = handle.read(16)
+        for loaded_all in (False, True):
+            if loaded_all and not Image.init():
+                break
+            for format_id in list(Image.ID):
+                factory, accept = Image.OPEN[format_id]
+                accepted = not accept or accept(prefix)
+                if not accepted or isinstance(accepted, (str, bytes)):
+                    continue
+                handle.seek(0)
+                try:
+                    return factory(handle, str(source_path)).size
+                except (SyntaxError, IndexError, TypeError, struct.error):
+                    continue
+    raise UnidentifiedImageError(f"cannot identify image file {str(source_path)!r}")
+
+
+@contextmanager
+def _large_image_limit() -> Iterator[None]:
+    """Allow images up to MAX_VIEWER_PIXELS while the block runs.
+
+    Pillow's limit is process-wide, so it is raised only around the
+    worker-side decoding in render_preview() and build_tile_pyramid() and
+    restored afterwards. The GUI reads sizes with read_image_size().
+    """
+    previous = Image.MAX_IMAGE_PIXELS
+    # Pillow raises at twice the limit
+    if previous and previous < MAX_VIEWER_PIXELS // 2:
+        Image.MAX_IMAGE_PIXELS = MAX_VIEWER_PIXELS // 2
+    try:
+        yield
+    finally:
+        Image.MAX_IMAGE_PIXELS = previous
+
+
+def _viewer_mode(image: Image.Image) -> str:
+    """Return RGBA for images with transparency, RGB otherwise."""
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+    return "RGBA" if has_alpha else "RGB"
+
+
+def render_preview(
+    source_path: Union[str, Path], max_size: Tuple[int, int]
+) -> Tuple[bytes, int, int, str, int, int]:
+    """Decode an image scaled to fit max_size.
+
+    JPEGs are decoded with draft(), so the decoder itself downscales by up
+    to 8x and a 100 MP file never exists at full size.
+
+    Returns:
+        Tuple: (pixels, width, height, mode, full_width, full_height) where
+        pixels are the raw RGB/RGBA bytes of the preview
+
+    Raises:
+        Image.DecompressionBombError: If the image has more than
+            MAX_VIEWER_PIXELS
+    """
+    with _large_image_limit(), Image.open(source_path) as image:
+        full_width, full_height = image.size
+        mode = _viewer_mode(image)
+        # Ask for the fitted size, not the box, so draft() can scale further
+        scale = min(1.0, max_size[0] / full_width, max_size[1] / full_height)
+        fitted = (max(1, round(full_width * scale)), max(1, round(full_height * scale)))
+        image.draft(mode, fitted)
+        preview = image.convert(mode)
+    # reduce() first: a whole-number box downscale is far cheaper than LANCZOS
+    factor = min(preview.width // max_size[0], preview.height // max_size[1])
+    if factor >= 2:
+        preview = preview.reduce(factor)
+    preview.thumbnail(max_size, Image.Resampling.LANCZOS)
+    return (
+        preview.tobytes(),
+        preview.width,
+        preview.height,
+        mode,
+        full_width,
+        full_height,
+    )
+
+
+def build_tile_pyramid(
+    source_path: Union[str, Path],
+    directory: Union[str, Path],
+    tile_size: int = TILE_SIZE,
+) -> TilePyramid:
+    """Decode an image once and write its tile pyramid to a directory.
+
+    A pyramid already finished in the directory is returned as is.
+
+    Args:
+        source_path: Image to tile
+        directory: Scratch directory owned by the caller
+        tile_size: Edge length of a tile in pixels
+
+    Returns:
+        TilePyramid: Description of the written pyramid
+
+    Raises:
+        Image.DecompressionBombError: If the image has more than
+            MAX_VIEWER_PIXELS
+    """
+    directory = Path(directory)
+    manifest = directory / PYRAMID_MANIFEST
+    if manifest.exists():
+        return load_tile_pyramid(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with _large_image_limit():
+        with Image.open(source_path) as image:
+            mode = _viewer_mode(image)
+            current = image.convert(mode)
+        pyramid = TilePyramid(
+            str(directory), current.width, current.height, mode, tile_size
+        )
+
+        level = 0
+        while True:
+            pyramid.levels.append(
+                _write_level(current, pyramid.level_path(level), tile_size)
+            )
+            if current.width <= tile_size and current.height <= tile_size:
+                break
+            # Halve for the next level; the previous full image is released
+            current = current.reduce(2)
+            level += 1
+
+    manifest.write_text(json.dumps(asdict(pyramid)))
+    return pyramid
+
+
+def load_tile_pyramid(directory: Union[str, Path]) -> TilePyramid:
+    """Return the pyramid described by a directory's manifest."""
+    data = json.loads((Path(directory) / PYRAMID_MANIFEST).read_text())
+    data["levels"] = [TileLevel(**level) for level in data["levels"]]
+    return TilePyramid(**data)
+
+
+def _write_level(image: Image.Image, path: Path, tile_size: int) -> TileLevel:
+    """Write one level's tiles, padding edge tiles to the full tile size."""
+    columns = math.ceil(image.width / tile_size)
+    rows = math.ceil(image.height / tile_size)
+    bytes_per_pixel = len(image.mode)
+    row_bytes = tile_size * bytes_per_pixel
+    with open(path, "wb") as handle:
+        for row in range(rows):
+            for column in range(columns):
+                box = (
+                    column * tile_size,
+                    row * tile_size,
+                    min((column + 1) * tile_size, image.width),
+                    min((row + 1) * tile_size, image.height),
+                )
+                tile = image.crop(box)
+                if tile.size == (tile_size, tile_size):
+                    handle.write(tile.tobytes())
+                    continue
+                # Pad each pixel row, then the missing rows
+                width = tile.width * bytes_per_pixel
+                data = tile.tobytes()
+                for y in range(tile.height):
+                    handle.write(data[y * width : (y + 1) * width])
+                    handle.write(bytes(row_bytes - width))
+                handle.write(bytes(row_bytes * (tile_size - tile.height)))
+    return TileLevel(image.width, image.height, columns, rows)
+
+
+def read_tile(pyramid: TilePyramid, level: int, column: int, row: int) -> bytes:
+    """Read one padded tile's raw pixels.
+
+    Uses a positional read rather than a memory map: mapped pages count
+    towards the process's resident size for as long as they stay mapped.
+    """
+    geometry = pyramid.levels[level]
+    offset = (row * geometry.columns + column) * pyramid.tile_bytes
+    fd = os.open(pyramid.level_path(level), os.O_RDONLY)
+    try:
+        return os.pread(fd, pyramid.tile_bytes, offset)
+    finally:
+        os.close(fd)
@@ -0,0 +1,222 @@
+"""Image utilities for Art Factory.
+
+Thumbnail generation lives here, separate from any Qt code, so it can run in
+worker processes. Thumbnails are content-addressed by the product's
+file_hash, which means identical files share thumbnails and a thumbnail
+never has to be regenerated once it exists.
+
+Media sniffing works on the first bytes of a file only, so ingestion can
+identify a file while it is still streaming in.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+from PIL import Image, UnidentifiedImageError
+
+# Thumbnail tiers (bounding boxes in pixels), matching products.thumbnail_paths
+THUMBNAIL_SIZES: Dict[str, Tuple[int, int]] = {
+    "small": (150, 150),
+    "medium": (400, 400),
+    "large": (800, 800),
+}
+
+THUMBNAIL_FORMAT = "JPEG"
+THUMBNAIL_EXTENSION = ".jpg"
+THUMBNAIL_QUALITY = 85
+
+# File extension per sniffed mime type
+MIME_EXTENSIONS: Dict[str, str] = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/bmp": ".bmp",
+    "image/tiff": ".tif",
+    "video/mp4": ".mp4",
+    "video/quicktime": ".mov",
+    "video/webm": ".webm",
+}
+
+
+# Header bytes kept for sniffing; JPEG dimensions can follow large EXIF blocks
+SNIFF_LIMIT_BYTES = 1024 * 1024
+
+# Bytes read per chunk when digesting a local file
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+class MediaInfo(NamedTuple):
+    """Type and dimensions read from a file header."""
+
+    mime_type: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+def thumbnail_path(cache_dir, file_hash: str, size_name: str) -> Path:
+    """Return the content-addressed path of a thumbnail.
+
+    Thumbnails are sharded by the first two hex digits of the hash to keep
+    directories small: ``{cache_dir}/{size}/{hash[:2]}/{hash}.jpg``.
+
+    Args:
+        cache_dir: Root directory of the thumbnail cache
+        file_hash: SHA256 of the source file
+        size_name: Thumbnail tier name (small, medium, large)
+
+    Returns:
+        Path: Location of the thumbnail file
+    """
+    return (
+        Path(cache_dir)
+        / size_name
+        / file_hash[:2]
+        / f"{file_hash}{THUMBNAIL_EXTENSION}"
+    )
+
+
+def generate_thumbnails(
+    source_path: str,
+    file_hash: str,
+    cache_dir: str,
+    size_names: Iterable[str] = tuple(THUMBNAIL_SIZES),
+) -> Dict[str, str]:
+    """Generate missing thumbnails for an image.
+
+    Existing thumbnails are reused without opening the source. Otherwise the
+    source is decoded once: JPEGs use draft() so the decoder downscales by a
+    power of two while decoding, and each tier is derived from the next
+    larger one with reducing_gap so resampling never touches the full-size
+    image. Files are written atomically.
+
+    This is a plain function so it can be submitted to a process pool.
+
+    Args:
+        source_path: Path of the original image
+        file_hash: SHA256 of the source file
+        cache_dir: Root directory of the thumbnail cache
+        size_names: Thumbnail tiers to produce
+
+    Returns:
+        Dict[str, str]: Thumbnail path per tier
+    """
+    paths = {name: thumbnail_path(cache_dir, file_hash, name) for name in size_names}
+    missing = [name for name, path in paths.items() if not path.exists()]
+    if missing:
+        # Largest tier first so each smaller tier is derived from it
+        missing.sort(key=lambda name: THUMBNAIL_SIZES[name], reverse=True)
+        largest = THUMBNAIL_SIZES[missing[0]]
+
+        with Image.open(source_path) as image:
+            image.draft("RGB", largest)
+            current = image.convert("RGB") if image.mode != "RGB" else image.copy()
+
+        for name in missing:
+            current.thumbnail(
+                THUMBNAIL_SIZES[name], Image.Resampling.LANCZOS, reducing_gap=2.0
+            )
+            _save_atomic(current, paths[name])
+
+    return {name: str(path) for name, path in paths.items()}
+
+
+def _save_atomic(image: Image.Image, path: Path):
+    """Write an image to a temporary file and move it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+    tmp_path = path.with_name(f".{path.name}.{suffix}")
+    image.save(tmp_path, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+    os.replace(tmp_path, path)
+
+
+def sniff_media(header: bytes) -> Optional[MediaInfo]:
+    """Identify a media file from its first bytes.
+
+    Images are recognised by Pillow, which parses headers lazily and needs
+    no pixel data; video containers are recognised by signature only, so
+    their dimensions are None.
+
+    Args:
+        header: Leading bytes of the file; more bytes help formats whose
+            dimensions come after large metadata blocks (JPEG with EXIF)
+
+    Returns:
+        Optional[MediaInfo]: The media info, or None if not recognised yet
+    """
+    if header[4:8] == b"ftyp":
+        brand = header[8:12]
+        return MediaInfo("video/quicktime" if brand == b"qt  " else "video/mp4")
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        return MediaInfo("video/webm")
+    try:
+        with Image.open(io.BytesIO(header)) as image:
+            mime_type = Image.MIME.get(image.format)
+            width, height = image.size
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError, EOFError):
+        return None
+    if mime_type is None:
+        return None
+    return MediaInfo(mime_type, width, height)
+
+
+class MediaDigest:
+    """SHA256, byte count and header sniffing, fed one chunk at a time."""
+
+    def __init__(self):
+        self._sha256 = hashlib.sha256()
+        self._header = bytearray()
+        self.size = 0
+        self.media: Optional[MediaInfo] = None
+
+    def update(self, chunk: bytes):
+        """Add the next chunk of the file."""
+        self._sha256.update(chunk)
+        self.size += len(chunk)
+        if self.media is None and len(self._header) < SNIFF_LIMIT_BYTES:
+            self._header += chunk[: SNIFF_LIMIT_BYTES - len(self._header)]
+            self.media = sniff_media(bytes(self._header))
+            if self.media is not None:
+                self._header = bytearray()
+
+    def hexdigest(self) -> str:
+        """Return the SHA256 of everything added so far."""
+        return self._sha256.hexdigest()
+
+
+def digest_file(
+    source_path: Union[str, Path],
+    copy_path: Optional[Union[str, Path]] = None,
+    chunk_size: int = DIGEST_CHUNK_SIZE,
+) -> Tuple[str, int, Optional[MediaInfo]]:
+    """Hash and sniff a file in one read, optionally copying it meanwhile.
+
+    This is a plain function so it can be submitted to a process pool.
+
+    Args:
+        source_path: File to read
+        copy_path: Where to write a copy of the bytes as they are read
+        chunk_size: Bytes read at a time
+
+    Returns:
+        Tuple: (SHA256 hex digest, size in bytes, MediaInfo or None)
+    """
+    digest = MediaDigest()
+    with open(source_path, "rb") as source:
+        if copy_path is None:
+            for chunk in iter(lambda: source.read(chunk_size), b""):
+                digest.update(chunk)
+        else:
+            try:
+                with open(copy_path, "wb") as copy:
+                    for chunk in iter(lambda: source.read(chunk_size), b""):
+                        copy.write(chunk)
+                        digest.update(chunk)
+            except BaseException:
+                Path(copy_path).unlink(missing_ok=True)
+                raise
+    return digest.hexdigest(), digest.size, digest.media
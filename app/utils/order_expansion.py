@@ -0,0 +1,329 @@
+"""Order expansion for Art Factory.
+
+An order's base parameter set expands into one generation parameter set per
+order item:
+
+- Sub-prompts: "A dog || A cat" gives one branch per sub-prompt
+- Inline tokens: "[red,blue] car" gives one item per value
+- Lookup tokens: "[color] car" expands to the lookup's values, and lookup
+  values may contain further tokens (nested lookups)
+- Back references: "[=color]" repeats the value chosen for [color]
+- Parameter lists: steps "8,10,20" gives one item per value
+- Parameter ranges: steps "10..20" (or "10..20:5" with a step) is inclusive
+- Random selection: steps "10|20|30" picks one value per item
+
+Expansion is a lazy generator pipeline, so items are produced one at a time
+and memory stays flat however large the cartesian product is. The number of
+items is computed in closed form without generating them, so callers can
+check it against a limit before writing anything.
+
+Usage:
+    expander = OrderExpander(order.base_parameter_set, lookups)
+    if expander.count() > limit:
+        ...
+    stream_order_items(order.id, expander, database.writer.insert_order_items)
+
+services.orders.create_order() does this for new orders.
+"""
+
+import itertools
+import math
+import random
+import re
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from signals import signal_bus as default_signal_bus
+
+# Parameters whose text is searched for [tokens]
+TOKEN_KEYS = ("prompt", "negative_prompt")
+
+# Separates alternative prompts in the "prompt" parameter
+SUB_PROMPT_DELIMITER = "||"
+
+# Order items written per insert_chunk() call
+DEFAULT_CHUNK_SIZE = 500
+
+TOKEN_PATTERN = re.compile(r"\[([^\[\]]*)\]")
+RANGE_PATTERN = re.compile(r"\s*(-?\d+)\s*\.\.\s*(-?\d+)\s*(?::\s*(\d+))?\s*")
+
+Bindings = Dict[str, str]
+
+
+class ExpansionError(ValueError):
+    """Raised when a base parameter set cannot be expanded."""
+
+
+def _parse_number(text: str) -> Optional[Any]:
+    """Return text as an int or float, or None if it is not a number."""
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _parse_numbers(parts: Sequence[str]) -> Optional[List[Any]]:
+    """Return every part as a number, or None if any part is not one."""
+    numbers = [_parse_number(part) for part in parts]
+    if any(number is None for number in numbers):
+        return None
+    return numbers
+
+
+def parse_parameter(value: Any) -> Tuple[str, Sequence[Any]]:
+    """Classify a parameter value for interpolation.
+
+    Only numeric strings are interpolated, so free text such as a style
+    description containing commas is passed through untouched.
+
+    Args:
+        value: Parameter value from the base parameter set
+
+    Returns:
+        Tuple[str, Sequence]: ("axis", values), ("random", choices), or
+        ("fixed", (value,))
+    """
+    if isinstance(value, str):
+        match = RANGE_PATTERN.fullmatch(value)
+        if match:
+            start, stop, step = match.groups()
+            step = int(step or 1)
+            if step < 1:
+                raise ExpansionError(f"Range step must be positive: {value!r}")
+            start, stop = int(start), int(stop)
+            direction = 1 if stop >= start else -1
+            return "axis", range(start, stop + direction, step * direction)
+        if "," in value:
+            numbers = _parse_numbers(value.split(","))
+            if numbers is not None:
+                return "axis", numbers
+        if "|" in value:
+            numbers = _parse_numbers(value.split("|"))
+            if numbers is not None:
+                return "random", numbers
+    return "fixed", (value,)
+
+
+class OrderExpander:
+    """Lazily expand a base parameter set into generation parameter sets.
+
+    Iterating the expander yields one dict per order item. Text expansions
+    (sub-prompts and tokens) form the outer loop and interpolated parameters
+    the inner loop, so neighbouring items share a prompt.
+
+    Example:
+        expander = OrderExpander(
+            {"prompt": "[color] cat || dog", "steps": "8,20"},
+            lookups={"color": ["red", "blue"]},
+        )
+        expander.count()  # 6
+        next(iter(expander))  # {"prompt": "red cat", "steps": 8}
+    """
+
+    def __init__(
+        self,
+        base_parameter_set: Mapping[str, Any],
+        lookups: Optional[Mapping[str, Sequence[Any]]] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        """Initialize the expander.
+
+        Args:
+            base_parameter_set: The order's base parameters
+            lookups: Lookup values by key, for [key] tokens
+            rng: Random source for "a|b|c" selections
+        """
+        self._base = dict(base_parameter_set)
+        self._lookups = dict(lookups or {})
+        self._rng = rng or random.Random()
+        self._lookup_counts: Dict[str, int] = {}
+
+        self._text_keys: List[str] = []
+        self._text_templates: List[List[str]] = []
+        self._axis_keys: List[str] = []
+        self._axis_values: List[Sequence[Any]] = []
+        self._random_choices: List[Tuple[str, Sequence[Any]]] = []
+
+        for key, value in self._base.items():
+            if key in TOKEN_KEYS and isinstance(value, str):
+                alternatives = [value]
+                if key == "prompt":
+                    alternatives = [
+                        part.strip() for part in value.split(SUB_PROMPT_DELIMITER)
+                    ]
+                self._text_keys.append(key)
+                self._text_templates.append(alternatives)
+                continue
+
+            kind, values = parse_parameter(value)
+            if kind == "axis":
+                self._axis_keys.append(key)
+                self._axis_values.append(values)
+            elif kind == "random":
+                self._random_choices.append((key, values))
+
+    def count(self) -> int:
+        """Return the number of items without generating them."""
+        total = math.prod(len(values) for values in self._axis_values)
+        for alternatives in self._text_templates:
+            total *= sum(self._count_text(text, ()) for text in alternatives)
+        return total
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield one generation parameter set per order item."""
+        for texts, _bindings in self._expand_keys(0, {}):
+            for values in itertools.product(*self._axis_values):
+                parameters = dict(self._base)
+                parameters.update(zip(self._text_keys, texts))
+                parameters.update(zip(self._axis_keys, values))
+                for key, choices in self._random_choices:
+                    parameters[key] = self._rng.choice(choices)
+                yield parameters
+
+    def _expand_keys(
+        self, position: int, bindings: Bindings
+    ) -> Iterator[Tuple[Tuple[str, ...], Bindings]]:
+        """Expand the token keys in order, sharing back-reference bindings."""
+        if position == len(self._text_templates):
+            yield (), bindings
+            return
+        for template in self._text_templates[position]:
+            for text, text_bindings in self._expand_text(template, bindings, ()):
+                for rest, rest_bindings in self._expand_keys(
+                    position + 1, text_bindings
+                ):
+                    yield (text,) + rest, rest_bindings
+
+    def _expand_text(
+        self, text: str, bindings: Bindings, stack: Tuple[str, ...]
+    ) -> Iterator[Tuple[str, Bindings]]:
+        """Yield every expansion of the tokens in text, left to right."""
+        match = TOKEN_PATTERN.search(text)
+        if match is None:
+            yield text, bindings
+            return
+        prefix, rest = text[: match.start()], text[match.end() :]
+        for value, value_bindings in self._expand_token(
+            match.group(1), bindings, stack
+        ):
+            for tail, tail_bindings in self._expand_text(rest, value_bindings, stack):
+                yield prefix + value + tail, tail_bindings
+
+    def _expand_token(
+        self, body: str, bindings: Bindings, stack: Tuple[str, ...]
+    ) -> Iterator[Tuple[str, Bindings]]:
+        """Yield the values of a single [token]."""
+        body = body.strip()
+        if body.startswith("="):
+            name = body[1:].strip()
+            if name not in bindings:
+                raise ExpansionError(f"Back reference [={name}] before [{name}]")
+            yield bindings[name], bindings
+        elif "," in body:
+            for value in body.split(","):
+                yield value.strip(), bindings
+        else:
+            for value in self._lookup_values(body, stack):
+                for text, text_bindings in self._expand_text(
+                    str(value), bindings, stack + (body,)
+                ):
+                    yield text, {**text_bindings, body: text}
+
+    def _lookup_values(self, key: str, stack: Tuple[str, ...]) -> Sequence[Any]:
+        """Return a lookup's values, rejecting unknown and cyclic lookups."""
+        if key in stack:
+            raise ExpansionError(f"Lookup cycle: {' -> '.join(stack + (key,))}")
+        if key not in self._lookups:
+            raise ExpansionError(f"Unknown lookup [{key}]")
+        return self._lookups[key]
+
+    def _count_text(self, text: str, stack: Tuple[str, ...]) -> int:
+        """Return the number of expansions of text."""
+        total = 1
+        for match in TOKEN_PATTERN.finditer(text):
+            total *= self._count_token(match.group(1).strip(), stack)
+        return total
+
+    def _count_token(self, body: str, stack: Tuple[str, ...]) -> int:
+        """Return the number of values a single [token] expands to."""
+        if body.startswith("="):
+            return 1
+        if "," in body:
+            return len(body.split(","))
+        if body not in self._lookup_counts:
+            values = self._lookup_values(body, stack)
+            self._lookup_counts[body] = sum(
+                self._count_text(str(value), stack + (body,)) for value in values
+            )
+        return self._lookup_counts[body]
+
+
+def iter_chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of up to size items from an iterable."""
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_order_items(
+    order_id: str,
+    expander: Iterable[Dict[str, Any]],
+    insert_chunk: Callable[[List[Dict[str, Any]]], None],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    signal_bus=None,
+) -> int:
+    """Write an order's items in chunks as they are expanded.
+
+    Each row holds order_id, a 1-based sequence_number and the
+    generation_parameter_set. After every chunk,
+    domain.order_items_expanded(order_id, items_written) is emitted, so the
+    last emission carries the final item count. An order that expands to
+    nothing still emits once with a count of zero.
+
+    Args:
+        order_id: Order the items belong to
+        expander: Iterable of generation parameter sets
+        insert_chunk: Callable that persists a list of rows
+        chunk_size: Rows per insert_chunk() call
+        signal_bus: Signal bus to emit on (defaults to the global bus)
+
+    Returns:
+        int: Number of items written
+    """
+    bus = signal_bus or default_signal_bus
+    rows = (
+        {
+            "order_id": order_id,
+            "sequence_number": sequence_number,
+            "generation_parameter_set": parameters,
+        }
+        for sequence_number, parameters in enumerate(expander, start=1)
+    )
+
+    written = 0
+    for chunk in iter_chunks(rows, chunk_size):
+        insert_chunk(chunk)
+        written += len(chunk)
+        bus.domain.order_items_expanded.emit(order_id, written)
+
+    if written == 0:
+        bus.domain.order_items_expanded.emit(order_id, 0)
+    return written
@@ -0,0 +1,438 @@
+"""Multi-tier thumbnail cache for Art Factory.
+
+Thumbnails are served from three tiers:
+
+1. Memory: an LRU of QPixmaps bounded by a byte budget
+2. Disk: content-addressed JPEGs under storage/thumbnails (see image_utils)
+3. Generation: Pillow downscaling in a process pool
+
+Lookups never block. ThumbnailCache.pixmap() answers from memory or returns
+None and emits ui.thumbnail_requested; the source is looked up, and the file
+generated or read, off the GUI thread and domain.thumbnail_ready is emitted
+once the pixmap is in memory, so views simply repaint.
+
+Usage:
+    cache = ThumbnailCache(thumbnails_dir(), database_source_resolver(database))
+    gallery.set_thumbnail_provider(cache.pixmap)
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+
+from signals import signal_bus as default_signal_bus
+from utils.file_utils import thumbnails_dir
+from utils.image_utils import THUMBNAIL_SIZES, generate_thumbnails
+
+logger = logging.getLogger(__name__)
+
+# Memory tier budget: about 700 small or 100 large thumbnails
+DEFAULT_MEMORY_BUDGET_BYTES = 64 * 1024 * 1024
+
+# resolve_source(product_id) -> (file_path, file_hash), or None if unknown
+SourceResolver = Callable[[str], Optional[Tuple[str, str]]]
+
+CacheKey = Tuple[str, str]
+
+
+def pixmap_bytes(pixmap: QPixmap) -> int:
+    """Return the approximate memory used by a pixmap."""
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+class PixmapLRUCache:
+    """Least-recently-used pixmap cache bounded by bytes, not entries.
+
+    A byte budget keeps memory predictable when tiers are mixed: one large
+    thumbnail costs as much as about 28 small ones.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES):
+        """Initialize the cache.
+
+        Args:
+            budget_bytes: Maximum total pixmap size in bytes
+        """
+        self._budget_bytes = budget_bytes
+        self._entries: "OrderedDict[CacheKey, QPixmap]" = OrderedDict()
+        self._sizes: Dict[CacheKey, int] = {}
+        self._used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def budget_bytes(self) -> int:
+        """Maximum total pixmap size in bytes."""
+        return self._budget_bytes
+
+    @property
+    def used_bytes(self) -> int:
+        """Total size of the cached pixmaps in bytes."""
+        return self._used_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: CacheKey) -> bool:
+        return key in self._entries
+
+    def get(self, key: CacheKey, count_miss: bool = True) -> Optional[QPixmap]:
+        """Return a cached pixmap and mark it as recently used.
+
+        Args:
+            key: Entry to look up
+            count_miss: Whether a miss adds to the statistics
+        """
+        pixmap = self._entries.get(key)
+        if pixmap is None:
+            if count_miss:
+                self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return pixmap
+
+    def put(self, key: CacheKey, pixmap: QPixmap):
+        """Insert a pixmap, evicting the least recently used entries."""
+        self.remove(key)
+        size = pixmap_bytes(pixmap)
+        if size > self._budget_bytes:
+            return
+        self._entries[key] = pixmap
+        self._sizes[key] = size
+        self._used_bytes += size
+        self._evict()
+
+    def remove(self, key: CacheKey):
+        """Drop an entry if present."""
+        if self._entries.pop(key, None) is not None:
+            self._used_bytes -= self._sizes.pop(key)
+
+    def set_budget(self, budget_bytes: int):
+        """Change the byte budget, evicting as needed."""
+        self._budget_bytes = budget_bytes
+        self._evict()
+
+    def clear(self):
+        """Drop every entry and reset the statistics."""
+        self._entries.clear()
+        self._sizes.clear()
+        self._used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict(self):
+        """Evict least recently used entries until within budget."""
+        while self._used_bytes > self._budget_bytes and self._entries:
+            key, _ = self._entries.popitem(last=False)
+            self._used_bytes -= self._sizes.pop(key)
+            self.evictions += 1
+
+
+class ThumbnailCache(QObject):
+    """Non-blocking thumbnail lookup backed by memory, disk and a worker pool.
+
+    Requests and responses travel over the signal bus: misses emit
+    ui.thumbnail_requested(product_id, size) and completed loads emit
+    domain.thumbnail_ready(product_id, size). Concurrent requests for the
+    same thumbnail are merged, and a thumbnail that failed to generate is
+    not requested again until clear() is called.
+
+    The source resolver usually queries the database, so it runs on a
+    worker thread. Generation runs generate_thumbnails() in a process pool
+    so Pillow's decoding never competes with the GUI thread for the GIL.
+    Reading the finished JPEG into a QImage happens on the pool's callback
+    thread; only the QImage to QPixmap conversion runs on the GUI thread.
+    """
+
+    # Internal: product_id, size_name, resolver Future
+    _source_resolved = pyqtSignal(str, str, object)
+
+    # Internal: product_id, size_name, QImage (None on failure)
+    _image_loaded = pyqtSignal(str, str, object)
+
+    def __init__(
+        self,
+        cache_dir,
+        resolve_source: Optional[SourceResolver] = None,
+        executor: Optional[Executor] = None,
+        memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES,
+        signal_bus=None,
+        parent: Optional[QObject] = None,
+    ):
+        """Initialize the thumbnail cache.
+
+        Args:
+            cache_dir: Root directory of the on-disk thumbnail cache
+            resolve_source: Callable mapping a product id to (path, hash)
+            executor: Worker pool (defaults to a spawn-based process pool)
+            memory_budget_bytes: Byte budget of the in-memory tier
+            signal_bus: Signal bus to use (defaults to the global bus)
+            parent: Optional parent object
+        """
+        super().__init__(parent)
+        self.cache_dir = str(cache_dir)
+        self.signal_bus = signal_bus or default_signal_bus
+        self.memory = PixmapLRUCache(memory_budget_bytes)
+        self._resolve_source = resolve_source
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._executor_lock = threading.Lock()
+        self._resolver_executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight: Dict[CacheKey, Future] = {}
+        self._resolving: Set[CacheKey] = set()
+        self._failed: Set[CacheKey] = set()
+
+        self._source_resolved.connect(self._on_source_resolved)
+        self._image_loaded.connect(self._on_image_loaded)
+        self.signal_bus.ui.thumbnail_requested.connect(self.request)
+
+    def set_source_resolver(self, resolve_source: SourceResolver):
+        """Set the callable mapping product ids to (path, hash)."""
+        self._resolve_source = resolve_source
+
+    def pixmap(self, product_id: str, size_name: str = "small") -> Optional[QPixmap]:
+        """Return a thumbnail from memory, requesting it on a miss.
+
+        This is safe to call from paint code: it never touches the disk,
+        and a thumbnail still loading counts as one miss however often it
+        is painted.
+
+        Args:
+            product_id: Product to show
+            size_name: Thumbnail tier name
+
+        Returns:
+            Optional[QPixmap]: The pixmap, or None while it is being loaded
+        """
+        key = (product_id, size_name)
+        outstanding = key in self._in_flight or key in self._failed
+        pixmap = self.memory.get(key, count_miss=not outstanding)
+        if pixmap is None and not outstanding:
+            self.signal_bus.ui.thumbnail_requested.emit(product_id, size_name)
+        return pixmap
+
+    def request(self, product_id: str, size_name: str = "small"):
+        """Load a thumbnail into memory in the background.
+
+        Args:
+            product_id: Product whose thumbnail is needed
+            size_name: Thumbnail tier name
+        """
+        key = (product_id, size_name)
+        if key in self._in_flight or key in self.memory or key in self._failed:
+            return
+        if size_name not in THUMBNAIL_SIZES:
+            logger.warning("Unknown thumbnail size %r for %s", size_name, product_id)
+            return
+        if self._resolve_source is None:
+            logger.debug("No thumbnail source resolver; dropping %s", product_id)
+            return
+
+        if self._resolver_executor is None:
+            self._resolver_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="thumbnail-source"
+            )
+        resolving = self._resolver_executor.submit(self._resolve_source, product_id)
+        self._in_flight[key] = resolving
+        self._resolving.add(key)
+        resolving.add_done_callback(
+            lambda done: self._source_resolved.emit(product_id, size_name, done)
+        )
+
+    def generate_files(self, file_path: str, file_hash: str) -> Future:
+        """Generate a file's disk thumbnails without loading them.
+
+        Used by ingestion so thumbnails exist before a view first asks for
+        them. Safe to call from any thread.
+
+        Returns:
+            Future: Resolves with the thumbnail path per tier
+        """
+        with self._executor_lock:
+            executor = self._get_executor()
+        return executor.submit(
+            generate_thumbnails, file_path, file_hash, self.cache_dir
+        )
+
+    def cancel(self, product_id: str, size_name: str = "small") -> bool:
+        """Withdraw a request that has not started generating yet.
+
+        A cancelled thumbnail is not marked as failed, so it can be
+        requested again later.
+
+        Returns:
+            bool: True if the request was still queued and is now dropped
+        """
+        key = (product_id, size_name)
+        future = self._in_flight.get(key)
+        if future is None:
+            return False
+        if key in self._resolving:
+            # A lookup already running is ignored once it completes
+            future.cancel()
+            self._resolving.discard(key)
+        elif not future.cancel():
+            return False
+        del self._in_flight[key]
+        return True
+
+    def is_pending(self, product_id: str, size_name: str = "small") -> bool:
+        """Return True while a thumbnail is being generated or read."""
+        return (product_id, size_name) in self._in_flight
+
+    def pending_count(self) -> int:
+        """Return the number of thumbnails being generated or read."""
+        return len(self._in_flight)
+
+    def clear(self):
+        """Drop the memory tier and forget failed requests."""
+        self.memory.clear()
+        self._failed.clear()
+
+    def shutdown(self, wait: bool = False):
+        """Stop the worker pools, cancelling queued lookups and generations.
+
+        Pending requests are forgotten, so a lookup that completes later
+        starts nothing.
+        """
+        self._in_flight.clear()
+        self._resolving.clear()
+        if self._resolver_executor is not None:
+            self._resolver_executor.shutdown(wait=wait, cancel_futures=True)
+            self._resolver_executor = None
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        """Create the process pool on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=max(1, (os.cpu_count() or 2) - 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _on_source_resolved(self, product_id: str, size_name: str, resolving: Future):
+        """Start generating a resolved thumbnail (GUI thread)."""
+        key = (product_id, size_name)
+        if self._in_flight.get(key) is not resolving:
+            # Cancelled while the lookup ran
+            return
+        self._resolving.discard(key)
+        source = None
+        if resolving.cancelled():
+            pass
+        elif resolving.exception() is not None:
+            logger.warning(
+                "Thumbnail source lookup failed for %s: %s",
+                product_id,
+                resolving.exception(),
+            )
+        else:
+            source = resolving.result()
+        if source is None:
+            del self._in_flight[key]
+            self._failed.add(key)
+            return
+        file_path, file_hash = source
+
+        future = self.generate_files(file_path, file_hash)
+        self._in_flight[key] = future
+        future.add_done_callback(
+            lambda done: self._on_generated(product_id, size_name, done)
+        )
+
+    def _on_generated(self, product_id: str, size_name: str, future: Future):
+        """Read the generated file into a QImage (runs off the GUI thread)."""
+        image = None
+        if future.cancelled():
+            # Withdrawn by cancel() or shutdown(); nothing to record
+            return
+        if future.exception() is not None:
+            logger.warning(
+                "Thumbnail generation failed for %s: %s",
+                product_id,
+                future.exception(),
+            )
+        else:
+            image = QImage(future.result()[size_name])
+            if image.isNull():
+                logger.warning("Could not read thumbnail for %s", product_id)
+                image = None
+        self._image_loaded.emit(product_id, size_name, image)
+
+    def _on_image_loaded(self, product_id: str, size_name: str, image):
+        """Store a loaded thumbnail and announce it (GUI thread)."""
+        key = (product_id, size_name)
+        self._in_flight.pop(key, None)
+        if image is None:
+            self._failed.add(key)
+            return
+        self.memory.put(key, QPixmap.fromImage(image))
+        self.signal_bus.domain.thumbnail_ready.emit(product_id, size_name)
+
+
+def database_source_resolver(database) -> SourceResolver:
+    """Return a resolver that looks products up in the database.
+
+    Deleted products and products without a file hash resolve to None.
+
+    Args:
+        database: Database holding the products table
+    """
+    from sqlalchemy import select
+
+    from models import Product
+
+    def resolve(product_id: str) -> Optional[Tuple[str, str]]:
+        with database.engine.connect() as connection:
+            row = connection.execute(
+                select(Product.file_path, Product.file_hash).where(
+                    Product.id == product_id, Product.deleted_at.is_(None)
+                )
+            ).first()
+        if row is None or not row.file_path or not row.file_hash:
+            return None
+        return row.file_path, row.file_hash
+
+    return resolve
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+
+
+def init_thumbnail_cache() -> ThumbnailCache:
+    """Create the application thumbnail cache (deferred startup hook).
+
+    Products are resolved against the application database. The worker
+    pools themselves are only started on the first cache miss.
+    """
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        from models.database import init_database
+
+        _thumbnail_cache = ThumbnailCache(
+            thumbnails_dir(), database_source_resolver(init_database())
+        )
+    return _thumbnail_cache
+
+
+def get_thumbnail_cache() -> Optional[ThumbnailCache]:
+    """Return the application thumbnail cache, if initialized."""
+    return _thumbnail_cache
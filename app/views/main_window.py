@@ -23,6 +23,8 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.signal_bus = signal_bus
+        self.signal_profiler_dock = None
+        self.dead_letter_dock = None
         self._setup_window()
         self._create_menu_bar()
         self._create_central_widget()
@@ -81,6 +83,17 @@ class MainWindow(QMainWindow):
         fullscreen_action.triggered.connect(self._toggle_fullscreen)
         view_menu.addAction(fullscreen_action)
 
+        view_menu.addSeparator()
+
+        profiler_action = QAction("Signal Profiler", self)
+        profiler_action.setShortcut("Ctrl+Alt+P")
+        profiler_action.triggered.connect(self.show_signal_profiler)
+        view_menu.addAction(profiler_action)
+
+        dead_letter_action = QAction("Dead Letters", self)
+        dead_letter_action.triggered.connect(self.show_dead_letters)
+        view_menu.addAction(dead_letter_action)
+
         # Help Menu
         help_menu = menubar.addMenu("Help")
 
@@ -145,6 +158,35 @@ class MainWindow(QMainWindow):
         else:
             self.showFullScreen()
 
+    def show_signal_profiler(self):
+        """Show the signal profiler dock, creating it on first use."""
+        # Imported here to keep the debug dock off the startup path
+        from views.widgets.signal_profiler_dock import SignalProfilerDock
+
+        if self.signal_profiler_dock is None:
+            self.signal_profiler_dock = SignalProfilerDock(self.signal_bus, self)
+            self.addDockWidget(
+                Qt.DockWidgetArea.BottomDockWidgetArea, self.signal_profiler_dock
+            )
+        self.signal_profiler_dock.show()
+        self.signal_profiler_dock.raise_()
+
+    def show_dead_letters(self):
+        """Show the dead-letter dock, creating it on first use."""
+        from models.database import init_database
+        from services.counters import get_counters
+        from views.widgets.dead_letter_dock import DeadLetterDock
+
+        if self.dead_letter_dock is None:
+            self.dead_letter_dock = DeadLetterDock(
+                init_database(), counters=get_counters(), parent=self
+            )
+            self.addDockWidget(
+                Qt.DockWidgetArea.BottomDockWidgetArea, self.dead_letter_dock
+            )
+        self.dead_letter_dock.show()
+        self.dead_letter_dock.raise_()
+
     def _on_about(self):
         """Handle about action."""
         from PyQt6.QtWidgets import QMessageBox
@@ -166,7 +208,8 @@ class MainWindow(QMainWindow):
 
         # Connect domain signals for business events
         self.signal_bus.domain.order_created.connect(self._on_order_created)
-        self.signal_bus.domain.product_created.connect(self._on_product_created)
+        # Products arrive in per-tick batches so bulk imports repaint once
+        self.signal_bus.domain.product_created_batch.connect(self._on_products_created)
 
         # Emit initial view changed signal
         self.signal_bus.ui.view_changed.emit("main")
@@ -190,6 +233,10 @@ class MainWindow(QMainWindow):
         """Handle order created signal."""
         self.statusBar().showMessage(f"Order created: {order_id}", 3000)
 
-    def _on_product_created(self, product_id: str):
-        """Handle product created signal."""
-        self.statusBar().showMessage(f"Product created: {product_id}", 3000)
+    def _on_products_created(self, product_ids: list):
+        """Handle a batch of product created signals."""
+        if len(product_ids) == 1:
+            message = f"Product created: {product_ids[0]}"
+        else:
+            message = f"{len(product_ids)} products created"
+        self.statusBar().showMessage(message, 3000)
@@ -0,0 +1,159 @@
+"""Dock listing order items in the dead-letter queue.
+
+Items land here when their retries are used up (dead_letter) or when a
+crash left it unknown whether the provider ran them (needs_retry). The
+table shows each item's provider, attempts and last error, most recent
+first. Resubmit Selected and Resubmit All put items back in the queue with
+a fresh retry budget (services.retries.resubmit). The table refreshes
+while the dock is visible.
+
+Usage:
+    dock = DeadLetterDock(database, scheduler=scheduler, parent=main_window)
+    main_window.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dock)
+"""
+
+from typing import List, Optional
+
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import (
+    QDockWidget,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from services.retries import DeadLetter, list_dead_letters, resubmit
+
+# Table refresh interval while the dock is visible
+DEFAULT_REFRESH_MS = 5000
+
+COLUMNS = ("Item", "Provider", "Model", "Status", "Attempts", "Error", "Updated")
+
+
+class DeadLetterDock(QDockWidget):
+    """Dock with the dead-letter queue and bulk resubmit."""
+
+    def __init__(
+        self,
+        database,
+        scheduler=None,
+        counters=None,
+        parent: Optional[QWidget] = None,
+        refresh_ms: int = DEFAULT_REFRESH_MS,
+    ):
+        """Initialize the dead-letter dock.
+
+        Args:
+            database: Database holding the order items
+            scheduler: GenerationScheduler resubmitted items are queued on
+            counters: CounterService correcting orders.failed_count
+            parent: Optional parent widget
+            refresh_ms: Table refresh interval while visible
+        """
+        super().__init__("Dead Letters", parent)
+        self.setObjectName("dead_letter_dock")
+        self.database = database
+        self.scheduler = scheduler
+        self.counters = counters
+        self.items: List[DeadLetter] = []
+
+        self.summary = QLabel()
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(self.refresh)
+        self.resubmit_selected_button = QPushButton("Resubmit Selected")
+        self.resubmit_selected_button.clicked.connect(self.resubmit_selected)
+        self.resubmit_all_button = QPushButton("Resubmit All")
+        self.resubmit_all_button.clicked.connect(self.resubmit_all)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        rows_header = self.table.verticalHeader()
+        header = self.table.horizontalHeader()
+        assert rows_header is not None and header is not None
+        rows_header.setVisible(False)
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(
+            COLUMNS.index("Error"), QHeaderView.ResizeMode.Stretch
+        )
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.summary, 1)
+        controls.addWidget(refresh_button)
+        controls.addWidget(self.resubmit_selected_button)
+        controls.addWidget(self.resubmit_all_button)
+        content = QWidget()
+        layout = QVBoxLayout(content)
+        layout.addLayout(controls)
+        layout.addWidget(self.table)
+        self.setWidget(content)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(refresh_ms)
+        self._timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self._on_visibility_changed)
+
+    def refresh(self):
+        """Reload the table from the database."""
+        self.items = list_dead_letters(self.database)
+        self.table.setRowCount(len(self.items))
+        for row, item in enumerate(self.items):
+            updated = (
+                item.updated_at.strftime("%Y-%m-%d %H:%M") if item.updated_at else ""
+            )
+            values = (
+                item.item_id,
+                item.provider,
+                item.model,
+                item.status,
+                str(item.retry_count),
+                item.error_message or "",
+                updated,
+            )
+            for column, value in enumerate(values):
+                cell = QTableWidgetItem(value)
+                if column == 0:
+                    cell.setData(Qt.ItemDataRole.UserRole, item.item_id)
+                self.table.setItem(row, column, cell)
+        self.summary.setText(f"{len(self.items)} items need attention")
+        has_items = bool(self.items)
+        self.resubmit_selected_button.setEnabled(has_items)
+        self.resubmit_all_button.setEnabled(has_items)
+
+    def selected_item_ids(self) -> List[str]:
+        """Return the ids of the selected rows, in table order."""
+        rows = sorted({index.row() for index in self.table.selectedIndexes()})
+        cells = [self.table.item(row, 0) for row in rows]
+        return [
+            cell.data(Qt.ItemDataRole.UserRole) for cell in cells if cell is not None
+        ]
+
+    def resubmit_selected(self) -> List[str]:
+        """Resubmit the selected items; returns their ids."""
+        return self._resubmit(self.selected_item_ids())
+
+    def resubmit_all(self) -> List[str]:
+        """Resubmit every listed item; returns their ids."""
+        return self._resubmit([item.item_id for item in self.items])
+
+    def _resubmit(self, item_ids: List[str]) -> List[str]:
+        resubmitted = []
+        if item_ids:
+            resubmitted = resubmit(
+                self.database, item_ids, self.scheduler, self.counters
+            )
+        self.refresh()
+        return resubmitted
+
+    def _on_visibility_changed(self, visible: bool):
+        if visible:
+            self.refresh()
+            self._timer.start()
+        else:
+            self._timer.stop()
@@ -0,0 +1,496 @@
+"""Virtualized product gallery for Art Factory.
+
+The gallery is a model/view pair: ProductListModel holds only product ids and
+fetches them in pages as the view scrolls, while GalleryWidget (a QListView)
+asks the ProductThumbnailDelegate to paint just the cells that are visible.
+Pages far from the visible rows are evicted, and a jump to a deep page
+fetches that page alone when the data source can seek. Memory and paint
+cost therefore stay flat however large the library is.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QObject,
+    QRect,
+    QSize,
+    Qt,
+)
+from PyQt6.QtGui import QColor, QPainter, QPixmap
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QListView,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionViewItem,
+    QWidget,
+)
+
+from signals import signal_bus as default_signal_bus
+
+# Rows requested from the data source per fetchMore() call
+DEFAULT_PAGE_SIZE = 200
+
+# Items laid out per batch by the view
+LAYOUT_BATCH_SIZE = 100
+
+# Pages kept loaded on each side of the visible rows
+KEEP_PAGES = 2
+
+# Cell geometry in pixels (thumbnails are the "small" 150x150 size)
+THUMBNAIL_SIZE = 150
+CELL_PADDING = 8
+
+# Custom item data roles
+ProductIdRole = Qt.ItemDataRole.UserRole + 1
+
+# fetch(filters, cursor, limit) -> (product_ids, next_cursor or None when done)
+PageFetcher = Callable[[Dict[str, Any], Any, int], Tuple[List[str], Any]]
+
+# seek(filters, offset, limit) -> (product_ids, next_cursor or None when done)
+PageSeeker = Callable[[Dict[str, Any], int, int], Tuple[List[str], Any]]
+
+# thumbnail_provider(product_id) -> pixmap, or None while it is not ready
+ThumbnailProvider = Callable[[str], Optional[QPixmap]]
+
+
+class ProductListModel(QAbstractListModel):
+    """List model over product ids, fetched lazily in pages.
+
+    The model never loads product rows up front. Views call canFetchMore()
+    and fetchMore() as they scroll, and each call pulls one page of ids from
+    the page fetcher using an opaque cursor, so the data source may page by
+    offset or by key. The source returns full pages until the last one.
+
+    Rows are kept per page. evict() drops the pages far from a span of
+    rows; their ids read as None until load_range() fetches them again
+    with the cursor kept for each page. A page whose cursor is not known
+    yet, as after a jump, is fetched through the page seeker when there
+    is one, and by walking the pages before it otherwise.
+
+    Example:
+        model = ProductListModel(pager.fetch_ids, seek_page=pager.seek_ids)
+        model.set_filters({"project": "project_1", "liked": True})
+    """
+
+    def __init__(
+        self,
+        fetch_page: PageFetcher,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        parent: Optional[QObject] = None,
+        seek_page: Optional[PageSeeker] = None,
+    ):
+        """Initialize the product list model.
+
+        Args:
+            fetch_page: Callable returning (ids, next_cursor) for a page
+            page_size: Number of ids requested per page
+            parent: Optional parent object
+            seek_page: Callable returning (ids, next_cursor) for the page
+                at a row offset, for jumps (optional)
+        """
+        super().__init__(parent)
+        self._fetch_page = fetch_page
+        self._seek_page = seek_page
+        self._page_size = page_size
+        self._filters: Dict[str, Any] = {}
+        # Products created since the last reset, newest first, above page 0
+        self._head: List[str] = []
+        # Loaded pages of the data source by number
+        self._pages: Dict[int, List[str]] = {}
+        # Cursor fetching each page whose start is known
+        self._cursors: Dict[int, Any] = {0: None}
+        # Rows of the data source the view knows of, loaded or not
+        self._row_count = 0
+        # id -> row, built on first use and dropped when rows shift
+        self._rows: Optional[Dict[str, int]] = None
+        self._exhausted = False
+
+    @property
+    def page_size(self) -> int:
+        """Number of ids requested per page."""
+        return self._page_size
+
+    @property
+    def filters(self) -> Dict[str, Any]:
+        """Filters currently applied to the model."""
+        return dict(self._filters)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Return the number of ids fetched so far."""
+        if parent.isValid():
+            return 0
+        return len(self._head) + self._row_count
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        """Return the product id for display and id roles."""
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, ProductIdRole):
+            return self.product_id(index.row())
+        return None
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        """Return True while the data source has more pages."""
+        if parent.isValid():
+            return False
+        return not self._exhausted
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        """Append the next page of ids from the data source."""
+        if parent.isValid() or self._exhausted:
+            return
+        self._load_page(self._row_count // self._page_size)
+
+    def ensure_loaded(self, row_count: int):
+        """Load the page holding row row_count - 1, and the rows above it.
+
+        Rows above the page only become known; their pages are not fetched
+        when the data source can seek.
+
+        Args:
+            row_count: Number of rows required
+        """
+        row = row_count - 1 - len(self._head)
+        if row >= 0:
+            self._load_page(row // self._page_size)
+
+    def load_range(self, first_row: int, last_row: int):
+        """Load the pages under a span of rows and evict those far from it.
+
+        Args:
+            first_row: First row of the span
+            last_row: Last row of the span
+        """
+        head = len(self._head)
+        if last_row >= head:
+            first_page = max(first_row - head, 0) // self._page_size
+            for page in range(first_page, (last_row - head) // self._page_size + 1):
+                if not self._load_page(page):
+                    break
+        self.evict(first_row, last_row)
+
+    def evict(self, first_row: int, last_row: int, keep_pages: int = KEEP_PAGES):
+        """Drop loaded pages more than keep_pages away from a span of rows.
+
+        Args:
+            first_row: First row of the span
+            last_row: Last row of the span
+            keep_pages: Pages kept on each side of the span
+        """
+        head = len(self._head)
+        low = max(first_row - head, 0) // self._page_size - keep_pages
+        high = max(last_row - head, 0) // self._page_size + keep_pages
+        far = [page for page in self._pages if page < low or page > high]
+        for page in far:
+            del self._pages[page]
+        if far:
+            self._rows = None
+
+    def _load_page(self, page: int) -> bool:
+        """Fetch one page of the data source unless it is loaded.
+
+        Returns:
+            bool: False if the data source ends before the page
+        """
+        if page in self._pages:
+            return True
+        filters = dict(self._filters)
+        if page in self._cursors:
+            product_ids, next_cursor = self._fetch_page(
+                filters, self._cursors[page], self._page_size
+            )
+        elif self._seek_page is not None:
+            # Products created since the reset now head the data source
+            offset = len(self._head) + page * self._page_size
+            product_ids, next_cursor = self._seek_page(filters, offset, self._page_size)
+        else:
+            known = max(known for known in self._cursors if known < page)
+            for earlier in range(known, page):
+                if not self._load_page(earlier) or earlier + 1 not in self._cursors:
+                    return False
+            return self._load_page(page)
+
+        head = len(self._head)
+        first = page * self._page_size
+        if next_cursor is not None and product_ids:
+            self._cursors[page + 1] = next_cursor
+        elif product_ids or first <= self._row_count:
+            # An empty seek past the end says nothing of the rows before it
+            self._exhausted = True
+        if not product_ids:
+            return False
+
+        end = first + len(product_ids)
+        known_rows = self._row_count
+        if end > known_rows:
+            self.beginInsertRows(QModelIndex(), head + known_rows, head + end - 1)
+        self._pages[page] = product_ids
+        if self._rows is not None:
+            self._rows.update(
+                (product_id, head + first + offset)
+                for offset, product_id in enumerate(product_ids)
+            )
+        if end > known_rows:
+            self._row_count = end
+            self.endInsertRows()
+        if first < known_rows:
+            self.dataChanged.emit(
+                self.index(head + first), self.index(head + min(end, known_rows) - 1)
+            )
+        return True
+
+    def set_filters(self, filters: Dict[str, Any]):
+        """Replace the filters and restart paging from the first page.
+
+        Args:
+            filters: Filter parameters understood by the page fetcher
+        """
+        self.beginResetModel()
+        self._filters = dict(filters)
+        self._head = []
+        self._pages = {}
+        self._cursors = {0: None}
+        self._row_count = 0
+        self._rows = None
+        self._exhausted = False
+        self.endResetModel()
+
+    def prepend_products(self, product_ids: List[str]):
+        """Show newly created products with one model update per batch.
+
+        Without filters the ids are inserted at the top in one row-range
+        insert. With filters the model cannot tell which ids match, so it
+        restarts paging instead.
+
+        Args:
+            product_ids: Product ids, oldest first
+        """
+        if not product_ids:
+            return
+        if self._filters:
+            self.set_filters(self._filters)
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(product_ids) - 1)
+        self._head[0:0] = reversed(product_ids)
+        self._rows = None
+        self.endInsertRows()
+
+    def product_id(self, row: int) -> Optional[str]:
+        """Return the product id at a row, if loaded."""
+        if row < 0:
+            return None
+        head = len(self._head)
+        if row < head:
+            return self._head[row]
+        page, offset = divmod(row - head, self._page_size)
+        product_ids = self._pages.get(page)
+        if product_ids is None or offset >= len(product_ids):
+            return None
+        return product_ids[offset]
+
+    def row_of(self, product_id: str) -> Optional[int]:
+        """Return the row of a loaded product id, or None."""
+        if self._rows is None:
+            self._rows = {loaded: row for row, loaded in enumerate(self._head)}
+            head = len(self._head)
+            for page, product_ids in self._pages.items():
+                first = head + page * self._page_size
+                self._rows.update(
+                    (loaded, first + offset)
+                    for offset, loaded in enumerate(product_ids)
+                )
+        return self._rows.get(product_id)
+
+
+class ProductThumbnailDelegate(QStyledItemDelegate):
+    """Paint a thumbnail cell for one product.
+
+    Thumbnails come from a provider callback; while a thumbnail is not
+    ready a placeholder is drawn, so painting never waits on decoding.
+    """
+
+    def __init__(
+        self,
+        thumbnail_provider: Optional[ThumbnailProvider] = None,
+        parent: Optional[QWidget] = None,
+    ):
+        """Initialize the delegate.
+
+        Args:
+            thumbnail_provider: Callable returning a pixmap or None
+            parent: Optional parent widget
+        """
+        super().__init__(parent)
+        self._thumbnail_provider = thumbnail_provider
+        self._cell_size = QSize(
+            THUMBNAIL_SIZE + CELL_PADDING * 2, THUMBNAIL_SIZE + CELL_PADDING * 2
+        )
+        self._placeholder = QColor("#e0e0e0")
+        self._highlight = QColor("#3d7eff")
+
+    def set_thumbnail_provider(self, thumbnail_provider: ThumbnailProvider):
+        """Replace the thumbnail provider."""
+        self._thumbnail_provider = thumbnail_provider
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        """Return the fixed cell size."""
+        return self._cell_size
+
+    def paint(
+        self,
+        painter: Optional[QPainter],
+        option: QStyleOptionViewItem,
+        index: QModelIndex,
+    ):
+        """Paint the thumbnail or its placeholder."""
+        assert painter is not None
+        target = option.rect.adjusted(
+            CELL_PADDING, CELL_PADDING, -CELL_PADDING, -CELL_PADDING
+        )
+        product_id = index.data(ProductIdRole)
+        pixmap = None
+        if self._thumbnail_provider is not None and product_id is not None:
+            pixmap = self._thumbnail_provider(product_id)
+
+        painter.save()
+        if pixmap is None or pixmap.isNull():
+            painter.fillRect(target, self._placeholder)
+        else:
+            scaled = pixmap.size().scaled(
+                target.size(), Qt.AspectRatioMode.KeepAspectRatio
+            )
+            x = target.x() + (target.width() - scaled.width()) // 2
+            y = target.y() + (target.height() - scaled.height()) // 2
+            painter.drawPixmap(QRect(x, y, scaled.width(), scaled.height()), pixmap)
+
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.setPen(self._highlight)
+            painter.drawRect(target.adjusted(-2, -2, 1, 1))
+        painter.restore()
+
+
+class GalleryWidget(QListView):
+    """Virtualized thumbnail grid over a ProductListModel.
+
+    The view uses uniform item sizes and batched layout so only visible
+    cells are laid out and painted. Scrolling loads the visible rows' pages
+    and evicts the far ones. It follows the signal bus: filters from
+    ui.filter_applied reset the model, ui.page_changed scrolls to a page
+    (fetching it if needed), domain.product_created_batch inserts new
+    products at the top in one operation per batch, and
+    domain.thumbnail_ready repaints the visible cells.
+    """
+
+    def __init__(
+        self,
+        model: ProductListModel,
+        thumbnail_provider: Optional[ThumbnailProvider] = None,
+        signal_bus=None,
+        parent: Optional[QWidget] = None,
+    ):
+        """Initialize the gallery widget.
+
+        Args:
+            model: The product list model to display
+            thumbnail_provider: Callable returning a pixmap or None
+            signal_bus: Signal bus to follow (defaults to the global bus)
+            parent: Optional parent widget
+        """
+        super().__init__(parent)
+        self.signal_bus = signal_bus or default_signal_bus
+        self._delegate = ProductThumbnailDelegate(thumbnail_provider, self)
+
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setMovement(QListView.Movement.Static)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(LAYOUT_BATCH_SIZE)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setItemDelegate(self._delegate)
+        self.setModel(model)
+
+        self._connect_signals()
+
+    def product_model(self) -> ProductListModel:
+        """Return the product list model."""
+        model = self.model()
+        assert isinstance(model, ProductListModel)
+        return model
+
+    def set_thumbnail_provider(self, thumbnail_provider: ThumbnailProvider):
+        """Replace the thumbnail provider and repaint visible cells."""
+        self._delegate.set_thumbnail_provider(thumbnail_provider)
+        self._repaint()
+
+    def selected_product_ids(self) -> List[str]:
+        """Return the ids of the selected, loaded products in row order."""
+        model = self.product_model()
+        rows = sorted(index.row() for index in self.selectedIndexes())
+        product_ids = [model.product_id(row) for row in rows]
+        return [product_id for product_id in product_ids if product_id is not None]
+
+    def load_visible(self):
+        """Load the pages of the visible rows and evict the far ones."""
+        viewport = self.viewport()
+        assert viewport is not None
+        rect = viewport.rect()
+        first = self.indexAt(rect.topLeft())
+        last = self.indexAt(rect.bottomRight())
+        model = self.product_model()
+        if not first.isValid():
+            return
+        last_row = last.row() if last.isValid() else model.rowCount() - 1
+        model.load_range(first.row(), last_row)
+
+    def _repaint(self):
+        """Repaint the visible cells."""
+        viewport = self.viewport()
+        assert viewport is not None
+        viewport.update()
+
+    def _connect_signals(self):
+        """Connect to signal bus for gallery events."""
+        self.signal_bus.ui.filter_applied.connect(self._on_filter_applied)
+        self.signal_bus.ui.page_changed.connect(self._on_page_changed)
+        self.signal_bus.domain.product_created_batch.connect(self._on_products_created)
+        self.signal_bus.domain.thumbnail_ready.connect(self._on_thumbnail_ready)
+        selection_model = self.selectionModel()
+        scroll_bar = self.verticalScrollBar()
+        assert selection_model is not None and scroll_bar is not None
+        selection_model.selectionChanged.connect(self._on_selection_changed)
+        scroll_bar.valueChanged.connect(self.load_visible)
+
+    def _on_filter_applied(self, filters: dict):
+        """Handle filter applied signal."""
+        self.product_model().set_filters(filters)
+        self.scrollToTop()
+
+    def _on_page_changed(self, page: int):
+        """Handle page changed signal (pages are 1-based)."""
+        model = self.product_model()
+        first_row = (max(1, page) - 1) * model.page_size
+        model.ensure_loaded(first_row + 1)
+        if first_row < model.rowCount():
+            self.scrollTo(
+                model.index(first_row),
+                QAbstractItemView.ScrollHint.PositionAtTop,
+            )
+            last_row = min(first_row + model.page_size, model.rowCount()) - 1
+            model.evict(first_row, last_row)
+
+    def _on_products_created(self, product_ids: list):
+        """Handle a batch of product created signals."""
+        self.product_model().prepend_products(product_ids)
+
+    def _on_thumbnail_ready(self, product_id: str, size_name: str):
+        """Repaint once a requested thumbnail has been loaded."""
+        self._repaint()
+
+    def _on_selection_changed(self, *_args):
+        """Publish the selection on the signal bus."""
+        self.signal_bus.ui.selection_changed.emit(self.selected_product_ids())
@@ -0,0 +1,446 @@
+"""Full-resolution image viewer for Art Factory.
+
+Upscales of 8k and more, and large PNGs, are too big to decode into one
+QPixmap on the GUI thread: the UI freezes for seconds and a 100 MP image
+costs 400 MB. ImageViewer never holds the full image instead:
+
+1. A placeholder (such as the large thumbnail) is shown immediately
+2. A worker process renders a screen-sized preview, which replaces it
+3. Another worker builds a tile pyramid on disk (see utils.image_tiles);
+   from then on the viewer draws the tiles visible at the level matching
+   the zoom, reading missing ones on a thread pool and drawing the preview
+   underneath until they arrive
+
+Tiles are kept in a byte-bounded LRU, so the GUI process's memory is the
+preview plus that budget, whatever the image size. Scroll to zoom around
+the cursor, drag to pan, double-click to toggle fit and 100%.
+
+Usage:
+    viewer = ImageViewer()
+    placeholder = thumbnail_cache.pixmap(product.id, "large")
+    viewer.open_image(product.file_path, placeholder)
+"""
+
+import logging
+import math
+import multiprocessing
+import shutil
+import tempfile
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from pathlib import Path
+from typing import Optional, Set, Tuple
+
+from PyQt6.QtCore import QPointF, QRectF, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QImage, QPainter, QPixmap
+from PyQt6.QtWidgets import QWidget
+
+from utils.file_utils import temp_dir
+from utils.image_tiles import (
+    TilePyramid,
+    build_tile_pyramid,
+    read_image_size,
+    read_tile,
+    render_preview,
+)
+from utils.thumbnail_cache import PixmapLRUCache
+
+logger = logging.getLogger(__name__)
+
+# Tiles kept in memory: about 64 RGBA or 85 RGB tiles of 512 pixels
+DEFAULT_TILE_BUDGET_BYTES = 64 * 1024 * 1024
+
+# Bounding box of the preview; covers a full-screen 1440p window
+DEFAULT_PREVIEW_SIZE = (2560, 1440)
+
+# Threads reading tiles from the pyramid files
+TILE_READ_WORKERS = 2
+
+# Zoom limits (display pixels per image pixel) and the wheel step
+MIN_ZOOM = 0.01
+MAX_ZOOM = 16.0
+ZOOM_STEP = 1.25
+
+_FORMATS = {
+    "RGB": QImage.Format.Format_RGB888,
+    "RGBA": QImage.Format.Format_RGBA8888,
+}
+
+TileKey = Tuple[int, int, int]
+
+
+def raw_image(pixels: bytes, width: int, height: int, mode: str) -> QImage:
+    """Return a QImage owning a copy of raw RGB/RGBA pixels."""
+    bytes_per_line = width * len(mode)
+    return QImage(pixels, width, height, bytes_per_line, _FORMATS[mode]).copy()
+
+
+class ImageViewer(QWidget):
+    """Zoomable viewer that decodes off-thread and draws only visible tiles.
+
+    Signals:
+        preview_ready: The preview has replaced the placeholder
+        image_ready: The tile pyramid is built; zooming in is sharp
+        load_failed: The image could not be decoded (error message)
+
+    Attributes:
+        tile_hits: Visible tiles found in memory while painting
+        tile_misses: Visible tiles that had to be read from disk
+    """
+
+    preview_ready = pyqtSignal()
+    image_ready = pyqtSignal()
+    load_failed = pyqtSignal(str)
+
+    # Internal, queued from worker threads: generation, payload
+    _preview_loaded = pyqtSignal(int, object)
+    _pyramid_loaded = pyqtSignal(int, object, object)
+    _tile_loaded = pyqtSignal(int, object, object)
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        tile_budget_bytes: int = DEFAULT_TILE_BUDGET_BYTES,
+        preview_size: Tuple[int, int] = DEFAULT_PREVIEW_SIZE,
+        scratch_dir: Optional[Path] = None,
+        parent: Optional[QWidget] = None,
+    ):
+        """Initialize the image viewer.
+
+        Args:
+            executor: Pool decoding images (defaults to two spawned processes)
+            tile_budget_bytes: Byte budget of the in-memory tiles
+            preview_size: Bounding box of the preview in pixels
+            scratch_dir: Where tile pyramids are written (defaults to storage
+                temp); each image's pyramid is deleted when it is closed
+            parent: Optional parent widget
+        """
+        super().__init__(parent)
+        self.tiles = PixmapLRUCache(tile_budget_bytes)
+        self.preview_size = preview_size
+        self.scratch_dir = Path(scratch_dir or temp_dir() / "tiles")
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._readers = ThreadPoolExecutor(
+            TILE_READ_WORKERS, thread_name_prefix="tile-reader"
+        )
+
+        self._generation = 0
+        self._path: Optional[str] = None
+        self._image_size: Optional[Tuple[int, int]] = None
+        self._preview: Optional[QPixmap] = None
+        self._pyramid: Optional[TilePyramid] = None
+        self._pyramid_dir: Optional[Path] = None
+        self._pyramid_job: Optional[Future] = None
+        self._pending: Set[TileKey] = set()
+        self._zoom = 1.0
+        self._fit = True
+        self._center = QPointF()
+        self._drag_origin: Optional[QPointF] = None
+
+        self.tile_hits = 0
+        self.tile_misses = 0
+
+        self.setMouseTracking(False)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self._preview_loaded.connect(self._on_preview_loaded)
+        self._pyramid_loaded.connect(self._on_pyramid_loaded)
+        self._tile_loaded.connect(self._on_tile_loaded)
+
+    @property
+    def zoom(self) -> float:
+        """Display pixels per image pixel."""
+        return self._zoom
+
+    @property
+    def pyramid(self) -> Optional[TilePyramid]:
+        """The current image's tile pyramid, once built."""
+        return self._pyramid
+
+    def open_image(self, path: str, placeholder: Optional[QPixmap] = None):
+        """Show an image, starting its preview and tiling in the background.
+
+        Only the header is read here, for the image size.
+
+        Args:
+            path: Image file
+            placeholder: Pixmap to show until the preview is ready
+        """
+        self.close_image()
+        self._path = str(path)
+        try:
+            self._image_size = read_image_size(self._path)
+        except Exception as error:
+            self._fail(error)
+            return
+        self._preview = placeholder
+        self.fit_to_window()
+
+        generation = self._generation
+        self.scratch_dir.mkdir(parents=True, exist_ok=True)
+        directory = Path(tempfile.mkdtemp(dir=self.scratch_dir))
+        self._pyramid_dir = directory
+        executor = self._get_executor()
+        preview = executor.submit(render_preview, self._path, self.preview_size)
+        preview.add_done_callback(
+            lambda done: self._preview_loaded.emit(generation, done)
+        )
+        self._pyramid_job = executor.submit(build_tile_pyramid, self._path, directory)
+        self._pyramid_job.add_done_callback(
+            lambda done: self._pyramid_loaded.emit(generation, directory, done)
+        )
+
+    def close_image(self):
+        """Forget the current image and delete its tile pyramid."""
+        # Results of jobs still running for the old image are ignored
+        self._generation += 1
+        self._path = None
+        self._image_size = None
+        self._preview = None
+        self._pyramid = None
+        self._pending.clear()
+        self.tiles.clear()
+        if self._pyramid_job is not None and not self._pyramid_job.done():
+            # The job's completion removes what it wrote
+            self._pyramid_job.cancel()
+        elif self._pyramid_dir is not None:
+            self._remove_directory(self._pyramid_dir)
+        self._pyramid_dir = None
+        self._pyramid_job = None
+        self.update()
+
+    def fit_to_window(self):
+        """Zoom so the whole image is visible, and keep it fitted on resize."""
+        self._fit = True
+        self._apply_fit()
+        self.update()
+
+    def set_zoom(self, zoom: float, anchor: Optional[QPointF] = None):
+        """Zoom, keeping the image point under anchor (widget coordinates) fixed.
+
+        Args:
+            zoom: Display pixels per image pixel
+            anchor: Widget point to zoom around (defaults to the centre)
+        """
+        zoom = min(MAX_ZOOM, max(MIN_ZOOM, zoom))
+        if anchor is None:
+            anchor = QPointF(self.width() / 2, self.height() / 2)
+        fixed = self._to_image(anchor)
+        self._zoom = zoom
+        self._fit = False
+        # Move the centre so that fixed stays under the anchor
+        self._center = fixed - (anchor - self._widget_center()) / zoom
+        self.update()
+
+    def center_on(self, point: QPointF):
+        """Scroll so the given full-resolution image point is centred."""
+        self._center = QPointF(point)
+        self._fit = False
+        self.update()
+
+    def level_for_zoom(self, zoom: Optional[float] = None) -> int:
+        """Return the pyramid level whose resolution best serves a zoom.
+
+        That is the smallest level still at least as detailed as the
+        display, so tiles are only ever scaled down.
+        """
+        if self._pyramid is None:
+            return 0
+        zoom = self._zoom if zoom is None else zoom
+        level = int(math.floor(math.log2(1 / zoom))) if zoom < 1 else 0
+        return max(0, min(level, len(self._pyramid.levels) - 1))
+
+    def visible_tiles(self) -> list:
+        """Return the (level, column, row) keys of the tiles in view."""
+        if self._pyramid is None:
+            return []
+        level = self.level_for_zoom()
+        scale = 2**level
+        geometry = self._pyramid.levels[level]
+        tile = self._pyramid.tile_size * scale  # in full-resolution pixels
+        top_left = self._to_image(QPointF(0, 0))
+        bottom_right = self._to_image(QPointF(self.width(), self.height()))
+        first_column = max(0, int(top_left.x() // tile))
+        first_row = max(0, int(top_left.y() // tile))
+        last_column = min(geometry.columns - 1, int(bottom_right.x() // tile))
+        last_row = min(geometry.rows - 1, int(bottom_right.y() // tile))
+        return [
+            (level, column, row)
+            for row in range(first_row, last_row + 1)
+            for column in range(first_column, last_column + 1)
+        ]
+
+    def shutdown(self):
+        """Close the image and stop the worker pools."""
+        self.close_image()
+        self._readers.shutdown(wait=True)
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # Painting
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(24, 24, 24))
+        if self._image_size is None:
+            return
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        width, height = self._image_size
+        if self._preview is not None:
+            painter.drawPixmap(
+                self._image_rect(width, height),
+                self._preview,
+                QRectF(self._preview.rect()),
+            )
+        for key in self.visible_tiles():
+            pixmap = self.tiles.get(key)
+            if pixmap is None:
+                self.tile_misses += 1
+                self._request_tile(key)
+                continue
+            self.tile_hits += 1
+            level, column, row = key
+            x, y, tile_width, tile_height = self._pyramid.tile_rect(*key)
+            scale = 2**level
+            target = self._image_rect(
+                tile_width * scale, tile_height * scale, x * scale, y * scale
+            )
+            painter.drawPixmap(target, pixmap, QRectF(0, 0, tile_width, tile_height))
+
+    def resizeEvent(self, event):
+        if self._fit:
+            self._apply_fit()
+        super().resizeEvent(event)
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.set_zoom(self._zoom * ZOOM_STEP**steps, event.position())
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag_origin = event.position()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_origin is not None:
+            delta = event.position() - self._drag_origin
+            self._drag_origin = event.position()
+            self.center_on(self._center - delta / self._zoom)
+
+    def mouseReleaseEvent(self, event):
+        self._drag_origin = None
+
+    def mouseDoubleClickEvent(self, event):
+        if self._fit:
+            self.set_zoom(1.0, event.position())
+        else:
+            self.fit_to_window()
+
+    # Geometry
+
+    def _widget_center(self) -> QPointF:
+        return QPointF(self.width() / 2, self.height() / 2)
+
+    def _to_image(self, point: QPointF) -> QPointF:
+        """Map a widget point to full-resolution image coordinates."""
+        return self._center + (point - self._widget_center()) / self._zoom
+
+    def _image_rect(
+        self, width: float, height: float, x: float = 0, y: float = 0
+    ) -> QRectF:
+        """Map a rectangle of the full-resolution image to the widget."""
+        origin = self._widget_center() + (QPointF(x, y) - self._center) * self._zoom
+        return QRectF(origin.x(), origin.y(), width * self._zoom, height * self._zoom)
+
+    def _apply_fit(self):
+        """Set the zoom and centre that fit the image in the widget."""
+        if self._image_size is None:
+            return
+        width, height = self._image_size
+        self._zoom = min(
+            MAX_ZOOM, max(MIN_ZOOM, min(self.width() / width, self.height() / height))
+        )
+        self._center = QPointF(width / 2, height / 2)
+
+    # Background results
+
+    def _get_executor(self) -> Executor:
+        """Create the decoding pool on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=2, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _request_tile(self, key: TileKey):
+        """Read a tile on the reader pool unless it is already on its way."""
+        if key in self._pending:
+            return
+        pyramid = self._pyramid
+        if pyramid is None:
+            return
+        self._pending.add(key)
+        generation = self._generation
+
+        def load() -> QImage:
+            size = pyramid.tile_size
+            return raw_image(read_tile(pyramid, *key), size, size, pyramid.mode)
+
+        future = self._readers.submit(load)
+        future.add_done_callback(
+            lambda done: self._tile_loaded.emit(generation, key, done)
+        )
+
+    def _on_preview_loaded(self, generation: int, future: Future):
+        if generation != self._generation or future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self._fail(error)
+            return
+        pixels, width, height, mode, _full_width, _full_height = future.result()
+        self._preview = QPixmap.fromImage(raw_image(pixels, width, height, mode))
+        self.update()
+        self.preview_ready.emit()
+
+    def _on_pyramid_loaded(self, generation: int, directory: Path, future: Future):
+        if generation != self._generation:
+            self._remove_directory(directory)
+            return
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self._fail(error)
+            return
+        self._pyramid = future.result()
+        self.update()
+        self.image_ready.emit()
+
+    def _on_tile_loaded(self, generation: int, key: TileKey, future: Future):
+        if generation != self._generation:
+            return
+        self._pending.discard(key)
+        if future.cancelled() or future.exception() is not None:
+            logger.warning("Could not read tile %s of %s", key, self._path)
+            return
+        self.tiles.put(key, QPixmap.fromImage(future.result()))
+        if key in self.visible_tiles():
+            self.update()
+
+    def _remove_directory(self, directory: Path):
+        """Delete a pyramid directory on the reader pool."""
+        try:
+            self._readers.submit(shutil.rmtree, directory, ignore_errors=True)
+        except RuntimeError:
+            # Shut down already: a late job finished after shutdown()
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _fail(self, error: BaseException):
+        logger.warning("Could not open %s: %s", self._path, error)
+        self.load_failed.emit(str(error))
@@ -0,0 +1,178 @@
+"""Debug dock showing signal bus slot timings.
+
+The dock lists every profiled signal and slot with its call count and
+execution times, worst total first, so a slot that stalls the GUI thread
+while an order runs stands out. Queue columns show how long deliveries
+from worker threads waited for the receiving thread. The table refreshes
+while the dock is visible; Export writes the same data as JSON.
+
+Usage:
+    dock = SignalProfilerDock(signal_bus, main_window)
+    main_window.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dock)
+"""
+
+from pathlib import Path
+from typing import Optional
+
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import (
+    QCheckBox,
+    QDockWidget,
+    QFileDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from signals import signal_bus as default_signal_bus
+
+# Table refresh interval while the dock is visible
+DEFAULT_REFRESH_MS = 1000
+
+# (header, row key, decimals or None for counts)
+COLUMNS = (
+    ("Signal", "signal", None),
+    ("Slot", "slot", None),
+    ("Calls", "count", None),
+    ("Total ms", "total_ms", 1),
+    ("Mean ms", "mean_ms", 2),
+    ("Max ms", "max_ms", 2),
+    ("p95 ms", "p95_ms", 2),
+    ("Queued", "queued", None),
+    ("Queue p95 ms", "queue_p95_ms", 2),
+    ("Queue max ms", "queue_max_ms", 2),
+)
+
+
+class _NumberItem(QTableWidgetItem):
+    """Table item that sorts by its numeric value."""
+
+    def __init__(self, value: float, decimals: Optional[int]):
+        text = str(value) if decimals is None else f"{value:.{decimals}f}"
+        super().__init__(text)
+        self._value = value
+        self.setTextAlignment(
+            Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        )
+
+    def __lt__(self, other):
+        if isinstance(other, _NumberItem):
+            return self._value < other._value
+        return super().__lt__(other)
+
+
+class SignalProfilerDock(QDockWidget):
+    """Dock with the signal bus profiler's per-slot statistics."""
+
+    def __init__(
+        self,
+        signal_bus=None,
+        parent: Optional[QWidget] = None,
+        refresh_ms: int = DEFAULT_REFRESH_MS,
+    ):
+        """Initialize the profiler dock.
+
+        Args:
+            signal_bus: Signal bus to profile (defaults to the global bus)
+            parent: Optional parent widget
+            refresh_ms: Table refresh interval while visible
+        """
+        super().__init__("Signal Profiler", parent)
+        self.setObjectName("signal_profiler_dock")
+        self.signal_bus = signal_bus or default_signal_bus
+
+        self.enabled_box = QCheckBox("Profile slots connected from now on")
+        self.enabled_box.setChecked(self.signal_bus.profiling_enabled)
+        self.enabled_box.toggled.connect(self._on_enabled_toggled)
+        self.summary = QLabel()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset_statistics)
+        export_button = QPushButton("Export JSON...")
+        export_button.clicked.connect(self._on_export_clicked)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([header for header, _, _ in COLUMNS])
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        rows_header = self.table.verticalHeader()
+        header = self.table.horizontalHeader()
+        assert rows_header is not None and header is not None
+        rows_header.setVisible(False)
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.enabled_box)
+        controls.addWidget(self.summary, 1)
+        controls.addWidget(reset_button)
+        controls.addWidget(export_button)
+        content = QWidget()
+        layout = QVBoxLayout(content)
+        layout.addLayout(controls)
+        layout.addWidget(self.table)
+        self.setWidget(content)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(refresh_ms)
+        self._timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self._on_visibility_changed)
+
+    def refresh(self):
+        """Reload the table from the profiler."""
+        profiler = self.signal_bus.profiler
+        rows = profiler.rows() if profiler is not None else []
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column, (_header, key, decimals) in enumerate(COLUMNS):
+                value = row[key]
+                if isinstance(value, str):
+                    item = QTableWidgetItem(value)
+                else:
+                    item = _NumberItem(value, decimals)
+                self.table.setItem(row_index, column, item)
+        self.table.setSortingEnabled(True)
+
+        if profiler is None:
+            self.summary.setText("Profiling is off")
+        else:
+            calls = sum(row["count"] for row in rows)
+            total = sum(row["total_ms"] for row in rows)
+            self.summary.setText(
+                f"{len(rows)} slots, {calls} calls, {total:.0f} ms in slots"
+            )
+
+    def reset_statistics(self):
+        """Clear the profiler's statistics."""
+        if self.signal_bus.profiler is not None:
+            self.signal_bus.profiler.reset()
+        self.refresh()
+
+    def export_to(self, path) -> Optional[Path]:
+        """Write the statistics as JSON; returns None while profiling is off."""
+        if self.signal_bus.profiler is None:
+            return None
+        return self.signal_bus.profiler.export_json(path)
+
+    def _on_export_clicked(self):
+        path, _filter = QFileDialog.getSaveFileName(
+            self, "Export Signal Profile", "signal-profile.json", "JSON (*.json)"
+        )
+        if path:
+            self.export_to(path)
+
+    def _on_enabled_toggled(self, enabled: bool):
+        self.signal_bus.set_profiling(enabled)
+        self.refresh()
+
+    def _on_visibility_changed(self, visible: bool):
+        if visible:
+            self.refresh()
+            self._timer.start()
+        else:
+            self._timer.stop()
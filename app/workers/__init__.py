@@ -0,0 +1 @@
+"""Background workers for Art Factory application."""
@@ -0,0 +1,433 @@
+"""Bulk folder import for Art Factory.
+
+Importing tens of thousands of existing images has to be fast and must not
+block the UI. ImportWorker is a QThread that:
+
+- walks the source directories with os.scandir, so no extra stat calls
+  are needed to tell files from directories
+- fans hashing, header sniffing and copying out to a process pool, with
+  each file read exactly once (see image_utils.digest_file)
+- deduplicates by file_hash against the products table and within the run
+  before any copy is renamed into the product store
+- inserts product rows through the write queue in batches
+- reports ui.loading_started/loading_finished around the run and emits
+  domain.import_progress periodically with counts and files per minute
+- stops promptly on cancel() or ui.request_cancel(import_id), keeping the
+  files already committed and discarding the rest
+
+Usage:
+    worker = ImportWorker(get_database(), ["/photos/2023"], project_id=project.id)
+    signal_bus.domain.import_progress.connect(status_bar.show_import)
+    worker.start()
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from PyQt6.QtCore import QObject, QThread
+from sqlalchemy import select
+
+from models import Database, Product
+from models.base import new_id
+from services.product_ingestion import media_kind, product_path
+from signals import signal_bus as default_signal_bus
+from utils.file_utils import products_dir, temp_dir
+from utils.image_utils import MediaInfo, digest_file
+
+logger = logging.getLogger(__name__)
+
+# File extensions picked up by a folder import
+IMPORT_EXTENSIONS = frozenset(
+    {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
+)
+
+# Product rows committed per write queue insert
+DEFAULT_BATCH_SIZE = 500
+
+# Seconds between import_progress emissions
+DEFAULT_PROGRESS_INTERVAL = 0.25
+
+# Files queued on the pool per worker process, so cancel() is prompt
+IN_FLIGHT_PER_WORKER = 8
+
+# Bound parameters per "file_hash IN (...)" query (SQLite allows 999)
+HASH_QUERY_CHUNK = 900
+
+
+def scan_files(
+    roots: Iterable[Union[str, Path]],
+    extensions: Iterable[str] = IMPORT_EXTENSIONS,
+) -> Iterator[str]:
+    """Yield the paths of importable files below the given roots.
+
+    Hidden directories are skipped and symlinked directories are not
+    followed. A root may also be a single file.
+
+    Args:
+        roots: Directories (or files) to import
+        extensions: Lower-case file extensions to include
+
+    Yields:
+        str: File paths, depth first
+    """
+    extensions = frozenset(extensions)
+    stack: List[str] = []
+    for root in reversed([str(root) for root in roots]):
+        if os.path.isfile(root):
+            if os.path.splitext(root)[1].lower() in extensions:
+                yield root
+        else:
+            stack.append(root)
+
+    while stack:
+        directory = stack.pop()
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.name.startswith("."):
+                                subdirectories.append(entry.path)
+                        elif (
+                            os.path.splitext(entry.name)[1].lower() in extensions
+                            and entry.is_file()
+                        ):
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError as error:
+            logger.warning("Cannot scan %s: %s", directory, error)
+            continue
+        stack.extend(sorted(subdirectories, reverse=True))
+
+
+@dataclass
+class ImportStats:
+    """Counts for one import run, emitted through domain.import_progress."""
+
+    import_id: str
+    total: int = 0
+    processed: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    cancelled: bool = False
+    finished: bool = False
+
+    @property
+    def files_per_minute(self) -> float:
+        """Files hashed and checked per minute so far."""
+        return self.processed / self.elapsed * 60 if self.elapsed else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the statistics, including files_per_minute."""
+        stats = asdict(self)
+        stats["files_per_minute"] = self.files_per_minute
+        return stats
+
+
+@dataclass
+class _Digested:
+    """A file that has been hashed (and copied) but not yet committed."""
+
+    source_path: str
+    copy_path: Optional[Path]
+    file_hash: str
+    file_size: int
+    media: Optional[MediaInfo]
+
+
+class ImportWorker(QThread):
+    """Imports folders of images into a project on a background thread.
+
+    Results are in stats once the thread finishes.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        roots: Iterable[Union[str, Path]],
+        project_id: Optional[str] = None,
+        copy_files: bool = True,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        products_root: Optional[Union[str, Path]] = None,
+        temp_root: Optional[Union[str, Path]] = None,
+        thumbnail_cache=None,
+        signal_bus=None,
+        import_id: Optional[str] = None,
+        parent: Optional[QObject] = None,
+    ):
+        """Initialize the import.
+
+        Args:
+            database: Database to deduplicate against and insert into
+            roots: Directories (or files) to import
+            project_id: Project the products are added to
+            copy_files: Copy files into the product store; if False the
+                products reference the files where they are
+            executor: Pool for hashing (defaults to a spawn process pool)
+            max_workers: Size of the default pool (CPU count - 1)
+            batch_size: Product rows per insert
+            progress_interval: Seconds between progress emissions
+            products_root: Root of the product store (defaults to storage)
+            temp_root: Directory for copies before they are committed
+            thumbnail_cache: ThumbnailCache to queue thumbnail generation on
+            signal_bus: Signal bus to use (defaults to the global bus)
+            import_id: Id accepted by ui.request_cancel (generated if omitted)
+            parent: Optional parent object
+        """
+        super().__init__(parent)
+        self.database = database
+        self.roots = [str(root) for root in roots]
+        self.project_id = project_id
+        self.copy_files = copy_files
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.batch_size = batch_size
+        self.progress_interval = progress_interval
+        self.products_root = Path(products_root or products_dir())
+        self.temp_root = Path(temp_root or temp_dir())
+        self.thumbnail_cache = thumbnail_cache
+        self.signal_bus = signal_bus or default_signal_bus
+        self.import_id = import_id or new_id()
+        self.stats = ImportStats(self.import_id)
+        self._executor = executor
+        self._cancel = threading.Event()
+        self._seen: Set[str] = set()
+        self._created_dirs: Set[Path] = set()
+        self._started = 0.0
+        self._last_report = 0.0
+
+        self.signal_bus.ui.request_cancel.connect(self._on_request_cancel)
+
+    def cancel(self):
+        """Stop the import after the files currently being hashed."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() has been called."""
+        return self._cancel.is_set()
+
+    def run(self):
+        """Thread body: scan, digest, deduplicate and insert."""
+        ui = self.signal_bus.ui
+        self._started = time.monotonic()
+        ui.loading_started.emit(f"Importing from {', '.join(self.roots)}")
+        try:
+            self._import()
+        except Exception:
+            logger.exception("Import %s failed", self.import_id)
+        finally:
+            self.stats.cancelled = self.cancelled
+            self.stats.finished = True
+            self._report(force=True)
+            ui.loading_finished.emit()
+        logger.info(
+            "Import %s: %d imported, %d duplicates, %d failed in %.1fs",
+            self.import_id,
+            self.stats.imported,
+            self.stats.duplicates,
+            self.stats.failed,
+            self.stats.elapsed,
+        )
+
+    def _on_request_cancel(self, import_id: str):
+        if import_id == self.import_id:
+            self.cancel()
+
+    def _import(self):
+        """Run the pipeline with the executor."""
+        paths = []
+        for path in scan_files(self.roots):
+            paths.append(path)
+            if self.cancelled:
+                return
+        self.stats.total = len(paths)
+        self._report(force=True)
+        if not paths:
+            return
+        if self.copy_files:
+            self.temp_root.mkdir(parents=True, exist_ok=True)
+
+        executor = self._executor
+        owns_executor = executor is None
+        if owns_executor:
+            executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        pending: Dict[Future, Tuple[str, Optional[Path]]] = {}
+        batch: List[_Digested] = []
+        window = self.max_workers * IN_FLIGHT_PER_WORKER
+        remaining = iter(paths)
+        try:
+            while True:
+                while not self.cancelled and len(pending) < window:
+                    path = next(remaining, None)
+                    if path is None:
+                        break
+                    copy_path = (
+                        self.temp_root / f"{uuid.uuid4().hex}.part"
+                        if self.copy_files
+                        else None
+                    )
+                    future = executor.submit(digest_file, path, copy_path)
+                    pending[future] = (path, copy_path)
+                if not pending or self.cancelled:
+                    break
+
+                done, _ = wait(
+                    pending, timeout=self.progress_interval, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    path, copy_path = pending.pop(future)
+                    self._collect(future, path, copy_path, batch)
+                if len(batch) >= self.batch_size:
+                    self._commit(batch)
+                self._report()
+
+            # Keep what has been digested; drop what is still queued
+            self._commit(batch)
+        finally:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            for _path, copy_path in pending.values():
+                if copy_path is not None:
+                    copy_path.unlink(missing_ok=True)
+            if owns_executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _collect(
+        self,
+        future: Future,
+        path: str,
+        copy_path: Optional[Path],
+        batch: List[_Digested],
+    ):
+        """Record one digested file, or its failure."""
+        self.stats.processed += 1
+        try:
+            file_hash, file_size, media = future.result()
+        except Exception as error:
+            self.stats.failed += 1
+            logger.warning("Could not import %s: %s", path, error)
+            if copy_path is not None:
+                copy_path.unlink(missing_ok=True)
+            return
+        batch.append(_Digested(path, copy_path, file_hash, file_size, media))
+
+    def _commit(self, batch: List[_Digested]):
+        """Deduplicate a batch, move copies into place and insert the rows."""
+        if not batch:
+            return
+        known = self._existing_hashes({item.file_hash for item in batch})
+        rows = []
+        moved: List[Path] = []
+        try:
+            for item in batch:
+                if item.file_hash in known or item.file_hash in self._seen:
+                    self.stats.duplicates += 1
+                    if item.copy_path is not None:
+                        item.copy_path.unlink(missing_ok=True)
+                    continue
+                self._seen.add(item.file_hash)
+                rows.append(self._place(item))
+                if item.copy_path is not None:
+                    moved.append(Path(rows[-1]["file_path"]))
+            if rows:
+                self.database.writer.insert_products(rows).result()
+        except BaseException:
+            for path in moved:
+                path.unlink(missing_ok=True)
+            for item in batch:
+                if item.copy_path is not None:
+                    item.copy_path.unlink(missing_ok=True)
+            raise
+        finally:
+            batch.clear()
+
+        self.stats.imported += len(rows)
+        domain = self.signal_bus.domain
+        for row in rows:
+            if self.thumbnail_cache is not None and row["type"] == "image":
+                self.thumbnail_cache.generate_files(row["file_path"], row["file_hash"])
+            domain.product_created.emit(row["id"])
+
+    def _place(self, item: _Digested) -> Dict[str, Any]:
+        """Move a new file into the product store and build its row."""
+        product_id = new_id()
+        mime_type = item.media.mime_type if item.media else None
+        if item.copy_path is None:
+            file_path = item.source_path
+        else:
+            path = product_path(
+                self.products_root,
+                self.project_id,
+                product_id,
+                item.file_hash,
+                mime_type,
+            )
+            if path.parent not in self._created_dirs:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._created_dirs.add(path.parent)
+            os.replace(item.copy_path, path)
+            file_path = str(path)
+        return {
+            "id": product_id,
+            "project_id": self.project_id,
+            "type": media_kind(mime_type),
+            "file_path": file_path,
+            "file_size": item.file_size,
+            "file_hash": item.file_hash,
+            "width": item.media.width if item.media else None,
+            "height": item.media.height if item.media else None,
+            "mime_type": mime_type,
+            "metadata": {"imported_from": item.source_path},
+        }
+
+    def _existing_hashes(self, hashes: Set[str]) -> Set[str]:
+        """Return which hashes already belong to live products."""
+        found: Set[str] = set()
+        ordered = list(hashes)
+        with self.database.session_factory() as session:
+            for start in range(0, len(ordered), HASH_QUERY_CHUNK):
+                found.update(
+                    session.scalars(
+                        select(Product.file_hash).where(
+                            Product.file_hash.in_(
+                                ordered[start : start + HASH_QUERY_CHUNK]
+                            ),
+                            Product.deleted_at.is_(None),
+                        )
+                    )
+                )
+        return found
+
+    def _report(self, force: bool = False):
+        """Emit import_progress at most once per progress interval."""
+        now = time.monotonic()
+        if not force and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+        self.stats.elapsed = now - self._started
+        self.signal_bus.domain.import_progress.emit(self.stats.as_dict())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Find and clean up near-duplicate images in Art Factory's library.
+
+Groups image products whose perceptual hashes are within --distance bits
+and prints, for each group, the product that would be kept (liked, then
+best rated, then largest, then oldest) and the ones that would be deleted.
+Pass --backfill first to hash images from before hashing was added, and
+--apply to soft-delete the duplicates. Run it while the application is
+closed.
+"""
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Get project root directory
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "app"))
+
+from models import Database  # noqa: E402
+from services.similarity import (  # noqa: E402
+    DEFAULT_MAX_DISTANCE,
+    SimilarityIndex,
+    apply_cleanup,
+    plan_cleanup,
+)
+from utils.file_utils import database_path  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--path", default=None, help="database file (defaults to the app's)"
+    )
+    parser.add_argument(
+        "--distance",
+        type=int,
+        default=DEFAULT_MAX_DISTANCE,
+        help="largest Hamming distance between duplicates",
+    )
+    parser.add_argument("--project", default=None, help="only this project id")
+    parser.add_argument(
+        "--backfill", action="store_true", help="hash images that have no hash yet"
+    )
+    parser.add_argument(
+        "--apply", action="store_true", help="soft-delete the duplicates"
+    )
+    args = parser.parse_args()
+
+    database = Database(args.path or database_path())
+    database.start()
+    executor = ProcessPoolExecutor()
+    try:
+        index = SimilarityIndex(database, executor=executor)
+        if args.backfill:
+            queued = index.backfill()
+            index.flush()
+            print(f"Hashed {index.hashed} of {queued} images ({index.failed} failed)")
+        index.load()
+
+        groups = index.duplicate_groups(args.distance, project_id=args.project)
+        plan = plan_cleanup(database, groups)
+        for group in plan:
+            print(f"keep {group.keep}")
+            for product_id in group.remove:
+                print(f"  delete {product_id}")
+        removable = sum(len(group.remove) for group in plan)
+        print(f"{len(plan)} duplicate groups, {removable} products to delete")
+        if args.apply and removable:
+            deleted = apply_cleanup(database, plan)
+            print(f"Deleted {deleted} products")
+    finally:
+        executor.shutdown()
+        database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
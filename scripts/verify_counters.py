@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Verify or repair Art Factory's denormalized counters.
+
+Recomputes projects.product_count/order_count, orders.completed_count/
+failed_count, collections.product_count and tags.usage_count from the
+rows they count and lists every value that has drifted. Pass --repair to
+fix them in one transaction. Run it while the application is closed.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Get project root directory
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "app"))
+
+from models import Database  # noqa: E402
+from services.counters import repair_counters, verify_counters  # noqa: E402
+from utils.file_utils import database_path  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--path", default=None, help="database file (defaults to the app's)"
+    )
+    parser.add_argument(
+        "--repair", action="store_true", help="fix the counters that drifted"
+    )
+    args = parser.parse_args()
+
+    database = Database(args.path or database_path())
+    try:
+        with database.engine.begin() as connection:
+            mismatches = verify_counters(connection)
+            for mismatch in mismatches:
+                print(
+                    f"{mismatch.table}.{mismatch.column} {mismatch.row_id}:"
+                    f" stored {mismatch.stored}, actual {mismatch.actual}"
+                )
+            if args.repair and mismatches:
+                repaired = repair_counters(connection)
+                print(f"Repaired {repaired} counters")
+            elif not mismatches:
+                print("All counters are correct")
+    finally:
+        database.close()
+    return 1 if mismatches and not args.repair else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
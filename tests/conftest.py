@@ -51,4 +51,16 @@ def debug_mode(monkeypatch):
     """Enable debug mode for a test."""
     monkeypatch.setenv("AF_DEBUG", "1")
     yield
-    monkeypatch.delenv("AF_DEBUG", raising=False)
\ No newline at end of file
+    monkeypatch.delenv("AF_DEBUG", raising=False)
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Provide a started database in a temporary file."""
+    from models import Database
+
+    db = Database(tmp_path / "artfactory.db", write_tick_ms=5)
+    db.create_schema()
+    db.start()
+    yield db
+    db.close()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Benchmark threads and memory for many concurrent mock generations.
+
+Each mock generation submits a request, polls its status a few times and
+finishes, sleeping between polls like a provider round trip. Two modes are
+compared, each in a fresh subprocess so memory figures do not mix:
+
+- threads: one worker thread per in-flight generation
+- asyncio: every generation is a coroutine on the shared AsyncLoopThread
+
+Peak thread count and peak resident memory (ru_maxrss) are reported.
+
+Usage:
+    python tests/performance/bench_async_generations.py
+    python tests/performance/bench_async_generations.py --generations 2000
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from utils.async_loop import AsyncLoopThread  # noqa: E402
+
+# Provider round trips per mock generation and seconds per round trip
+DEFAULT_POLLS = 5
+DEFAULT_POLL_SECONDS = 0.05
+
+
+def run_threads(generations: int, polls: int, delay: float) -> int:
+    """Run every generation on its own thread; return the peak thread count."""
+    barrier = threading.Barrier(generations + 1)
+
+    def generate():
+        barrier.wait()
+        for _ in range(polls):
+            time.sleep(delay)
+
+    threads = [threading.Thread(target=generate) for _ in range(generations)]
+    for thread in threads:
+        thread.start()
+    peak = threading.active_count()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    return peak
+
+
+def run_asyncio(generations: int, polls: int, delay: float) -> int:
+    """Run every generation on the shared loop; return the peak thread count."""
+    loop = AsyncLoopThread()
+    loop.start()
+
+    async def generate():
+        for _ in range(polls):
+            await asyncio.sleep(delay)
+
+    async def run_all():
+        tasks = [asyncio.ensure_future(generate()) for _ in range(generations)]
+        await asyncio.sleep(0)
+        peak = threading.active_count()
+        await asyncio.gather(*tasks)
+        return peak
+
+    peak = loop.run(run_all())
+    loop.stop()
+    return peak
+
+
+def measure(mode: str, generations: int, polls: int, delay: float) -> dict:
+    """Run one mode in this process and return its measurements."""
+    baseline_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    runner = run_threads if mode == "threads" else run_asyncio
+    peak_threads = runner(generations, polls, delay)
+    elapsed = time.perf_counter() - start
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mode": mode,
+        "peak_threads": peak_threads,
+        "baseline_mib": baseline_kib / 1024,
+        "peak_mib": peak_kib / 1024,
+        "seconds": elapsed,
+    }
+
+
+def main() -> int:
+    """Run the concurrent generation benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--generations", type=int, default=500)
+    parser.add_argument("--polls", type=int, default=DEFAULT_POLLS)
+    parser.add_argument("--delay", type=float, default=DEFAULT_POLL_SECONDS)
+    parser.add_argument(
+        "--mode", choices=("threads", "asyncio"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.mode:
+        result = measure(args.mode, args.generations, args.polls, args.delay)
+        print(json.dumps(result))
+        return 0
+
+    print(f"{args.generations} concurrent mock generations")
+    print(f"{'mode':>8} {'threads':>8} {'rss MiB':>9} {'added MiB':>10} {'sec':>6}")
+    for mode in ("threads", "asyncio"):
+        output = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--mode",
+                mode,
+                "--generations",
+                str(args.generations),
+                "--polls",
+                str(args.polls),
+                "--delay",
+                str(args.delay),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output)
+        print(
+            f"{mode:>8} {result['peak_threads']:>8} {result['peak_mib']:>9.1f} "
+            f"{result['peak_mib'] - result['baseline_mib']:>10.1f} "
+            f"{result['seconds']:>6.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
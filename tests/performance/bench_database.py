@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Benchmark concurrent database writes at 1, 4 and 16 writer threads.
+
+Each writer thread updates the status of its share of order items, the way
+generation workers report progress. Two modes are compared:
+
+- direct: every thread uses its own session and commits each update
+- queue: every thread submits to the shared WriteQueue, which commits one
+  transaction per tick
+
+A bulk insert section compares ORM add_all(), multi-row insert().values()
+statements and the executemany() path used by WriteQueue.
+
+Usage:
+    python tests/performance/bench_database.py
+    python tests/performance/bench_database.py --updates 20000 --threads 1 4 16
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from sqlalchemy import insert, update  # noqa: E402
+
+from models import Database, Order, OrderItem  # noqa: E402
+
+DEFAULT_THREAD_COUNTS = (1, 4, 16)
+
+
+def make_database(directory: Path, name: str, items: int) -> Database:
+    """Create a database holding one order with the given number of items."""
+    database = Database(directory / f"{name}.db")
+    database.create_schema()
+    database.start()
+    database.writer.insert(
+        Order.__table__,
+        [
+            {
+                "id": "order_1",
+                "provider": "bench",
+                "model": "bench",
+                "base_parameter_set": {},
+            }
+        ],
+    )
+    database.writer.insert_order_items(
+        [
+            {"id": f"item_{n}", "order_id": "order_1", "sequence_number": n}
+            for n in range(items)
+        ]
+    )
+    database.writer.flush()
+    return database
+
+
+def run_threads(thread_count: int, target) -> float:
+    """Run target(index) on thread_count threads and return the elapsed time."""
+    threads = [
+        threading.Thread(target=target, args=(index,)) for index in range(thread_count)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def bench_direct(database: Database, thread_count: int, updates: int) -> float:
+    """Rows/sec with one commit per update from each thread."""
+    table = OrderItem.__table__
+
+    def writer(index):
+        session = database.session()
+        for n in range(index, updates, thread_count):
+            session.execute(
+                update(table).where(table.c.id == f"item_{n}").values(status="done")
+            )
+            session.commit()
+        database.remove_session()
+
+    return updates / run_threads(thread_count, writer)
+
+
+def bench_queue(database: Database, thread_count: int, updates: int) -> float:
+    """Rows/sec through the shared write queue, including the final flush."""
+
+    def writer(index):
+        for n in range(index, updates, thread_count):
+            database.writer.update_item_status(f"item_{n}", "done")
+
+    start = time.perf_counter()
+    run_threads(thread_count, writer)
+    database.writer.flush()
+    return updates / (time.perf_counter() - start)
+
+
+def bench_bulk_insert(directory: Path, rows: int) -> dict:
+    """Rows/sec for each bulk insert strategy."""
+    results = {}
+
+    database = make_database(directory, "bulk_orm", 0)
+    session = database.session()
+    start = time.perf_counter()
+    session.add_all(
+        OrderItem(order_id="order_1", sequence_number=n) for n in range(rows)
+    )
+    session.commit()
+    results["orm_add_all"] = rows / (time.perf_counter() - start)
+    database.close()
+
+    database = make_database(directory, "bulk_values", 0)
+    table = OrderItem.__table__
+    values = [{"order_id": "order_1", "sequence_number": n} for n in range(rows)]
+    start = time.perf_counter()
+    with database.engine.begin() as connection:
+        for first in range(0, rows, 1000):
+            connection.execute(insert(table).values(values[first : first + 1000]))
+    results["insert_values"] = rows / (time.perf_counter() - start)
+    database.close()
+
+    database = make_database(directory, "bulk_queue", 0)
+    start = time.perf_counter()
+    database.writer.insert_order_items(
+        [{"order_id": "order_1", "sequence_number": n} for n in range(rows)]
+    )
+    database.writer.flush()
+    results["write_queue"] = rows / (time.perf_counter() - start)
+    database.close()
+    return results
+
+
+def main() -> int:
+    """Run the database write benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=5000, help="status updates")
+    parser.add_argument(
+        "--threads", type=int, nargs="+", default=list(DEFAULT_THREAD_COUNTS)
+    )
+    parser.add_argument("--rows", type=int, default=50_000, help="bulk insert rows")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        print(f"{args.updates} status updates per run (rows/sec, higher is better)")
+        print(f"{'threads':>8} {'direct':>12} {'queue':>12} {'speedup':>9}")
+        for thread_count in args.threads:
+            results = {}
+            for mode, bench in (("direct", bench_direct), ("queue", bench_queue)):
+                database = make_database(
+                    directory, f"{mode}_{thread_count}", args.updates
+                )
+                results[mode] = bench(database, thread_count, args.updates)
+                database.close()
+            print(
+                f"{thread_count:>8} {results['direct']:>12.0f} "
+                f"{results['queue']:>12.0f} "
+                f"{results['queue'] / results['direct']:>8.1f}x"
+            )
+
+        bulk = bench_bulk_insert(directory, args.rows)
+        print(f"\n{args.rows} order item inserts (rows/sec)")
+        for name, rate in bulk.items():
+            print(f"{name:>14} {rate:>12.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Benchmark the execution journal: fsync batching and latency per item.
+
+Worker threads each journal items the way the generation scheduler does:
+a durable "begin", a durable "submitted" and a "complete" that rides along
+with a later sync. Reported per thread count are the items per second,
+the median and 99th percentile time an item waits for its two durable
+records, and the records per fsync. The baseline fsyncs every record on
+its own, as a journal without group commit would.
+
+Usage:
+    python tests/performance/bench_execution_journal.py
+    python tests/performance/bench_execution_journal.py --items 5000 --dir /data
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from services.execution_journal import ExecutionJournal  # noqa: E402
+
+THREAD_COUNTS = (1, 8, 32, 128)
+
+
+def run_journal(path: Path, items: int, threads: int):
+    """Journal items from several threads; return (seconds, waits, journal)."""
+    journal = ExecutionJournal(path)
+    journal.open()
+    waits = []
+    lock = threading.Lock()
+
+    def worker(offset: int):
+        own = []
+        for n in range(offset, items, threads):
+            item_id = f"item_{n}"
+            start = time.perf_counter()
+            journal.begin(item_id, "fake").result()
+            journal.submitted(item_id, f"req_{n}").result()
+            own.append(time.perf_counter() - start)
+            journal.finish(item_id, "complete")
+        with lock:
+            waits.extend(own)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    journal.close()
+    return elapsed, waits, journal
+
+
+def run_baseline(path: Path, items: int) -> float:
+    """Write and fsync each record on its own; return seconds."""
+    start = time.perf_counter()
+    with open(path, "ab") as handle:
+        for n in range(items):
+            for event in ("begin", "submitted", "complete"):
+                handle.write(f'{{"item":"item_{n}","event":"{event}"}}\n'.encode())
+                handle.flush()
+                os.fsync(handle.fileno())
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    """Run the execution journal benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--dir", default=None, help="directory for the journal")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        baseline = run_baseline(Path(tmp) / "baseline.log", args.items)
+        print(
+            f"fsync per record: {args.items / baseline:,.0f} items/s,"
+            f" {baseline / args.items * 1000:.2f} ms per item"
+        )
+        print()
+        print(
+            f"{'threads':>7} {'items/s':>9} {'wait p50':>9} {'wait p99':>9}"
+            f" {'records/fsync':>14}"
+        )
+        for threads in THREAD_COUNTS:
+            path = Path(tmp) / f"journal_{threads}.log"
+            elapsed, waits, journal = run_journal(path, args.items, threads)
+            waits.sort()
+            p50 = statistics.median(waits) * 1000
+            p99 = waits[int(len(waits) * 0.99) - 1] * 1000
+            batching = journal.record_count / max(1, journal.sync_count)
+            print(
+                f"{threads:>7} {args.items / elapsed:>9,.0f} {p50:>7.2f}ms"
+                f" {p99:>7.2f}ms {batching:>14.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
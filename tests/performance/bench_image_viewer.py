@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Benchmark time to first paint and memory when viewing 100 MP images.
+
+A noisy JPEG and PNG are generated, then each is opened in a fresh process
+twice: once with ImageViewer (preview first, tiles built in worker
+processes) and once the naive way, decoding straight into a QPixmap on the
+GUI thread. Reported per run are the time until a screen-sharp image can
+be painted, the time until full-resolution tiles are ready, the longest
+the GUI thread went without processing events, and the GUI process's peak
+RSS with the interpreter and Qt included. Worker processes are not in the
+RSS; they exit once the pyramid is written.
+
+Usage:
+    python tests/performance/bench_image_viewer.py
+    python tests/performance/bench_image_viewer.py --size 12000 9000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from PIL import Image  # noqa: E402
+
+
+def make_image(path: Path, size) -> int:
+    """Write a noisy image (so it does not compress to nothing); return bytes."""
+    tile = Image.effect_noise((1000, 1000), 48).convert("RGB")
+    image = Image.new("RGB", size)
+    for x in range(0, size[0], tile.width):
+        for y in range(0, size[1], tile.height):
+            image.paste(tile, (x, y))
+    image.save(path, quality=90, compress_level=1)
+    return path.stat().st_size
+
+
+def peak_rss_mb() -> float:
+    """Peak resident size of this process in MiB.
+
+    VmHWM is used where available: ru_maxrss survives exec, so it would
+    report the benchmark parent's peak from generating the image.
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    # ru_maxrss is bytes on macOS and KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def run_child(mode: str, path: str) -> dict:
+    """Open one image in this process and measure it."""
+    from PyQt6.QtGui import QImageReader, QPixmap
+    from PyQt6.QtWidgets import QApplication
+
+    from views.widgets.image_viewer import ImageViewer
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    if mode == "naive":
+        # Qt refuses images over 256 MB by default
+        QImageReader.setAllocationLimit(0)
+        start = time.perf_counter()
+        pixmap = QPixmap(path)
+        elapsed = time.perf_counter() - start
+        assert not pixmap.isNull()
+        return {
+            "first": elapsed,
+            "ready": elapsed,
+            "stall": elapsed,
+            "rss": peak_rss_mb(),
+        }
+
+    viewer = ImageViewer()
+    viewer.resize(1600, 1000)
+    viewer.show()
+    times = {}
+    viewer.preview_ready.connect(lambda: times.setdefault("first", clock()))
+    viewer.image_ready.connect(lambda: times.setdefault("ready", clock()))
+    viewer.load_failed.connect(lambda error: times.setdefault("error", error))
+    start = time.perf_counter()
+
+    def clock() -> float:
+        return time.perf_counter() - start
+
+    viewer.open_image(path)
+    stall = clock()
+    while "ready" not in times and "error" not in times:
+        before = time.perf_counter()
+        app.processEvents()
+        stall = max(stall, time.perf_counter() - before)
+        time.sleep(0.005)
+    times["stall"] = stall
+    # Paint at 100%, reading the visible full-resolution tiles
+    viewer.set_zoom(1.0)
+    for _frame in range(50):
+        viewer.repaint()
+        app.processEvents()
+        time.sleep(0.005)
+    times["rss"] = peak_rss_mb()
+    viewer.shutdown()
+    return times
+
+
+def measure(mode: str, path: Path) -> dict:
+    """Run one measurement in a fresh interpreter."""
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", ""))
+    if not env["QT_QPA_PLATFORM"]:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", mode, str(path)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main() -> int:
+    """Run the image viewer benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, nargs=2, default=[10000, 10000])
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(*args.child)))
+        return 0
+
+    size = tuple(args.size)
+    print(f"{size[0]}x{size[1]} ({size[0] * size[1] / 1e6:.0f} MP)")
+    print(
+        f"{'file':>6} {'mode':>7} {'first paint':>12} {'tiles ready':>12} "
+        f"{'max stall':>10} {'GUI RSS MiB':>12}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix in ("jpg", "png"):
+            path = Path(tmp) / f"large.{suffix}"
+            make_image(path, size)
+            for mode in ("viewer", "naive"):
+                result = measure(mode, path)
+                if "error" in result:
+                    print(f"{suffix:>6} {mode:>7} failed: {result['error']}")
+                    continue
+                print(
+                    f"{suffix:>6} {mode:>7} {result['first']:>11.2f}s "
+                    f"{result['ready']:>11.2f}s {result['stall']:>9.2f}s "
+                    f"{result['rss']:>12.0f}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
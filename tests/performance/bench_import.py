@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark bulk folder import throughput in files per minute.
+
+A folder of distinct JPEGs is generated, then imported twice into fresh
+databases: once copying the files into the product store and once
+referencing them in place. Hashing and sniffing run in the default spawn
+process pool, as in the application. The target is 10,000 files/minute.
+
+Usage:
+    python tests/performance/bench_import.py
+    python tests/performance/bench_import.py --files 10000 --size 1024 768
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from PIL import Image  # noqa: E402
+from PyQt6.QtCore import QCoreApplication  # noqa: E402
+
+from models import Database  # noqa: E402
+from workers.import_worker import ImportWorker  # noqa: E402
+
+TARGET_FILES_PER_MINUTE = 10_000
+
+
+def make_files(directory: Path, count: int, size) -> int:
+    """Write count distinct JPEGs in folders of 500; return the total bytes."""
+    total = 0
+    base = Image.effect_noise(size, 64).convert("RGB")
+    for n in range(count):
+        folder = directory / f"folder_{n // 500:03d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"photo_{n:06d}.jpg"
+        image = base.copy()
+        image.putpixel((n % size[0], n // size[0] % size[1]), (n % 256, 0, 0))
+        image.save(path, "JPEG", quality=90)
+        total += path.stat().st_size
+    return total
+
+
+def bench(source: Path, store: Path, copy_files: bool, workers) -> dict:
+    """Import source into a fresh database and return the statistics."""
+    database = Database(store / "artfactory.db")
+    database.create_schema()
+    database.start()
+    worker = ImportWorker(
+        database,
+        [source],
+        copy_files=copy_files,
+        max_workers=workers,
+        products_root=store / "products",
+        temp_root=store / "temp",
+    )
+    start = time.perf_counter()
+    worker.run()
+    elapsed = time.perf_counter() - start
+    database.close()
+    stats = worker.stats.as_dict()
+    stats["wall"] = elapsed
+    return stats
+
+
+def main() -> int:
+    """Run the import benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--size", type=int, nargs=2, default=[1024, 768])
+    parser.add_argument("--workers", type=int, default=None, help="pool size")
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        source = directory / "source"
+        total_bytes = make_files(source, args.files, tuple(args.size))
+        print(
+            f"{args.files} JPEGs of {args.size[0]}x{args.size[1]}, "
+            f"{total_bytes / 2**20:.0f} MiB total"
+        )
+        print(f"{'mode':>10} {'seconds':>8} {'files/min':>10} {'target':>7}")
+        for copy_files in (True, False):
+            mode = "copy" if copy_files else "reference"
+            stats = bench(source, directory / mode, copy_files, args.workers)
+            rate = stats["total"] / stats["wall"] * 60
+            verdict = "ok" if rate >= TARGET_FILES_PER_MINUTE else "MISS"
+            print(f"{mode:>10} {stats['wall']:>8.2f} {rate:>10.0f} {verdict:>7}")
+            app.processEvents()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Benchmark gallery prefetch hit rates for different window sizes.
+
+A folder of JPEGs is generated, then for each window size a fresh
+ThumbnailCache (with its process pool) and NavigationPrefetcher follow a
+simulated user: arrowing forward through the products at a key-repeat
+interval, then back. This runs with thumbnails still to be generated
+("cold"), and again with them already on disk ("warm", the usual case when
+browsing) so only the memory tier is empty. Each step selects one product
+and waits for its thumbnails the way the gallery and viewer would. Reported are the
+prefetcher's hit rate, the mean and worst wait per step and the requests
+it withdrew as stale. Window 0 is the baseline without prefetching.
+
+Usage:
+    python tests/performance/bench_prefetch.py
+    python tests/performance/bench_prefetch.py --products 200 --interval 40
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from PIL import Image  # noqa: E402
+from PyQt6.QtGui import QGuiApplication  # noqa: E402
+
+from services.prefetch import NavigationPrefetcher  # noqa: E402
+from signals import signal_bus  # noqa: E402
+from utils.thumbnail_cache import ThumbnailCache  # noqa: E402
+from views.widgets.gallery_widget import ProductListModel  # noqa: E402
+
+
+def make_sources(directory: Path, count: int, size) -> dict:
+    """Write count distinct JPEGs; return product id -> (path, hash)."""
+    base = Image.effect_noise(size, 64).convert("RGB")
+    sources = {}
+    for n in range(count):
+        path = directory / f"photo_{n:05d}.jpg"
+        image = base.copy()
+        image.putpixel((n % size[0], 0), (n % 256, 0, 0))
+        image.save(path, "JPEG", quality=90)
+        sources[f"product_{n}"] = (str(path), f"{n:064x}")
+    return sources
+
+
+def bench(app, sources: dict, cache_dir: Path, window: int, interval: float):
+    """Arrow through every product and back; return the statistics."""
+    product_ids = list(sources)
+
+    def fetch_page(filters, cursor, limit):
+        offset = cursor or 0
+        page = product_ids[offset : offset + limit]
+        return page, offset + limit if offset + limit < len(product_ids) else None
+
+    model = ProductListModel(fetch_page)
+    model.fetchMore()
+    cache = ThumbnailCache(cache_dir, sources.get)
+    prefetcher = NavigationPrefetcher(model, cache, window=window)
+    sizes = prefetcher.size_names
+
+    waits = []
+    path = list(range(len(product_ids))) + list(range(len(product_ids) - 2, -1, -1))
+    for row in path:
+        product_id = product_ids[row]
+        signal_bus.ui.selection_changed.emit([product_id])
+        start = time.perf_counter()
+        for size_name in sizes:
+            cache.request(product_id, size_name)
+        while not all((product_id, size) in cache.memory for size in sizes):
+            app.processEvents()
+            time.sleep(0.001)
+        waits.append(time.perf_counter() - start)
+        # The user holds the arrow key
+        deadline = start + interval
+        while time.perf_counter() < deadline:
+            app.processEvents()
+            time.sleep(0.001)
+
+    stats = prefetcher.stats()
+    stats["mean_wait"] = statistics.mean(waits)
+    stats["max_wait"] = max(waits)
+    cache.shutdown(wait=True)
+    signal_bus.ui.selection_changed.disconnect(prefetcher._on_selection_changed)
+    return stats
+
+
+def main() -> int:
+    """Run the prefetch benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--size", type=int, nargs=2, default=[3000, 2000])
+    parser.add_argument("--interval", type=float, default=60, help="ms per step")
+    parser.add_argument("--windows", type=int, nargs="+", default=[0, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        sources = make_sources(directory, args.products, tuple(args.size))
+        print(
+            f"{args.products} JPEGs of {args.size[0]}x{args.size[1]}, "
+            f"one step every {args.interval:.0f} ms, forward then back"
+        )
+        print(
+            f"{'disk':>5} {'window':>6} {'hit rate':>9} {'mean wait':>10} "
+            f"{'max wait':>9} {'cancelled':>10}"
+        )
+        for tier in ("cold", "warm"):
+            if tier == "warm":
+                # One pass without prefetching fills the shared disk cache
+                bench(app, sources, directory / "warm", 0, 0)
+            for window in args.windows:
+                cache_dir = directory / (f"cold_{window}" if tier == "cold" else "warm")
+                stats = bench(app, sources, cache_dir, window, args.interval / 1000)
+                print(
+                    f"{tier:>5} {window:>6} {stats['hit_rate']:>8.0%} "
+                    f"{stats['mean_wait'] * 1000:>8.1f}ms "
+                    f"{stats['max_wait'] * 1000:>7.1f}ms {stats['cancelled']:>10}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Benchmark the in-memory product index: memory per product and filter latency.
+
+Synthetic products are loaded into a ProductIndex: 200 projects made one
+after another, three types, 10% liked and two tags per product (one of 40
+tags spread over the whole library, one of many short-lived ones). Reported
+are the load time, the index's own estimate of its size and the growth
+of the process's resident memory, both per product (target under 64
+bytes), and the median time of count() and of the first gallery page for common
+filters, with the filter cache cleared before every call.
+
+With --trace the heap growth is measured with tracemalloc instead of the
+resident size; that is exact but makes the load several times slower.
+With --compare the same products are also written to a temporary SQLite
+database, and the same counts and first pages are timed there through
+KeysetPager.
+
+Usage:
+    python tests/performance/bench_product_index.py
+    python tests/performance/bench_product_index.py --products 200000 --compare
+"""
+
+import argparse
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from models import (  # noqa: E402
+    Database,
+    KeysetPager,
+    Product,
+    Project,
+    Tag,
+    TagAssociation,
+)
+from models.paging import compile_filters  # noqa: E402
+from models.product_index import ProductIndex  # noqa: E402
+
+START = datetime(2023, 1, 1)
+
+FILTERS = [
+    ("all", {}),
+    ("liked", {"liked": True}),
+    ("video", {"type": "video"}),
+    ("project", {"project": "project_100"}),
+    ("project+liked", {"project": "project_100", "liked": True}),
+    ("tag (spread)", {"tag": "tag_7"}),
+    ("tag+type", {"tag": "tag_7", "type": "image"}),
+    ("short tag", {"tag": "batch_250"}),
+]
+
+
+def make_products(count: int):
+    """Return synthetic product rows, oldest first, and their tag pairs."""
+    per_project = max(1, count // 200)
+    rows = []
+    tags = []
+    for n in range(count):
+        product_id = str(uuid.uuid4())
+        rows.append(
+            (
+                product_id,
+                f"project_{n // per_project}",
+                ("image", "image", "video", "audio")[n % 4],
+                n % 10 == 0,
+                n % 6 or None,
+                1024 + n % 512,
+                1024,
+                START + timedelta(seconds=n * 20),
+            )
+        )
+        tags.append((f"tag_{n * 7919 % 40}", product_id))
+        tags.append((f"batch_{n // 1000}", product_id))
+    return rows, tags
+
+
+def median_us(call, repeat: int) -> float:
+    """Return the median duration of call() in microseconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1e6
+
+
+def rss_bytes() -> int:
+    """Return the resident size of this process (Linux)."""
+    with open("/proc/self/statm") as handle:
+        return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def bench_index(
+    database: Database, rows, tags, repeat: int, trace: bool
+) -> ProductIndex:
+    """Load the index, print its size and time its queries."""
+    count = len(rows)
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+    else:
+        before = rss_bytes()
+    start = time.perf_counter()
+    index = ProductIndex(database)
+    index.load_rows(rows)
+    index.load_tags(tags)
+    index.ready = True
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    if trace:
+        grown = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+    else:
+        grown = rss_bytes() - before
+
+    measure = "tracemalloc" if trace else "RSS growth"
+    print(f"{count:,} products, {len(tags):,} tag assignments")
+    print(f"load:        {elapsed:.2f} s ({count / elapsed:,.0f} products/s)")
+    print(f"estimate:    {index.memory_bytes() / count:.1f} bytes per product")
+    print(f"{measure + ':':<12} {grown / count:.1f} bytes per product (target < 64)")
+    print()
+    print(f"{'filter':<14} {'matches':>9} {'count':>10} {'first page':>11}")
+
+    def cold(call):
+        def run():
+            index._mask_cache = (None, 0)
+            return call()
+
+        return run
+
+    for name, filters in FILTERS:
+        matches = index.count(filters)
+        count_us = median_us(cold(lambda: index.count(filters)), repeat)
+        page_us = median_us(cold(lambda: index.fetch_ids(filters, None, 200)), repeat)
+        print(f"{name:<14} {matches:>9,} {count_us:>8.0f}us {page_us:>9.0f}us")
+    return index
+
+
+def bench_sqlite(database: Database, rows, tags, repeat: int):
+    """Write the products to SQLite and time the same queries there."""
+    columns = ["id", "project_id", "type", "liked", "rating", "width", "height"]
+    with database.engine.begin() as connection:
+        connection.execute(
+            insert(Project.__table__),
+            [{"id": name, "name": name} for name in sorted({row[1] for row in rows})],
+        )
+        connection.execute(
+            insert(Tag.__table__),
+            [{"id": name, "name": name} for name in sorted({tag for tag, _ in tags})],
+        )
+        for start in range(0, len(rows), 50_000):
+            connection.execute(
+                insert(Product.__table__),
+                [
+                    {
+                        **dict(zip(columns, row[:7])),
+                        "created_at": row[7],
+                        "file_path": "/dev/null",
+                    }
+                    for row in rows[start : start + 50_000]
+                ],
+            )
+        connection.execute(
+            insert(TagAssociation.__table__),
+            [
+                {"tag_id": tag_id, "entity_type": "product", "entity_id": product_id}
+                for tag_id, product_id in tags
+            ],
+        )
+
+    pager = KeysetPager(database, Product)
+    session = database.session()
+    print()
+    print(f"{'sqlite':<14} {'matches':>9} {'count':>10} {'first page':>11}")
+    for name, filters in FILTERS:
+        statement = select(func.count()).where(*compile_filters(Product, filters))
+        matches = session.scalar(statement)
+        count_us = median_us(lambda: session.scalar(statement), repeat)
+        page_us = median_us(lambda: pager.fetch_ids(filters, None, 200), repeat)
+        print(f"{name:<14} {matches:>9,} {count_us:>8.0f}us {page_us:>9.0f}us")
+
+
+def main() -> int:
+    """Run the product index benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--trace", action="store_true", help="measure the heap with tracemalloc"
+    )
+    parser.add_argument(
+        "--compare", action="store_true", help="also time SQLite queries"
+    )
+    args = parser.parse_args()
+
+    rows, tags = make_products(args.products)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(Path(tmp) / "bench.db")
+        database.create_schema()
+        bench_index(database, rows, tags, args.repeat, args.trace)
+        if args.compare:
+            bench_sqlite(database, rows, tags, max(5, args.repeat // 10))
+        database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
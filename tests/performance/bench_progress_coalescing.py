@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Benchmark GUI-thread load from generation progress updates.
+
+A worker thread reports progress for many order items at a fixed rate while
+the GUI thread runs a slot with a simulated repaint cost. The benchmark is run
+once with raw queued emits and once through the ProgressCoalescer, reporting
+how many slot invocations reached the GUI thread and the delivery latency.
+
+Usage:
+    python tests/performance/bench_progress_coalescing.py
+    python tests/performance/bench_progress_coalescing.py --window 33
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from PyQt6.QtCore import QCoreApplication, QTimer  # noqa: E402
+
+from signals import DomainSignals, ProgressCoalescer  # noqa: E402
+
+
+def busy_wait(seconds: float):
+    """Spin for the given duration to simulate slot work."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def run_producer(post, rate: int, duration: float, items: int, stamps, lock):
+    """Post progress updates at a fixed rate from the current thread."""
+    total = int(rate * duration)
+    start = time.perf_counter()
+    for i in range(total):
+        target = start + i / rate
+        while time.perf_counter() < target:
+            time.sleep(0)
+        item_id = f"item_{i % items}"
+        percent = (i // items) % 101
+        with lock:
+            stamps[item_id].append(time.perf_counter())
+        post(item_id, percent)
+
+
+def run_mode(app, coalesced: bool, args) -> dict:
+    """Run one benchmark pass and return its measurements."""
+    signals = DomainSignals()
+    stamps = defaultdict(deque)
+    lock = threading.Lock()
+    latencies = []
+    slot_calls = 0
+
+    def on_progress(item_id, percent):
+        nonlocal slot_calls
+        slot_calls += 1
+        now = time.perf_counter()
+        with lock:
+            queue = stamps[item_id]
+            if coalesced:
+                # Only the latest value is delivered; the rest were collapsed
+                latencies.append(now - queue[-1])
+                queue.clear()
+            else:
+                latencies.append(now - queue.popleft())
+        busy_wait(args.slot_cost_us / 1_000_000)
+
+    signals.generation_progress.connect(on_progress)
+
+    if coalesced:
+        coalescer = ProgressCoalescer(signals.generation_progress, args.window)
+        post = coalescer.post
+    else:
+        coalescer = None
+        post = signals.generation_progress.emit
+
+    producer = threading.Thread(
+        target=run_producer,
+        args=(post, args.rate, args.duration, args.items, stamps, lock),
+    )
+    start = time.perf_counter()
+    producer.start()
+
+    # Pump the GUI event loop until the producer finishes and the queue drains
+    poll = QTimer()
+    poll.timeout.connect(
+        lambda: (
+            app.quit()
+            if not producer.is_alive()
+            and not any(stamps.values())
+            and (coalescer is None or coalescer.pending_count() == 0)
+            else None
+        )
+    )
+    poll.start(5)
+    app.exec()
+    poll.stop()
+    elapsed = time.perf_counter() - start
+    producer.join()
+
+    posted = int(args.rate * args.duration)
+    latencies.sort()
+    return {
+        "mode": "coalesced" if coalesced else "queued",
+        "posted": posted,
+        "gui_slot_calls": slot_calls,
+        "drain_seconds": round(elapsed, 3),
+        "latency_ms_median": round(statistics.median(latencies) * 1000, 3),
+        "latency_ms_p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 3),
+        "latency_ms_max": round(latencies[-1] * 1000, 3),
+    }
+
+
+def main() -> int:
+    """Run the progress coalescing benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=10_000, help="updates/sec")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds")
+    parser.add_argument("--items", type=int, default=200, help="order items")
+    parser.add_argument("--window", type=int, default=16, help="frame window ms")
+    parser.add_argument(
+        "--slot-cost-us", type=float, default=150.0, help="simulated repaint cost"
+    )
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+
+    print(
+        f"{args.rate} updates/sec for {args.duration}s across {args.items} items, "
+        f"slot cost {args.slot_cost_us}us, window {args.window}ms"
+    )
+    for coalesced in (False, True):
+        result = run_mode(app, coalesced, args)
+        print(
+            f"{result['mode']:>10}: {result['gui_slot_calls']:>7} GUI slot calls "
+            f"for {result['posted']} updates, drained in "
+            f"{result['drain_seconds']}s, latency median "
+            f"{result['latency_ms_median']}ms / p95 {result['latency_ms_p95']}ms "
+            f"/ max {result['latency_ms_max']}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Benchmark result cache hits: time per hit and disk used, link vs copy.
+
+A source item with one image of --size MB is stored in the cache, then
+--hits items with the same request are served from it. Each hit writes a
+product row, links the file and completes the item. Reported are the
+milliseconds per hit and the extra disk space the hits took. The baseline
+run makes link_file() copy, as a cache without hard links or reflinks
+would.
+
+Usage:
+    python tests/performance/bench_result_cache.py
+    python tests/performance/bench_result_cache.py --hits 1000 --size 8
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from PyQt6.QtCore import QCoreApplication  # noqa: E402
+
+import services.result_cache as result_cache  # noqa: E402
+from models import Database, Order, OrderItem, Project  # noqa: E402
+from services.generation_scheduler import ScheduledItem  # noqa: E402
+from services.result_cache import CacheSettings, ResultCache  # noqa: E402
+
+PARAMETERS = {"prompt": "A red car", "steps": 20, "seed": 42}
+
+
+def copy_file(source, destination) -> str:
+    """link_file() stand-in that always copies."""
+    shutil.copyfile(source, destination)
+    return "copy"
+
+
+def disk_usage(root: Path) -> int:
+    """Return the bytes allocated to distinct files under root."""
+    seen = set()
+    total = 0
+    for path in root.rglob("*"):
+        stat = path.stat()
+        if path.is_file() and (stat.st_dev, stat.st_ino) not in seen:
+            seen.add((stat.st_dev, stat.st_ino))
+            total += stat.st_blocks * 512
+    return total
+
+
+def run(directory: Path, hits: int, size: int, link: bool):
+    """Serve hits from one cached item; return (s per hit, bytes used, stats)."""
+    database = Database(directory / "bench.db", write_tick_ms=5)
+    database.create_schema()
+    database.start()
+    products = directory / "products"
+    source = products / "source.png"
+    source.parent.mkdir(parents=True)
+    source.write_bytes(os.urandom(size))
+    writer = database.writer
+    writer.insert(Project.__table__, [{"id": "p1", "name": "Bench"}])
+    writer.insert(
+        Order.__table__,
+        [
+            {
+                "id": "o1",
+                "project_id": "p1",
+                "provider": "fake",
+                "model": "flux",
+                "base_parameter_set": {},
+            }
+        ],
+    )
+    writer.insert(
+        OrderItem.__table__,
+        [
+            {"id": f"item_{n}", "order_id": "o1", "sequence_number": n}
+            for n in range(hits + 1)
+        ],
+    )
+    writer.insert_products(
+        [
+            {
+                "order_item_id": "item_0",
+                "project_id": "p1",
+                "type": "image",
+                "file_path": str(source),
+                "file_size": size,
+                "file_hash": "a" * 64,
+                "mime_type": "image/png",
+            }
+        ]
+    )
+    cache = ResultCache(
+        database, {"fake": CacheSettings(enabled=True)}, products_root=products
+    )
+    cache.store(ScheduledItem("item_0", "fake", "p1"), "flux", PARAMETERS, 10.0)
+    writer.flush()
+    before = disk_usage(products)
+
+    patch = mock.patch.object(result_cache, "link_file", copy_file)
+    if not link:
+        patch.start()
+    start = time.perf_counter()
+    for n in range(1, hits + 1):
+        cache.serve(ScheduledItem(f"item_{n}", "fake", "p1"), "flux", PARAMETERS)
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    if not link:
+        patch.stop()
+    used = disk_usage(products) - before
+    database.close()
+    return elapsed / hits, used, cache.stats()
+
+
+def main() -> int:
+    """Run the result cache benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hits", type=int, default=200)
+    parser.add_argument("--size", type=int, default=4, help="image size in MB")
+    parser.add_argument("--dir", default=None, help="directory for the files")
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])  # noqa: F841
+    size = args.size * 1024 * 1024
+    print(f"{args.hits} hits on one {args.size} MB image")
+    print(f"{'files':>8} {'ms/hit':>8} {'disk used':>10}")
+    for name, link in (("copied", False), ("linked", True)):
+        with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+            per_hit, used, stats = run(Path(tmp), args.hits, size, link)
+        print(f"{name:>8} {per_hit * 1000:>8.2f} {used / 1024 / 1024:>8.1f}MB")
+    print(
+        f"saved {stats['saved_calls']} provider calls,"
+        f" {stats['saved_seconds']:.0f}s of generation"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Benchmark full-text product search latency at 500k order items.
+
+One order item and one product are created per row. Prompts are drawn
+from a fixed vocabulary, so common words match a large share of the
+products and rare words only a few. The search index is built by the
+insert triggers, as in the application. The database is reused across
+runs when --path is given.
+
+Each query runs --repeat times for the first page (100 ids). The p50
+and p95 latencies are reported against the 20 ms target.
+
+Usage:
+    python tests/performance/bench_search.py
+    python tests/performance/bench_search.py --items 100000 --path /tmp/search.db
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from PyQt6.QtCore import QCoreApplication  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from models import Database, Order, Product, Project  # noqa: E402
+from services.search import ProductSearch  # noqa: E402
+
+TARGET_MS = 20.0
+
+SUBJECTS = ["cat", "astronaut", "lighthouse", "dragon", "robot", "forest", "city"]
+STYLES = ["oil painting", "watercolour", "photograph", "pixel art", "sketch"]
+MOODS = ["at night", "in the rain", "at sunset", "in space", "underwater"]
+RARE = [f"rareword{n}" for n in range(1000)]
+
+QUERIES = [
+    "cat",
+    '"oil painting"',
+    "astro*",
+    "dragon underwater",
+    "rareword42",
+    "notes:favourite",
+    "lighthouse -rain",
+]
+
+
+def prompt(rng: random.Random) -> str:
+    """Build a random prompt; one in 50 carries a rare word."""
+    words = [rng.choice(SUBJECTS), rng.choice(STYLES), rng.choice(MOODS)]
+    if rng.random() < 0.02:
+        words.append(rng.choice(RARE))
+    return " ".join(words)
+
+
+def populate(database: Database, items: int, chunk: int = 20_000):
+    """Insert items order items with one product each."""
+    rng = random.Random(1)
+    writer = database.writer
+    writer.insert(Project.__table__, [{"id": "project", "name": "Bench"}])
+    writer.insert(
+        Order.__table__,
+        [
+            {
+                "id": "order",
+                "project_id": "project",
+                "provider": "bench",
+                "model": "bench",
+                "base_parameter_set": {},
+            }
+        ],
+    )
+    for first in range(0, items, chunk):
+        numbers = range(first, min(first + chunk, items))
+        writer.insert_order_items(
+            [
+                {
+                    "id": f"item_{n}",
+                    "order_id": "order",
+                    "sequence_number": n,
+                    "generation_parameter_set": {"prompt": prompt(rng)},
+                }
+                for n in numbers
+            ]
+        )
+        writer.insert_products(
+            [
+                {
+                    "id": f"product_{n}",
+                    "order_item_id": f"item_{n}",
+                    "project_id": "project",
+                    "type": "image",
+                    "file_path": f"/bench/{n}.png",
+                    "notes": "favourite" if n % 97 == 0 else None,
+                }
+                for n in numbers
+            ]
+        )
+        writer.flush()
+        print(f"  {numbers.stop} rows", end="\r", flush=True)
+    print()
+
+
+def main() -> int:
+    """Run the search latency benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--path", type=Path, help="database file to reuse")
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path or Path(tmp) / "search.db"
+        database = Database(path)
+        database.create_schema()
+        database.start()
+        with database.session_factory() as session:
+            existing = session.scalar(select(func.count()).select_from(Product))
+        if existing < args.items:
+            start = time.perf_counter()
+            populate(database, args.items)
+            rate = args.items / (time.perf_counter() - start)
+            print(f"Inserted {args.items} items with indexing: {rate:.0f} rows/s")
+
+        search = ProductSearch(database)
+        print(f"{'query':>22} {'matches':>8} {'p50 ms':>8} {'p95 ms':>8} {'target':>7}")
+        for query in QUERIES:
+            search.search(query)  # warm the page cache
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                search.search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            verdict = "ok" if p95 <= TARGET_MS else "MISS"
+            print(
+                f"{query:>22} {search.count(query):>8} "
+                f"{statistics.median(timings):>8.2f} {p95:>8.2f} {verdict:>7}"
+            )
+        database.close()
+        app.processEvents()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Throughput and latency benchmark suite for the signal bus.
+
+Measures the event backbone under load and compares the results with a JSON
+baseline so regressions are caught before they ship:
+
+- direct, queued and cross-thread emit latency
+- fan-out cost with N connected slots
+- LoggedSignalWrapper overhead over a raw emit
+- SignalBus.reset() cost as the number of signals grows
+
+Lower is better for every metric. Baselines are machine specific; refresh
+them with --save after intentional changes or on new hardware.
+
+Usage:
+    python tests/performance/bench_signal_bus.py
+    python tests/performance/bench_signal_bus.py --save
+    python tests/performance/bench_signal_bus.py --compare --tolerance 0.3
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import threading
+import time
+import timeit
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from PyQt6.QtCore import (  # noqa: E402
+    PYQT_VERSION_STR,
+    QT_VERSION_STR,
+    QCoreApplication,
+    QObject,
+    Qt,
+    pyqtSignal,
+)
+
+from signals import DomainSignals, SignalBus  # noqa: E402
+from signals.signal_bus import LoggedSignalWrapper, SignalTrace  # noqa: E402
+from signals.signal_bus import logger as bus_logger  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "signal_bus.json"
+
+# Relative slowdown tolerated before a metric counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+FAN_OUT_SIZES = (1, 10, 100)
+RESET_SIGNAL_COUNTS = (16, 64, 256)
+
+
+class Probe(QObject):
+    """Signal source carrying the emit timestamp."""
+
+    ping = pyqtSignal(float)
+    item = pyqtSignal(str, int)
+
+
+def percentile(values, fraction: float) -> float:
+    """Return the given percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def per_call_ns(func, number: int, repeat: int) -> float:
+    """Return the best per-call cost of func in nanoseconds."""
+    best = min(timeit.Timer(func).repeat(repeat=repeat, number=number))
+    return best / number * 1e9
+
+
+def pump_until(app, condition, timeout: float = 30.0):
+    """Process events until condition() is true or the timeout expires."""
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+
+
+def bench_direct(args) -> dict:
+    """Emit cost with a direct-connected slot."""
+    probe = Probe()
+    probe.ping.connect(lambda stamp: None, Qt.ConnectionType.DirectConnection)
+    cost = per_call_ns(lambda: probe.ping.emit(0.0), args.emits, args.repeat)
+    return {"direct_emit_ns": round(cost, 1)}
+
+
+def bench_queued(app, args) -> dict:
+    """Latency from emit to slot for a same-thread queued connection."""
+    probe = Probe()
+    latencies = []
+    probe.ping.connect(
+        lambda stamp: latencies.append(time.perf_counter() - stamp),
+        Qt.ConnectionType.QueuedConnection,
+    )
+    count = args.emits // 10
+    for _ in range(count):
+        probe.ping.emit(time.perf_counter())
+    pump_until(app, lambda: len(latencies) == count)
+
+    # Per-event latency when each emit is drained before the next
+    single = []
+    probe.ping.disconnect()
+    probe.ping.connect(
+        lambda stamp: single.append(time.perf_counter() - stamp),
+        Qt.ConnectionType.QueuedConnection,
+    )
+    for _ in range(1000):
+        probe.ping.emit(time.perf_counter())
+        app.processEvents()
+
+    return {
+        "queued_burst_drain_us_per_event": round(
+            max(latencies) / count * 1e6 if latencies else 0.0, 3
+        ),
+        "queued_latency_us_median": round(statistics.median(single) * 1e6, 2),
+        "queued_latency_us_p95": round(percentile(single, 0.95) * 1e6, 2),
+    }
+
+
+def bench_cross_thread(app, args) -> dict:
+    """Latency from a worker thread emit to the GUI thread slot."""
+    probe = Probe()
+    latencies = []
+    probe.ping.connect(lambda stamp: latencies.append(time.perf_counter() - stamp))
+    count = args.emits // 10
+
+    def worker():
+        for _ in range(count):
+            probe.ping.emit(time.perf_counter())
+            # Pace the producer so we measure latency, not queue build-up
+            time.sleep(0.0001)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    pump_until(app, lambda: len(latencies) == count)
+    thread.join()
+
+    return {
+        "cross_thread_latency_us_median": round(statistics.median(latencies) * 1e6, 2),
+        "cross_thread_latency_us_p95": round(percentile(latencies, 0.95) * 1e6, 2),
+    }
+
+
+def bench_fan_out(args) -> dict:
+    """Emit cost as the number of connected slots grows."""
+    results = {}
+    for size in FAN_OUT_SIZES:
+        probe = Probe()
+        for _ in range(size):
+            probe.item.connect(lambda item_id, percent: None)
+        number = max(100, args.emits // size)
+        cost = per_call_ns(lambda: probe.item.emit("item_1", 50), number, args.repeat)
+        results[f"fan_out_{size}_slots_ns"] = round(cost, 1)
+    return results
+
+
+def bench_logged_wrapper(args) -> dict:
+    """LoggedSignalWrapper overhead compared to a raw emit."""
+    probe = Probe()
+    probe.item.connect(lambda item_id, percent: None)
+    previous_level = bus_logger.level
+    bus_logger.setLevel(logging.WARNING)
+    try:
+        raw = per_call_ns(
+            lambda: probe.item.emit("item_1", 50), args.emits, args.repeat
+        )
+        wrapped = LoggedSignalWrapper(probe.item, "bench.item", SignalTrace())
+        logged = per_call_ns(
+            lambda: wrapped.emit("item_1", 50), args.emits, args.repeat
+        )
+        sampled_wrapper = LoggedSignalWrapper(
+            probe.item, "bench.item", SignalTrace(), sample_every=100
+        )
+        sampled = per_call_ns(
+            lambda: sampled_wrapper.emit("item_1", 50), args.emits, args.repeat
+        )
+    finally:
+        bus_logger.setLevel(previous_level)
+    return {
+        "raw_emit_ns": round(raw, 1),
+        "logged_wrapper_emit_ns": round(logged, 1),
+        "sampled_wrapper_emit_ns": round(sampled, 1),
+    }
+
+
+def make_signals_class(count: int):
+    """Build a DomainSignals subclass with the given number of extra signals."""
+    namespace = {f"signal_{i}": pyqtSignal(str) for i in range(count)}
+    return type(f"BenchSignals{count}", (DomainSignals,), namespace)
+
+
+def bench_reset(args) -> dict:
+    """SignalBus.reset() cost as the number of signals grows."""
+    results = {}
+    original_instance = SignalBus._instance
+    try:
+        for count in RESET_SIGNAL_COUNTS:
+            SignalBus._instance = None
+            bus = SignalBus()
+            bus._domain_signals = make_signals_class(count)()
+            samples = []
+            for _ in range(args.repeat * 4):
+                for i in range(count):
+                    getattr(bus._domain_signals, f"signal_{i}").connect(print)
+                start = time.perf_counter()
+                bus.reset()
+                samples.append(time.perf_counter() - start)
+            results[f"reset_{count}_extra_signals_us"] = round(min(samples) * 1e6, 1)
+    finally:
+        SignalBus._instance = original_instance
+    return results
+
+
+def run_suite(app, args) -> dict:
+    """Run every benchmark and return the combined metrics."""
+    results = {}
+    results.update(bench_direct(args))
+    results.update(bench_queued(app, args))
+    results.update(bench_cross_thread(app, args))
+    results.update(bench_fan_out(args))
+    results.update(bench_logged_wrapper(args))
+    results.update(bench_reset(args))
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return (metric, baseline, current) tuples that regressed."""
+    regressions = []
+    for name, previous in baseline.get("results", {}).items():
+        current = results.get(name)
+        if current is None or previous <= 0:
+            continue
+        if current > previous * (1 + tolerance):
+            regressions.append((name, previous, current))
+    return regressions
+
+
+def main() -> int:
+    """Run the signal bus benchmark suite."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emits", type=int, default=20_000, help="emits per run")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per metric")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the baseline")
+    parser.add_argument(
+        "--compare", action="store_true", help="fail on regressions vs baseline"
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    results = run_suite(app, args)
+
+    for name, value in results.items():
+        print(f"{name:<40} {value:>12}")
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "metadata": {
+                "python": platform.python_version(),
+                "qt": QT_VERSION_STR,
+                "pyqt": PYQT_VERSION_STR,
+                "platform": platform.platform(),
+                "emits": args.emits,
+            },
+            "results": results,
+        }
+        args.baseline.write_text(json.dumps(payload, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+
+    if args.compare:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        for name, previous, current in regressions:
+            print(f"REGRESSION {name}: {previous} -> {current}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Microbenchmark the cost of emitting through the signal bus.
+
+Measures the per-emit cost of a domain signal with one connected slot when
+debug logging is disabled, enabled, and sampled. Log records go to a
+NullHandler so the numbers reflect the bus, not terminal I/O.
+
+Usage:
+    python tests/performance/bench_signal_logging.py
+    python tests/performance/bench_signal_logging.py --emits 500000
+"""
+
+import argparse
+import logging
+import sys
+import timeit
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from signals import SignalBus  # noqa: E402
+from signals.signal_bus import logger as bus_logger  # noqa: E402
+
+
+def measure(bus: SignalBus, emits: int, repeat: int) -> float:
+    """Return the best per-emit cost in nanoseconds."""
+    signal = bus.domain.generation_progress
+    timer = timeit.Timer(lambda: signal.emit("item_1", 50))
+    best = min(timer.repeat(repeat=repeat, number=emits))
+    return best / emits * 1e9
+
+
+def main() -> int:
+    """Run the signal logging microbenchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emits", type=int, default=100_000, help="emits per run")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per mode")
+    parser.add_argument("--sample", type=int, default=100, help="sample every N")
+    args = parser.parse_args()
+
+    bus_logger.addHandler(logging.NullHandler())
+    bus_logger.setLevel(logging.DEBUG)
+    bus_logger.propagate = False
+
+    bus = SignalBus()
+    bus.domain.generation_progress.connect(lambda item_id, percent: None)
+
+    modes = [
+        ("disabled", lambda: bus.set_debug(False)),
+        ("enabled", lambda: bus.set_debug(True)),
+        (f"sampled 1/{args.sample}", lambda: bus.set_debug(True, args.sample)),
+    ]
+    print(f"{args.emits} emits x {args.repeat} runs, one connected slot")
+    for name, configure in modes:
+        configure()
+        cost = measure(bus, args.emits, args.repeat)
+        print(f"{name:>16}: {cost:8.1f} ns/emit")
+    bus.set_debug(False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
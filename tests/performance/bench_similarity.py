@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Benchmark near-duplicate lookup: multi-index table against a linear scan.
+
+Synthetic 64-bit hashes are added to a HammingIndex: clusters of up to
+eight near-copies (a few flipped bits each, like a seed sweep) around
+random centres. Reported are the build time, the index's own estimate of
+its size per hash, and for each distance the median query time, the
+candidates checked per query and the time of comparing every hash in a
+plain Python loop. With --groups the time of grouping all duplicates
+through SimilarityIndex.duplicate_groups() is measured as well.
+
+Usage:
+    python tests/performance/bench_similarity.py
+    python tests/performance/bench_similarity.py --hashes 100000 --groups
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add app directory to path
+app_dir = Path(__file__).parent.parent.parent / "app"
+sys.path.insert(0, str(app_dir))
+
+from services.similarity import HammingIndex, SimilarityIndex  # noqa: E402
+
+DISTANCES = (0, 4, 6, 8, 11)
+
+
+def make_hashes(count: int, seed: int = 1):
+    """Return (product id, hash) pairs in clusters of near-copies."""
+    rng = random.Random(seed)
+    pairs = []
+    while len(pairs) < count:
+        centre = rng.getrandbits(64)
+        for _ in range(rng.randint(1, 8)):
+            value = centre
+            for _ in range(rng.randrange(5)):
+                value ^= 1 << rng.randrange(64)
+            pairs.append((str(uuid.UUID(int=rng.getrandbits(128))), value))
+    return pairs[:count]
+
+
+def median_us(call, repeat: int) -> float:
+    """Return the median duration of call() in microseconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1e6
+
+
+def main() -> int:
+    """Run the similarity benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hashes", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--groups", action="store_true", help="also time duplicate_groups()"
+    )
+    args = parser.parse_args()
+
+    pairs = make_hashes(args.hashes)
+    start = time.perf_counter()
+    index = HammingIndex()
+    for product_id, value in pairs:
+        index.add(product_id, value)
+    elapsed = time.perf_counter() - start
+    count = len(pairs)
+    print(f"{count:,} hashes")
+    print(f"build:    {elapsed:.2f} s ({count / elapsed:,.0f} hashes/s)")
+    print(f"estimate: {index.memory_bytes() / count:.1f} bytes per hash")
+    print()
+
+    rng = random.Random(2)
+    queries = [rng.choice(pairs)[1] for _ in range(args.repeat)]
+    values = [value for _product_id, value in pairs]
+    scan_repeat = max(3, args.repeat // 10)
+
+    def scan(query, distance):
+        return [v for v in values if (v ^ query).bit_count() <= distance]
+
+    print(
+        f"{'distance':>8} {'matches':>8} {'candidates':>11}"
+        f" {'index':>10} {'scan':>10}"
+    )
+    for distance in DISTANCES:
+        matches = statistics.mean(len(index.query(q, distance)) for q in queries)
+        candidates = statistics.mean(
+            len(index.candidates(q, distance)) for q in queries
+        )
+        cycle = iter(queries * 2)
+        index_us = median_us(lambda: index.query(next(cycle), distance), args.repeat)
+        cycle = iter(queries * 2)
+        scan_us = median_us(lambda: scan(next(cycle), distance), scan_repeat)
+        print(
+            f"{distance:>8} {matches:>8.1f} {candidates:>11,.0f}"
+            f" {index_us / 1000:>8.2f}ms {scan_us / 1000:>8.1f}ms"
+        )
+
+    if args.groups:
+        # Grouping without a project filter never touches the database
+        similarity = SimilarityIndex(database=None)
+        similarity._index = index
+        start = time.perf_counter()
+        groups = similarity.duplicate_groups()
+        elapsed = time.perf_counter() - start
+        print()
+        print(f"groups:   {len(groups):,} groups in {elapsed:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
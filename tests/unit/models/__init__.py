@@ -0,0 +1 @@
+"""Unit tests for data models and persistence."""
@@ -0,0 +1,108 @@
+"""Tests for the SQLite database setup."""
+
+# Database testing
+import threading
+
+from sqlalchemy import inspect, select, text
+
+from models import Database, Order, Project
+
+
+class TestDatabase:
+    """Test suite for Database."""
+
+    def test_pragmas_applied_to_connections(self, database):
+        """Test WAL and the tuned pragmas on pooled connections."""
+        session = database.session()
+
+        def pragma(name):
+            return session.execute(text(f"PRAGMA {name}")).scalar()
+
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("foreign_keys") == 1
+        assert pragma("mmap_size") == 256 * 1024 * 1024
+        assert pragma("cache_size") == -64 * 1024
+
+    def test_schema_matches_documented_tables(self, database):
+        """Test that every documented table is created with its indexes."""
+        inspector = inspect(database.engine)
+
+        assert {
+            "projects",
+            "orders",
+            "order_items",
+            "products",
+            "collections",
+            "collection_products",
+            "providers",
+            "models",
+            "templates",
+            "lookups",
+            "tags",
+            "tag_associations",
+            "generation_logs",
+            "system_settings",
+            "migration_history",
+        } <= set(inspector.get_table_names())
+        indexes = {index["name"] for index in inspector.get_indexes("products")}
+        assert "idx_products_created_at" in indexes
+        assert "metadata" in {c["name"] for c in inspector.get_columns("products")}
+
+    def test_each_thread_gets_its_own_session(self, database):
+        """Test the per-thread session registry."""
+        main_session = database.session()
+        assert database.session() is main_session
+
+        worker_sessions = []
+
+        def worker():
+            worker_sessions.append(database.session())
+            database.remove_session()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        assert worker_sessions[0] is not main_session
+
+    def test_orm_round_trip(self, database):
+        """Test defaults and relationships through the ORM."""
+        session = database.session()
+        project = Project(name="Dogs")
+        session.add(project)
+        session.flush()
+        session.add(
+            Order(
+                project_id=project.id,
+                provider="replicate",
+                model="flux",
+                base_parameter_set={"prompt": "a dog"},
+            )
+        )
+        session.commit()
+
+        order = session.scalars(select(Order)).one()
+        assert order.status == "pending"
+        assert order.items == []
+        assert len(order.id) == 36
+        assert order.created_at is not None
+
+    def test_reader_not_blocked_by_open_write(self, tmp_path):
+        """Test that WAL lets a reader run while a write is uncommitted."""
+        db = Database(tmp_path / "wal.db")
+        db.create_schema()
+        try:
+            with db.engine.connect() as writer:
+                writer.execute(text("BEGIN IMMEDIATE"))
+                writer.execute(
+                    text("INSERT INTO projects (id, name) VALUES ('p1', 'x')")
+                )
+                with db.engine.connect() as reader:
+                    count = reader.execute(
+                        text("SELECT COUNT(*) FROM projects")
+                    ).scalar()
+                writer.rollback()
+            assert count == 0
+        finally:
+            db.close()
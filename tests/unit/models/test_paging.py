@@ -0,0 +1,243 @@
+"""Tests for keyset pagination."""
+
+# Keyset paging testing
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect, text
+
+from models import (
+    CursorError,
+    Database,
+    KeysetPager,
+    Order,
+    OrderItem,
+    Product,
+    Project,
+    Tag,
+    TagAssociation,
+)
+from models.paging import (
+    FILTERS,
+    compile_filters,
+    decode_cursor,
+    encode_cursor,
+    keyset_statement,
+)
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def products(database):
+    """Provide 25 products; every pair shares a created_at to test ties."""
+    writer = database.writer
+    writer.insert(
+        Project.__table__, [{"id": "p1", "name": "One"}, {"id": "p2", "name": "Two"}]
+    )
+    writer.insert(
+        Order.__table__,
+        [
+            {
+                "id": "order_1",
+                "provider": "replicate",
+                "model": "flux",
+                "base_parameter_set": {},
+            }
+        ],
+    )
+    writer.insert(
+        OrderItem.__table__,
+        [{"id": "item_1", "order_id": "order_1", "sequence_number": 0}],
+    )
+    writer.insert(Tag.__table__, [{"id": "t1", "name": "cats"}])
+    writer.insert_products(
+        [
+            {
+                "id": f"product_{n:02d}",
+                "project_id": "p1" if n % 2 else "p2",
+                "order_item_id": "item_1" if n % 5 == 0 else None,
+                "type": "image",
+                "file_path": f"/tmp/{n}.png",
+                "liked": n % 3 == 0,
+                "created_at": START + timedelta(seconds=n // 2),
+            }
+            for n in range(25)
+        ]
+    )
+    writer.insert(
+        TagAssociation.__table__,
+        [
+            {"tag_id": "t1", "entity_type": "product", "entity_id": f"product_{n:02d}"}
+            for n in (3, 7, 11)
+        ],
+    )
+    writer.flush()
+    return KeysetPager(database, Product)
+
+
+def _newest_first(ids):
+    """Sort product ids the way pages order them."""
+
+    def key(product_id):
+        return int(product_id[-2:]) // 2, product_id
+
+    return sorted(ids, key=key, reverse=True)
+
+
+class TestCursors:
+    """Test suite for cursor encoding."""
+
+    def test_round_trip(self):
+        """Test that a cursor decodes to the position it was made from."""
+        position = (datetime(2024, 5, 6, 7, 8, 9, 123456), "abc")
+
+        assert decode_cursor(encode_cursor(*position)) == position
+
+    @pytest.mark.parametrize("cursor", ["", "not a cursor", "WzFd", "e30"])
+    def test_invalid_cursor_rejected(self, cursor):
+        """Test that malformed cursors raise CursorError."""
+        with pytest.raises(CursorError):
+            decode_cursor(cursor)
+
+
+class TestKeysetPager:
+    """Test suite for KeysetPager."""
+
+    def test_pages_cover_every_row_once(self, products):
+        """Test that following next_cursor visits all rows in order, ties included."""
+        seen = []
+        page = products.page(limit=4)
+        while True:
+            seen.extend(product.id for product in page.rows)
+            if page.next_cursor is None:
+                break
+            page = products.page(after=page.next_cursor, limit=4)
+
+        assert seen == _newest_first(f"product_{n:02d}" for n in range(25))
+
+    def test_previous_cursor_returns_previous_page(self, products):
+        """Test that before=previous_cursor rebuilds the page before."""
+        first = products.page(limit=5)
+        second = products.page(after=first.next_cursor, limit=5)
+        back = products.page(before=second.previous_cursor, limit=5)
+
+        assert first.previous_cursor is None
+        assert [p.id for p in back.rows] == [p.id for p in first.rows]
+        assert back.previous_cursor is None
+        assert back.next_cursor is not None
+
+    def test_filters_applied(self, products):
+        """Test each product filter against the rows it should keep."""
+        cases = {
+            "project": ("p1", {n for n in range(25) if n % 2}),
+            "liked": (True, {n for n in range(25) if n % 3 == 0}),
+            "tag": ("t1", {3, 7, 11}),
+            "model": ("flux", {n for n in range(25) if n % 5 == 0}),
+        }
+        for key, (value, expected) in cases.items():
+            rows = products.page({key: value}, limit=100).rows
+
+            assert {int(p.id[-2:]) for p in rows} == expected, key
+
+    def test_deleted_rows_skipped(self, database, products):
+        """Test that soft-deleted products never appear."""
+        database.writer.update(
+            Product.__table__, "product_24", {"deleted_at": datetime(2024, 2, 1)}
+        )
+        database.writer.flush()
+
+        ids = [p.id for p in products.page(limit=100).rows]
+
+        assert "product_24" not in ids
+        assert len(ids) == 24
+
+    def test_fetch_ids_matches_gallery_fetcher(self, products):
+        """Test the (filters, cursor, limit) -> (ids, next_cursor) contract."""
+        ids, cursor = products.fetch_ids({"project": "p2"}, None, 10)
+        more, end = products.fetch_ids({"project": "p2"}, cursor, 10)
+
+        assert len(ids) == 10
+        assert len(more) == 3
+        assert end is None
+        assert set(ids).isdisjoint(more)
+
+    def test_seek_ids_joins_keyset_pages(self, products):
+        """Test that a seek returns the page at an offset and a cursor after it."""
+        first, cursor = products.fetch_ids({}, None, 10)
+        second, _cursor = products.fetch_ids({}, cursor, 10)
+
+        ids, after = products.seek_ids({}, 5, 10)
+        rest, end = products.seek_ids({}, 20, 10)
+
+        assert ids == first[5:] + second[:5]
+        assert products.fetch_ids({}, after, 5)[0] == second[5:]
+        assert len(rest) == 5 and end is None
+
+    def test_unknown_filter_rejected(self, products):
+        """Test that a filter the model does not support raises ValueError."""
+        with pytest.raises(ValueError):
+            products.page({"colour": "red"})
+
+    def test_none_filter_ignored(self, products):
+        """Test that a cleared (None) filter does not restrict the page."""
+        assert len(products.page({"project": None}, limit=100).rows) == 25
+
+
+class TestQueryPlans:
+    """Test suite for the index use of page queries."""
+
+    @staticmethod
+    def _plan(database, statement):
+        compiled = statement.compile(database.engine)
+        parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+        with database.engine.connect() as connection:
+            rows = connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {compiled}", parameters
+            ).all()
+        return [row[3] for row in rows]
+
+    def test_no_full_scans(self, database):
+        """Test that every filter and cursor combination seeks an index."""
+        cursor = encode_cursor(START, "product_10")
+        values = {"liked": True}
+        for model, available in FILTERS.items():
+            table = model.__tablename__
+            combinations = [{}] + [{key: values.get(key, "x")} for key in available]
+            for filters in combinations:
+                for position in ({}, {"after": cursor}, {"before": cursor}):
+                    statement = keyset_statement(model, filters, limit=101, **position)
+                    for detail in self._plan(database, statement):
+                        # Only the LIMITed walk of the ordering index may scan
+                        assert not detail.startswith("SCAN") or detail == (
+                            f"SCAN {table} USING INDEX idx_{table}_created_at"
+                        ), (table, filters, position, detail)
+
+    def test_compile_filters_excludes_deleted(self):
+        """Test that soft-deleted rows are filtered for models that have them."""
+        predicates = compile_filters(Product, {})
+
+        assert "deleted_at IS NULL" in str(predicates[0])
+
+
+class TestSchemaIndexes:
+    """Test suite for index upgrades in Database.create_schema."""
+
+    def test_outdated_index_rebuilt(self, tmp_path):
+        """Test that an index with stale columns is rebuilt with the declared ones."""
+        database = Database(tmp_path / "old.db")
+        database.create_schema()
+        with database.engine.begin() as connection:
+            connection.execute(text("DROP INDEX idx_products_created_at"))
+            connection.execute(
+                text("CREATE INDEX idx_products_created_at ON products(created_at)")
+            )
+
+        database.create_schema()
+
+        indexes = {
+            index["name"]: index["column_names"]
+            for index in inspect(database.engine).get_indexes("products")
+        }
+        assert indexes["idx_products_created_at"] == ["created_at", "id"]
+        database.close()
@@ -0,0 +1,283 @@
+"""Tests for the in-memory product index."""
+
+# Product index testing
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import KeysetPager, Product, Project, Tag, TagAssociation
+from models.product_index import (
+    ProductIndex,
+    RowSet,
+    encode_id,
+    format_id,
+    highest_bits,
+    skip_bits,
+)
+from signals import signal_bus
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _product(n, **values):
+    """Return a products row; product n is n minutes after START."""
+    row = {
+        "id": f"product_{n:02d}",
+        "project_id": "p1" if n % 2 else "p2",
+        "type": "video" if n % 3 == 0 else "image",
+        "file_path": f"/tmp/{n}.png",
+        "liked": n % 4 == 0,
+        "rating": n % 5 or None,
+        "width": 640,
+        "height": 480,
+        "created_at": START + timedelta(minutes=n),
+    }
+    row.update(values)
+    return row
+
+
+@pytest.fixture
+def products(database):
+    """Provide 30 products in two projects, every third one tagged t1."""
+    writer = database.writer
+    writer.insert(
+        Project.__table__, [{"id": "p1", "name": "One"}, {"id": "p2", "name": "Two"}]
+    )
+    writer.insert(Tag.__table__, [{"id": "t1", "name": "cats"}])
+    writer.insert_products([_product(n) for n in range(30)])
+    writer.insert(
+        TagAssociation.__table__,
+        [
+            {"tag_id": "t1", "entity_type": "product", "entity_id": f"product_{n:02d}"}
+            for n in range(0, 30, 3)
+        ],
+    )
+    writer.flush()
+    return database
+
+
+@pytest.fixture
+def index(products):
+    """Provide a loaded index over the products fixture."""
+    product_index = ProductIndex(products)
+    product_index.start()
+    product_index.flush()
+    return product_index
+
+
+class TestProductIndex:
+    """Test suite for ProductIndex."""
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            {},
+            {"project": "p1"},
+            {"type": "video", "liked": True},
+            {"liked": False, "project": "p2"},
+            {"tag": "t1"},
+            {"tag": "t1", "type": "image", "project": None},
+            {"project": "missing"},
+        ],
+    )
+    def test_matches_keyset_pager(self, products, index, filters):
+        """Test that filtered pages list the same ids, in the same order."""
+        pager = KeysetPager(products, Product)
+        expected, cursor = [], None
+        while True:
+            ids, cursor = pager.fetch_ids(filters, cursor, 7)
+            expected.extend(ids)
+            if cursor is None:
+                break
+
+        actual, cursor = [], None
+        while True:
+            ids, cursor = index.fetch_ids(filters, cursor, 7)
+            actual.extend(ids)
+            if cursor is None:
+                break
+
+        assert actual == expected
+        assert index.count(filters) == len(expected)
+
+    def test_events_keep_index_current(self, products, index):
+        """Test that created, liked and deleted products reach the index."""
+        writer = products.writer
+        writer.insert_products([_product(40, liked=False)]).result()
+        signal_bus.domain.product_created.emit("product_40")
+        writer.update(Product.__table__, "product_01", {"liked": True}).result()
+        signal_bus.domain.product_liked.emit("product_01")
+        signal_bus.domain.product_deleted.emit("product_02")
+        index.flush()
+
+        assert index.fetch_ids({}, None, 1)[0] == ["product_40"]
+        assert index.record("product_01").liked
+        assert index.record("product_02") is None
+        assert len(index) == 30
+
+    def test_new_products_bring_their_tags(self, products, index):
+        """Test that a created product's tag assignments are indexed."""
+        writer = products.writer
+        writer.insert_products([_product(41)])
+        writer.insert(
+            TagAssociation.__table__,
+            [{"tag_id": "t1", "entity_type": "product", "entity_id": "product_41"}],
+        ).result()
+        signal_bus.domain.product_created.emit("product_41")
+        index.flush()
+
+        assert index.tags_of("product_41") == ["t1"]
+        assert index.count({"tag": "t1"}) == 11
+
+    def test_backdated_products_keep_keyset_order(self, products, index):
+        """Test that a product older than the newest one pages in its place."""
+        writer = products.writer
+        writer.insert_products([_product(42), _product(15, id="product_15b")])
+        writer.insert(
+            TagAssociation.__table__,
+            [{"tag_id": "t1", "entity_type": "product", "entity_id": "product_15b"}],
+        )
+        writer.update(
+            Product.__table__, "product_16", {"deleted_at": datetime.now()}
+        ).result()
+        signal_bus.domain.product_deleted.emit("product_16")
+        signal_bus.domain.product_created.emit("product_42")
+        index.flush()
+        signal_bus.domain.product_created.emit("product_15b")
+        index.flush()
+
+        pager = KeysetPager(products, Product)
+        for filters in ({}, {"tag": "t1"}, {"liked": True}):
+            assert index.fetch_ids(filters, None, 100)[0] == (
+                pager.fetch_ids(filters, None, 100)[0]
+            )
+        assert index.tags_of("product_15b") == ["t1"]
+        assert index.record("product_16") is None
+
+    def test_seek_ids_matches_paging(self, index):
+        """Test that seeking to an offset lands where paging would."""
+        paged, cursor = [], None
+        while True:
+            ids, cursor = index.fetch_ids({"project": "p1"}, cursor, 4)
+            paged.extend(ids)
+            if cursor is None:
+                break
+
+        ids, cursor = index.seek_ids({"project": "p1"}, 6, 4)
+
+        assert ids == paged[6:10]
+        assert index.fetch_ids({"project": "p1"}, cursor, 100)[0] == paged[10:]
+        assert index.seek_ids({"project": "p1"}, 15, 4) == ([], None)
+
+    def test_tag_and_untag(self, index):
+        """Test that tag() and untag() change the tag filter."""
+        index.tag("product_01", "t2")
+        index.tag("product_05", "t2")
+        assert index.fetch_ids({"tag": "t2"}, None, 10)[0] == [
+            "product_05",
+            "product_01",
+        ]
+
+        index.untag("product_05", "t2")
+        assert index.count({"tag": "t2"}) == 1
+
+    def test_record(self, index):
+        """Test that record() returns the indexed columns."""
+        record = index.record("product_10")
+
+        assert record.project_id == "p2"
+        assert record.type == "image"
+        assert record.liked is False
+        assert record.rating is None
+        assert (record.width, record.height) == (640, 480)
+        assert record.created_at == START + timedelta(minutes=10)
+        assert index.record("product_99") is None
+
+    def test_unknown_filter_rejected(self, index):
+        """Test that filters the columns cannot answer raise ValueError."""
+        assert index.supports({"project": "p1", "model": None})
+        assert not index.supports({"model": "flux"})
+        with pytest.raises(ValueError):
+            index.count({"model": "flux"})
+
+    def test_loads_before_ready_are_not_lost(self, products):
+        """Test that events before the initial load are covered by it."""
+        product_index = ProductIndex(products)
+        products.writer.insert_products([_product(50)]).result()
+        signal_bus.domain.product_created.emit("product_50")
+        product_index.start()
+        product_index.flush()
+
+        assert product_index.ready
+        assert len(product_index) == 31
+
+    def test_compact_at_scale(self, database):
+        """Test that 100k products with two tags each stay under 64 bytes."""
+        count = 100_000
+        product_index = ProductIndex(database)
+        ids = [str(uuid.uuid4()) for _ in range(count)]
+        product_index.load_rows(
+            [
+                (
+                    product_id,
+                    f"project_{n // 5000}",
+                    "image" if n % 10 else "video",
+                    n % 7 == 0,
+                    n % 6 or None,
+                    1024,
+                    1024,
+                    START + timedelta(seconds=n),
+                )
+                for n, product_id in enumerate(ids)
+            ]
+        )
+        product_index.load_tags(
+            (f"tag_{tag}", product_id)
+            for n, product_id in enumerate(ids)
+            for tag in (n % 50, 50 + n // 2000)
+        )
+
+        assert product_index.memory_bytes() / count < 64
+        assert product_index.count({"project": "project_3", "liked": True}) == len(
+            [n for n in range(15000, 20000) if n % 7 == 0]
+        )
+        assert product_index.record(ids[123]).id == ids[123]
+
+
+class TestRowSet:
+    """Test suite for RowSet."""
+
+    def test_switches_representation(self):
+        """Test that clustered rows become a bitmap and scattered ones do not."""
+        rows = RowSet(range(1000, 1100))
+        assert rows.dense
+
+        rows.add(1_000_000)
+        assert not rows.dense
+        assert 1_000_000 in rows and 1050 in rows and 999 not in rows
+        assert rows.mask() == sum(1 << row for row in [*range(1000, 1100), 1_000_000])
+
+        rows.discard(1_000_000)
+        assert rows.dense
+        assert len(rows) == 100
+
+    def test_skip_bits_across_chunks(self):
+        """Test that skipping set bits works across scan chunks."""
+        bits = sum(1 << row for row in range(0, 20_000, 3))
+        rows = highest_bits(bits, bits.bit_length(), 10_000)
+
+        for count in (0, 1, 700, 4000, len(rows) - 1):
+            stop = skip_bits(bits, count)
+            assert highest_bits(bits, stop, 2) == rows[count : count + 2]
+        assert skip_bits(bits, len(rows) + 1) == 0
+
+    def test_ids_round_trip(self):
+        """Test that UUIDs pack into their bytes and other ids into a digest."""
+        product_id = str(uuid.uuid4())
+        key, canonical = encode_id(product_id)
+
+        assert canonical and key == uuid.UUID(product_id).bytes
+        assert format_id(key) == product_id
+        assert encode_id(product_id.upper())[1] is False
+        assert encode_id("product_1")[1] is False
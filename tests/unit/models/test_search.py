@@ -0,0 +1,143 @@
+"""Tests for the FTS5 product search index."""
+
+# Search index testing
+from sqlalchemy import text, update
+
+from models import (
+    Order,
+    OrderItem,
+    Product,
+    Project,
+    Tag,
+    TagAssociation,
+    rebuild_search_index,
+)
+
+
+def seed(database):
+    """Create a project, an order with one item and its product."""
+    writer = database.writer
+    writer.insert(Project.__table__, [{"id": "project_1", "name": "Nebula"}])
+    writer.insert(
+        Order.__table__,
+        [
+            {
+                "id": "order_1",
+                "project_id": "project_1",
+                "provider": "replicate",
+                "model": "flux",
+                "base_parameter_set": {"prompt": "a {animal} in space"},
+            }
+        ],
+    )
+    writer.insert(
+        OrderItem.__table__,
+        [
+            {
+                "id": "item_1",
+                "order_id": "order_1",
+                "sequence_number": 1,
+                "generation_parameter_set": {"prompt": "an astronaut cat"},
+            }
+        ],
+    )
+    writer.insert_products(
+        [
+            {
+                "id": "product_1",
+                "project_id": "project_1",
+                "order_item_id": "item_1",
+                "type": "image",
+                "file_path": "/tmp/a.png",
+                "notes": "keeper",
+            }
+        ]
+    )
+    writer.flush()
+
+
+def indexed(database, match):
+    """Return the product ids matching an FTS5 expression."""
+    statement = text(
+        "SELECT product_id FROM product_search WHERE product_search MATCH :match"
+    )
+    with database.engine.connect() as connection:
+        return connection.execute(statement, {"match": match}).scalars().all()
+
+
+class TestSearchIndex:
+    """Test suite for the search index triggers."""
+
+    def test_product_insert_indexes_prompt_notes_and_project(self, database):
+        """Test that a new product is indexed from its item, notes and project."""
+        seed(database)
+        assert indexed(database, "astronaut") == ["product_1"]
+        assert indexed(database, "notes : keeper") == ["product_1"]
+        assert indexed(database, "project : nebula") == ["product_1"]
+        assert indexed(database, "space") == []
+
+    def test_prompt_falls_back_to_order_and_metadata(self, database):
+        """Test the base_parameter_set and metadata prompt fallbacks."""
+        seed(database)
+        database.writer.update(
+            OrderItem.__table__, "item_1", {"generation_parameter_set": None}
+        )
+        database.writer.insert_products(
+            [
+                {
+                    "id": "imported",
+                    "type": "image",
+                    "file_path": "/tmp/b.png",
+                    "metadata": {"prompt": "watercolour harbour"},
+                }
+            ]
+        )
+        database.writer.flush()
+        assert indexed(database, "space") == ["product_1"]
+        assert indexed(database, "harbour") == ["imported"]
+
+    def test_tags_and_renames_follow(self, database):
+        """Test that tagging and renaming tags or projects re-index products."""
+        seed(database)
+        writer = database.writer
+        writer.insert(Tag.__table__, [{"id": "tag_1", "name": "portrait"}])
+        writer.insert(
+            TagAssociation.__table__,
+            [{"tag_id": "tag_1", "entity_type": "product", "entity_id": "product_1"}],
+        )
+        writer.flush()
+        assert indexed(database, "tags : portrait") == ["product_1"]
+
+        writer.update(Tag.__table__, "tag_1", {"name": "landscape"})
+        writer.update(Project.__table__, "project_1", {"name": "Galaxy"})
+        writer.flush()
+        assert indexed(database, "portrait") == []
+        assert indexed(database, "tags : landscape") == ["product_1"]
+        assert indexed(database, "project : galaxy") == ["product_1"]
+
+    def test_soft_and_hard_delete_remove_product(self, database):
+        """Test that deleted products leave the index and restored ones return."""
+        seed(database)
+        table = Product.__table__
+        with database.engine.begin() as connection:
+            connection.execute(
+                update(table).values(deleted_at=text("CURRENT_TIMESTAMP"))
+            )
+        assert indexed(database, "astronaut") == []
+
+        with database.engine.begin() as connection:
+            connection.execute(update(table).values(deleted_at=None))
+        assert indexed(database, "astronaut") == ["product_1"]
+
+        with database.engine.begin() as connection:
+            connection.execute(table.delete())
+            rows = connection.execute(text("SELECT count(*) FROM product_search_rows"))
+            assert rows.scalar() == 0
+        assert indexed(database, "astronaut") == []
+
+    def test_rebuild_matches_incremental_index(self, database):
+        """Test that a rebuild reproduces the trigger-maintained index."""
+        seed(database)
+        with database.engine.begin() as connection:
+            rebuild_search_index(connection)
+        assert indexed(database, "astronaut") == ["product_1"]
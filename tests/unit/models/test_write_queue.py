@@ -0,0 +1,189 @@
+"""Tests for the serialized write queue."""
+
+# Write queue testing
+import threading
+
+import pytest
+from sqlalchemy import event, select
+
+from models import Order, OrderItem, Product
+
+
+def add_order(database, order_id="order_1"):
+    """Insert an order through the write queue."""
+    database.writer.insert(
+        Order.__table__,
+        [
+            {
+                "id": order_id,
+                "provider": "replicate",
+                "model": "flux",
+                "base_parameter_set": {},
+            }
+        ],
+    )
+
+
+def item_rows(count, order_id="order_1"):
+    """Return order item rows with fixed ids."""
+    return [
+        {
+            "id": f"item_{n}",
+            "order_id": order_id,
+            "sequence_number": n,
+            "generation_parameter_set": {"n": n},
+        }
+        for n in range(count)
+    ]
+
+
+def count_commits(engine):
+    """Return a list that grows by one per committed transaction."""
+    commits = []
+    event.listen(engine, "commit", lambda connection: commits.append(True))
+    return commits
+
+
+class TestWriteQueue:
+    """Test suite for WriteQueue."""
+
+    def test_bulk_insert_applies_column_defaults(self, database):
+        """Test multi-row inserts with Python-side defaults per row."""
+        add_order(database)
+        database.writer.insert_order_items(item_rows(3))
+        database.writer.flush()
+
+        items = database.session().scalars(select(OrderItem)).all()
+        assert len(items) == 3
+        assert {item.status for item in items} == {"pending"}
+        assert all(item.created_at is not None for item in items)
+
+    def test_large_insert_in_one_call(self, database):
+        """Test a bulk insert of thousands of rows."""
+        add_order(database)
+        database.writer.insert_order_items(item_rows(5000))
+        database.writer.flush()
+
+        count = database.session().query(OrderItem).count()
+        assert count == 5000
+        assert database.writer.rows_inserted == 5001
+
+    def test_tick_of_writes_shares_one_transaction(self, database):
+        """Test that writes queued together commit once."""
+        add_order(database)
+        database.writer.insert_order_items(item_rows(10))
+        database.writer.flush()
+        commits = count_commits(database.engine)
+
+        for n in range(10):
+            database.writer.update_item_status(f"item_{n}", "generating")
+        database.writer.flush()
+
+        assert len(commits) == 1
+
+    def test_updates_to_same_row_are_coalesced(self, database):
+        """Test that later values win and untouched columns are kept."""
+        add_order(database)
+        database.writer.insert_order_items(item_rows(1))
+        database.writer.flush()
+
+        database.writer.update_item_status("item_0", "generating", retry_count=2)
+        database.writer.update_item_status("item_0", "complete")
+        database.writer.flush()
+
+        item = database.session().get(OrderItem, "item_0")
+        assert (item.status, item.retry_count) == ("complete", 2)
+        assert database.writer.rows_updated == 1
+
+    def test_concurrent_producers(self, database):
+        """Test many threads writing through the queue at once."""
+        add_order(database)
+        database.writer.insert_order_items(item_rows(400))
+        database.writer.flush()
+
+        def produce(offset):
+            for n in range(offset, 400, 8):
+                database.writer.update_item_status(f"item_{n}", "complete")
+
+        threads = [threading.Thread(target=produce, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        database.writer.flush()
+
+        statuses = database.session().scalars(select(OrderItem.status)).all()
+        assert set(statuses) == {"complete"}
+
+    def test_failed_transaction_reports_the_error(self, database):
+        """Test that an error is delivered and the queue keeps working."""
+        add_order(database)
+        database.writer.flush()
+
+        duplicate = database.writer.insert(
+            Order.__table__,
+            [
+                {
+                    "id": "order_1",
+                    "provider": "x",
+                    "model": "y",
+                    "base_parameter_set": {},
+                }
+            ],
+        )
+        with pytest.raises(Exception):
+            duplicate.result(timeout=5)
+
+        database.writer.insert_products(
+            [{"type": "image", "file_path": "/tmp/a.png", "file_hash": "ab"}]
+        )
+        database.writer.flush()
+        assert database.session().query(Product).count() == 1
+
+    def test_failed_write_does_not_fail_its_batch(self, database):
+        """Test that one failing write of three fails only its own future."""
+        add_order(database)
+        database.writer.flush()
+        commits = count_commits(database.engine)
+        started, release = threading.Event(), threading.Event()
+
+        def hold(connection):
+            started.set()
+            release.wait(5)
+
+        # Hold the writer so the three writes queue up for one tick
+        blocker = database.writer.submit(hold)
+        assert started.wait(5)
+
+        items = database.writer.insert_order_items(item_rows(2))
+        duplicate = database.writer.insert(
+            Order.__table__,
+            [
+                {
+                    "id": "order_1",
+                    "provider": "x",
+                    "model": "y",
+                    "base_parameter_set": {},
+                }
+            ],
+        )
+        status = database.writer.update(Order.__table__, "order_1", {"model": "z"})
+        release.set()
+
+        blocker.result(timeout=5)
+        items.result(timeout=5)
+        status.result(timeout=5)
+        with pytest.raises(Exception):
+            duplicate.result(timeout=5)
+        session = database.session()
+        assert session.query(OrderItem).count() == 2
+        assert session.scalars(select(Order.model)).all() == ["z"]
+        # The blocker's tick and the replay commit; the failed try rolled back
+        assert len(commits) == 2
+
+    def test_submit_requires_running_writer(self, database):
+        """Test that writes after stop() are rejected."""
+        database.writer.stop()
+
+        with pytest.raises(RuntimeError):
+            database.writer.update_item_status("item_0", "complete")
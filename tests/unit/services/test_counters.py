@@ -0,0 +1,194 @@
+"""Tests for event-driven denormalized counter maintenance."""
+
+# Counter maintenance testing
+import pytest
+from sqlalchemy import text
+
+from models import (
+    Collection,
+    CollectionProduct,
+    Order,
+    OrderItem,
+    Project,
+    Tag,
+    TagAssociation,
+)
+from services.counters import CounterService, repair_counters, verify_counters
+from signals import signal_bus
+
+
+@pytest.fixture
+def counters(database):
+    """Provide a counter service over a project with one order of two items."""
+    writer = database.writer
+    writer.insert(Project.__table__, [{"id": "p1", "name": "Space"}])
+    writer.insert(
+        Order.__table__,
+        [
+            {
+                "id": "order_1",
+                "project_id": "p1",
+                "provider": "replicate",
+                "model": "flux",
+                "base_parameter_set": {},
+            }
+        ],
+    )
+    writer.insert(
+        OrderItem.__table__,
+        [
+            {"id": f"item_{n}", "order_id": "order_1", "sequence_number": n}
+            for n in range(2)
+        ],
+    )
+    writer.insert(Collection.__table__, [{"id": "c1", "name": "Best"}])
+    writer.insert(Tag.__table__, [{"id": "t1", "name": "space"}])
+    writer.flush()
+    return CounterService(database)
+
+
+def _value(database, counter, row_id):
+    """Read one counter straight from the database."""
+    table, column = counter.split(".")
+    with database.engine.connect() as connection:
+        return connection.execute(
+            text(f"SELECT {column} FROM {table} WHERE id = :id"), {"id": row_id}
+        ).scalar_one()
+
+
+def _add_product(database, product_id):
+    """Insert a product in p1, in collection c1 and tagged t1."""
+    writer = database.writer
+    writer.insert_products(
+        [
+            {
+                "id": product_id,
+                "project_id": "p1",
+                "type": "image",
+                "file_path": f"/tmp/{product_id}.png",
+            }
+        ]
+    )
+    writer.insert(
+        CollectionProduct.__table__,
+        [{"collection_id": "c1", "product_id": product_id}],
+    )
+    writer.insert(
+        TagAssociation.__table__,
+        [{"tag_id": "t1", "entity_type": "product", "entity_id": product_id}],
+    )
+    writer.flush()
+
+
+class TestCounterService:
+    """Test suite for CounterService."""
+
+    def test_events_update_counters(self, database, counters):
+        """Test that domain events move the counters they affect."""
+        _add_product(database, "product_1")
+        signal_bus.domain.order_created.emit("order_1")
+        signal_bus.domain.product_created.emit("product_1")
+        signal_bus.domain.generation_completed.emit("item_0")
+        signal_bus.domain.generation_failed.emit("item_1", "timeout")
+        counters.flush()
+
+        assert _value(database, "projects.order_count", "p1") == 1
+        assert _value(database, "projects.product_count", "p1") == 1
+        assert _value(database, "orders.completed_count", "order_1") == 1
+        assert _value(database, "orders.failed_count", "order_1") == 1
+
+    def test_product_deleted_decrements_memberships(self, database, counters):
+        """Test that a deleted product lowers its project, collection and tag counts."""
+        _add_product(database, "product_1")
+        counters.adjust("collections.product_count", "c1", 1)
+        counters.adjust("tags.usage_count", "t1", 1)
+        signal_bus.domain.product_created.emit("product_1")
+        counters.flush()
+
+        signal_bus.domain.product_deleted.emit("product_1")
+        counters.flush()
+
+        assert _value(database, "projects.product_count", "p1") == 0
+        assert _value(database, "collections.product_count", "c1") == 0
+        assert _value(database, "tags.usage_count", "t1") == 0
+
+    def test_events_batched_into_one_tick(self, database, counters):
+        """Test that events emitted together are applied in one tick."""
+        for n in range(20):
+            _add_product(database, f"product_{n}")
+        for n in range(20):
+            signal_bus.domain.product_created.emit(f"product_{n}")
+        counters.flush()
+
+        assert _value(database, "projects.product_count", "p1") == 20
+        assert counters.tick_count == 1
+        assert counters.rows_updated == 1
+
+    def test_duplicate_events_counted_once_per_tick(self, database, counters):
+        """Test that a repeated id within one tick is only counted once."""
+        signal_bus.domain.generation_completed.emit("item_0")
+        signal_bus.domain.generation_completed.emit("item_0")
+        counters.flush()
+
+        assert _value(database, "orders.completed_count", "order_1") == 1
+
+    def test_unknown_counter_rejected(self, counters):
+        """Test that adjust() refuses columns it does not maintain."""
+        with pytest.raises(KeyError):
+            counters.adjust("projects.name", "p1", 1)
+
+
+class TestVerifyAndRepair:
+    """Test suite for verify_counters and repair_counters."""
+
+    def test_verify_reports_drift(self, database, counters):
+        """Test that verify lists counters that differ from the real counts."""
+        _add_product(database, "product_1")
+        with database.engine.begin() as connection:
+            mismatches = verify_counters(connection)
+
+        found = {(m.table, m.column, m.row_id, m.stored, m.actual) for m in mismatches}
+        assert found == {
+            ("projects", "product_count", "p1", 0, 1),
+            ("projects", "order_count", "p1", 0, 1),
+            ("collections", "product_count", "c1", 0, 1),
+            ("tags", "usage_count", "t1", 0, 1),
+        }
+
+    def test_repair_fixes_drift(self, database, counters):
+        """Test that repair rewrites drifted counters and leaves none behind."""
+        _add_product(database, "product_1")
+        database.writer.update_item_status("item_0", "complete")
+        database.writer.update_item_status("item_1", "failed")
+        database.writer.flush()
+
+        with database.engine.begin() as connection:
+            assert repair_counters(connection) == 6
+        with database.engine.begin() as connection:
+            assert verify_counters(connection) == []
+            assert repair_counters(connection) == 0
+
+        assert _value(database, "orders.completed_count", "order_1") == 1
+        assert _value(database, "tags.usage_count", "t1") == 1
+
+    def test_deleted_products_not_counted(self, database, counters):
+        """Test that soft-deleted products drop out of the real counts."""
+        _add_product(database, "product_1")
+        database.writer.update(
+            Project.__table__, "p1", {"product_count": 1, "order_count": 1}
+        )
+        database.writer.update(Collection.__table__, "c1", {"product_count": 1})
+        database.writer.update(Tag.__table__, "t1", {"usage_count": 1})
+        database.writer.flush()
+        with database.engine.begin() as connection:
+            assert verify_counters(connection) == []
+            connection.execute(
+                text("UPDATE products SET deleted_at = CURRENT_TIMESTAMP")
+            )
+            mismatches = verify_counters(connection)
+
+        assert {(m.table, m.actual) for m in mismatches} == {
+            ("projects", 0),
+            ("collections", 0),
+            ("tags", 0),
+        }
@@ -0,0 +1,338 @@
+"""Tests for the crash-safe order execution journal."""
+
+# Execution journal testing
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+from models import Order, OrderItem, Project
+from services.execution_journal import ExecutionJournal, reconcile_journal
+from services.generation_scheduler import (
+    GenerationScheduler,
+    ScheduledItem,
+)
+
+APP_DIR = Path(__file__).resolve().parents[3] / "app"
+
+# Runs a scheduler against a fake provider until it is killed. The provider
+# "charges" an item by appending it to the ledger (fsynced) and answering
+# with a request id. Items n % 3 == 0 take forever at the provider, items
+# n % 5 == 1 take forever before the provider answers.
+CHILD_SCRIPT = """
+import os, sys, threading, time
+sys.path.insert(0, {app_dir!r})
+
+from models import Database
+from models.base import utcnow
+from services.execution_journal import ExecutionJournal
+from services.generation_scheduler import (
+    GenerationScheduler, ProviderLimits, ScheduledItem,
+)
+
+database_path, journal_path, ledger_path, count = sys.argv[1:5]
+database = Database(database_path, write_tick_ms=5)
+database.start()
+journal = ExecutionJournal(journal_path, sync_interval_ms=20)
+journal.open()
+ledger = open(ledger_path, "a")
+ledger_lock = threading.Lock()
+
+
+def execute(item):
+    number = int(item.item_id[-3:])
+    database.writer.update_item_status(item.item_id, "generating", started_at=utcnow())
+    if number % 5 == 1:
+        time.sleep(600)
+    request_id = "req-" + item.item_id
+    with ledger_lock:
+        ledger.write(item.item_id + " " + request_id + "\\n")
+        ledger.flush()
+        os.fsync(ledger.fileno())
+    item.record_request(request_id)
+    time.sleep(600 if number % 3 == 0 else 0.002)
+    database.writer.update_item_status(item.item_id, "complete", completed_at=utcnow())
+
+
+scheduler = GenerationScheduler(
+    execute, [ProviderLimits("fake", concurrent_limit=32)], journal=journal
+)
+scheduler.start()
+scheduler.enqueue_many(
+    ScheduledItem("item_%03d" % n, "fake", "p1") for n in range(int(count))
+)
+time.sleep(600)
+"""
+
+
+def statuses(database):
+    """Return {item id: (status, provider_request_id)}."""
+    with database.engine.connect() as connection:
+        return {
+            item_id: (status, request_id)
+            for item_id, status, request_id in connection.execute(
+                select(OrderItem.id, OrderItem.status, OrderItem.provider_request_id)
+            )
+        }
+
+
+@pytest.fixture
+def make_items(database):
+    """Create an order with the given number of items item_000, item_001..."""
+
+    def factory(count):
+        writer = database.writer
+        writer.insert(Project.__table__, [{"id": "p1", "name": "Space"}])
+        writer.insert(
+            Order.__table__,
+            [
+                {
+                    "id": "o1",
+                    "project_id": "p1",
+                    "provider": "fake",
+                    "model": "flux",
+                    "base_parameter_set": {},
+                }
+            ],
+        )
+        writer.insert(
+            OrderItem.__table__,
+            [
+                {"id": f"item_{n:03d}", "order_id": "o1", "sequence_number": n}
+                for n in range(count)
+            ],
+        )
+        writer.flush()
+        return database
+
+    return factory
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Provide an open journal that is closed after the test."""
+    execution_journal = ExecutionJournal(tmp_path / "journal.log")
+    execution_journal.open()
+    yield execution_journal
+    execution_journal.close()
+
+
+class TestExecutionJournal:
+    """Test suite for ExecutionJournal."""
+
+    def test_durable_appends_share_fsyncs(self, journal):
+        """Test that concurrent durable records are batched into few fsyncs."""
+
+        def worker(thread):
+            for n in range(50):
+                journal.begin(f"item_{thread}_{n}", "fake").result(10)
+
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert journal.record_count == 400
+        assert journal.sync_count < 400
+        assert len(journal.replay()) == 400
+
+    def test_replay_keeps_latest_state(self, journal):
+        """Test that replay reports each item's last event and request id."""
+        journal.begin("item_1", "fake")
+        journal.submitted("item_1", "req-1")
+        journal.finish("item_1", "complete")
+        journal.begin("item_2", "fake")
+        journal.submitted("item_2", "req-2")
+        journal.finish("item_3", "failed", "boom")
+        journal.flush()
+
+        states = journal.replay()
+        assert (states["item_1"].event, states["item_1"].request_id) == (
+            "complete",
+            "req-1",
+        )
+        assert states["item_2"].open and states["item_2"].request_id == "req-2"
+        assert states["item_3"].error == "boom"
+
+    def test_torn_last_record_is_ignored(self, journal):
+        """Test that a record cut short by a crash does not break replay."""
+        journal.begin("item_1", "fake")
+        journal.submitted("item_1", "req-1").result(10)
+        journal.close()
+        with open(journal.path, "ab") as handle:
+            handle.write(b'{"item":"item_1","event":"comp')
+
+        assert journal.replay()["item_1"].event == "submitted"
+
+    def test_scheduler_journals_each_item(self, qapp, journal):
+        """Test that scheduled items are journalled from begin to finish."""
+
+        def execute(item):
+            item.record_request(f"req-{item.item_id}")
+            if item.item_id == "bad":
+                raise RuntimeError("content policy")
+
+        scheduler = GenerationScheduler(execute, journal=journal)
+        scheduler.start()
+        scheduler.enqueue_many(
+            [ScheduledItem("good", "fake"), ScheduledItem("bad", "fake")]
+        )
+        deadline = time.monotonic() + 10
+        while journal.record_count < 6:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        scheduler.stop()
+        journal.flush()
+
+        states = journal.replay()
+        assert states["good"].event == "complete"
+        assert states["good"].request_id == "req-good"
+        assert (states["bad"].event, states["bad"].error) == (
+            "failed",
+            "content policy",
+        )
+
+    def test_stop_leaves_running_items_resumable(self, qtbot, journal):
+        """Test that a shutdown does not journal running items as cancelled."""
+        from signals import signal_bus
+
+        started = threading.Event()
+
+        def execute(item):
+            item.record_request(f"req-{item.item_id}").result(10)
+            started.set()
+            assert item.cancel_event.wait(10)
+
+        cancelled = []
+        signal_bus.domain.generation_cancelled.connect(cancelled.append)
+        scheduler = GenerationScheduler(execute, journal=journal)
+        scheduler.start()
+        scheduler.enqueue(ScheduledItem("item_1", "fake"))
+        assert started.wait(10)
+
+        scheduler.stop()
+        journal.flush()
+        signal_bus.domain.generation_cancelled.disconnect(cancelled.append)
+
+        state = journal.replay()["item_1"]
+        assert state.open and state.request_id == "req-item_1"
+        assert cancelled == []
+
+
+class TestReconcileJournal:
+    """Test suite for reconcile_journal()."""
+
+    def test_settles_each_kind_of_item(self, make_items, journal):
+        """Test resume, needs_retry, requeue and lost finishes."""
+        database = make_items(5)
+        for n in range(4):
+            database.writer.update_item_status(f"item_{n:03d}", "generating")
+        database.writer.update_item_status("item_004", "complete")
+        database.writer.flush()
+        journal.begin("item_000", "fake")
+        journal.begin("item_001", "fake")
+        journal.submitted("item_001", "req-1")
+        journal.begin("item_002", "fake")
+        journal.submitted("item_002", "req-2")
+        journal.finish("item_002", "complete")
+        journal.begin("item_004", "fake")
+        journal.close()
+
+        result = reconcile_journal(journal, database)
+
+        assert result.retry == ["item_000"]
+        assert [(item.item_id, item.provider_request_id) for item in result.resume] == [
+            ("item_001", "req-1")
+        ]
+        assert result.resume[0].provider_id == "fake"
+        assert result.resume[0].project_id == "p1"
+        assert result.closed == ["item_002"]
+        assert result.requeued == ["item_003"]
+        assert statuses(database) == {
+            "item_000": ("needs_retry", None),
+            "item_001": ("generating", "req-1"),
+            "item_002": ("complete", None),
+            "item_003": ("pending", None),
+            "item_004": ("complete", None),
+        }
+        assert list(journal.replay()) == ["item_001"]
+
+    def test_retrying_item_drops_its_request(self, make_items, journal):
+        """Test that an item waiting for a retry is requeued, not re-polled."""
+        database = make_items(1)
+        database.writer.update_item_status(
+            "item_000", "pending", provider_request_id="req-0"
+        )
+        database.writer.flush()
+        journal.begin("item_000", "fake")
+        journal.submitted("item_000", "req-0")
+        journal.finish("item_000", "retrying", "503")
+        journal.close()
+
+        assert journal.replay()["item_000"].request_id is None
+        result = reconcile_journal(journal, database)
+
+        assert result.resume == []
+        assert result.requeued == ["item_000"]
+        assert statuses(database) == {"item_000": ("pending", None)}
+
+    def test_recovers_from_killed_process(self, make_items, tmp_path):
+        """Test that nothing a killed run was charged for is submitted again."""
+        count = 200
+        database = make_items(count)
+        script = tmp_path / "child.py"
+        script.write_text(textwrap.dedent(CHILD_SCRIPT.format(app_dir=str(APP_DIR))))
+        ledger_path = tmp_path / "ledger.txt"
+        ledger_path.touch()
+        journal_path = tmp_path / "journal.log"
+        environment = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+        child = subprocess.Popen(
+            [
+                sys.executable,
+                str(script),
+                str(database.path),
+                str(journal_path),
+                str(ledger_path),
+                str(count),
+            ],
+            env=environment,
+        )
+        try:
+            deadline = time.monotonic() + 60
+            while len(ledger_path.read_text().splitlines()) < 30:
+                assert child.poll() is None, "child exited early"
+                assert time.monotonic() < deadline, "child made no progress"
+                time.sleep(0.01)
+        finally:
+            child.kill()
+            child.wait()
+
+        charged = dict(line.split() for line in ledger_path.read_text().splitlines())
+        journal = ExecutionJournal(journal_path)
+        result = reconcile_journal(journal, database)
+        after = statuses(database)
+
+        resumed = {item.item_id: item.provider_request_id for item in result.resume}
+        assert resumed and result.retry
+        for item_id, request_id in charged.items():
+            status, stored_request = after[item_id]
+            assert status in ("complete", "generating", "needs_retry"), item_id
+            if status == "generating":
+                assert resumed[item_id] == stored_request == request_id
+        # Items the scheduler never started are still waiting to be scheduled
+        assert [status for status, _ in after.values()].count("pending") > 0
+        assert set(resumed) <= set(charged)
+        assert {
+            item_id for item_id, (status, _) in after.items() if status == "complete"
+        }.isdisjoint(resumed)
+
+        again = reconcile_journal(journal, database)
+        assert {item.item_id for item in again.resume} == set(resumed)
+        assert not (again.retry or again.requeued or again.closed)
@@ -0,0 +1,285 @@
+"""Tests for the provider-aware generation scheduler."""
+
+# Generation scheduler testing
+import threading
+import time
+
+import pytest
+
+from services.generation_scheduler import (
+    BULK,
+    INTERACTIVE,
+    GenerationScheduler,
+    ProviderLimits,
+    ScheduledItem,
+    TokenBucket,
+)
+
+
+class FakeProvider:
+    """Local stand-in for a provider API that records what it runs."""
+
+    def __init__(self, duration: float = 0.0):
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.executed = []
+        self.running = {}
+        self.max_running = {}
+
+    def __call__(self, item: ScheduledItem):
+        provider = item.provider_id
+        with self.lock:
+            self.running[provider] = self.running.get(provider, 0) + 1
+            self.max_running[provider] = max(
+                self.max_running.get(provider, 0), self.running[provider]
+            )
+        if self.duration:
+            time.sleep(self.duration)
+        with self.lock:
+            self.running[provider] -= 1
+            self.executed.append(item.item_id)
+
+
+def wait_for(condition, timeout: float = 30.0):
+    """Poll until condition() is true."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def make_scheduler(qapp):
+    """Create schedulers that are stopped after the test."""
+    schedulers = []
+
+    def factory(*args, **kwargs):
+        scheduler = GenerationScheduler(*args, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield factory
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+class TestTokenBucket:
+    """Test suite for TokenBucket."""
+
+    def test_burst_then_refill(self):
+        """Test that a full bucket allows a burst and then refills."""
+        now = [0.0]
+        bucket = TokenBucket.per_minute(120, clock=lambda: now[0])
+
+        assert bucket.capacity == 2
+        for _ in range(2):
+            assert bucket.delay() == 0
+            bucket.consume()
+        assert bucket.delay() == pytest.approx(0.5)
+
+        now[0] = 0.5
+        assert bucket.delay() == 0
+
+    def test_oversized_request_waits_for_full_bucket(self):
+        """Test that a cost above capacity is clamped, not blocked forever."""
+        now = [0.0]
+        bucket = TokenBucket(rate=1, capacity=2, clock=lambda: now[0])
+        bucket.consume(2)
+
+        assert bucket.delay(10) == pytest.approx(2)
+
+
+class TestGenerationScheduler:
+    """Test suite for GenerationScheduler."""
+
+    def test_ten_thousand_items_respect_concurrency(self, make_scheduler):
+        """Test a large queue across providers with concurrency caps."""
+        provider = FakeProvider()
+        limits = [
+            ProviderLimits("replicate", concurrent_limit=3),
+            ProviderLimits("fal", concurrent_limit=5),
+        ]
+        scheduler = make_scheduler(provider, limits, max_workers=8)
+        scheduler.enqueue_many(
+            ScheduledItem(
+                f"item_{n}",
+                ("replicate", "fal", "local")[n % 3],
+                f"project_{n % 7}",
+            )
+            for n in range(10_000)
+        )
+        assert scheduler.queued_count() == 10_000
+
+        scheduler.start()
+        wait_for(lambda: len(provider.executed) == 10_000)
+
+        assert provider.max_running["replicate"] <= 3
+        assert provider.max_running["fal"] <= 5
+        assert provider.max_running["local"] <= 4
+        assert scheduler.queued_count() == 0
+        wait_for(lambda: scheduler.running_count() == 0)
+
+    def test_interactive_lane_first_without_starving_bulk(self, make_scheduler):
+        """Test priority lanes with a bulk turn after each interactive burst."""
+        provider = FakeProvider()
+        scheduler = make_scheduler(
+            provider, [ProviderLimits("replicate", concurrent_limit=1)]
+        )
+        scheduler.enqueue_many(
+            ScheduledItem(f"bulk_{n}", "replicate", lane=BULK) for n in range(3)
+        )
+        scheduler.enqueue_many(
+            ScheduledItem(f"now_{n}", "replicate", lane=INTERACTIVE) for n in range(6)
+        )
+
+        scheduler.start()
+        wait_for(lambda: len(provider.executed) == 9)
+
+        assert provider.executed[:7] == [
+            "now_0",
+            "now_1",
+            "now_2",
+            "now_3",
+            "bulk_0",
+            "now_4",
+            "now_5",
+        ]
+
+    def test_projects_share_a_provider_fairly(self, make_scheduler):
+        """Test that a small project is not stuck behind a large order."""
+        provider = FakeProvider()
+        scheduler = make_scheduler(
+            provider, [ProviderLimits("replicate", concurrent_limit=1)]
+        )
+        scheduler.enqueue_many(
+            ScheduledItem(f"big_{n}", "replicate", "big") for n in range(100)
+        )
+        scheduler.enqueue_many(
+            ScheduledItem(f"small_{n}", "replicate", "small") for n in range(3)
+        )
+
+        scheduler.start()
+        wait_for(lambda: len(provider.executed) == 103)
+
+        assert provider.executed[:6] == [
+            "big_0",
+            "small_0",
+            "big_1",
+            "small_1",
+            "big_2",
+            "small_2",
+        ]
+
+    def test_request_rate_limit(self, make_scheduler):
+        """Test that a per-minute request limit spaces out dispatches."""
+        provider = FakeProvider()
+        scheduler = make_scheduler(
+            provider,
+            [ProviderLimits("replicate", rate_limit_requests=600, concurrent_limit=50)],
+        )
+        scheduler.enqueue_many(
+            ScheduledItem(f"item_{n}", "replicate") for n in range(15)
+        )
+
+        start = time.monotonic()
+        scheduler.start()
+        wait_for(lambda: len(provider.executed) == 15)
+
+        # 10 tokens of burst, then 5 more at 10/s
+        assert time.monotonic() - start >= 0.4
+
+    def test_cancel_queued_item_from_signal(self, qtbot, make_scheduler):
+        """Test that ui.request_cancel drops a queued item."""
+        from signals import signal_bus
+
+        provider = FakeProvider()
+        scheduler = make_scheduler(provider)
+        scheduler.enqueue_many(
+            ScheduledItem(f"item_{n}", "replicate") for n in range(3)
+        )
+
+        with qtbot.waitSignal(signal_bus.domain.generation_cancelled) as blocker:
+            signal_bus.ui.request_cancel.emit("item_1")
+        assert blocker.args == ["item_1"]
+        assert scheduler.queued_count() == 2
+
+        scheduler.start()
+        wait_for(lambda: len(provider.executed) == 2)
+        assert "item_1" not in provider.executed
+
+    def test_cancel_running_item(self, qtbot, make_scheduler):
+        """Test that a running item is told to stop and reported cancelled."""
+        from signals import signal_bus
+
+        started = threading.Event()
+
+        def execute(item):
+            started.set()
+            assert item.cancel_event.wait(5)
+
+        scheduler = make_scheduler(execute)
+        scheduler.enqueue(ScheduledItem("item_1", "replicate"))
+        scheduler.start()
+        started.wait(5)
+
+        with qtbot.waitSignal(signal_bus.domain.generation_cancelled) as blocker:
+            assert scheduler.cancel("item_1")
+        assert blocker.args == ["item_1"]
+
+    def test_failures_reported(self, qtbot, make_scheduler):
+        """Test that an exception from execute() marks the item failed."""
+        from signals import signal_bus
+
+        def execute(item):
+            raise RuntimeError("provider returned 500")
+
+        scheduler = make_scheduler(execute)
+        scheduler.enqueue(ScheduledItem("item_1", "replicate"))
+
+        with qtbot.waitSignal(signal_bus.domain.generation_failed) as blocker:
+            scheduler.start()
+        assert blocker.args == ["item_1", "provider returned 500"]
+
+    def test_stats_report_queue_depth_and_waits(self, qtbot, make_scheduler):
+        """Test the scheduler_stats emission."""
+        from signals import signal_bus
+
+        provider = FakeProvider(duration=0.01)
+        scheduler = make_scheduler(
+            provider,
+            [ProviderLimits("replicate", concurrent_limit=1)],
+            stats_interval_ms=20,
+        )
+        scheduler.enqueue_many(
+            ScheduledItem(f"item_{n}", "replicate") for n in range(20)
+        )
+
+        with qtbot.waitSignal(signal_bus.domain.scheduler_stats) as blocker:
+            scheduler.start()
+        stats = blocker.args[0]["replicate"]
+        assert stats["concurrent_limit"] == 1
+        assert stats["queued"] + stats["running"] <= 20
+        assert set(stats) >= {"dispatched", "wait_ms_avg", "wait_ms_max"}
+
+    def test_stats_only_emitted_when_counts_change(self, qtbot, make_scheduler):
+        """Test that an idle scheduler does not repeat scheduler_stats."""
+        from signals import signal_bus
+
+        emitted = []
+        signal_bus.domain.scheduler_stats.connect(emitted.append)
+        scheduler = make_scheduler(FakeProvider(), stats_interval_ms=5)
+        scheduler.start()
+        qtbot.waitUntil(lambda: len(emitted) == 1)
+        qtbot.wait(100)
+        assert len(emitted) == 1
+
+        scheduler.enqueue(ScheduledItem("item_1", "replicate"))
+        idle = {"queued": 0, "running": 0}
+        qtbot.waitUntil(
+            lambda: emitted[-1].get("replicate", {}).items() >= idle.items()
+        )
+        count = len(emitted)
+        qtbot.wait(100)
+        signal_bus.domain.scheduler_stats.disconnect(emitted.append)
+
+        assert len(emitted) == count
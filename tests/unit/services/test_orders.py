@@ -0,0 +1,73 @@
+"""Tests for order creation."""
+
+# Order creation testing
+import pytest
+from sqlalchemy import func, select
+
+from models import Order, OrderItem, Project
+from services.orders import create_order
+from signals import signal_bus
+from utils.order_expansion import ExpansionError
+
+
+@pytest.fixture
+def project(database):
+    """Provide a database with project p1."""
+    database.writer.insert(Project.__table__, [{"id": "p1", "name": "Space"}])
+    database.writer.flush()
+    return database
+
+
+class TestCreateOrder:
+    """Test suite for create_order."""
+
+    def test_large_order_inserted_in_chunks(self, qtbot, project, monkeypatch):
+        """Test that a large order reaches the writer chunk by chunk."""
+        writer = project.writer
+        chunks = []
+        insert_order_items = writer.insert_order_items
+
+        def record(rows):
+            chunks.append(len(rows))
+            return insert_order_items(rows)
+
+        monkeypatch.setattr(writer, "insert_order_items", record)
+        progress = []
+        signal_bus.domain.order_items_expanded.connect(
+            lambda order_id, count: progress.append(count)
+        )
+
+        with qtbot.waitSignal(signal_bus.domain.order_created) as blocker:
+            order_id = create_order(
+                project,
+                "replicate",
+                "flux",
+                {"prompt": "[a,b,c,d,e] cat", "steps": "1..1000"},
+                project_id="p1",
+                chunk_size=500,
+            )
+
+        assert blocker.args == [order_id]
+        assert chunks == [500] * 10
+        assert progress[-1] == 5000
+        with project.engine.connect() as connection:
+            count, last = connection.execute(
+                select(func.count(), func.max(OrderItem.sequence_number)).where(
+                    OrderItem.order_id == order_id
+                )
+            ).one()
+            expanded = connection.execute(
+                select(Order.expanded_count).where(Order.id == order_id)
+            ).scalar_one()
+        assert (count, last, expanded) == (5000, 5000, 5000)
+
+    def test_oversized_order_rejected_before_writing(self, project):
+        """Test that an order over the item limit writes nothing."""
+        with pytest.raises(ExpansionError):
+            create_order(
+                project, "replicate", "flux", {"steps": "1..1000"}, max_items=999
+            )
+
+        project.writer.flush()
+        with project.engine.connect() as connection:
+            assert connection.execute(select(func.count(Order.id))).scalar_one() == 0
@@ -0,0 +1,181 @@
+"""Tests for gallery navigation prefetching."""
+
+# Navigation prefetch testing
+import pytest
+
+from services.prefetch import NavigationPrefetcher, pixmap_estimate
+from signals import signal_bus
+from views.widgets.gallery_widget import ProductListModel
+
+
+class FakeMemory(set):
+    """Memory tier holding (product_id, size_name) keys."""
+
+    budget_bytes = 64 * 1024 * 1024
+
+
+class FakeThumbnailCache:
+    """Queues requests until complete() and records cancellations."""
+
+    def __init__(self):
+        self.memory = FakeMemory()
+        self.queue = []
+        self.cancelled = []
+
+    def request(self, product_id, size_name="small"):
+        key = (product_id, size_name)
+        if key not in self.memory and key not in self.queue:
+            self.queue.append(key)
+
+    def is_pending(self, product_id, size_name="small"):
+        return (product_id, size_name) in self.queue
+
+    def cancel(self, product_id, size_name="small"):
+        key = (product_id, size_name)
+        if key not in self.queue:
+            return False
+        self.queue.remove(key)
+        self.cancelled.append(key)
+        return True
+
+    def complete(self):
+        self.memory.update(self.queue)
+        self.queue.clear()
+
+
+def fetch_page(filters, cursor, limit):
+    """Offset-paged source of 1000 product ids."""
+    offset = cursor or 0
+    ids = [f"product_{n}" for n in range(offset, min(offset + limit, 1000))]
+    return ids, offset + limit if offset + limit < 1000 else None
+
+
+@pytest.fixture
+def model(qapp):
+    """Provide a product model with its first page loaded."""
+    model = ProductListModel(fetch_page, page_size=50)
+    model.fetchMore()
+    return model
+
+
+@pytest.fixture
+def cache():
+    """Provide a fake thumbnail cache."""
+    return FakeThumbnailCache()
+
+
+def select(product_id):
+    """Emit a gallery selection of one product."""
+    signal_bus.ui.selection_changed.emit([product_id])
+
+
+class TestNavigationPrefetcher:
+    """Test suite for NavigationPrefetcher."""
+
+    def test_selection_warms_neighbours_ahead_first(self, model, cache):
+        """Test that selecting a product queues it, then the next and previous N."""
+        prefetcher = NavigationPrefetcher(model, cache, window=2, size_names=["small"])
+
+        select("product_10")
+
+        assert prefetcher.requested == 5
+        assert cache.queue == [
+            ("product_10", "small"),
+            ("product_11", "small"),
+            ("product_12", "small"),
+            ("product_9", "small"),
+            ("product_8", "small"),
+        ]
+
+    def test_hits_after_prefetch(self, model, cache):
+        """Test that stepping onto a prefetched product counts as a hit."""
+        prefetcher = NavigationPrefetcher(model, cache, window=2, size_names=["small"])
+
+        select("product_10")
+        cache.complete()
+        select("product_11")
+
+        assert (prefetcher.hits, prefetcher.misses) == (1, 1)
+        assert prefetcher.hit_rate == 0.5
+
+    def test_stale_prefetches_cancelled(self, model, cache):
+        """Test that a jump withdraws queued prefetches outside the new plan."""
+        prefetcher = NavigationPrefetcher(model, cache, window=2, size_names=["small"])
+
+        select("product_10")
+        select("product_30")
+
+        assert set(cache.cancelled) == {
+            ("product_10", "small"),
+            ("product_11", "small"),
+            ("product_12", "small"),
+            ("product_9", "small"),
+            ("product_8", "small"),
+        }
+        assert prefetcher.cancelled == 5
+        assert cache.queue[:2] == [("product_30", "small"), ("product_31", "small")]
+
+    def test_direction_change_reorders_queue(self, model, cache):
+        """Test that reversing cancels the queue and requeues backwards first."""
+        prefetcher = NavigationPrefetcher(model, cache, window=2, size_names=["small"])
+        select("product_10")
+        select("product_11")
+
+        select("product_10")
+
+        assert prefetcher.cancelled > 0
+        assert cache.queue[:3] == [
+            ("product_10", "small"),
+            ("product_9", "small"),
+            ("product_8", "small"),
+        ]
+
+    def test_budget_limits_plan(self, model, cache):
+        """Test that the estimated bytes of a plan stay within the budget."""
+        budget = pixmap_estimate("large") * 4 + pixmap_estimate("small") * 4
+        prefetcher = NavigationPrefetcher(
+            model, cache, window=8, size_names=["small", "large"], budget_bytes=budget
+        )
+
+        select("product_10")
+
+        assert cache.queue == [
+            (f"product_{n}", size)
+            for n in (10, 11, 12, 13)
+            for size in ("small", "large")
+        ]
+        assert prefetcher.requested == 8
+
+    def test_warm_products_not_requested(self, model, cache):
+        """Test that products already in memory are skipped."""
+        cache.memory.update({("product_10", "small"), ("product_11", "small")})
+        prefetcher = NavigationPrefetcher(model, cache, window=1, size_names=["small"])
+
+        select("product_10")
+
+        assert cache.queue == [("product_9", "small")]
+        assert prefetcher.requested == 1
+
+    def test_page_change_warms_next_page(self, model, cache):
+        """Test that paging forward loads and warms the rows past the page."""
+        prefetcher = NavigationPrefetcher(model, cache, window=3)
+
+        signal_bus.ui.page_changed.emit(2)
+
+        assert cache.queue[:3] == [
+            ("product_100", "small"),
+            ("product_101", "small"),
+            ("product_102", "small"),
+        ]
+        assert model.rowCount() >= 104
+        assert prefetcher.misses == 3
+
+    def test_filter_resets_position(self, model, cache):
+        """Test that applying filters withdraws every queued prefetch."""
+        prefetcher = NavigationPrefetcher(model, cache, window=2, size_names=["small"])
+        select("product_10")
+
+        signal_bus.ui.filter_applied.emit({"liked": True})
+
+        assert cache.queue == []
+        assert prefetcher.cancelled == 5
@@ -0,0 +1,212 @@
+"""Tests for single-pass product ingestion."""
+
+# Product ingestion testing
+import asyncio
+import hashlib
+import io
+import threading
+
+import pytest
+from PIL import Image
+from sqlalchemy import func, select
+
+from models import Product, Project
+from services.product_ingestion import IngestWriter, ProductIngestor
+
+
+def image_bytes(size=(64, 48), image_format="PNG", color="red", **save_options):
+    """Encode a solid image."""
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, image_format, **save_options)
+    return buffer.getvalue()
+
+
+def chunked(data: bytes, size: int):
+    """Split data into chunks of the given size."""
+    return [data[start : start + size] for start in range(0, len(data), size)]
+
+
+class FakeThumbnailCache:
+    """Records thumbnail generation requests."""
+
+    def __init__(self):
+        self.requests = []
+
+    def generate_files(self, file_path, file_hash):
+        self.requests.append((file_path, file_hash))
+
+
+@pytest.fixture
+def ingestor(database, tmp_path):
+    """Provide an ingestor writing under tmp_path, with two projects."""
+    database.writer.insert(
+        Project.__table__,
+        [{"id": "project_1", "name": "One"}, {"id": "project_2", "name": "Two"}],
+    ).result()
+    return ProductIngestor(
+        database,
+        FakeThumbnailCache(),
+        products_root=tmp_path / "products",
+        temp_root=tmp_path / "temp",
+    )
+
+
+def product_count(database) -> int:
+    """Count the rows in the products table."""
+    with database.session_factory() as session:
+        return session.scalar(select(func.count()).select_from(Product))
+
+
+class TestProductIngestor:
+    """Test suite for ProductIngestor."""
+
+    def test_ingest_computes_metadata_in_one_pass(self, ingestor, database):
+        """Test that hash, size, type and dimensions come from one stream."""
+        data = image_bytes((64, 48))
+        consumed = []
+
+        def chunks():
+            for chunk in chunked(data, 100):
+                consumed.append(len(chunk))
+                yield chunk
+
+        product = ingestor.ingest_chunks(chunks(), project_id=None)
+
+        assert sum(consumed) == len(data)
+        assert product.file_hash == hashlib.sha256(data).hexdigest()
+        assert product.file_size == len(data)
+        assert product.mime_type == "image/png"
+        assert (product.width, product.height) == (64, 48)
+        assert not product.duplicate
+
+        with database.session_factory() as session:
+            row = session.get(Product, product.product_id)
+        assert row.file_hash == product.file_hash
+        assert row.type == "image"
+        assert (row.width, row.height, row.file_size) == (64, 48, len(data))
+
+    def test_file_stored_at_final_path(self, ingestor, tmp_path):
+        """Test the products/{project}/{yyyy}/{mm}/{id}_{hash}.ext layout."""
+        data = image_bytes(image_format="JPEG")
+        source = tmp_path / "source.jpg"
+        source.write_bytes(data)
+
+        product = ingestor.ingest_file(source, project_id="project_1")
+
+        path = tmp_path / "products" / "project_1"
+        stored = list(path.glob("*/*/*"))
+        assert [str(file) for file in stored] == [product.file_path]
+        assert stored[0].name == f"{product.product_id}_{product.file_hash}.jpg"
+        assert stored[0].read_bytes() == data
+        assert list((tmp_path / "temp").iterdir()) == []
+
+    def test_product_created_emitted_after_commit(self, ingestor, database):
+        """Test that product_created fires once the row is readable."""
+        seen = []
+
+        def on_created(product_id):
+            with database.session_factory() as session:
+                seen.append(session.get(Product, product_id) is not None)
+
+        ingestor.signal_bus.domain.product_created.connect(on_created)
+        ingestor.ingest_chunks([image_bytes()])
+        assert seen == [True]
+
+    def test_thumbnails_queued_for_images(self, ingestor):
+        """Test that thumbnail generation is queued with the final path."""
+        product = ingestor.ingest_chunks([image_bytes()])
+        assert ingestor.thumbnail_cache.requests == [
+            (product.file_path, product.file_hash)
+        ]
+
+        ingestor.ingest_chunks([b"not an image"])
+        assert len(ingestor.thumbnail_cache.requests) == 1
+
+    def test_duplicate_discarded_before_rename(self, ingestor, database, tmp_path):
+        """Test that a known hash returns the existing product, storing nothing."""
+        data = image_bytes()
+        first = ingestor.ingest_chunks([data], project_id="project_1")
+        created = []
+        ingestor.signal_bus.domain.product_created.connect(created.append)
+
+        second = ingestor.ingest_chunks(chunked(data, 10), project_id="project_2")
+
+        assert second.duplicate
+        assert second.product_id == first.product_id
+        assert created == []
+        assert product_count(database) == 1
+        assert not (tmp_path / "products" / "project_2").exists()
+        assert list((tmp_path / "temp").iterdir()) == []
+
+    def test_concurrent_duplicates_make_one_product(self, ingestor, database):
+        """Test that identical files ingested together produce one product."""
+        data = image_bytes((32, 32))
+        results = []
+        barrier = threading.Barrier(8)
+
+        def ingest():
+            barrier.wait()
+            results.append(ingestor.ingest_chunks(chunked(data, 64)))
+
+        threads = [threading.Thread(target=ingest) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({result.product_id for result in results}) == 1
+        assert sum(not result.duplicate for result in results) == 1
+        assert product_count(database) == 1
+
+    def test_dimensions_found_after_large_exif(self, ingestor):
+        """Test that JPEG dimensions after a big metadata block are sniffed."""
+        exif = Image.Exif()
+        exif[0x010E] = "x" * 60_000  # ImageDescription
+        data = image_bytes((120, 90), "JPEG", exif=exif.tobytes())
+        product = ingestor.ingest_chunks(chunked(data, 4096))
+        assert product.mime_type == "image/jpeg"
+        assert (product.width, product.height) == (120, 90)
+
+    def test_failed_stream_leaves_nothing(self, ingestor, database, tmp_path):
+        """Test that an error mid-stream removes the partial file."""
+
+        def chunks():
+            yield image_bytes()[:50]
+            raise ConnectionError("download interrupted")
+
+        with pytest.raises(ConnectionError):
+            ingestor.ingest_chunks(chunks())
+        assert list((tmp_path / "temp").iterdir()) == []
+        assert product_count(database) == 0
+
+    def test_ingest_download_streams_through_writer(self, ingestor, monkeypatch):
+        """Test that downloads are ingested chunk by chunk off the loop thread."""
+        data = image_bytes((20, 10), "WEBP")
+
+        threads = set()
+        write = IngestWriter.write
+
+        def record(writer, chunk):
+            threads.add(threading.current_thread())
+            write(writer, chunk)
+
+        monkeypatch.setattr(IngestWriter, "write", record)
+
+        class FakeClient:
+            async def download_to(self, url, write):
+                for chunk in chunked(data, 16):
+                    await write(chunk)
+                return len(data)
+
+        async def download():
+            loop_thread = threading.current_thread()
+            product = await ingestor.ingest_download(
+                FakeClient(), "https://example.test/out.webp"
+            )
+            return product, loop_thread
+
+        product, loop_thread = asyncio.run(download())
+        assert threads and loop_thread not in threads
+        assert product.mime_type == "image/webp"
+        assert product.file_path.endswith(".webp")
+        assert product.file_hash == hashlib.sha256(data).hexdigest()
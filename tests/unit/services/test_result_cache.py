@@ -0,0 +1,210 @@
+"""Tests for the generation result cache."""
+
+# Result cache testing
+import os
+
+import pytest
+from sqlalchemy import select
+
+from models import Order, OrderItem, Product, Project, Provider
+from models.base import utcnow
+from services.generation_scheduler import ScheduledItem
+from services.result_cache import (
+    CacheSettings,
+    ResultCache,
+    cache_key,
+    cache_report,
+    load_cache_settings,
+)
+from signals import signal_bus
+
+PARAMETERS = {"prompt": "A red car", "steps": 20, "seed": 42}
+
+
+@pytest.fixture
+def library(database, tmp_path):
+    """Create order o1 with items item_0..item_3; item_0 has one image."""
+    source = tmp_path / "source.png"
+    source.write_bytes(b"\x89PNG fake image bytes")
+    writer = database.writer
+    writer.insert(Project.__table__, [{"id": "p1", "name": "Space"}])
+    writer.insert(
+        Order.__table__,
+        [
+            {
+                "id": "o1",
+                "project_id": "p1",
+                "provider": "fake",
+                "model": "flux",
+                "base_parameter_set": {},
+            }
+        ],
+    )
+    writer.insert(
+        OrderItem.__table__,
+        [
+            {
+                "id": f"item_{n}",
+                "order_id": "o1",
+                "sequence_number": n,
+                "return_parameter_set": {"seed": 42} if n == 0 else None,
+            }
+            for n in range(4)
+        ],
+    )
+    writer.insert_products(
+        [
+            {
+                "id": "product_0",
+                "order_item_id": "item_0",
+                "project_id": "p1",
+                "type": "image",
+                "file_path": str(source),
+                "file_size": source.stat().st_size,
+                "file_hash": "a" * 64,
+                "width": 64,
+                "height": 48,
+                "mime_type": "image/png",
+                "metadata": {"prompt": "A red car"},
+            }
+        ]
+    )
+    writer.flush()
+    return database
+
+
+@pytest.fixture
+def cache(library, tmp_path):
+    """Provide a result cache with the fake provider opted in."""
+    return ResultCache(
+        library,
+        {"fake": CacheSettings(enabled=True)},
+        products_root=tmp_path / "products",
+    )
+
+
+def products_of(database, item_id):
+    """Return the live product rows of an order item."""
+    with database.engine.connect() as connection:
+        return connection.execute(
+            select(Product).where(
+                Product.order_item_id == item_id, Product.deleted_at.is_(None)
+            )
+        ).all()
+
+
+class TestCacheKey:
+    """Test suite for cache_key() and CacheSettings."""
+
+    def test_key_is_canonical(self):
+        """Test that equal requests share a key and different ones do not."""
+        key = cache_key("fake", "flux", PARAMETERS)
+
+        assert key == cache_key(
+            "fake", "flux", {"seed": 42.0, "steps": 20, "prompt": "A red car"}
+        )
+        assert key == cache_key("fake", "flux", dict(PARAMETERS, lora=None))
+        assert key != cache_key("fake", "flux", dict(PARAMETERS, seed=43))
+        assert key != cache_key("fake", "sdxl", PARAMETERS)
+        assert key != cache_key("other", "flux", PARAMETERS)
+        assert len(key) == 64
+
+    def test_settings_opt_in(self, library):
+        """Test that only opted-in models with fixed seeds are cacheable."""
+        library.writer.insert(
+            Provider.__table__,
+            [
+                {
+                    "id": "fake",
+                    "name": "Fake",
+                    "settings": {"result_cache": {"enabled": True, "models": ["flux"]}},
+                },
+                {"id": "plain", "name": "Plain", "settings": None},
+            ],
+        )
+        library.writer.flush()
+
+        settings = load_cache_settings(library)
+
+        assert settings["fake"].cacheable("flux", PARAMETERS)
+        assert not settings["fake"].cacheable("sdxl", PARAMETERS)
+        assert not settings["fake"].cacheable("flux", dict(PARAMETERS, seed=-1))
+        assert not settings["fake"].cacheable("flux", {"prompt": "A red car"})
+        assert not settings["plain"].cacheable("flux", PARAMETERS)
+        anything = CacheSettings(enabled=True, seed_key=None)
+        assert anything.cacheable("flux", {"prompt": "A red car"})
+
+
+class TestResultCache:
+    """Test suite for ResultCache."""
+
+    def test_hit_links_existing_asset(self, qapp, cache, library):
+        """Test that a repeated request becomes a linked product, no call."""
+        created = []
+        signal_bus.domain.product_created.connect(created.append)
+        assert (
+            cache.serve(ScheduledItem("item_0", "fake", "p1"), "flux", PARAMETERS) == []
+        )
+        cache.store(ScheduledItem("item_0", "fake", "p1"), "flux", PARAMETERS, 12.5)
+        library.writer.flush()
+
+        product_ids = cache.serve(ScheduledItem("item_1", "fake"), "flux", PARAMETERS)
+        library.writer.flush()
+        qapp.processEvents()
+
+        [product] = products_of(library, "item_1")
+        [source] = products_of(library, "item_0")
+        assert product_ids == [product.id] and created == product_ids
+        assert product.project_id == "p1"
+        assert (product.file_hash, product.width, product.mime_type) == (
+            source.file_hash,
+            source.width,
+            source.mime_type,
+        )
+        assert product.metadata == {"prompt": "A red car"}
+        assert os.path.samefile(product.file_path, source.file_path)
+        with library.engine.connect() as connection:
+            status, returned = connection.execute(
+                select(OrderItem.status, OrderItem.return_parameter_set).where(
+                    OrderItem.id == "item_1"
+                )
+            ).one()
+        assert (status, returned) == ("complete", {"seed": 42})
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["saved_calls"]) == (1, 1, 1)
+        assert stats["saved_seconds"] == 12.5
+        assert stats["files"] == {"hardlink": 1}
+        [report] = cache_report(library)
+        assert (report.provider, report.entries, report.hits) == ("fake", 1, 1)
+        assert report.saved_seconds == 12.5
+
+    def test_misses(self, cache, library):
+        """Test unopted providers, other parameters and deleted outputs."""
+        cache.store(ScheduledItem("item_0", "fake"), "flux", PARAMETERS, 3.0)
+        library.writer.flush()
+
+        other = ScheduledItem("item_1", "other")
+        assert cache.serve(other, "flux", PARAMETERS) == []
+        assert cache.store(other, "flux", PARAMETERS, 3.0) is None
+        item = ScheduledItem("item_1", "fake")
+        assert cache.serve(item, "flux", dict(PARAMETERS, seed=7)) == []
+
+        library.writer.update(Product.__table__, "product_0", {"deleted_at": utcnow()})
+        library.writer.flush()
+        assert cache.serve(item, "flux", PARAMETERS) == []
+        library.writer.flush()
+
+        assert products_of(library, "item_1") == []
+        assert cache_report(library) == []
+        assert cache.stats()["misses"] == 2
+
+    def test_first_item_keeps_the_key(self, cache, library):
+        """Test that storing a cached key again does not replace its item."""
+        first = cache.store(ScheduledItem("item_0", "fake"), "flux", PARAMETERS, 1.0)
+        again = cache.store(ScheduledItem("item_2", "fake"), "flux", PARAMETERS, 9.0)
+        library.writer.flush()
+
+        assert first == again
+        assert cache.serve(ScheduledItem("item_3", "fake"), "flux", PARAMETERS)
+        assert cache.stats()["saved_seconds"] == 1.0
@@ -0,0 +1,346 @@
+"""Tests for the retry policy and dead-letter queue."""
+
+# Retry engine testing
+import random
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from models import Order, OrderItem, Project
+from services.counters import CounterService
+from services.generation_scheduler import GenerationScheduler, ScheduledItem
+from services.retries import (
+    MAX_RETRY_AFTER,
+    PermanentError,
+    RetryController,
+    RetryPolicy,
+    TransientError,
+    classify_error,
+    list_dead_letters,
+    parse_retry_after,
+    resubmit,
+)
+from signals import signal_bus
+from utils.http_client import HttpError, HttpStatusError
+
+# Retries fast enough for tests
+FAST = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.05)
+
+
+def wait_for(condition, timeout: float = 30.0):
+    """Poll until condition() is true."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def rows(database):
+    """Return {item id: (status, retry_count, error_message)}."""
+    with database.engine.connect() as connection:
+        return {
+            item_id: (status, retry_count, error)
+            for item_id, status, retry_count, error in connection.execute(
+                select(
+                    OrderItem.id,
+                    OrderItem.status,
+                    OrderItem.retry_count,
+                    OrderItem.error_message,
+                )
+            )
+        }
+
+
+@pytest.fixture
+def items(database):
+    """Create order o1 with items item_0..item_3 and return the database."""
+    writer = database.writer
+    writer.insert(Project.__table__, [{"id": "p1", "name": "Space"}])
+    writer.insert(
+        Order.__table__,
+        [
+            {
+                "id": "o1",
+                "project_id": "p1",
+                "provider": "fake",
+                "model": "flux",
+                "base_parameter_set": {},
+            }
+        ],
+    )
+    writer.insert(
+        OrderItem.__table__,
+        [{"id": f"item_{n}", "order_id": "o1", "sequence_number": n} for n in range(4)],
+    )
+    writer.flush()
+    return database
+
+
+@pytest.fixture
+def make_scheduler(qapp):
+    """Create schedulers that are stopped after the test."""
+    schedulers = []
+
+    def factory(*args, **kwargs):
+        scheduler = GenerationScheduler(*args, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield factory
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+def http_error(status: int, **headers) -> HttpStatusError:
+    """Return the error HttpClient raises for status."""
+    return HttpStatusError(status, "Error", "https://api.example/x", headers=headers)
+
+
+class TestClassifyError:
+    """Test suite for classify_error() and parse_retry_after()."""
+
+    def test_transient_and_permanent_errors(self):
+        """Test that rate limits, 5xx and timeouts are the retryable ones."""
+        assert classify_error(http_error(429, **{"retry-after": "7"})).retry_after == 7
+        assert classify_error(http_error(503)).transient
+        assert not classify_error(http_error(400)).transient
+        assert not classify_error(http_error(401)).transient
+        assert classify_error(HttpError("connection reset")).transient
+        assert classify_error(TimeoutError()).transient
+        assert not classify_error(ValueError("bad prompt")).transient
+        assert not classify_error(PermanentError("content policy")).transient
+        assert classify_error(TransientError("busy", retry_after=3)).retry_after == 3
+
+    def test_parse_retry_after(self):
+        """Test delay-seconds, HTTP dates, garbage and absurd values."""
+        now = datetime(2026, 10, 17, 12, 0, 0)
+        assert parse_retry_after("120") == 120
+        assert parse_retry_after("Sat, 17 Oct 2026 12:00:30 GMT", now) == 30
+        assert parse_retry_after("Sat, 17 Oct 2026 11:00:00 GMT", now) == 0
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("99999999") == MAX_RETRY_AFTER
+
+
+class TestRetryController:
+    """Test suite for RetryController."""
+
+    def test_policy_settings_and_jitter(self):
+        """Test that delays grow, stay jittered within bounds and are capped."""
+        policy = RetryPolicy.from_settings({"max_attempts": 2, "base_delay": 1})
+        assert (policy.max_attempts, policy.base_delay, policy.max_delay) == (
+            2,
+            1.0,
+            300.0,
+        )
+        rng = random.Random(1)
+        for attempt, bound in ((1, 1), (2, 2), (3, 4), (20, 300)):
+            delays = [policy.delay(attempt, rng) for _ in range(200)]
+            assert all(bound / 2 <= delay <= bound for delay in delays)
+            assert len(set(delays)) > 100
+
+    def test_decisions_and_records(self, items):
+        """Test retry, dead-letter and permanent failure outcomes."""
+        controller = RetryController(items, {"fake": FAST})
+        item = ScheduledItem("item_0", "fake")
+
+        first = controller.on_failure(item, http_error(503))
+        controller.on_failure(item, http_error(503))
+        last = controller.on_failure(item, http_error(503))
+        permanent = controller.on_failure(
+            ScheduledItem("item_1", "fake"), PermanentError("content policy")
+        )
+        items.writer.flush()
+
+        assert first.delay is not None and first.provider_pause > 0
+        assert last.delay is None and last.provider_pause > 0
+        assert permanent == permanent.__class__(None, 0.0)
+        assert controller.consecutive_failures("fake") == 3
+        assert rows(items)["item_0"][:2] == ("dead_letter", 3)
+        assert rows(items)["item_1"] == ("failed", 1, "content policy")
+        controller.on_success(item)
+        assert controller.consecutive_failures("fake") == 0
+
+    def test_retry_clears_the_request_id(self, items):
+        """Test that an item going back to pending forgets its failed request."""
+        items.writer.update_item_status(
+            "item_0", "generating", provider_request_id="req-0"
+        )
+        controller = RetryController(items, {"fake": FAST})
+        item = ScheduledItem("item_0", "fake", provider_request_id="req-0")
+
+        decision = controller.on_failure(item, http_error(503))
+        items.writer.flush()
+
+        assert decision.delay is not None
+        assert item.provider_request_id is None
+        with items.engine.connect() as connection:
+            stored = connection.execute(
+                select(OrderItem.status, OrderItem.provider_request_id).where(
+                    OrderItem.id == "item_0"
+                )
+            ).one()
+        assert tuple(stored) == ("pending", None)
+
+    def test_retry_after_sets_floor(self):
+        """Test that the server's Retry-After outweighs a shorter backoff."""
+        controller = RetryController(default_policy=FAST)
+        decision = controller.on_failure(
+            ScheduledItem("item_0", "fake"), http_error(429, **{"retry-after": "30"})
+        )
+        assert decision.delay == decision.provider_pause == 30
+
+
+class TestSchedulerRetries:
+    """Test suite for GenerationScheduler with a RetryController."""
+
+    def test_transient_failures_retried_until_success(
+        self, qtbot, make_scheduler, items
+    ):
+        """Test that an item failing twice with 503 completes on try three."""
+        calls = []
+        retrying = []
+        completed = []
+        signal_bus.domain.generation_retrying.connect(
+            lambda item_id, attempt, delay: retrying.append(attempt)
+        )
+        signal_bus.domain.generation_completed.connect(completed.append)
+
+        def execute(item):
+            calls.append(item.item_id)
+            if len(calls) < 3:
+                raise http_error(503)
+
+        retry = RetryController(items, {"fake": FAST})
+        scheduler = make_scheduler(execute, retry=retry)
+        scheduler.start()
+        scheduler.enqueue(ScheduledItem("item_0", "fake"))
+        qtbot.waitUntil(lambda: bool(completed), timeout=30000)
+
+        assert calls == ["item_0"] * 3
+        assert retrying == [1, 2]
+        assert retry.consecutive_failures("fake") == 0
+        items.writer.flush()
+        assert rows(items)["item_0"][1] == 2
+
+    def test_exhausted_and_permanent_failures(self, qtbot, make_scheduler, items):
+        """Test dead-lettering after max attempts and no retry if permanent."""
+        calls = []
+        failed = []
+        signal_bus.domain.generation_failed.connect(
+            lambda item_id, error: failed.append(item_id)
+        )
+
+        def execute(item):
+            calls.append(item.item_id)
+            if item.item_id == "item_0":
+                raise http_error(502)
+            raise http_error(422)
+
+        scheduler = make_scheduler(
+            execute, retry=RetryController(items, {"fake": FAST})
+        )
+        scheduler.start()
+        scheduler.enqueue_many(
+            [ScheduledItem("item_0", "fake"), ScheduledItem("item_1", "fake")]
+        )
+        qtbot.waitUntil(lambda: len(failed) == 2, timeout=30000)
+        items.writer.flush()
+
+        assert calls.count("item_0") == 3 and calls.count("item_1") == 1
+        assert rows(items)["item_0"][:2] == ("dead_letter", 3)
+        assert rows(items)["item_1"][:2] == ("failed", 1)
+        assert scheduler.delayed_count() == 0
+
+    def test_rate_limit_pauses_the_provider(self, make_scheduler):
+        """Test that a 429 with Retry-After holds back the provider's queue."""
+        started = {}
+        gate = threading.Event()
+
+        def execute(item):
+            started[item.item_id] = time.monotonic()
+            if item.item_id == "first":
+                gate.wait(10)
+                raise http_error(429, **{"retry-after": "1"})
+
+        policy = RetryPolicy(max_attempts=1, base_delay=0.01)
+        scheduler = make_scheduler(
+            execute, retry=RetryController(default_policy=policy)
+        )
+        scheduler.start()
+        scheduler.enqueue(ScheduledItem("first", "fake"))
+        wait_for(lambda: "first" in started)
+        failed_at = time.monotonic()
+        scheduler.enqueue(ScheduledItem("other", "other-provider"))
+        wait_for(lambda: "other" in started)
+        gate.set()
+        wait_for(lambda: scheduler.stats()["fake"]["paused_s"] > 0)
+        scheduler.enqueue(ScheduledItem("second", "fake"))
+        wait_for(lambda: "second" in started)
+
+        assert started["second"] - failed_at >= 0.9
+        assert started["other"] - failed_at < 0.9
+
+
+class TestDeadLetters:
+    """Test suite for list_dead_letters() and resubmit()."""
+
+    def test_bulk_resubmit(self, qapp, make_scheduler, items):
+        """Test that resubmitted items are reset, queued and uncounted."""
+        counters = CounterService(items)
+        items.writer.update_item_status(
+            "item_0", "dead_letter", retry_count=5, error_message="HTTP 503"
+        )
+        items.writer.update_item_status("item_1", "needs_retry")
+        items.writer.update_item_status("item_2", "failed", error_message="nsfw")
+        items.writer.update(Order.__table__, "o1", {"failed_count": 2})
+        items.writer.flush()
+
+        dead = list_dead_letters(items)
+        assert {letter.item_id for letter in dead} == {"item_0", "item_1"}
+        assert dead[0].provider == "fake" and dead[0].project_id == "p1"
+        assert list_dead_letters(items, provider="other") == []
+
+        executed = []
+        scheduler = make_scheduler(lambda item: executed.append(item.item_id))
+        scheduler.start()
+        resubmitted = resubmit(
+            items, ["item_0", "item_1", "missing"], scheduler, counters
+        )
+        wait_for(lambda: len(executed) == 2)
+        counters.flush()
+
+        assert resubmitted == ["item_0", "item_1"]
+        assert sorted(executed) == ["item_0", "item_1"]
+        assert rows(items)["item_0"] == ("pending", 0, None)
+        assert list_dead_letters(items) == []
+        with items.engine.connect() as connection:
+            failed_count = connection.execute(select(Order.failed_count)).scalar()
+        assert failed_count == 1
+
+    def test_resubmit_skips_items_no_longer_dead(self, items):
+        """Test that a stale selection cannot reset a completed item."""
+        counters = CounterService(items)
+        items.writer.update_item_status("item_0", "dead_letter", error_message="503")
+        items.writer.update_item_status("item_1", "dead_letter", error_message="503")
+        items.writer.update(Order.__table__, "o1", {"failed_count": 2})
+        items.writer.flush()
+        snapshot = [letter.item_id for letter in list_dead_letters(items)]
+
+        # item_1 is retried elsewhere and completes before the resubmit
+        items.writer.update_item_status(
+            "item_1", "complete", retry_count=2, error_message=None
+        )
+        items.writer.flush()
+        resubmitted = resubmit(items, snapshot, counters=counters)
+        counters.flush()
+
+        assert resubmitted == ["item_0"]
+        assert rows(items)["item_0"] == ("pending", 0, None)
+        assert rows(items)["item_1"] == ("complete", 2, None)
+        with items.engine.connect() as connection:
+            failed_count = connection.execute(select(Order.failed_count)).scalar()
+        assert failed_count == 1
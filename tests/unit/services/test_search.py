@@ -0,0 +1,158 @@
+"""Tests for ranked, paged product search."""
+
+# Product search testing
+import pytest
+
+from models import Order, OrderItem, Project
+from services.search import ProductSearch, compile_query
+
+PROMPTS = [
+    "an astronaut cat floating in space",
+    "oil painting of a cat",
+    "painting oil lamp",
+    "astronomy chart with constellations",
+    "sci-fi city at night",
+    "a cat cat cat on a cat sofa",
+]
+
+
+@pytest.fixture
+def search(database):
+    """Provide a search service over products made from PROMPTS."""
+    writer = database.writer
+    writer.insert(
+        Project.__table__,
+        [{"id": "p1", "name": "Space"}, {"id": "p2", "name": "Home"}],
+    )
+    writer.insert(
+        Order.__table__,
+        [
+            {
+                "id": "order_1",
+                "provider": "replicate",
+                "model": "flux",
+                "base_parameter_set": {},
+            }
+        ],
+    )
+    writer.insert(
+        OrderItem.__table__,
+        [
+            {
+                "id": f"item_{n}",
+                "order_id": "order_1",
+                "sequence_number": n,
+                "generation_parameter_set": {"prompt": prompt},
+            }
+            for n, prompt in enumerate(PROMPTS)
+        ],
+    )
+    writer.insert_products(
+        [
+            {
+                "id": f"product_{n}",
+                "order_item_id": f"item_{n}",
+                "project_id": "p1" if n < 3 else "p2",
+                "type": "image",
+                "file_path": f"/tmp/{n}.png",
+            }
+            for n in range(len(PROMPTS))
+        ]
+    )
+    writer.flush()
+    return ProductSearch(database, page_size=2)
+
+
+class TestCompileQuery:
+    """Test suite for compile_query."""
+
+    def test_words_prefixes_and_phrases(self):
+        """Test the translation of each supported term form."""
+        assert compile_query("cat") == '("cat")'
+        assert compile_query("astro*") == '("astro"*)'
+        assert compile_query('"oil painting" cat') == '("oil painting") AND ("cat")'
+
+    def test_fields_or_and_exclusion(self):
+        """Test column filters, OR and excluded terms."""
+        assert compile_query("tag:portrait") == '(tags : "portrait")'
+        assert compile_query("cat OR dog") == '("cat" OR "dog")'
+        assert compile_query("cat -sofa") == '("cat") NOT "sofa"'
+
+    def test_punctuation_cannot_break_syntax(self):
+        """Test that FTS5 operators in user input are neutralised."""
+        assert compile_query("sci-fi") == '("sci fi")'
+        assert compile_query('NEAR( "unclosed') == '("NEAR") AND ("unclosed")'
+        assert compile_query("*** ---") is None
+        assert compile_query("-cat") is None
+
+
+class TestProductSearch:
+    """Test suite for ProductSearch."""
+
+    def test_ranked_pages(self, search):
+        """Test that results are ranked and paged with has_more."""
+        first = search.search("cat")
+        assert first.product_ids[0] == "product_5"
+        assert first.has_more
+        second = search.search("cat", page=1)
+        assert not second.has_more
+        assert set(first.product_ids + second.product_ids) == {
+            "product_0",
+            "product_1",
+            "product_5",
+        }
+        assert search.count("cat") == 3
+
+    def test_rank_covers_every_match(self, search, database):
+        """Test that an older strong match outranks any number of newer ones."""
+        database.writer.insert(
+            OrderItem.__table__,
+            [
+                {
+                    "id": f"item_new_{n}",
+                    "order_id": "order_1",
+                    "sequence_number": 100 + n,
+                    "generation_parameter_set": {"prompt": f"a cat and {n} dogs"},
+                }
+                for n in range(10)
+            ],
+        )
+        database.writer.insert_products(
+            [
+                {
+                    "id": f"product_new_{n}",
+                    "order_item_id": f"item_new_{n}",
+                    "type": "image",
+                    "file_path": f"/tmp/new_{n}.png",
+                }
+                for n in range(10)
+            ]
+        )
+        database.writer.flush()
+
+        assert search.search("cat").product_ids[0] == "product_5"
+        pages = [search.search("cat", page=n).product_ids for n in range(7)]
+        found = [product_id for page in pages for product_id in page]
+        assert len(found) == len(set(found)) == search.count("cat") == 13
+
+    def test_prefix_and_phrase(self, search):
+        """Test prefix matching and phrase order."""
+        assert set(search.search("astro*", page_size=10).product_ids) == {
+            "product_0",
+            "product_3",
+        }
+        assert search.search('"oil painting"').product_ids == ["product_1"]
+        assert search.search("sci-fi").product_ids == ["product_4"]
+
+    def test_project_filter(self, search):
+        """Test that project_id restricts the results."""
+        assert search.search("cat", project_id="p2").product_ids == ["product_5"]
+
+    def test_search_requested_emits_results(self, search):
+        """Test that ui.search_requested is answered with search_completed."""
+        received = []
+        search.signal_bus.domain.search_completed.connect(
+            lambda query, ids: received.append((query, ids))
+        )
+        search.signal_bus.ui.search_requested.emit('"oil painting"')
+        assert received == [('"oil painting"', ["product_1"])]
@@ -0,0 +1,205 @@
+"""Tests for the near-duplicate image index."""
+
+# Near-duplicate search testing
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image, ImageDraw
+from sqlalchemy import select
+
+from models import KeysetPager, Product, ProductHash, Project
+from models.paging import FILTERS
+from services.similarity import (
+    HammingIndex,
+    SimilarityIndex,
+    apply_cleanup,
+    plan_cleanup,
+)
+from signals import signal_bus
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_image(seed, size=(320, 240)):
+    """Return an image of shapes that differ with seed."""
+    image = Image.new("RGB", size, (20, 40, 60))
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    for n in range(6):
+        x = (seed * 97 + n * 131) % width
+        y = (seed * 53 + n * 71) % height
+        color = ((seed * 40 + n * 60) % 256, (n * 90) % 256, (seed * 20) % 256)
+        draw.ellipse([x - 45, y - 35, x + 45, y + 35], fill=color)
+    return image
+
+
+@pytest.fixture
+def executor():
+    """Thread pool standing in for the process pool."""
+    pool = ThreadPoolExecutor(max_workers=2)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+@pytest.fixture
+def library(database, tmp_path):
+    """Provide products a, a_copy and a_small (one picture) and b, c.
+
+    a_copy is liked and a_small is a half-size JPEG of the same image.
+    """
+    images = {
+        "a": (make_image(1), "PNG", {}),
+        "a_copy": (make_image(1), "JPEG", {"liked": True}),
+        "a_small": (make_image(1).resize((160, 120)), "JPEG", {}),
+        "b": (make_image(5), "PNG", {}),
+        "c": (make_image(9), "PNG", {}),
+    }
+    rows = []
+    for n, (product_id, (image, kind, values)) in enumerate(images.items()):
+        path = tmp_path / f"{product_id}.{kind.lower()}"
+        image.save(path, kind)
+        rows.append(
+            {
+                "id": product_id,
+                "project_id": "p1",
+                "type": "image",
+                "file_path": str(path),
+                "width": image.width,
+                "height": image.height,
+                "created_at": START + timedelta(minutes=n),
+                **values,
+            }
+        )
+    database.writer.insert(Project.__table__, [{"id": "p1", "name": "One"}])
+    database.writer.insert_products(rows)
+    database.writer.flush()
+    return database
+
+
+@pytest.fixture
+def index(library, executor):
+    """Provide a loaded index that has hashed the library from its events."""
+    similarity = SimilarityIndex(library, executor=executor)
+    similarity.start()
+    for product_id in ["a", "a_copy", "a_small", "b", "c"]:
+        signal_bus.domain.product_created.emit(product_id)
+    similarity.flush()
+    return similarity
+
+
+class TestHammingIndex:
+    """Test suite for HammingIndex."""
+
+    def test_matches_linear_scan(self):
+        """Test that queries find exactly what comparing every hash finds."""
+        rng = random.Random(7)
+        centers = [rng.getrandbits(64) for _ in range(50)]
+        hashes = {}
+        for n in range(3000):
+            value = centers[n % 50]
+            for _ in range(rng.randrange(8)):
+                value ^= 1 << rng.randrange(64)
+            hashes[str(uuid.UUID(int=n))] = value
+        index = HammingIndex()
+        for product_id, value in hashes.items():
+            index.add(product_id, value)
+
+        for query in centers[:10] + [rng.getrandbits(64)]:
+            for distance in (0, 3, 6, 9):
+                expected = sorted(
+                    (
+                        (product_id, (value ^ query).bit_count())
+                        for product_id, value in hashes.items()
+                        if (value ^ query).bit_count() <= distance
+                    ),
+                    key=lambda match: (match[1], match[0]),
+                )
+                assert index.query(query, distance) == expected
+
+    def test_removed_products_are_skipped(self):
+        """Test that remove() hides a product until it is added again."""
+        index = HammingIndex()
+        index.add("product_1", 0b1011)
+        index.add("product_2", 0b1001)
+        index.remove("product_1")
+
+        assert index.query(0b1011, 2) == [("product_2", 1)]
+        assert list(index.items()) == [("product_2", 0b1001)]
+
+
+class TestSimilarityIndex:
+    """Test suite for SimilarityIndex."""
+
+    def test_created_products_are_hashed(self, index):
+        """Test that product_created events store hashes for image products."""
+        with index.database.engine.connect() as connection:
+            stored = set(connection.scalars(select(ProductHash.product_id)))
+
+        assert stored == {"a", "a_copy", "a_small", "b", "c"}
+        assert (index.hashed, index.failed) == (5, 0)
+
+    def test_find_similar(self, index):
+        """Test that copies are found and other images are not."""
+        matches = dict(index.find_similar("a"))
+
+        assert set(matches) == {"a_copy", "a_small"}
+        assert index.find_similar("b") == []
+        assert index.find_similar("unknown") == []
+
+    def test_load_reads_stored_hashes(self, index, library, executor):
+        """Test that a new index finds the hashes stored by an earlier one."""
+        reloaded = SimilarityIndex(library, executor=executor)
+        reloaded.load()
+
+        assert len(reloaded) == 5
+        assert [match[0] for match in reloaded.find_similar("a_small")] == [
+            match[0] for match in index.find_similar("a_small")
+        ]
+
+    def test_backfill_hashes_missing_products(self, library, executor):
+        """Test that backfill() hashes products created without events."""
+        similarity = SimilarityIndex(library, executor=executor)
+        similarity.load()
+
+        assert similarity.backfill() == 5
+        similarity.flush()
+        assert similarity.backfill() == 0
+        assert {match[0] for match in similarity.find_similar("a_copy")} == {
+            "a",
+            "a_small",
+        }
+
+    def test_similar_to_filter(self, index, library, monkeypatch):
+        """Test that the gallery can page a product and its near-duplicates."""
+        monkeypatch.setitem(FILTERS[Product], "similar_to", index.similar_predicate)
+        pager = KeysetPager(library, Product)
+
+        ids, _cursor = pager.fetch_ids({"similar_to": "a"}, None, 10)
+
+        assert ids == ["a_small", "a_copy", "a"]
+
+    def test_cleanup_keeps_liked_product(self, index, library):
+        """Test that cleanup keeps the liked copy and deletes the rest."""
+        groups = index.duplicate_groups(project_id="p1")
+        assert groups == [["a", "a_copy", "a_small"]]
+
+        plan = plan_cleanup(library, groups)
+        assert plan[0].keep == "a_copy"
+        assert sorted(plan[0].remove) == ["a", "a_small"]
+
+        deleted = []
+        signal_bus.domain.product_deleted.connect(deleted.append)
+        assert apply_cleanup(library, plan) == 2
+
+        with library.engine.connect() as connection:
+            live = set(
+                connection.scalars(
+                    select(Product.id).where(Product.deleted_at.is_(None))
+                )
+            )
+        assert live == {"a_copy", "b", "c"}
+        assert sorted(deleted) == ["a", "a_small"]
+        assert index.duplicate_groups() == []
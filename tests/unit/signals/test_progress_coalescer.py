@@ -0,0 +1,127 @@
+"""Tests for coalesced generation progress delivery."""
+
+# Progress coalescer testing
+import threading
+
+from PyQt6.QtCore import QObject
+
+from signals import DomainSignals, ProgressCoalescer, signal_bus
+from signals.progress_coalescer import DEFAULT_PROGRESS_WINDOW_MS
+
+
+class SignalReceiver(QObject):
+    """Helper class to receive and track signal emissions."""
+
+    def __init__(self):
+        super().__init__()
+        self.received_signals = []
+
+    def handle_signal(self, *args):
+        """Record received signal with arguments."""
+        self.received_signals.append(args)
+
+
+class TestProgressCoalescer:
+    """Test suite for ProgressCoalescer."""
+
+    def test_latest_value_delivered_per_item(self, qtbot):
+        """Test that only the latest progress per item is delivered."""
+        signals = DomainSignals()
+        receiver = SignalReceiver()
+        signals.generation_progress.connect(receiver.handle_signal)
+        coalescer = ProgressCoalescer(signals.generation_progress, window_ms=10)
+
+        for percent in range(0, 101, 10):
+            coalescer.post("item_a", percent)
+        coalescer.post("item_b", 5)
+
+        qtbot.waitUntil(lambda: len(receiver.received_signals) == 2)
+
+        assert sorted(receiver.received_signals) == [("item_a", 100), ("item_b", 5)]
+        assert coalescer.posted_count == 12
+        assert coalescer.delivered_count == 2
+        assert coalescer.pending_count() == 0
+
+    def test_zero_window_passes_through(self):
+        """Test that a zero window delivers every update immediately."""
+        signals = DomainSignals()
+        receiver = SignalReceiver()
+        signals.generation_progress.connect(receiver.handle_signal)
+        coalescer = ProgressCoalescer(signals.generation_progress, window_ms=0)
+
+        coalescer.post("item_a", 10)
+        coalescer.post("item_a", 20)
+
+        assert receiver.received_signals == [("item_a", 10), ("item_a", 20)]
+
+    def test_set_window_zero_flushes_pending(self):
+        """Test that disabling coalescing flushes buffered progress."""
+        signals = DomainSignals()
+        receiver = SignalReceiver()
+        signals.generation_progress.connect(receiver.handle_signal)
+        coalescer = ProgressCoalescer(signals.generation_progress, window_ms=1000)
+
+        coalescer.post("item_a", 30)
+        assert receiver.received_signals == []
+
+        coalescer.set_window(0)
+        assert receiver.received_signals == [("item_a", 30)]
+
+    def test_posts_from_worker_thread(self, qtbot):
+        """Test that progress posted from another thread is delivered."""
+        signals = DomainSignals()
+        receiver = SignalReceiver()
+        signals.generation_progress.connect(receiver.handle_signal)
+        coalescer = ProgressCoalescer(signals.generation_progress, window_ms=5)
+
+        def worker():
+            for percent in range(101):
+                coalescer.post("item_t", percent)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        qtbot.waitUntil(lambda: ("item_t", 100) in receiver.received_signals)
+        assert len(receiver.received_signals) < 101
+
+
+class TestSignalBusProgress:
+    """Test suite for progress coalescing through the signal bus."""
+
+    def test_lifecycle_flushes_pending_progress_first(self, qtbot):
+        """Test that buffered progress is delivered before lifecycle events."""
+        events = []
+        signal_bus.set_progress_window(1000)
+        try:
+            signal_bus._domain_signals.generation_progress.connect(
+                lambda item_id, percent: events.append(("progress", percent))
+            )
+            signal_bus._domain_signals.generation_completed.connect(
+                lambda item_id: events.append(("completed", item_id))
+            )
+
+            signal_bus.emit_progress("item_x", 60)
+            signal_bus.emit_progress("item_x", 100)
+            signal_bus._domain_signals.generation_completed.emit("item_x")
+
+            assert events == [("progress", 100), ("completed", "item_x")]
+        finally:
+            signal_bus.set_progress_window(DEFAULT_PROGRESS_WINDOW_MS)
+
+    def test_lifecycle_hooks_survive_reset(self):
+        """Test that reset keeps the lifecycle flush hooks connected."""
+        events = []
+        signal_bus.set_progress_window(1000)
+        try:
+            signal_bus.reset()
+            signal_bus._domain_signals.generation_progress.connect(
+                lambda item_id, percent: events.append(percent)
+            )
+
+            signal_bus.emit_progress("item_y", 42)
+            signal_bus._domain_signals.generation_failed.emit("item_y", "boom")
+
+            assert events == [42]
+        finally:
+            signal_bus.set_progress_window(DEFAULT_PROGRESS_WINDOW_MS)
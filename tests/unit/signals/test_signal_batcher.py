@@ -0,0 +1,117 @@
+"""Tests for tick-based batching of single-id signals."""
+
+# Signal batcher testing
+import threading
+
+from PyQt6.QtCore import QObject
+
+from signals import DomainSignals, SignalBatcher, signal_bus
+
+
+class SignalReceiver(QObject):
+    """Helper class to receive and track signal emissions."""
+
+    def __init__(self):
+        super().__init__()
+        self.received_signals = []
+
+    def handle_signal(self, *args):
+        """Record received signal with arguments."""
+        self.received_signals.append(args)
+
+
+class TestSignalBatcher:
+    """Test suite for SignalBatcher."""
+
+    def test_single_ids_delivered_as_one_batch(self, qtbot):
+        """Test that ids emitted within a tick arrive as one ordered list."""
+        signals = DomainSignals()
+        receiver = SignalReceiver()
+        signals.product_created_batch.connect(receiver.handle_signal)
+        batcher = SignalBatcher(
+            signals.product_created, signals.product_created_batch, window_ms=5
+        )
+
+        for i in range(100):
+            signals.product_created.emit(f"product_{i}")
+
+        qtbot.waitUntil(lambda: len(receiver.received_signals) == 1)
+
+        assert receiver.received_signals[0][0] == [f"product_{i}" for i in range(100)]
+        assert batcher.batch_count == 1
+        assert batcher.pending_count() == 0
+
+    def test_single_id_connections_keep_working(self, qtbot):
+        """Test that single-id slots still receive every emit."""
+        signals = DomainSignals()
+        single_receiver = SignalReceiver()
+        batch_receiver = SignalReceiver()
+        signals.generation_completed.connect(single_receiver.handle_signal)
+        signals.generation_completed_batch.connect(batch_receiver.handle_signal)
+        batcher = SignalBatcher(
+            signals.generation_completed,
+            signals.generation_completed_batch,
+            window_ms=5,
+        )
+
+        signals.generation_completed.emit("item_1")
+        signals.generation_completed.emit("item_2")
+
+        assert single_receiver.received_signals == [("item_1",), ("item_2",)]
+        qtbot.waitUntil(lambda: len(batch_receiver.received_signals) == 1)
+        assert batch_receiver.received_signals[0][0] == ["item_1", "item_2"]
+        assert batcher.batch_count == 1
+
+    def test_worker_thread_emits_are_batched(self, qtbot):
+        """Test that emits from a worker thread are collected into batches."""
+        signals = DomainSignals()
+        receiver = SignalReceiver()
+        signals.product_created_batch.connect(receiver.handle_signal)
+        batcher = SignalBatcher(
+            signals.product_created, signals.product_created_batch, window_ms=5
+        )
+
+        def worker():
+            for i in range(1000):
+                signals.product_created.emit(f"product_{i}")
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        def all_delivered():
+            return sum(len(args[0]) for args in receiver.received_signals) == 1000
+
+        qtbot.waitUntil(all_delivered)
+        assert batcher.batch_count == len(receiver.received_signals) < 1000
+
+    def test_flush_delivers_immediately(self):
+        """Test that flush emits the pending batch without waiting."""
+        signals = DomainSignals()
+        receiver = SignalReceiver()
+        signals.product_created_batch.connect(receiver.handle_signal)
+        batcher = SignalBatcher(
+            signals.product_created, signals.product_created_batch, window_ms=1000
+        )
+
+        signals.product_created.emit("product_a")
+        batcher.flush()
+        batcher.flush()
+
+        assert receiver.received_signals == [(["product_a"],)]
+
+
+class TestSignalBusBatching:
+    """Test suite for batch signals through the signal bus."""
+
+    def test_bus_batches_product_created(self, qtbot):
+        """Test that the bus derives product_created_batch after reset."""
+        received = []
+        signal_bus.reset()
+        signal_bus._domain_signals.product_created_batch.connect(received.append)
+
+        signal_bus._domain_signals.product_created.emit("product_1")
+        signal_bus._domain_signals.product_created.emit("product_2")
+        signal_bus.flush_batches()
+
+        assert received == [["product_1", "product_2"]]
@@ -1,6 +1,7 @@
 """Tests for signal bus singleton and logging."""
 
 # Signal bus testing
+import logging
 import os
 from io import StringIO
 from contextlib import redirect_stderr
@@ -140,51 +141,53 @@ class TestSignalBus:
 class TestSignalLogging:
     """Test suite for signal logging in debug mode."""
 
-    def test_debug_logging_emission(self, debug_mode, qtbot, monkeypatch):
+    def test_debug_logging_emission(self, debug_mode, qtbot, monkeypatch, caplog):
         """Test that signal emissions are logged in debug mode."""
         # Recreate signal bus with debug mode
         from signals.signal_bus import SignalBus
 
         monkeypatch.setattr(SignalBus, "_instance", None)
+        caplog.set_level(logging.DEBUG, logger="signals.signal_bus")
 
-        # Capture stderr
-        stderr_capture = StringIO()
-
-        with redirect_stderr(stderr_capture):
-            bus = SignalBus()
+        bus = SignalBus()
 
-            # Emit a signal
-            bus.domain.order_created.emit("test_order_debug")
+        # Emit a signal
+        bus.domain.order_created.emit("test_order_debug")
 
-        output = stderr_capture.getvalue()
+        output = caplog.text
 
         # Check for debug initialization and emission
         assert "[SIGNAL]" in output
-        assert "order_created" in output or "domain.order_created" in output
+        assert "domain.order_created" in output
+        assert "test_order_debug" in output
 
-    def test_debug_logging_connection(self, debug_mode, monkeypatch):
+        # Structured fields are attached to the log record
+        record = caplog.records[-1]
+        assert record.signal == "domain.order_created"
+        assert record.signal_event == "emit"
+        assert record.signal_args == ("test_order_debug",)
+
+    def test_debug_logging_connection(self, debug_mode, monkeypatch, caplog):
         """Test that signal connections are logged in debug mode."""
         # Recreate signal bus with debug mode
         from signals.signal_bus import SignalBus
 
         monkeypatch.setattr(SignalBus, "_instance", None)
-
-        stderr_capture = StringIO()
+        caplog.set_level(logging.DEBUG, logger="signals.signal_bus")
 
         def dummy_handler():
             pass
 
-        with redirect_stderr(stderr_capture):
-            bus = SignalBus()
-            bus.domain.order_created.connect(dummy_handler)
+        bus = SignalBus()
+        bus.domain.order_created.connect(dummy_handler)
 
-        output = stderr_capture.getvalue()
+        output = caplog.text
 
         # Check for connection logging
         assert "[SIGNAL]" in output
         assert "Connected" in output or "connect" in output.lower()
 
-    def test_no_logging_without_debug(self, qtbot, monkeypatch):
+    def test_no_logging_without_debug(self, qtbot, monkeypatch, caplog):
         """Test that signals don't log when not in debug mode."""
         # Ensure debug mode is off
         monkeypatch.delenv("AF_DEBUG", raising=False)
@@ -193,6 +196,7 @@ class TestSignalLogging:
         from signals.signal_bus import SignalBus
 
         monkeypatch.setattr(SignalBus, "_instance", None)
+        caplog.set_level(logging.DEBUG, logger="signals.signal_bus")
 
         stderr_capture = StringIO()
 
@@ -200,7 +204,59 @@ class TestSignalLogging:
             bus = SignalBus()
             bus.domain.order_created.emit("test_no_debug")
 
-        output = stderr_capture.getvalue()
-
         # Should have no debug output
-        assert "[SIGNAL]" not in output
+        assert "[SIGNAL]" not in stderr_capture.getvalue()
+        assert "[SIGNAL]" not in caplog.text
+        assert len(bus.trace) == 0
+
+    def test_debug_toggled_at_runtime(self, monkeypatch):
+        """Test that debug logging can be switched on and off at runtime."""
+        from signals.signal_bus import SignalBus
+
+        monkeypatch.delenv("AF_DEBUG", raising=False)
+        monkeypatch.setattr(SignalBus, "_instance", None)
+
+        bus = SignalBus()
+        received = []
+        bus.domain.order_created.connect(received.append)
+        assert not bus.debug_enabled
+
+        bus.set_debug(True)
+        bus.domain.order_created.emit("order_logged")
+        assert bus.debug_enabled
+        assert [r.signal for r in bus.trace.records()] == ["domain.order_created"]
+
+        bus.set_debug(False)
+        bus.domain.order_created.emit("order_quiet")
+        assert len(bus.trace) == 1
+
+        # Connections made before toggling keep receiving signals
+        assert received == ["order_logged", "order_quiet"]
+
+    def test_sampled_debug_logging(self, monkeypatch):
+        """Test that sampled logging records one in every N emits."""
+        from signals.signal_bus import SignalBus
+
+        monkeypatch.delenv("AF_DEBUG", raising=False)
+        monkeypatch.setattr(SignalBus, "_instance", None)
+
+        bus = SignalBus()
+        bus.set_debug(True, sample_every=10)
+        for i in range(25):
+            bus.domain.generation_progress.emit("item_1", i)
+
+        records = bus.trace.records()
+        assert len(records) == 2
+        assert records[0].args == ("item_1", 9)
+        assert records[1].args == ("item_1", 19)
+
+    def test_trace_is_bounded(self):
+        """Test that the trace ring buffer drops the oldest records."""
+        from signals.signal_bus import SignalTrace
+
+        trace = SignalTrace(maxlen=3)
+        for i in range(5):
+            trace.append("emit", "domain.order_created", (f"order_{i}",))
+
+        assert len(trace) == 3
+        assert trace.records()[0].args == ("order_2",)
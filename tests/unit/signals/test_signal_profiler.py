@@ -0,0 +1,227 @@
+"""Tests for signal bus slot profiling."""
+
+# Signal profiling testing
+import json
+import threading
+import time
+
+import pytest
+from PyQt6 import sip
+from PyQt6.QtCore import QObject
+
+from signals.signal_bus import SignalBus
+from signals.signal_profiler import SignalProfiler, percentile
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    """Provide a fresh signal bus with profiling on."""
+    monkeypatch.delenv("AF_DEBUG", raising=False)
+    monkeypatch.delenv("AF_PROFILE_SIGNALS", raising=False)
+    monkeypatch.setattr(SignalBus, "_instance", None)
+    bus = SignalBus()
+    bus.set_profiling(True)
+    yield bus
+    bus.reset()
+
+
+def row_for(profiler: SignalProfiler, signal_name: str) -> dict:
+    """Return the single profiled row of a signal."""
+    rows = [row for row in profiler.rows() if row["signal"] == signal_name]
+    assert len(rows) == 1
+    return rows[0]
+
+
+class Receiver(QObject):
+    """QObject slot owner, as windows and services are."""
+
+    def __init__(self):
+        super().__init__()
+        self.received = []
+
+    def on_order_created(self, order_id):
+        self.received.append(order_id)
+
+
+class TestSignalProfiler:
+    """Test suite for SignalProfiler through the signal bus."""
+
+    def test_slot_calls_counted_and_timed(self, bus):
+        """Test per-slot call counts and execution times."""
+        received = []
+
+        def slow_slot(order_id):
+            time.sleep(0.005)
+            received.append(order_id)
+
+        bus.domain.order_created.connect(slow_slot)
+        for n in range(3):
+            bus.domain.order_created.emit(f"order_{n}")
+
+        row = row_for(bus.profiler, "domain.order_created")
+        assert received == ["order_0", "order_1", "order_2"]
+        assert row["slot"].endswith("slow_slot")
+        assert row["emits"] == 3
+        assert row["count"] == 3
+        assert row["max_ms"] >= 5
+        assert row["total_ms"] >= 15
+        assert row["queued"] == 0
+
+    def test_cross_thread_queue_delay(self, qtbot, bus):
+        """Test that a worker emit measures the wait until the GUI thread ran it."""
+        received = []
+        bus.domain.order_created.connect(received.append)
+
+        worker = threading.Thread(
+            target=bus.domain.order_created.emit, args=("order_1",)
+        )
+        worker.start()
+        worker.join()
+        # The GUI thread is busy for a while before it gets to the event
+        time.sleep(0.02)
+        qtbot.waitUntil(lambda: received == ["order_1"])
+
+        row = row_for(bus.profiler, "domain.order_created")
+        assert row["queued"] == 1
+        assert row["queue_max_ms"] >= 20
+
+    def test_method_slots_named_and_released(self, bus):
+        """Test that QObject methods are named by class and die with the object."""
+        receiver = Receiver()
+        bus.domain.order_created.connect(receiver.on_order_created)
+        bus.domain.order_created.emit("order_1")
+
+        assert receiver.received == ["order_1"]
+        assert row_for(bus.profiler, "domain.order_created")["slot"] == (
+            "Receiver.on_order_created"
+        )
+
+        sip.delete(receiver)
+        bus.domain.order_created.emit("order_2")
+
+        assert receiver.received == ["order_1"]
+
+    def test_disconnect_profiled_slot(self, bus):
+        """Test that disconnecting the original slot removes its relay."""
+        received = []
+        bus.domain.order_created.connect(received.append)
+        bus.domain.order_created.emit("order_1")
+
+        bus.domain.order_created.disconnect(received.append)
+        bus.domain.order_created.emit("order_2")
+
+        assert received == ["order_1"]
+
+    def test_extra_arguments_dropped(self, bus):
+        """Test that slots taking fewer arguments than the signal still work."""
+        received = []
+        bus.domain.generation_failed.connect(lambda item_id: received.append(item_id))
+
+        bus.domain.generation_failed.emit("item_1", "timeout")
+
+        assert received == ["item_1"]
+
+    def test_export_json(self, bus, tmp_path):
+        """Test that the snapshot is written as JSON per signal and slot."""
+        bus.ui.view_changed.connect(lambda view: None)
+        bus.ui.view_changed.emit("main")
+
+        path = bus.profiler.export_json(tmp_path / "signals.json")
+
+        data = json.loads(path.read_text())
+        entry = data["signals"]["ui.view_changed"]
+        assert entry["emits"] == 1
+        (stats,) = entry["slots"].values()
+        assert stats["calls"]["count"] == 1
+        assert set(stats["queue_delay"]) == {
+            "count",
+            "total_ms",
+            "mean_ms",
+            "max_ms",
+            "p95_ms",
+        }
+
+    def test_paused_profiling_keeps_connections(self, bus):
+        """Test that switching profiling off stops recording, not delivery."""
+        received = []
+        bus.domain.order_created.connect(received.append)
+        bus.domain.order_created.emit("order_1")
+
+        bus.set_profiling(False)
+        bus.domain.order_created.emit("order_2")
+        bus.set_profiling(True)
+        bus.domain.order_created.emit("order_3")
+
+        assert received == ["order_1", "order_2", "order_3"]
+        assert row_for(bus.profiler, "domain.order_created")["count"] == 2
+
+    def test_disconnect_after_profiling_off(self, bus):
+        """Test that a timed slot can be disconnected once profiling is off."""
+        received = []
+        bus.domain.order_created.connect(received.append)
+
+        bus.set_profiling(False)
+        bus.domain.order_created.disconnect(received.append)
+        bus.domain.order_created.emit("order_1")
+
+        assert received == []
+        assert not bus.profiler.has_relays()
+
+    def test_relay_dropped_with_receiver(self, bus):
+        """Test that a destroyed receiver's relay leaves the relay table."""
+
+        class Receiver(QObject):
+            def on_order_created(self, order_id):
+                pass
+
+        receiver = Receiver()
+        bus.domain.order_created.connect(receiver.on_order_created)
+        assert bus.profiler.has_relays()
+
+        sip.delete(receiver)
+
+        assert not bus.profiler.has_relays()
+
+    def test_profiling_with_debug_logging(self, bus):
+        """Test that debug logging still records while profiling."""
+        bus.set_debug(True)
+        bus.domain.order_created.connect(lambda order_id: None)
+        bus.domain.order_created.emit("order_1")
+
+        events = [record.event for record in bus.trace.records()]
+        assert events == ["connect", "emit"]
+        assert row_for(bus.profiler, "domain.order_created")["count"] == 1
+
+    def test_reset_clears_statistics(self, bus):
+        """Test that reset() empties the statistics but keeps timing."""
+        received = []
+        bus.domain.order_created.connect(received.append)
+        bus.domain.order_created.emit("order_1")
+
+        bus.profiler.reset()
+        assert bus.profiler.rows() == []
+
+        bus.domain.order_created.emit("order_2")
+        assert row_for(bus.profiler, "domain.order_created")["count"] == 1
+
+    def test_bus_reset_drops_profiled_connections(self, bus):
+        """Test that SignalBus.reset() disconnects profiled slots too."""
+        received = []
+        bus.domain.order_created.connect(received.append)
+
+        bus.reset()
+        bus.domain.order_created.connect(lambda order_id: None)
+        bus.domain.order_created.emit("order_1")
+
+        assert received == []
+        assert row_for(bus.profiler, "domain.order_created")["count"] == 1
+
+
+class TestPercentile:
+    """Test suite for percentile."""
+
+    def test_nearest_rank(self):
+        """Test the nearest-rank p95 of a known distribution."""
+        assert percentile(range(1, 101), 0.95) == 95
+        assert percentile([], 0.95) == 0.0
+        assert percentile([3.0], 0.95) == 3.0
@@ -0,0 +1,111 @@
+"""Tests for the startup pipeline and profiler."""
+
+# Startup testing
+import sys
+
+from startup import ImportTimer, StartupPipeline, StartupProfiler
+
+
+class TestStartupProfiler:
+    """Test suite for StartupProfiler."""
+
+    def test_phases_recorded_when_enabled(self):
+        """Test that named phases are timed and reported."""
+        profiler = StartupProfiler(enabled=True)
+        profiler.start()
+        with profiler.phase("create application"):
+            pass
+        profiler.stop()
+
+        assert [name for name, _ in profiler.phases] == ["create application"]
+        report = profiler.report()
+        assert "create application" in report
+        assert "Import costs" in report
+
+    def test_disabled_profiler_records_nothing(self):
+        """Test that a disabled profiler is a no-op."""
+        profiler = StartupProfiler()
+        profiler.start()
+        with profiler.phase("create application"):
+            pass
+
+        assert profiler.phases == []
+        assert profiler.imports is None
+
+    def test_import_timer_records_nested_imports(self, tmp_path, monkeypatch):
+        """Test that module imports are timed with nesting depth."""
+        (tmp_path / "af_outer_mod.py").write_text("import af_inner_mod\n")
+        (tmp_path / "af_inner_mod.py").write_text("VALUE = 1\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        timer = ImportTimer()
+        timer.install()
+        try:
+            import af_outer_mod  # noqa: F401
+        finally:
+            timer.uninstall()
+            sys.modules.pop("af_outer_mod", None)
+            sys.modules.pop("af_inner_mod", None)
+
+        records = {
+            name: (self_us, cumulative, depth)
+            for name, self_us, cumulative, depth in timer.records
+        }
+        assert records["af_inner_mod"][2] == 1
+        assert records["af_outer_mod"][2] == 0
+        assert records["af_outer_mod"][1] >= records["af_inner_mod"][1]
+        assert "af_outer_mod" in timer.report()
+        assert timer not in sys.meta_path
+
+
+class TestStartupPipeline:
+    """Test suite for StartupPipeline."""
+
+    def test_run_all_resolves_lazy_targets(self):
+        """Test that "module:function" targets are imported and run."""
+        pipeline = StartupPipeline()
+        pipeline.defer("platform", "platform:python_version")
+        pipeline.defer("answer", lambda: 42)
+
+        finished = []
+        pipeline.on_finished(lambda: finished.append(True))
+        pipeline.run_all()
+
+        assert pipeline.results["answer"] == 42
+        assert pipeline.results["platform"]
+        assert pipeline.pending == 0
+        assert finished == [True]
+
+    def test_failures_are_recorded_not_raised(self):
+        """Test that a failing initializer does not stop the pipeline."""
+
+        def broken():
+            raise RuntimeError("database unavailable")
+
+        pipeline = StartupPipeline()
+        pipeline.defer("database", broken)
+        pipeline.defer("cache", lambda: "ready")
+        pipeline.run_all()
+
+        assert isinstance(pipeline.errors["database"], RuntimeError)
+        assert pipeline.results["cache"] == "ready"
+
+    def test_start_runs_at_idle_time(self, qtbot):
+        """Test that initializers run from the event loop, not inline."""
+        profiler = StartupProfiler(enabled=True)
+        pipeline = StartupPipeline(profiler)
+        calls = []
+        pipeline.defer("first", lambda: calls.append("first"))
+        pipeline.defer("second", lambda: calls.append("second"))
+
+        finished = []
+        pipeline.on_finished(lambda: finished.append(True))
+        pipeline.start()
+        assert calls == []
+
+        qtbot.waitUntil(lambda: finished == [True])
+        assert calls == ["first", "second"]
+        assert [name for name, _ in profiler.phases] == [
+            "deferred: first",
+            "deferred: second",
+        ]
@@ -0,0 +1,191 @@
+"""Tests for the shared asyncio loop thread and its Qt bridge."""
+
+# Async loop testing
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.generation_scheduler import (
+    GenerationScheduler,
+    ProviderLimits,
+    ScheduledItem,
+)
+from utils.async_loop import AsyncBridge, AsyncLoopThread
+
+
+@pytest.fixture
+def loop_thread():
+    """Provide a running loop thread that is stopped after the test."""
+    loop = AsyncLoopThread(name="test-asyncio-loop")
+    loop.start()
+    yield loop
+    loop.stop()
+
+
+class TestAsyncLoopThread:
+    """Test suite for AsyncLoopThread."""
+
+    def test_run_returns_result(self, loop_thread):
+        """Test that run() blocks until the coroutine's result is ready."""
+
+        async def add(a, b):
+            await asyncio.sleep(0)
+            return a + b
+
+        assert loop_thread.run(add(2, 3), timeout=5) == 5
+
+    def test_coroutines_share_one_thread(self, loop_thread):
+        """Test that every coroutine runs on the single loop thread."""
+
+        async def thread_name():
+            return threading.current_thread().name
+
+        futures = [loop_thread.submit(thread_name()) for _ in range(20)]
+        assert {future.result(5) for future in futures} == {"test-asyncio-loop"}
+
+    def test_submit_requires_running_loop(self):
+        """Test that submitting to a stopped loop raises."""
+        loop = AsyncLoopThread()
+        coroutine = asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            loop.submit(coroutine)
+        coroutine.close()
+
+    def test_stop_cancels_pending_tasks(self):
+        """Test that stopping the loop cancels coroutines still running."""
+        loop = AsyncLoopThread()
+        loop.start()
+        cancelled = threading.Event()
+
+        async def forever():
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        loop.submit(forever())
+        time.sleep(0.05)
+        loop.stop()
+        assert cancelled.is_set()
+        assert not loop.running
+
+    def test_shutdown_hooks_run_on_stop(self):
+        """Test that shutdown hooks are awaited on the loop when it stops."""
+        loop = AsyncLoopThread()
+        loop.start()
+        ran = []
+
+        async def hook():
+            ran.append(threading.current_thread().name)
+
+        loop.add_shutdown_hook(hook)
+        loop.stop()
+        assert ran == ["asyncio-loop"]
+
+
+class TestAsyncBridge:
+    """Test suite for AsyncBridge."""
+
+    def test_result_delivered_on_gui_thread(self, qtbot, loop_thread):
+        """Test that on_result runs on the thread that owns the bridge."""
+        bridge = AsyncBridge(loop_thread)
+        received = []
+
+        async def compute():
+            return 42
+
+        bridge.submit(
+            compute(),
+            on_result=lambda value: received.append(
+                (value, threading.current_thread() is threading.main_thread())
+            ),
+        )
+        qtbot.waitUntil(lambda: bool(received), timeout=5000)
+        assert received == [(42, True)]
+
+    def test_error_delivered_to_on_error(self, qtbot, loop_thread):
+        """Test that exceptions are passed to on_error instead of on_result."""
+        bridge = AsyncBridge(loop_thread)
+        errors = []
+
+        async def fail():
+            raise ValueError("boom")
+
+        bridge.submit(fail(), on_result=pytest.fail, on_error=errors.append)
+        qtbot.waitUntil(lambda: bool(errors), timeout=5000)
+        assert isinstance(errors[0], ValueError)
+
+
+class TestAsyncGenerations:
+    """Test suite for running coroutine generations through the scheduler."""
+
+    def test_500_concurrent_generations_use_one_thread(self, qapp, loop_thread):
+        """Test that 500 in-flight async generations add no worker threads."""
+        in_flight = []
+        peak = {"in_flight": 0, "threads": 0}
+        release = None
+
+        async def generate(item: ScheduledItem):
+            in_flight.append(item.item_id)
+            peak["in_flight"] = max(peak["in_flight"], len(in_flight))
+            peak["threads"] = max(peak["threads"], threading.active_count())
+            await release.wait()
+            in_flight.remove(item.item_id)
+
+        async def make_event():
+            return asyncio.Event()
+
+        release = loop_thread.run(make_event(), timeout=5)
+        threads_before = threading.active_count()
+        scheduler = GenerationScheduler(
+            generate,
+            limits=[ProviderLimits("mock", concurrent_limit=500)],
+            max_workers=500,
+            async_loop=loop_thread,
+        )
+        scheduler.start()
+        try:
+            scheduler.enqueue_many(
+                ScheduledItem(f"item_{n}", "mock", "project") for n in range(500)
+            )
+            deadline = time.monotonic() + 30
+            while peak["in_flight"] < 500:
+                assert time.monotonic() < deadline, "timed out"
+                time.sleep(0.01)
+            loop_thread.call_soon(release.set)
+            while scheduler.running_count() or scheduler.queued_count():
+                assert time.monotonic() < deadline, "timed out"
+                time.sleep(0.01)
+        finally:
+            scheduler.stop()
+
+        # Only the scheduler's dispatcher thread is added
+        assert peak["threads"] <= threads_before + 1
+
+    def test_cancel_cancels_running_task(self, qapp, loop_thread):
+        """Test that cancelling a running coroutine reports it cancelled."""
+        started = threading.Event()
+        cancelled = []
+
+        async def generate(item: ScheduledItem):
+            started.set()
+            await asyncio.sleep(3600)
+
+        scheduler = GenerationScheduler(generate, async_loop=loop_thread)
+        scheduler.signal_bus.domain.generation_cancelled.connect(cancelled.append)
+        scheduler.start()
+        try:
+            scheduler.enqueue(ScheduledItem("item_1", "mock", "project"))
+            assert started.wait(5)
+            assert scheduler.cancel("item_1")
+            deadline = time.monotonic() + 5
+            while scheduler.running_count():
+                assert time.monotonic() < deadline, "timed out"
+                time.sleep(0.01)
+        finally:
+            scheduler.stop()
+        qapp.processEvents()
+        assert cancelled == ["item_1"]
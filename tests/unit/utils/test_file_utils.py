@@ -0,0 +1,34 @@
+"""Tests for file and storage helpers."""
+
+# File utilities testing
+import os
+
+from utils.file_utils import link_file
+
+
+class TestLinkFile:
+    """Test suite for link_file()."""
+
+    def test_hard_link_shares_the_file(self, tmp_path):
+        """Test that a file on the same file system is hard linked."""
+        source = tmp_path / "source.png"
+        source.write_bytes(b"image")
+
+        assert link_file(source, tmp_path / "linked.png") == "hardlink"
+        assert os.path.samefile(source, tmp_path / "linked.png")
+
+    def test_falls_back_without_links(self, tmp_path, monkeypatch):
+        """Test that content still arrives when hard links are refused."""
+
+        def refuse(source, destination):
+            raise OSError("cross-device link")
+
+        monkeypatch.setattr(os, "link", refuse)
+        source = tmp_path / "source.png"
+        source.write_bytes(b"image")
+
+        method = link_file(source, tmp_path / "copy.png")
+
+        assert method in ("reflink", "copy")
+        assert (tmp_path / "copy.png").read_bytes() == b"image"
+        assert not os.path.samefile(source, tmp_path / "copy.png")
@@ -0,0 +1,419 @@
+"""Tests for the pooled HTTP/2 client."""
+
+# HTTP client testing
+import asyncio
+import json
+import shutil
+import ssl
+import subprocess
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from utils import http_client
+from utils.async_loop import AsyncLoopThread
+from utils.http_client import (
+    HttpClient,
+    HttpError,
+    HttpStatusError,
+    ProviderHttpClients,
+)
+
+# Size of the large download served by the stub
+LARGE_BODY_BYTES = 8 * 1024 * 1024
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Provider API stand-in: JSON echo, chunked and large downloads."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+
+    def finish(self):
+        super().finish()
+        with self.server.lock:
+            self.server.active -= 1
+
+    def send_body(self, body: bytes, status: int = 200, **headers):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(0.05)
+            self.send_body(b"slow")
+        elif self.path == "/large":
+            self.send_response(200)
+            self.send_header("Content-Length", str(LARGE_BODY_BYTES))
+            self.end_headers()
+            block = bytes(range(256)) * 256
+            for _ in range(LARGE_BODY_BYTES // len(block)):
+                self.wfile.write(block)
+        elif self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for part in (b"hello ", b"chunked ", b"world"):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+            self.wfile.write(b"0\r\n\r\n")
+        elif self.path == "/close":
+            self.send_body(b"bye", Connection="close")
+            self.close_connection = True
+        elif self.path == "/redirect":
+            self.send_body(b"", status=302, Location="/status/1")
+        elif self.path.startswith("/redirect-to"):
+            [location] = parse_qs(urlsplit(self.path).query)["url"]
+            self.send_body(b"", status=302, Location=location)
+        elif self.path == "/headers":
+            headers = {name.lower(): value for name, value in self.headers.items()}
+            self.send_body(json.dumps(headers).encode())
+        elif self.path == "/missing":
+            self.send_body(b'{"detail": "not found"}', status=404)
+        else:
+            self.send_body(json.dumps({"path": self.path}).encode())
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        payload = json.loads(self.rfile.read(length))
+        self.send_body(json.dumps({"received": payload}).encode(), status=201)
+
+
+def serve(tls: ssl.SSLContext = None):
+    """Start StubHandler on a free local port, optionally over TLS."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    if tls is not None:
+        server.socket = tls.wrap_socket(server.socket, server_side=True)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.active = 0
+    server.max_active = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    scheme = "http" if tls is None else "https"
+    server.url = f"{scheme}://127.0.0.1:{server.server_address[1]}"
+    return server
+
+
+@pytest.fixture
+def stub_server():
+    """Serve StubHandler on a free local port."""
+    server = serve()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def other_server():
+    """Serve StubHandler on a second origin."""
+    server = serve()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def tls_server(tmp_path):
+    """Serve StubHandler over TLS with a self-signed certificate."""
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is needed to make a test certificate")
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes"]
+        + ["-keyout", str(key), "-out", str(cert), "-days", "1"]
+        + ["-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"],
+        check=True,
+        capture_output=True,
+    )
+    tls = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    tls.load_cert_chain(cert, key)
+    server = serve(tls)
+    server.client_context = ssl.create_default_context(cafile=str(cert))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def loop_thread():
+    """Provide a running loop thread that is stopped after the test."""
+    loop = AsyncLoopThread()
+    loop.start()
+    yield loop
+    loop.stop()
+
+
+class TestHttpClient:
+    """Test suite for HttpClient."""
+
+    def test_get_and_post_json(self, stub_server, loop_thread):
+        """Test that JSON requests round-trip through the stub server."""
+        client = HttpClient(stub_server.url)
+
+        async def exchange():
+            got = await client.get("/predictions/1?x=1")
+            posted = await client.post("/predictions", json={"prompt": "a cat"})
+            return got, posted
+
+        got, posted = loop_thread.run(exchange(), timeout=10)
+        assert got.status == 200
+        assert got.json() == {"path": "/predictions/1?x=1"}
+        assert posted.status == 201
+        assert posted.json() == {"received": {"prompt": "a cat"}}
+
+    def test_sequential_requests_reuse_one_connection(self, stub_server, loop_thread):
+        """Test that keep-alive serves many polls over one connection."""
+        client = HttpClient(stub_server.url)
+
+        async def poll():
+            for n in range(20):
+                await client.get(f"/status/{n}")
+
+        loop_thread.run(poll(), timeout=10)
+        stats = client.stats()
+        assert stub_server.connections == 1
+        assert stats["requests"] == 20
+        assert stats["connections_opened"] == 1
+        assert stats["connections_reused"] == 19
+        assert stats["reuse_ratio"] == pytest.approx(0.95)
+        assert stats["protocols"] == {"http/1.1": 20}
+
+    def test_connections_capped_by_max_connections(self, stub_server, loop_thread):
+        """Test that concurrent requests never open more than the limit."""
+        client = HttpClient(stub_server.url, max_connections=2)
+
+        async def burst():
+            await asyncio.gather(*(client.get(f"/slow/{n}") for n in range(10)))
+
+        loop_thread.run(burst(), timeout=10)
+        assert client.stats()["connections_opened"] == 2
+        assert stub_server.max_active <= 2
+
+    def test_connection_close_is_not_reused(self, stub_server, loop_thread):
+        """Test that a response with Connection: close retires its connection."""
+        client = HttpClient(stub_server.url)
+
+        async def exchange():
+            await client.get("/close")
+            await client.get("/status/1")
+
+        loop_thread.run(exchange(), timeout=10)
+        assert client.stats()["connections_opened"] == 2
+        assert client.stats()["connections_reused"] == 0
+
+    def test_retries_when_idle_connection_was_closed(self, stub_server, loop_thread):
+        """Test that a connection closed by the server while idle is replaced."""
+        client = HttpClient(stub_server.url)
+        loop_thread.run(client.get("/status/1"), timeout=10)
+
+        stub_server.shutdown()
+        stub_server.server_close()
+        server = ThreadingHTTPServer(stub_server.server_address, StubHandler)
+        server.daemon_threads = True
+        server.lock = threading.Lock()
+        server.connections = server.active = server.max_active = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            response = loop_thread.run(client.get("/status/2"), timeout=10)
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert response.json() == {"path": "/status/2"}
+
+    def test_follows_redirects(self, stub_server, loop_thread):
+        """Test that redirects are followed on the same pooled connection."""
+        client = HttpClient(stub_server.url)
+        response = loop_thread.run(client.get("/redirect"), timeout=10)
+        assert response.json() == {"path": "/status/1"}
+        assert response.url.endswith("/status/1")
+        assert client.stats()["connections_opened"] == 1
+
+    def test_cross_origin_redirect_drops_credentials(
+        self, stub_server, other_server, loop_thread
+    ):
+        """Test that credentials only follow redirects within the origin."""
+        client = HttpClient(stub_server.url)
+        credentials = {
+            "Authorization": "Bearer secret",
+            "Cookie": "session=1",
+            "Proxy-Authorization": "Basic c2VjcmV0",
+            "X-Request-Id": "42",
+        }
+
+        async def exchange():
+            same = await client.get(
+                f"/redirect-to?url={stub_server.url}/headers", headers=credentials
+            )
+            other = await client.get(
+                f"/redirect-to?url={other_server.url}/headers", headers=credentials
+            )
+            return same.json(), other.json()
+
+        same, other = loop_thread.run(exchange(), timeout=10)
+        assert same["authorization"] == "Bearer secret"
+        assert same["cookie"] == "session=1"
+        assert same["proxy-authorization"] == "Basic c2VjcmV0"
+        assert not {"authorization", "cookie", "proxy-authorization"} & set(other)
+        assert other["x-request-id"] == "42"
+
+    def test_refuses_https_to_http_redirect(self, tls_server, stub_server, loop_thread):
+        """Test that a redirect from https down to http is not followed."""
+        client = HttpClient(tls_server.url, ssl_context=tls_server.client_context)
+        assert loop_thread.run(client.get("/status/1"), timeout=10).status == 200
+
+        with pytest.raises(HttpError, match="Refusing redirect"):
+            loop_thread.run(
+                client.get(
+                    f"/redirect-to?url={stub_server.url}/headers",
+                    headers={"Authorization": "Bearer secret"},
+                ),
+                timeout=10,
+            )
+        assert stub_server.connections == 0
+
+    def test_rejects_line_breaks_in_headers(self, stub_server, loop_thread):
+        """Test that CR or LF in a header value never reaches the wire."""
+        client = HttpClient(stub_server.url)
+        for value in ("a\r\nX-Injected: 1", "a\nb", "a\rb"):
+            with pytest.raises(ValueError):
+                loop_thread.run(
+                    client.get("/headers", headers={"X-Test": value}), timeout=10
+                )
+        with pytest.raises(ValueError):
+            HttpClient(stub_server.url, headers={"Authorization": "a\r\nb"})
+        assert stub_server.connections == 0
+
+    def test_error_status_raises(self, stub_server, loop_thread):
+        """Test that 4xx answers raise HttpStatusError with the body."""
+        client = HttpClient(stub_server.url)
+        with pytest.raises(HttpStatusError) as caught:
+            loop_thread.run(client.get("/missing"), timeout=10)
+        assert caught.value.status == 404
+        assert b"not found" in caught.value.body
+
+    def test_connection_refused_raises_http_error(self, loop_thread):
+        """Test that an unreachable origin raises HttpError."""
+        client = HttpClient("http://127.0.0.1:9")
+        with pytest.raises(HttpError):
+            loop_thread.run(client.get("/"), timeout=10)
+
+
+class TestDownload:
+    """Test suite for streamed downloads."""
+
+    def test_download_streams_to_destination(self, stub_server, loop_thread, tmp_path):
+        """Test that a large body is written to disk without buffering it."""
+        client = HttpClient(stub_server.url)
+        destination = tmp_path / "products" / "project" / "output.png"
+
+        tracemalloc.start()
+        try:
+            written = loop_thread.run(
+                client.download("/large", destination), timeout=30
+            )
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert written == LARGE_BODY_BYTES
+        assert destination.stat().st_size == LARGE_BODY_BYTES
+        assert not destination.with_name("output.png.part").exists()
+        assert peak < LARGE_BODY_BYTES // 8
+        assert client.stats()["bytes_downloaded"] == LARGE_BODY_BYTES
+
+    def test_download_writes_off_the_loop(
+        self, stub_server, loop_thread, tmp_path, monkeypatch
+    ):
+        """Test that file writes never run on the event loop thread."""
+        writers = set()
+
+        class RecordingFile:
+            def __init__(self, handle):
+                self.handle = handle
+
+            def write(self, chunk):
+                writers.add(threading.get_ident())
+                return self.handle.write(chunk)
+
+            def close(self):
+                self.handle.close()
+
+        monkeypatch.setattr(
+            http_client,
+            "open",
+            lambda path, mode: RecordingFile(open(path, mode)),
+            raising=False,
+        )
+
+        async def loop_ident():
+            return threading.get_ident()
+
+        client = HttpClient(stub_server.url)
+        destination = tmp_path / "output.png"
+        written = loop_thread.run(client.download("/large", destination), timeout=30)
+
+        assert written == destination.stat().st_size == LARGE_BODY_BYTES
+        assert writers
+        assert loop_thread.run(loop_ident(), timeout=5) not in writers
+
+    def test_download_chunked_body(self, stub_server, loop_thread, tmp_path):
+        """Test that chunked transfer encoding is decoded."""
+        client = HttpClient(stub_server.url)
+        destination = tmp_path / "chunked.txt"
+        loop_thread.run(client.download("/chunked", destination), timeout=10)
+        assert destination.read_bytes() == b"hello chunked world"
+
+    def test_failed_download_leaves_no_file(self, stub_server, loop_thread, tmp_path):
+        """Test that an error status writes nothing."""
+        client = HttpClient(stub_server.url)
+        destination = tmp_path / "missing.png"
+        with pytest.raises(HttpStatusError):
+            loop_thread.run(client.download("/missing", destination), timeout=10)
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestProviderHttpClients:
+    """Test suite for ProviderHttpClients."""
+
+    def test_client_sized_by_concurrent_limit(self):
+        """Test that each provider client uses its concurrent_limit."""
+        clients = ProviderHttpClients({"replicate": 8, "fal": None})
+        assert clients.client("replicate").max_connections == 8
+        assert clients.client("replicate") is clients.client("replicate")
+        assert clients.client("fal").max_connections == 4
+
+    def test_stats_per_provider(self, stub_server, loop_thread):
+        """Test that stats are reported per provider."""
+        clients = ProviderHttpClients({"replicate": 2})
+
+        async def exchange():
+            client = clients.client("replicate")
+            await client.get(f"{stub_server.url}/a")
+            await client.get(f"{stub_server.url}/b")
+
+        loop_thread.run(exchange(), timeout=10)
+        stats = clients.stats()
+        assert list(stats) == ["replicate"]
+        assert stats["replicate"]["connections_reused"] == 1
+        loop_thread.run(clients.aclose(), timeout=10)
+        assert clients.stats() == {}
@@ -0,0 +1,131 @@
+"""Tests for image tile pyramids."""
+
+# Tile pyramid testing
+import pytest
+from PIL import Image
+
+from utils.image_tiles import (
+    build_tile_pyramid,
+    load_tile_pyramid,
+    read_image_size,
+    read_tile,
+    render_preview,
+)
+
+
+def make_gradient(path, size=(1000, 700), mode="RGB", fmt="PNG"):
+    """Write an image whose pixels encode their own coordinates."""
+    image = Image.new(mode, size)
+    image.putdata(
+        [
+            (x % 256, y % 256, (x // 256) * 16 + y // 256) + ((255,) * (mode == "RGBA"))
+            for y in range(size[1])
+            for x in range(size[0])
+        ]
+    )
+    image.save(path, fmt)
+    return str(path)
+
+
+class TestBuildTilePyramid:
+    """Test suite for build_tile_pyramid."""
+
+    def test_levels_halve_until_one_tile(self, tmp_path):
+        """Test level geometry down to a single tile."""
+        source = make_gradient(tmp_path / "image.png")
+
+        pyramid = build_tile_pyramid(source, tmp_path / "tiles", tile_size=256)
+
+        geometry = [
+            (level.width, level.height, level.columns, level.rows)
+            for level in pyramid.levels
+        ]
+        assert geometry == [(1000, 700, 4, 3), (500, 350, 2, 2), (250, 175, 1, 1)]
+        assert pyramid.mode == "RGB"
+
+    def test_tiles_hold_source_pixels(self, tmp_path):
+        """Test that a tile read back matches the same crop of the source."""
+        source = make_gradient(tmp_path / "image.png")
+        pyramid = build_tile_pyramid(source, tmp_path / "tiles", tile_size=256)
+
+        pixels = read_tile(pyramid, 0, 2, 1)
+
+        tile = Image.frombytes("RGB", (256, 256), pixels)
+        with Image.open(source) as image:
+            expected = image.convert("RGB").crop((512, 256, 768, 512))
+        assert tile.tobytes() == expected.tobytes()
+
+    def test_edge_tiles_padded(self, tmp_path):
+        """Test that edge tiles keep their pixels and are padded to full size."""
+        source = make_gradient(tmp_path / "image.png")
+        pyramid = build_tile_pyramid(source, tmp_path / "tiles", tile_size=256)
+
+        pixels = read_tile(pyramid, 0, 3, 2)
+
+        assert len(pixels) == pyramid.tile_bytes
+        assert pyramid.tile_rect(0, 3, 2) == (768, 512, 232, 188)
+        tile = Image.frombytes("RGB", (256, 256), pixels)
+        assert tile.getpixel((0, 0)) == (768 % 256, 512 % 256, 3 * 16 + 2)
+        assert tile.getpixel((255, 255)) == (0, 0, 0)
+
+    def test_alpha_kept(self, tmp_path):
+        """Test that images with transparency are tiled as RGBA."""
+        source = make_gradient(tmp_path / "image.png", (300, 200), mode="RGBA")
+
+        pyramid = build_tile_pyramid(source, tmp_path / "tiles", tile_size=256)
+
+        assert pyramid.mode == "RGBA"
+        assert len(read_tile(pyramid, 0, 0, 0)) == 256 * 256 * 4
+
+    def test_finished_pyramid_reused(self, tmp_path):
+        """Test that a directory with a manifest is not tiled again."""
+        source = make_gradient(tmp_path / "image.png", (300, 200))
+        first = build_tile_pyramid(source, tmp_path / "tiles", tile_size=256)
+
+        assert load_tile_pyramid(tmp_path / "tiles") == first
+        assert build_tile_pyramid("missing.png", tmp_path / "tiles") == first
+
+
+class TestRenderPreview:
+    """Test suite for render_preview."""
+
+    def test_preview_fits_box(self, tmp_path):
+        """Test that the preview fits the box and reports the full size."""
+        source = make_gradient(tmp_path / "image.jpg", (1000, 700), fmt="JPEG")
+
+        pixels, width, height, mode, full_width, full_height = render_preview(
+            source, (200, 200)
+        )
+
+        assert (width, height) == (200, 140)
+        assert (full_width, full_height) == (1000, 700)
+        assert mode == "RGB"
+        assert len(pixels) == width * height * 3
+
+
+class TestPixelLimit:
+    """Test suite for images past Pillow's decompression bomb limit."""
+
+    def test_limit_raised_only_while_decoding(self, tmp_path, monkeypatch):
+        """Test that a huge image opens without changing the global limit."""
+        source = make_gradient(tmp_path / "image.png", size=(300, 200))
+        # Pillow would refuse this image outright
+        monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+        with pytest.raises(Image.DecompressionBombError):
+            Image.open(source)
+
+        assert read_image_size(source) == (300, 200)
+        assert Image.MAX_IMAGE_PIXELS == 1000
+
+        assert render_preview(source, (64, 64))[4:] == (300, 200)
+        assert Image.MAX_IMAGE_PIXELS == 1000
+        pyramid = build_tile_pyramid(source, tmp_path / "tiles", tile_size=256)
+        assert (pyramid.width, pyramid.height) == (300, 200)
+        assert Image.MAX_IMAGE_PIXELS == 1000
+
+    def test_unreadable_file(self, tmp_path):
+        """Test that a file no format accepts raises UnidentifiedImageError."""
+        source = tmp_path / "notes.png"
+        source.write_bytes(b"not an image")
+        with pytest.raises(Image.UnidentifiedImageError):
+            read_image_size(source)
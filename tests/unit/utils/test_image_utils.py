@@ -0,0 +1,86 @@
+"""Tests for thumbnail generation."""
+
+# Image utilities testing
+import io
+import os
+
+from PIL import Image
+
+from utils.image_utils import (
+    MediaInfo,
+    generate_thumbnails,
+    sniff_media,
+    thumbnail_path,
+)
+
+
+def make_image(path, size=(1600, 1200), fmt="JPEG"):
+    """Write a solid-colour test image."""
+    Image.new("RGB", size, (200, 40, 40)).save(path, fmt)
+    return str(path)
+
+
+class TestGenerateThumbnails:
+    """Test suite for generate_thumbnails."""
+
+    def test_thumbnail_path_is_content_addressed(self, tmp_path):
+        """Test that paths are sharded by the first two hash digits."""
+        path = thumbnail_path(tmp_path, "abcdef", "medium")
+
+        assert path == tmp_path / "medium" / "ab" / "abcdef.jpg"
+
+    def test_generates_every_tier_within_bounds(self, tmp_path):
+        """Test that each tier fits its bounding box and keeps aspect ratio."""
+        source = make_image(tmp_path / "source.jpg")
+
+        paths = generate_thumbnails(source, "ff00aa", tmp_path / "thumbs")
+
+        expected = {"small": (150, 113), "medium": (400, 300), "large": (800, 600)}
+        for name, size in expected.items():
+            with Image.open(paths[name]) as image:
+                assert image.size == size
+                assert image.format == "JPEG"
+
+    def test_converts_non_rgb_sources(self, tmp_path):
+        """Test that RGBA PNGs are converted for JPEG output."""
+        source = tmp_path / "source.png"
+        Image.new("RGBA", (300, 300), (0, 0, 0, 0)).save(source, "PNG")
+
+        paths = generate_thumbnails(str(source), "00aa", tmp_path, ("small",))
+
+        with Image.open(paths["small"]) as image:
+            assert image.mode == "RGB"
+            assert image.size == (150, 150)
+
+    def test_existing_thumbnails_are_reused(self, tmp_path):
+        """Test that a second call does not regenerate or open the source."""
+        source = make_image(tmp_path / "source.jpg")
+        paths = generate_thumbnails(source, "1234", tmp_path / "thumbs")
+        mtimes = {name: os.stat(path).st_mtime_ns for name, path in paths.items()}
+        os.remove(source)
+
+        again = generate_thumbnails(source, "1234", tmp_path / "thumbs")
+
+        assert again == paths
+        assert {n: os.stat(p).st_mtime_ns for n, p in again.items()} == mtimes
+
+
+class TestSniffMedia:
+    """Test suite for sniff_media."""
+
+    def test_image_type_and_size_from_header(self):
+        """Test that images are identified from their first bytes."""
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 200)).save(buffer, "PNG")
+
+        assert sniff_media(buffer.getvalue()[:64]) == MediaInfo("image/png", 300, 200)
+
+    def test_video_container_signatures(self):
+        """Test that MP4 and WebM containers are recognised without dimensions."""
+        assert sniff_media(b"\x00\x00\x00\x18ftypisom") == MediaInfo("video/mp4")
+        assert sniff_media(b"\x1a\x45\xdf\xa3\x9f") == MediaInfo("video/webm")
+
+    def test_unknown_or_truncated_data(self):
+        """Test that unrecognised bytes return None."""
+        assert sniff_media(b"plain text") is None
+        assert sniff_media(b"\xff\xd8\xff") is None
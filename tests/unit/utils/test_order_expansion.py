@@ -0,0 +1,181 @@
+"""Tests for streaming order expansion."""
+
+# Order expansion testing
+import random
+import tracemalloc
+
+import pytest
+
+from utils.order_expansion import (
+    ExpansionError,
+    OrderExpander,
+    parse_parameter,
+    stream_order_items,
+)
+
+LOOKUPS = {
+    "color": ["red", "[shade] blue"],
+    "shade": ["light", "dark"],
+    "animal": ["cat", "dog", "fox"],
+}
+
+
+def prompts(expander):
+    """Return the expanded prompts in order."""
+    return [item["prompt"] for item in expander]
+
+
+class TestParseParameter:
+    """Test suite for parameter interpolation parsing."""
+
+    def test_numeric_list_is_an_axis(self):
+        """Test comma-separated numbers."""
+        assert parse_parameter("8,10,20") == ("axis", [8, 10, 20])
+
+    def test_range_is_inclusive_with_optional_step(self):
+        """Test a..b and a..b:step ranges."""
+        assert list(parse_parameter("10..13")[1]) == [10, 11, 12, 13]
+        assert list(parse_parameter("0..20:10")[1]) == [0, 10, 20]
+
+    def test_pipe_list_is_a_random_choice(self):
+        """Test a|b|c random selections."""
+        assert parse_parameter("0.5|0.7") == ("random", [0.5, 0.7])
+
+    def test_free_text_is_fixed(self):
+        """Test that non-numeric strings are not split."""
+        assert parse_parameter("moody, cinematic") == ("fixed", ("moody, cinematic",))
+        assert parse_parameter(7) == ("fixed", (7,))
+
+
+class TestOrderExpander:
+    """Test suite for OrderExpander."""
+
+    def test_inline_tokens_and_sub_prompts(self):
+        """Test inline values multiplied across sub-prompts."""
+        expander = OrderExpander({"prompt": "[red,blue] car || a [big,small] dog"})
+
+        assert prompts(expander) == [
+            "red car",
+            "blue car",
+            "a big dog",
+            "a small dog",
+        ]
+        assert expander.count() == 4
+
+    def test_nested_lookups_and_back_references(self):
+        """Test lookups that contain tokens, and [=key] back references."""
+        expander = OrderExpander(
+            {"prompt": "[color] [animal]", "negative_prompt": "no [=color]"},
+            LOOKUPS,
+        )
+        items = list(expander)
+
+        assert expander.count() == len(items) == 9
+        assert items[0] == {"prompt": "red cat", "negative_prompt": "no red"}
+        assert items[3]["prompt"] == "light blue cat"
+        assert items[3]["negative_prompt"] == "no light blue"
+
+    def test_parameters_interpolate_inside_prompts(self):
+        """Test that parameter axes multiply each prompt."""
+        expander = OrderExpander(
+            {"prompt": "[a,b]", "steps": "8,20", "cfg": "1..3", "model": "x"}
+        )
+        items = list(expander)
+
+        assert expander.count() == len(items) == 12
+        assert items[0] == {"prompt": "a", "steps": 8, "cfg": 1, "model": "x"}
+        assert items[-1] == {"prompt": "b", "steps": 20, "cfg": 3, "model": "x"}
+
+    def test_random_selection_does_not_multiply(self):
+        """Test that a|b|c picks a value per item."""
+        expander = OrderExpander(
+            {"prompt": "[a,b,c]", "seed": "1|2|3"}, rng=random.Random(7)
+        )
+        items = list(expander)
+
+        assert expander.count() == 3
+        assert all(item["seed"] in (1, 2, 3) for item in items)
+
+    def test_unknown_and_cyclic_lookups_raise(self):
+        """Test lookup errors are reported at count time."""
+        with pytest.raises(ExpansionError, match="Unknown lookup"):
+            OrderExpander({"prompt": "[missing]"}).count()
+        with pytest.raises(ExpansionError, match="cycle"):
+            OrderExpander({"prompt": "[a]"}, {"a": ["[b]"], "b": ["[a]"]}).count()
+
+    def test_back_reference_before_binding_raises(self):
+        """Test [=key] used before [key]."""
+        with pytest.raises(ExpansionError, match="Back reference"):
+            list(OrderExpander({"prompt": "[=color] [color]"}, LOOKUPS))
+
+    def test_count_is_closed_form_for_large_orders(self):
+        """Test that a six-axis order is counted without expanding it."""
+        expander = OrderExpander(
+            {
+                "prompt": "[a,b,c,d,e,f,g,h,i,j] [animal] || [color]",
+                "steps": "1..20",
+                "cfg": "1..10",
+                "width": "512,768,1024",
+                "sampler_index": "0..9",
+            },
+            LOOKUPS,
+        )
+
+        assert expander.count() == (30 + 3) * 20 * 10 * 3 * 10
+
+
+class TestStreamOrderItems:
+    """Test suite for stream_order_items."""
+
+    def test_items_written_in_chunks_with_progress(self, qapp):
+        """Test chunked inserts, sequence numbers and progress emissions."""
+        from signals import signal_bus
+
+        chunks = []
+        progress = []
+        signal_bus.domain.order_items_expanded.connect(
+            lambda order_id, count: progress.append((order_id, count))
+        )
+        expander = OrderExpander({"prompt": "[a,b,c,d,e]", "steps": "1,2"})
+
+        written = stream_order_items("order_1", expander, chunks.append, 4)
+
+        assert written == 10
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        assert chunks[0][0] == {
+            "order_id": "order_1",
+            "sequence_number": 1,
+            "generation_parameter_set": {"prompt": "a", "steps": 1},
+        }
+        assert chunks[-1][-1]["sequence_number"] == 10
+        assert progress == [("order_1", 4), ("order_1", 8), ("order_1", 10)]
+
+    def test_empty_expansion_still_reports(self, qapp):
+        """Test that an order with no items emits a zero count."""
+        from signals import signal_bus
+
+        progress = []
+        signal_bus.domain.order_items_expanded.connect(
+            lambda order_id, count: progress.append(count)
+        )
+
+        assert stream_order_items("order_2", [], lambda rows: None) == 0
+        assert progress == [0]
+
+    def test_memory_stays_flat_for_100k_items(self, qapp):
+        """Test that streaming does not materialize the expansion."""
+        big = OrderExpander(
+            {"prompt": "[a,b,c,d,e,f,g,h,i,j]", "steps": "1..100", "cfg": "1..100"}
+        )
+        assert big.count() == 100_000
+
+        tracemalloc.start()
+        try:
+            written = stream_order_items("order_3", big, lambda rows: None, 500)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert written == 100_000
+        # One 500-row chunk is a few hundred KB; 100k rows would be ~50 MB
+        assert peak < 5 * 1024 * 1024
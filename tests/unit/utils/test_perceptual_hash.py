@@ -0,0 +1,61 @@
+"""Tests for perceptual image hashing."""
+
+# Perceptual hash testing
+from PIL import Image, ImageDraw
+
+from utils.perceptual_hash import (
+    dhash,
+    dhash_file,
+    dhash_files,
+    format_hash,
+    hamming,
+    parse_hash,
+)
+
+
+def make_image(seed, size=(640, 480)):
+    """Return an image of shapes that differ with seed."""
+    image = Image.new("RGB", size, (20, 40, 60))
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    for n in range(6):
+        x = (seed * 97 + n * 131) % width
+        y = (seed * 53 + n * 71) % height
+        color = ((seed * 40 + n * 60) % 256, (n * 90) % 256, (seed * 20) % 256)
+        draw.ellipse([x - 90, y - 70, x + 90, y + 70], fill=color)
+    return image
+
+
+class TestPerceptualHash:
+    """Test suite for the dHash functions."""
+
+    def test_survives_resize_and_reencoding(self, tmp_path):
+        """Test that a smaller JPEG copy hashes within a few bits."""
+        original = make_image(1)
+        original.save(tmp_path / "original.png")
+        original.resize((320, 240)).save(tmp_path / "copy.jpg", "JPEG", quality=70)
+
+        first, second = dhash_files(
+            [str(tmp_path / "original.png"), str(tmp_path / "copy.jpg")]
+        )
+
+        assert hamming(first, second) <= 4
+
+    def test_different_images_are_far_apart(self):
+        """Test that unrelated images differ in many bits."""
+        assert hamming(dhash(make_image(1)), dhash(make_image(5))) > 10
+
+    def test_unreadable_file_gives_none(self, tmp_path):
+        """Test that files Pillow cannot open are skipped, not raised."""
+        path = tmp_path / "broken.png"
+        path.write_bytes(b"not an image")
+
+        assert dhash_file(str(path)) is None
+        assert dhash_file(str(tmp_path / "missing.png")) is None
+
+    def test_format_round_trip(self):
+        """Test that hashes are stored as 16 hex digits."""
+        value = dhash(make_image(3))
+
+        assert len(format_hash(1)) == 16
+        assert parse_hash(format_hash(value)) == value
@@ -0,0 +1,256 @@
+"""Tests for the multi-tier thumbnail cache."""
+
+# Thumbnail cache testing
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+from PyQt6.QtGui import QPixmap
+
+from models import Product
+from utils import thumbnail_cache
+from utils.thumbnail_cache import (
+    PixmapLRUCache,
+    ThumbnailCache,
+    database_source_resolver,
+    init_thumbnail_cache,
+)
+
+
+def make_pixmap(width, height):
+    """Return a 32-bit pixmap of the given size."""
+    pixmap = QPixmap(width, height)
+    pixmap.fill()
+    return pixmap
+
+
+@pytest.fixture
+def executor():
+    """Thread pool standing in for the process pool."""
+    pool = ThreadPoolExecutor(max_workers=2)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """Map product ids to (path, hash) for two generated images."""
+    mapping = {}
+    for index in range(2):
+        path = tmp_path / f"product_{index}.jpg"
+        Image.new("RGB", (640, 480), (index * 100, 0, 0)).save(path, "JPEG")
+        mapping[f"product_{index}"] = (str(path), f"{index:02d}hash")
+    return mapping
+
+
+class TestPixmapLRUCache:
+    """Test suite for PixmapLRUCache."""
+
+    def test_hits_and_misses_are_counted(self, qapp):
+        """Test lookup statistics."""
+        cache = PixmapLRUCache()
+        cache.put(("p1", "small"), make_pixmap(10, 10))
+
+        assert cache.get(("p1", "small")) is not None
+        assert cache.get(("p2", "small")) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_evicts_least_recently_used_by_bytes(self, qapp):
+        """Test that the byte budget, not the entry count, drives eviction."""
+        one = make_pixmap(100, 100)
+        cache = PixmapLRUCache(budget_bytes=one.width() * one.height() * 4 * 2)
+        cache.put(("a", "small"), one)
+        cache.put(("b", "small"), make_pixmap(100, 100))
+        cache.get(("a", "small"))
+
+        cache.put(("c", "small"), make_pixmap(100, 100))
+
+        assert ("a", "small") in cache
+        assert ("b", "small") not in cache
+        assert cache.evictions == 1
+        assert cache.used_bytes <= cache.budget_bytes
+
+    def test_oversized_pixmap_is_not_cached(self, qapp):
+        """Test that a pixmap larger than the budget is skipped."""
+        cache = PixmapLRUCache(budget_bytes=100)
+        cache.put(("a", "large"), make_pixmap(100, 100))
+
+        assert len(cache) == 0
+
+
+class TestThumbnailCache:
+    """Test suite for ThumbnailCache."""
+
+    def test_miss_requests_and_ready_signal_follows(
+        self, qtbot, tmp_path, executor, sources
+    ):
+        """Test the asynchronous request/response round trip."""
+        from signals import signal_bus
+
+        cache = ThumbnailCache(tmp_path / "thumbs", sources.get, executor)
+
+        with qtbot.waitSignal(signal_bus.domain.thumbnail_ready) as blocker:
+            assert cache.pixmap("product_0") is None
+        assert blocker.args == ["product_0", "small"]
+
+        pixmap = cache.pixmap("product_0")
+        assert pixmap is not None
+        assert (pixmap.width(), pixmap.height()) == (150, 113)
+        assert cache.pending_count() == 0
+
+    def test_repeated_misses_are_merged(self, qtbot, tmp_path, sources):
+        """Test that a thumbnail in flight is only requested once."""
+        from signals import signal_bus
+
+        submitted = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                submitted.append(args)
+                return super().submit(fn, *args, **kwargs)
+
+        pool = RecordingExecutor(max_workers=1)
+        cache = ThumbnailCache(tmp_path / "thumbs", sources.get, pool)
+        try:
+            with qtbot.waitSignal(signal_bus.domain.thumbnail_ready):
+                for _ in range(5):
+                    cache.pixmap("product_1", "medium")
+        finally:
+            pool.shutdown(wait=True)
+
+        assert len(submitted) == 1
+
+    def test_outstanding_miss_counted_once(self, qtbot, tmp_path, executor, sources):
+        """Test that repainting a loading thumbnail adds no further misses."""
+        from signals import signal_bus
+
+        cache = ThumbnailCache(tmp_path / "thumbs", sources.get, executor)
+
+        with qtbot.waitSignal(signal_bus.domain.thumbnail_ready):
+            for _ in range(5):
+                cache.pixmap("product_0")
+        cache.pixmap("product_0")
+
+        assert (cache.memory.hits, cache.memory.misses) == (1, 1)
+
+    def test_source_resolved_off_the_gui_thread(
+        self, qtbot, tmp_path, executor, sources
+    ):
+        """Test that the resolver never runs on the calling thread."""
+        from signals import signal_bus
+
+        threads = []
+
+        def resolve(product_id):
+            threads.append(threading.get_ident())
+            return sources.get(product_id)
+
+        cache = ThumbnailCache(tmp_path / "thumbs", resolve, executor)
+        with qtbot.waitSignal(signal_bus.domain.thumbnail_ready):
+            cache.request("product_1")
+            assert cache.is_pending("product_1")
+
+        assert threads and threading.get_ident() not in threads
+        assert cache.pixmap("product_1") is not None
+
+    def test_unknown_product_is_not_retried(self, qtbot, tmp_path, executor):
+        """Test that unresolvable products are remembered as failed."""
+        from signals import signal_bus
+
+        requests = []
+        cache = ThumbnailCache(tmp_path / "thumbs", lambda product_id: None, executor)
+        signal_bus.ui.thumbnail_requested.connect(lambda *args: requests.append(args))
+
+        cache.pixmap("missing")
+        cache.pixmap("missing")
+
+        assert requests == [("missing", "small")]
+
+    def test_generation_failure_is_recorded(self, qtbot, tmp_path, executor):
+        """Test that an unreadable source marks the thumbnail as failed."""
+        broken = tmp_path / "broken.jpg"
+        broken.write_bytes(b"not an image")
+        cache = ThumbnailCache(
+            tmp_path / "thumbs", lambda product_id: (str(broken), "bad0"), executor
+        )
+
+        cache.request("product_x")
+        qtbot.waitUntil(lambda: cache.pending_count() == 0)
+
+        assert cache.pixmap("product_x") is None
+        assert cache.pending_count() == 0
+
+    def test_queued_request_can_be_cancelled(self, qtbot, tmp_path, sources):
+        """Test that cancel() drops a queued request without marking it failed."""
+        gate = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=1)
+        pool.submit(gate.wait)
+        cache = ThumbnailCache(tmp_path / "thumbs", sources.get, pool)
+        try:
+            cache.request("product_0")
+            assert cache.is_pending("product_0")
+
+            assert cache.cancel("product_0")
+            assert not cache.is_pending("product_0")
+            assert not cache.cancel("product_0")
+
+            cache.request("product_0")
+            assert cache.is_pending("product_0")
+        finally:
+            cache.shutdown(wait=True)
+            gate.set()
+            pool.shutdown(wait=True)
+
+
+class TestDatabaseSourceResolver:
+    """Test suite for database_source_resolver."""
+
+    @pytest.fixture
+    def products(self, database, sources):
+        """Store product_0 and product_1, the latter deleted."""
+        database.writer.insert_products(
+            [
+                {
+                    "id": product_id,
+                    "type": "image",
+                    "file_path": file_path,
+                    "file_hash": file_hash,
+                }
+                for product_id, (file_path, file_hash) in sources.items()
+            ]
+        )
+        database.writer.update(
+            Product.__table__, "product_1", {"deleted_at": datetime(2025, 1, 1)}
+        )
+        database.writer.flush()
+        return database
+
+    def test_resolves_live_products(self, products, sources):
+        """Test that only stored, undeleted products resolve."""
+        resolve = database_source_resolver(products)
+
+        assert resolve("product_0") == sources["product_0"]
+        assert resolve("product_1") is None
+        assert resolve("missing") is None
+
+    def test_init_installs_the_database_resolver(
+        self, qtbot, tmp_path, executor, products, monkeypatch
+    ):
+        """Test that the application cache loads thumbnails for stored products."""
+        from signals import signal_bus
+
+        monkeypatch.setattr(thumbnail_cache, "_thumbnail_cache", None)
+        monkeypatch.setattr(thumbnail_cache, "thumbnails_dir", lambda: tmp_path)
+        monkeypatch.setattr("models.database.init_database", lambda: products)
+        monkeypatch.setattr(ThumbnailCache, "_get_executor", lambda self: executor)
+
+        cache = init_thumbnail_cache()
+        try:
+            with qtbot.waitSignal(signal_bus.domain.thumbnail_ready) as blocker:
+                cache.pixmap("product_0")
+        finally:
+            cache.shutdown(wait=True)
+
+        assert blocker.args == ["product_0", "small"]
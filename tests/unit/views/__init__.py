@@ -0,0 +1 @@
+"""Unit tests for views and widgets."""
@@ -0,0 +1,114 @@
+"""Tests for the dead-letter dock."""
+
+# Dead-letter dock testing
+import pytest
+from sqlalchemy import select
+
+from models import Order, OrderItem, Project
+from views.main_window import MainWindow
+from views.widgets.dead_letter_dock import COLUMNS, DeadLetterDock
+
+
+@pytest.fixture
+def dead_letters(database):
+    """Create an order with two dead-lettered items and one complete one."""
+    writer = database.writer
+    writer.insert(Project.__table__, [{"id": "p1", "name": "Space"}])
+    writer.insert(
+        Order.__table__,
+        [
+            {
+                "id": "o1",
+                "project_id": "p1",
+                "provider": "fake",
+                "model": "flux",
+                "base_parameter_set": {},
+            }
+        ],
+    )
+    writer.insert(
+        OrderItem.__table__,
+        [
+            {
+                "id": "item_0",
+                "order_id": "o1",
+                "sequence_number": 0,
+                "status": "dead_letter",
+                "retry_count": 5,
+                "error_message": "HTTP 503 Service Unavailable",
+            },
+            {
+                "id": "item_1",
+                "order_id": "o1",
+                "sequence_number": 1,
+                "status": "needs_retry",
+            },
+            {
+                "id": "item_2",
+                "order_id": "o1",
+                "sequence_number": 2,
+                "status": "complete",
+            },
+        ],
+    )
+    writer.flush()
+    return database
+
+
+def statuses(database):
+    """Return {item id: status}."""
+    with database.engine.connect() as connection:
+        return dict(connection.execute(select(OrderItem.id, OrderItem.status)).all())
+
+
+class TestDeadLetterDock:
+    """Test suite for DeadLetterDock."""
+
+    def test_lists_dead_letters(self, qtbot, dead_letters):
+        """Test that the table shows the dead-lettered items only."""
+        dock = DeadLetterDock(dead_letters)
+        qtbot.addWidget(dock)
+
+        dock.refresh()
+
+        assert dock.table.rowCount() == 2
+        assert dock.table.columnCount() == len(COLUMNS)
+        listed = {dock.table.item(row, 0).text() for row in range(2)}
+        assert listed == {"item_0", "item_1"}
+        assert "2 items" in dock.summary.text()
+
+    def test_resubmit_selected_then_all(self, qtbot, dead_letters):
+        """Test that resubmitted items leave the table as pending items."""
+        dock = DeadLetterDock(dead_letters)
+        qtbot.addWidget(dock)
+        dock.refresh()
+
+        dock.table.selectRow(0)
+        selected = dock.table.item(0, 0).text()
+        assert dock.resubmit_selected() == [selected]
+        assert dock.table.rowCount() == 1
+        assert dock.resubmit_all() != []
+
+        assert dock.table.rowCount() == 0
+        assert not dock.resubmit_all_button.isEnabled()
+        assert statuses(dead_letters) == {
+            "item_0": "pending",
+            "item_1": "pending",
+            "item_2": "complete",
+        }
+
+
+class TestMainWindowDeadLetters:
+    """Test suite for the main window's dead-letter dock."""
+
+    def test_dock_created_on_demand(self, qtbot, monkeypatch, database):
+        """Test that the dock only exists once it is asked for."""
+        monkeypatch.setattr("models.database.init_database", lambda: database)
+        window = MainWindow()
+        qtbot.addWidget(window)
+        assert window.dead_letter_dock is None
+
+        window.show_dead_letters()
+        window.show_dead_letters()
+
+        assert window.findChildren(DeadLetterDock) == [window.dead_letter_dock]
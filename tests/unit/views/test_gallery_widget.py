@@ -0,0 +1,216 @@
+"""Tests for the virtualized gallery widget."""
+
+# Gallery widget testing
+from views.widgets.gallery_widget import GalleryWidget, ProductListModel
+
+
+class FakeProductSource:
+    """Offset-paged product id source that records every fetch."""
+
+    def __init__(self, total: int):
+        self.product_ids = [f"product_{i}" for i in range(total)]
+        self.fetches = []
+
+    def fetch_page(self, filters, cursor, limit):
+        """Return (ids, next_cursor) for one page."""
+        self.fetches.append((filters, cursor, limit))
+        return self._page(filters, cursor, limit)
+
+    def seek_page(self, filters, offset, limit):
+        """Return (ids, next_cursor) for the page at a row offset."""
+        self.fetches.append((filters, ("seek", offset), limit))
+        return self._page(filters, offset, limit)
+
+    def _page(self, filters, cursor, limit):
+        """Return (ids, next_cursor) for the page at an offset cursor."""
+        ids = self.product_ids
+        if filters.get("liked"):
+            ids = ids[::2]
+        offset = cursor or 0
+        page = ids[offset : offset + limit]
+        next_cursor = offset + limit if offset + limit < len(ids) else None
+        return page, next_cursor
+
+
+class TestProductListModel:
+    """Test suite for ProductListModel."""
+
+    def test_model_starts_empty_and_fetches_pages(self, qapp):
+        """Test that rows are only fetched a page at a time."""
+        source = FakeProductSource(1000)
+        model = ProductListModel(source.fetch_page, page_size=100)
+
+        assert model.rowCount() == 0
+        assert model.canFetchMore()
+
+        model.fetchMore()
+        assert model.rowCount() == 100
+        assert model.product_id(0) == "product_0"
+        assert source.fetches == [({}, None, 100)]
+
+    def test_model_stops_when_source_exhausted(self, qapp):
+        """Test that canFetchMore turns false after the last page."""
+        source = FakeProductSource(250)
+        model = ProductListModel(source.fetch_page, page_size=100)
+
+        model.ensure_loaded(10_000)
+
+        assert model.rowCount() == 250
+        assert not model.canFetchMore()
+        assert len(source.fetches) == 3
+
+    def test_set_filters_resets_paging(self, qapp):
+        """Test that new filters restart from the first page."""
+        source = FakeProductSource(1000)
+        model = ProductListModel(source.fetch_page, page_size=100)
+        model.ensure_loaded(300)
+
+        model.set_filters({"liked": True})
+        assert model.rowCount() == 0
+
+        model.fetchMore()
+        assert model.product_id(1) == "product_2"
+        assert source.fetches[-1] == ({"liked": True}, None, 100)
+
+    def test_evicted_pages_reload_by_cursor(self, qapp):
+        """Test that far pages are dropped and fetched again on return."""
+        source = FakeProductSource(2000)
+        model = ProductListModel(source.fetch_page, page_size=100)
+        model.ensure_loaded(1000)
+
+        model.evict(900, 999, keep_pages=1)
+        assert model.product_id(0) is None
+        assert model.product_id(850) == "product_850"
+        assert model.row_of("product_5") is None
+
+        model.load_range(0, 50)
+        assert model.product_id(0) == "product_0"
+        assert source.fetches[-1] == ({}, None, 100)
+        assert model.product_id(950) is None
+
+    def test_seek_loads_only_the_target_page(self, qapp):
+        """Test that a deep page is fetched alone when the source can seek."""
+        source = FakeProductSource(200_000)
+        model = ProductListModel(
+            source.fetch_page, page_size=100, seek_page=source.seek_page
+        )
+
+        model.ensure_loaded(150_001)
+
+        assert source.fetches == [({}, ("seek", 150_000), 100)]
+        assert model.rowCount() == 150_100
+        assert model.product_id(150_000) == "product_150000"
+        assert model.product_id(149_999) is None
+        model.fetchMore()
+        assert source.fetches[-1] == ({}, 150_100, 100)
+
+    def test_prepend_products_inserts_batch_at_top(self, qapp):
+        """Test that a product batch is inserted with a single row insert."""
+        source = FakeProductSource(10)
+        model = ProductListModel(source.fetch_page, page_size=100)
+        model.fetchMore()
+        inserts = []
+        model.rowsInserted.connect(
+            lambda parent, first, last: inserts.append((first, last))
+        )
+
+        model.prepend_products(["new_1", "new_2", "new_3"])
+
+        assert inserts == [(0, 2)]
+        assert model.product_id(0) == "new_3"
+        assert model.rowCount() == 13
+
+    def test_row_of_follows_inserts(self, qapp):
+        """Test that row lookups stay correct as pages and new products arrive."""
+        source = FakeProductSource(300)
+        model = ProductListModel(source.fetch_page, page_size=100)
+        model.fetchMore()
+
+        assert model.row_of("product_42") == 42
+        model.fetchMore()
+        assert model.row_of("product_150") == 150
+        model.prepend_products(["new_1"])
+        assert model.row_of("product_150") == 151
+        assert model.row_of("missing") is None
+
+
+class TestGalleryWidget:
+    """Test suite for GalleryWidget."""
+
+    def test_view_fetches_only_what_it_needs(self, qtbot):
+        """Test that a large library is not loaded up front."""
+        source = FakeProductSource(200_000)
+        model = ProductListModel(source.fetch_page, page_size=200)
+        gallery = GalleryWidget(model)
+        qtbot.addWidget(gallery)
+        gallery.resize(800, 600)
+        gallery.show()
+        qtbot.waitExposed(gallery)
+        qtbot.waitUntil(lambda: model.rowCount() > 0)
+        qtbot.wait(50)
+
+        assert model.rowCount() <= 400
+        assert model.canFetchMore()
+
+    def test_filter_applied_signal_resets_model(self, qtbot):
+        """Test that ui.filter_applied reaches the model."""
+        from signals import signal_bus
+
+        source = FakeProductSource(1000)
+        model = ProductListModel(source.fetch_page, page_size=100)
+        gallery = GalleryWidget(model)
+        qtbot.addWidget(gallery)
+
+        signal_bus.ui.filter_applied.emit({"liked": True})
+
+        assert model.filters == {"liked": True}
+
+    def test_page_changed_signal_fetches_page(self, qtbot):
+        """Test that ui.page_changed loads rows up to the requested page."""
+        from signals import signal_bus
+
+        source = FakeProductSource(10_000)
+        model = ProductListModel(source.fetch_page, page_size=100)
+        gallery = GalleryWidget(model)
+        qtbot.addWidget(gallery)
+
+        signal_bus.ui.page_changed.emit(5)
+
+        assert model.rowCount() >= 401
+
+    def test_deep_page_jump_keeps_memory_flat(self, qtbot):
+        """Test that jumping deep fetches one page and scrolling evicts."""
+        from signals import signal_bus
+
+        source = FakeProductSource(200_000)
+        model = ProductListModel(
+            source.fetch_page, page_size=200, seek_page=source.seek_page
+        )
+        gallery = GalleryWidget(model)
+        qtbot.addWidget(gallery)
+        gallery.resize(800, 600)
+        gallery.show()
+        qtbot.waitExposed(gallery)
+
+        signal_bus.ui.page_changed.emit(500)
+        qtbot.wait(50)
+
+        assert ({}, ("seek", 99_800), 200) in source.fetches
+        assert len(source.fetches) <= 6
+        assert model.product_id(99_800) == "product_99800"
+        assert model.product_id(0) is None
+
+    def test_product_batch_signal_prepends(self, qtbot):
+        """Test that domain.product_created_batch adds products to the top."""
+        from signals import signal_bus
+
+        source = FakeProductSource(10)
+        model = ProductListModel(source.fetch_page, page_size=100)
+        model.fetchMore()
+        gallery = GalleryWidget(model)
+        qtbot.addWidget(gallery)
+
+        signal_bus.domain.product_created_batch.emit(["fresh_1", "fresh_2"])
+
+        assert model.product_id(0) == "fresh_2"
+        assert model.product_id(1) == "fresh_1"
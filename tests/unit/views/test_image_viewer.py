@@ -0,0 +1,113 @@
+"""Tests for the tiled image viewer."""
+
+# Image viewer testing
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+from PyQt6.QtCore import QPointF
+
+from views.widgets.image_viewer import ImageViewer
+
+
+@pytest.fixture
+def viewer(qtbot, tmp_path):
+    """Provide a viewer decoding on threads, with a small tile budget."""
+    executor = ThreadPoolExecutor(2)
+    widget = ImageViewer(
+        executor=executor,
+        tile_budget_bytes=8 * 512 * 512 * 4,
+        preview_size=(200, 200),
+        scratch_dir=tmp_path / "tiles",
+    )
+    qtbot.addWidget(widget)
+    widget.resize(400, 300)
+    widget.show()
+    qtbot.waitExposed(widget)
+    yield widget
+    widget.shutdown()
+    executor.shutdown(wait=True)
+
+
+def make_image(path, size=(4000, 3000)):
+    """Write a large two-colour PNG."""
+    image = Image.new("RGB", size, (30, 90, 200))
+    image.paste((250, 200, 20), (0, 0, size[0] // 2, size[1]))
+    image.save(path, "PNG", compress_level=1)
+    return str(path)
+
+
+class TestImageViewer:
+    """Test suite for ImageViewer."""
+
+    def test_preview_then_tiles(self, qtbot, viewer, tmp_path):
+        """Test that the preview arrives, then the pyramid, fitted to the window."""
+        path = make_image(tmp_path / "big.png")
+
+        with qtbot.waitSignals([viewer.preview_ready, viewer.image_ready]):
+            viewer.open_image(path)
+
+        assert viewer.zoom == pytest.approx(0.1)
+        assert viewer.pyramid.width == 4000
+        assert viewer.level_for_zoom() == 3
+
+    def test_only_visible_tiles_loaded(self, qtbot, viewer, tmp_path):
+        """Test that painting reads just the tiles in view at the zoom's level."""
+        path = make_image(tmp_path / "big.png")
+        with qtbot.waitSignal(viewer.image_ready):
+            viewer.open_image(path)
+
+        viewer.set_zoom(1.0, QPointF(200, 150))
+        visible = viewer.visible_tiles()
+        viewer.repaint()
+        qtbot.waitUntil(lambda: all(key in viewer.tiles for key in visible))
+
+        assert {level for level, _column, _row in visible} == {0}
+        assert len(visible) <= 4
+        assert len(viewer.tiles) == len(visible)
+
+    def test_tile_memory_bounded(self, qtbot, viewer, tmp_path):
+        """Test that panning across the image never exceeds the tile budget."""
+        path = make_image(tmp_path / "big.png")
+        with qtbot.waitSignal(viewer.image_ready):
+            viewer.open_image(path)
+        viewer.set_zoom(1.0)
+
+        for step in range(8):
+            viewer.center_on(QPointF(200 + step * 450, 150 + step * 350))
+            viewer.repaint()
+            visible = viewer.visible_tiles()
+            qtbot.waitUntil(lambda: all(key in viewer.tiles for key in visible))
+
+            assert viewer.tiles.used_bytes <= viewer.tiles.budget_bytes
+
+    def test_close_removes_pyramid(self, qtbot, viewer, tmp_path):
+        """Test that closing an image deletes its tiles from disk."""
+        path = make_image(tmp_path / "big.png", (600, 400))
+        with qtbot.waitSignal(viewer.image_ready):
+            viewer.open_image(path)
+        directory = viewer.pyramid.directory
+
+        viewer.close_image()
+
+        qtbot.waitUntil(lambda: not (tmp_path / "tiles").joinpath(directory).exists())
+        assert viewer.pyramid is None
+
+    def test_stale_results_ignored(self, qtbot, viewer, tmp_path):
+        """Test that opening a second image discards the first one's results."""
+        first = make_image(tmp_path / "first.png", (3000, 2000))
+        second = make_image(tmp_path / "second.png", (600, 400))
+
+        viewer.open_image(first)
+        with qtbot.waitSignal(viewer.image_ready):
+            viewer.open_image(second)
+
+        assert viewer.pyramid.width == 600
+
+    def test_unreadable_file_fails(self, qtbot, viewer, tmp_path):
+        """Test that a file that is not an image reports load_failed."""
+        path = tmp_path / "notes.txt"
+        path.write_text("not an image")
+
+        with qtbot.waitSignal(viewer.load_failed):
+            viewer.open_image(str(path))
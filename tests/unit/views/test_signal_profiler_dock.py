@@ -0,0 +1,74 @@
+"""Tests for the signal profiler debug dock."""
+
+# Signal profiler dock testing
+import json
+
+import pytest
+
+from signals.signal_bus import SignalBus
+from views.main_window import MainWindow
+from views.widgets.signal_profiler_dock import COLUMNS, SignalProfilerDock
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    """Provide a fresh signal bus with profiling off."""
+    monkeypatch.delenv("AF_DEBUG", raising=False)
+    monkeypatch.delenv("AF_PROFILE_SIGNALS", raising=False)
+    monkeypatch.setattr(SignalBus, "_instance", None)
+    bus = SignalBus()
+    yield bus
+    bus.reset()
+
+
+class TestSignalProfilerDock:
+    """Test suite for SignalProfilerDock."""
+
+    def test_rows_follow_profiler(self, qtbot, bus):
+        """Test that the table lists the profiled slots, worst first."""
+        dock = SignalProfilerDock(bus)
+        qtbot.addWidget(dock)
+        dock.enabled_box.setChecked(True)
+        bus.domain.order_created.connect(lambda order_id: None)
+        bus.ui.view_changed.connect(lambda view: sum(range(100_000)))
+        bus.domain.order_created.emit("order_1")
+        bus.ui.view_changed.emit("main")
+
+        dock.refresh()
+
+        assert bus.profiling_enabled
+        assert dock.table.rowCount() == 2
+        assert dock.table.columnCount() == len(COLUMNS)
+        assert dock.table.item(0, 0).text() == "ui.view_changed"
+        assert dock.table.item(0, 2).text() == "1"
+        assert "2 slots, 2 calls" in dock.summary.text()
+
+    def test_reset_and_export(self, qtbot, bus, tmp_path):
+        """Test the Reset and Export actions."""
+        dock = SignalProfilerDock(bus)
+        qtbot.addWidget(dock)
+        assert dock.export_to(tmp_path / "off.json") is None
+
+        dock.enabled_box.setChecked(True)
+        bus.domain.order_created.connect(lambda order_id: None)
+        bus.domain.order_created.emit("order_1")
+        path = dock.export_to(tmp_path / "profile.json")
+
+        assert "domain.order_created" in json.loads(path.read_text())["signals"]
+        dock.reset_statistics()
+        assert dock.table.rowCount() == 0
+
+
+class TestMainWindowProfiler:
+    """Test suite for the main window's profiler dock."""
+
+    def test_dock_created_on_demand(self, qtbot):
+        """Test that the dock only exists once it is asked for."""
+        window = MainWindow()
+        qtbot.addWidget(window)
+        assert window.signal_profiler_dock is None
+
+        window.show_signal_profiler()
+        window.show_signal_profiler()
+
+        assert window.findChildren(SignalProfilerDock) == [window.signal_profiler_dock]
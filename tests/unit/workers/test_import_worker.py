@@ -0,0 +1,193 @@
+"""Tests for the bulk folder import worker."""
+
+# Import worker testing
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+from sqlalchemy import func, select
+
+from models import Product, Project
+from workers.import_worker import ImportWorker, scan_files
+
+
+def make_images(directory, count, size=(32, 24), start=0):
+    """Write count distinct PNG files and return their paths."""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for n in range(start, start + count):
+        path = directory / f"image_{n}.png"
+        Image.new("RGB", size, (n % 256, n // 256 % 256, 7)).save(path)
+        paths.append(path)
+    return paths
+
+
+def product_count(database) -> int:
+    """Count the rows in the products table."""
+    with database.session_factory() as session:
+        return session.scalar(select(func.count()).select_from(Product))
+
+
+@pytest.fixture
+def project(database):
+    """Create the project that imports go into."""
+    database.writer.insert(
+        Project.__table__, [{"id": "project_1", "name": "Imports"}]
+    ).result()
+    return "project_1"
+
+
+@pytest.fixture
+def make_worker(database, tmp_path, project):
+    """Create import workers that hash on a thread pool."""
+    executors = []
+
+    def factory(roots, **kwargs):
+        executor = ThreadPoolExecutor(2)
+        executors.append(executor)
+        kwargs.setdefault("executor", executor)
+        kwargs.setdefault("max_workers", 2)
+        kwargs.setdefault("project_id", project)
+        return ImportWorker(
+            database,
+            roots,
+            products_root=tmp_path / "store" / "products",
+            temp_root=tmp_path / "store" / "temp",
+            **kwargs,
+        )
+
+    yield factory
+    for executor in executors:
+        executor.shutdown()
+
+
+class TestScanFiles:
+    """Test suite for scan_files."""
+
+    def test_finds_images_recursively(self, tmp_path):
+        """Test that nested images are found and other files skipped."""
+        make_images(tmp_path / "a", 2)
+        make_images(tmp_path / "a" / "b", 1)
+        (tmp_path / "a" / "notes.txt").write_text("x")
+        make_images(tmp_path / ".cache", 1)
+        (tmp_path / "a" / "UPPER.JPG").write_bytes(b"")
+
+        found = sorted(scan_files([tmp_path]))
+
+        assert [path.split("/")[-1] for path in found] == [
+            "UPPER.JPG",
+            "image_0.png",
+            "image_0.png",
+            "image_1.png",
+        ]
+
+    def test_accepts_single_files(self, tmp_path):
+        """Test that a root can be a file."""
+        (path,) = make_images(tmp_path, 1)
+        assert list(scan_files([path])) == [str(path)]
+
+
+class TestImportWorker:
+    """Test suite for ImportWorker."""
+
+    def test_imports_and_copies_files(self, make_worker, database, tmp_path):
+        """Test that every image becomes a product in the store."""
+        make_images(tmp_path / "photos", 30)
+        created = []
+        worker = make_worker([tmp_path / "photos"], batch_size=8)
+        worker.signal_bus.domain.product_created.connect(created.append)
+
+        worker.run()
+
+        assert worker.stats.total == 30
+        assert worker.stats.imported == 30
+        assert product_count(database) == 30
+        assert len(created) == 30
+        stored = list((tmp_path / "store" / "products" / "project_1").rglob("*.png"))
+        assert len(stored) == 30
+        assert list((tmp_path / "store" / "temp").iterdir()) == []
+
+        with database.session_factory() as session:
+            product = session.scalars(select(Product).limit(1)).one()
+        assert (product.width, product.height) == (32, 24)
+        assert product.mime_type == "image/png"
+        assert product.metadata_["imported_from"].startswith(str(tmp_path / "photos"))
+
+    def test_skips_duplicates_within_run_and_database(
+        self, make_worker, database, tmp_path
+    ):
+        """Test that files already imported, or repeated, are not stored twice."""
+        make_images(tmp_path / "first", 10)
+        make_worker([tmp_path / "first"]).run()
+
+        # Same content again, plus 5 new files, plus a copy within the run
+        make_images(tmp_path / "second", 15)
+        make_images(tmp_path / "second" / "copy", 1, start=14)
+        worker = make_worker([tmp_path / "second"])
+        worker.run()
+
+        assert worker.stats.imported == 5
+        assert worker.stats.duplicates == 11
+        assert product_count(database) == 15
+        assert list((tmp_path / "store" / "temp").iterdir()) == []
+
+    def test_reference_in_place(self, make_worker, tmp_path):
+        """Test that copy_files=False keeps the original paths."""
+        paths = make_images(tmp_path / "photos", 3)
+        worker = make_worker([tmp_path / "photos"], copy_files=False)
+        worker.run()
+
+        with worker.database.session_factory() as session:
+            stored = set(session.scalars(select(Product.file_path)))
+        assert stored == {str(path) for path in paths}
+        assert not (tmp_path / "store" / "products").exists()
+
+    def test_reports_loading_and_progress(self, make_worker, tmp_path):
+        """Test that loading signals bracket the run and progress is reported."""
+        make_images(tmp_path / "photos", 5)
+        events = []
+        worker = make_worker([tmp_path / "photos"])
+        ui = worker.signal_bus.ui
+        ui.loading_started.connect(lambda name: events.append("started"))
+        ui.loading_finished.connect(lambda: events.append("finished"))
+        worker.signal_bus.domain.import_progress.connect(events.append)
+
+        worker.run()
+
+        assert events[0] == "started"
+        assert events[-1] == "finished"
+        final = events[-2]
+        assert final["finished"] and not final["cancelled"]
+        assert final["processed"] == final["imported"] == 5
+        assert final["files_per_minute"] > 0
+
+    def test_cancel_stops_and_cleans_up(self, make_worker, database, tmp_path):
+        """Test that cancelling keeps committed work and leaves no temp files."""
+        make_images(tmp_path / "photos", 200)
+        worker = make_worker([tmp_path / "photos"], batch_size=10, progress_interval=0)
+
+        def cancel_after_first_files(stats):
+            if stats["processed"] >= 10:
+                worker.signal_bus.ui.request_cancel.emit(worker.import_id)
+
+        worker.signal_bus.domain.import_progress.connect(cancel_after_first_files)
+        worker.run()
+
+        assert worker.stats.cancelled
+        assert 0 < worker.stats.imported < 200
+        assert product_count(database) == worker.stats.imported
+        assert list((tmp_path / "store" / "temp").iterdir()) == []
+
+    def test_process_pool(self, database, tmp_path, project):
+        """Test the default spawn process pool end to end."""
+        make_images(tmp_path / "photos", 6)
+        worker = ImportWorker(
+            database,
+            [tmp_path / "photos"],
+            project_id=project,
+            max_workers=2,
+            products_root=tmp_path / "products",
+            temp_root=tmp_path / "temp",
+        )
+        worker.run()
+        assert worker.stats.imported == 6